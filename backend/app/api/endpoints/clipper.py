@@ -234,7 +234,9 @@ async def delete_twitch_target(target_id: int, db: Session = Depends(get_db)):
         if job_ids:
             # Free pending approvals
             db.query(PendingApproval).filter(PendingApproval.clip_job_id.in_(job_ids)).delete(synchronize_session=False)
-            db.query(ClipJob).filter(ClipJob.target_id == target_id).delete(synchronize_session=False)
+            # Bulk delete nao dispara o listener: libera as URLs do indice junto
+            from core.clipper.clip_index import delete_jobs
+            delete_jobs(db, job_ids)
         
         db.delete(target)
         db.commit()
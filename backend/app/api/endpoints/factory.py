@@ -13,17 +13,22 @@ Consome a tabela `pending_approvals` e orquestra:
 import os
 import re
 import json
+import hashlib
 import logging
 import random
 from datetime import datetime, timedelta
 from typing import List, Optional
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from core.database import get_db
+from core.database import get_async_db, get_db
 from core.models import PendingApproval, Profile, Army, army_profiles
 
 logger = logging.getLogger("FactoryAPI")
@@ -116,88 +121,171 @@ def _get_available_profiles_for_item(_item: PendingApproval, db: Session) -> Lis
 
 # ─── GET /pending ────────────────────────────────────────────────────────
 
+PENDING_PAGE_SIZE = 50
+PENDING_MAX_PAGE_SIZE = 200
+
+
+def _encode_pending_cursor(created_at: datetime, item_id: int) -> str:
+    return f"{created_at.isoformat()}|{item_id}"
+
+
+def _decode_pending_cursor(cursor: str):
+    try:
+        created_at, item_id = cursor.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor invalido")
+
+
+def _clip_details(clip_urls, clip_metadata) -> Optional[List[ClipDetail]]:
+    """Detalhes individuais dos clips para o reordering UI."""
+    clip_count = len(clip_urls) if clip_urls else 0
+    if clip_count == 0:
+        return None
+    metadata_list = clip_metadata or []
+    clips_detail = []
+    for i in range(clip_count):
+        meta = metadata_list[i] if i < len(metadata_list) else {}
+        clips_detail.append(ClipDetail(
+            index=i,
+            title=meta.get("title"),
+            duration=meta.get("duration"),
+            views=meta.get("views") or meta.get("view_count"),
+            creator=meta.get("creator") or meta.get("creator_name"),
+            broadcaster=meta.get("broadcaster_name"),
+            game=meta.get("game") or meta.get("game_name"),
+        ))
+    return clips_detail
+
+
 @router.get("/pending", response_model=List[PendingItemResponse])
-def list_pending(db: Session = Depends(get_db)):
+def list_pending(
+    request: Request,
+    limit: int = Query(PENDING_PAGE_SIZE, ge=1, le=PENDING_MAX_PAGE_SIZE),
+    before: Optional[str] = Query(None, description="Cursor X-Next-Cursor da pagina anterior"),
+    db: Session = Depends(get_db),
+):
     """
-    Lista todos os vídeos pendentes de curadoria.
+    Lista os vídeos pendentes de curadoria.
     Ordenados do mais recente para o mais antigo.
     Inclui army_id e profiles disponiveis para selecao no frontend.
+
+    Uma query só (PendingApproval + ClipJob + TwitchTarget), carregando apenas
+    as colunas usadas — o transcript vem de ClipJob.transcript_text, nunca do
+    whisper_result word-level. Paginação por cursor (header X-Next-Cursor) e
+    ETag: se nada mudou, o polling recebe 304.
     """
-    items = (
-        db.query(PendingApproval)
+    from core.clipper.models import ClipJob, TwitchTarget
+
+    query = (
+        db.query(
+            PendingApproval.id,
+            PendingApproval.clip_job_id,
+            PendingApproval.video_path,
+            PendingApproval.thumbnail_path,
+            PendingApproval.streamer_name,
+            PendingApproval.title,
+            PendingApproval.duration_seconds,
+            PendingApproval.file_size_bytes,
+            PendingApproval.caption,
+            PendingApproval.hashtags,
+            PendingApproval.caption_generated,
+            PendingApproval.status,
+            PendingApproval.created_at,
+            ClipJob.transcript_text,
+            ClipJob.clip_urls,
+            ClipJob.clip_metadata,
+            TwitchTarget.army_id,
+            TwitchTarget.channel_name,
+        )
+        .outerjoin(ClipJob, ClipJob.id == PendingApproval.clip_job_id)
+        .outerjoin(TwitchTarget, TwitchTarget.id == ClipJob.target_id)
         .filter(PendingApproval.status == "pending")
-        .order_by(PendingApproval.created_at.desc())
-        .limit(50)
+    )
+    if before:
+        cursor_created_at, cursor_id = _decode_pending_cursor(before)
+        query = query.filter(or_(
+            PendingApproval.created_at < cursor_created_at,
+            and_(PendingApproval.created_at == cursor_created_at, PendingApproval.id < cursor_id),
+        ))
+    rows = (
+        query.order_by(PendingApproval.created_at.desc(), PendingApproval.id.desc())
+        .limit(limit + 1)
         .all()
     )
 
-    available_profiles = _get_available_profiles_for_item(None, db) if items else []
-
-    results = []
-    for item in items:
-        # Resolver army_id e target_name via ClipJob → TwitchTarget
-        target_army_id = None
-        target_name = None
-        if item.clip_job_id:
-            from core.clipper.models import ClipJob, TwitchTarget
-            job = db.query(ClipJob).filter(ClipJob.id == item.clip_job_id).first()
-            if job and job.target_id:
-                target = db.query(TwitchTarget).filter(TwitchTarget.id == job.target_id).first()
-                if target:
-                    target_army_id = target.army_id
-                    target_name = target.channel_name
-
-        # Extrair transcript do ClipJob.whisper_result para uso na geração de caption
-        transcript_text = None
-        if item.clip_job_id:
-            job_for_transcript = db.query(ClipJob).filter(ClipJob.id == item.clip_job_id).first() if not job else job
-            if job_for_transcript and job_for_transcript.whisper_result:
-                # whisper_result é uma lista de dicts, cada um com "text"
-                transcript_parts = [
-                    t.get("text", "") for t in (job_for_transcript.whisper_result or []) if t.get("text")
-                ]
-                transcript_text = " ".join(transcript_parts) if transcript_parts else None
-
-        # Extrair detalhes individuais dos clips para reordering UI
-        clips_detail = None
-        if item.clip_job_id and job:
-            metadata_list = job.clip_metadata or []
-            clip_count = len(job.clip_urls) if job.clip_urls else 0
-            if clip_count > 0:
-                clips_detail = []
-                for i in range(clip_count):
-                    meta = metadata_list[i] if i < len(metadata_list) else {}
-                    clips_detail.append(ClipDetail(
-                        index=i,
-                        title=meta.get("title"),
-                        duration=meta.get("duration"),
-                        views=meta.get("views") or meta.get("view_count"),
-                        creator=meta.get("creator") or meta.get("creator_name"),
-                        broadcaster=meta.get("broadcaster_name"),
-                        game=meta.get("game") or meta.get("game_name"),
-                    ))
-
-        results.append(PendingItemResponse(
-            id=item.id,
-            clip_job_id=item.clip_job_id,
-            video_path=item.video_path,
-            thumbnail_path=item.thumbnail_path,
-            streamer_name=item.streamer_name,
-            title=item.title,
-            duration_seconds=item.duration_seconds,
-            file_size_bytes=item.file_size_bytes,
-            caption=item.caption,
-            hashtags=item.hashtags or [],
-            caption_generated=item.caption_generated or False,
-            transcript=transcript_text,
-            status=item.status,
-            created_at=item.created_at,
-            target_army_id=target_army_id,
-            target_name=target_name,
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_pending_cursor(rows[-1].created_at, rows[-1].id)
+
+    available_profiles = _get_available_profiles_for_item(None, db) if rows else []
+
+    results = [
+        PendingItemResponse(
+            id=row.id,
+            clip_job_id=row.clip_job_id,
+            video_path=row.video_path,
+            thumbnail_path=row.thumbnail_path,
+            streamer_name=row.streamer_name,
+            title=row.title,
+            duration_seconds=row.duration_seconds,
+            file_size_bytes=row.file_size_bytes,
+            caption=row.caption,
+            hashtags=row.hashtags or [],
+            caption_generated=row.caption_generated or False,
+            transcript=row.transcript_text,
+            status=row.status,
+            created_at=row.created_at,
+            target_army_id=row.army_id,
+            target_name=row.channel_name,
             available_profiles=available_profiles,
-            clips=clips_detail,
-        ))
-    return results
+            clips=_clip_details(row.clip_urls, row.clip_metadata) if row.clip_job_id else None,
+        )
+        for row in rows
+    ]
+
+    body = json.dumps(jsonable_encoder(results), separators=(",", ":")).encode("utf-8")
+    etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# ─── GET /preview/{id}/{arquivo} — proxies leves da curadoria ───────────
+
+@router.get("/preview/{item_id}/{name}")
+async def get_preview(item_id: int, name: str, request: Request):
+    """
+    Poster, sprite + WebVTT e MP4 ~480p gerados pelo Clipper (core/clipper/preview.py).
+    Arquivos: poster.jpg, sprite.jpg, sprite.vtt, preview.mp4. Sem consulta ao banco.
+    """
+    from core.clipper.preview import PREVIEW_FILES, preview_file
+    from app.api.video_stream import (
+        CACHE_CONTROL, VideoFileResponse, is_not_modified, not_modified_response, strong_etag,
+    )
+
+    path = preview_file(item_id, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Preview não disponível")
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Preview não disponível")
+
+    etag = strong_etag(st)
+    if is_not_modified(request.headers, etag, st.st_mtime):
+        return not_modified_response(etag, st.st_mtime)
+    if name == "preview.mp4":
+        return VideoFileResponse(path, stat_result=st)
+    return FileResponse(
+        path, media_type=PREVIEW_FILES[name], stat_result=st,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
 
 
 # ─── POST /approve/{id} — SYN-78: Smart Queue Pipeline ──────────────────
@@ -240,7 +328,7 @@ async def approve_item(
         raise HTTPException(status_code=400, detail=f"Arquivo não encontrado: {item.video_path}")
 
     try:
-        from core.auto_scheduler import create_queue, schedule_next_batch
+        from core.auto_scheduler import create_queue, schedule_next_batch, preload_slot_allocator
         from zoneinfo import ZoneInfo
 
         SP_TZ = ZoneInfo("America/Sao_Paulo")
@@ -282,6 +370,12 @@ async def approve_item(
         results = []
         overall_scheduled_time = None
 
+        # Modo smart: ocupacao de todos os perfis carregada uma vez (2 queries)
+        slot_allocator = (
+            preload_slot_allocator(profile_slugs, schedule_hours, db)
+            if body.schedule_mode not in ("specific", "now") else None
+        )
+
         for i, p in enumerate(profiles):
             # Resolver path e caption únicos para este perfil
             v = variant_map.get(p.slug, {})
@@ -367,6 +461,7 @@ async def approve_item(
                     profile_slug=p.slug,
                     batch_size=1,
                     db=db,
+                    allocator=slot_allocator,
                 )
 
             if not p_scheduled_time and queue_items and hasattr(queue_items[0], 'scheduled_at') and queue_items[0].scheduled_at:
@@ -957,18 +1052,18 @@ class ReorderRequest(BaseModel):
     order: List[int]  # Nova ordem dos clips via indices [2, 0, 1]
 
 @router.post("/reorder/{item_id}")
-async def reorder_item(item_id: int, body: ReorderRequest, db: Session = Depends(get_db)):
+async def reorder_item(item_id: int, body: ReorderRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Reordena os clipes de um job pendente e re-agenda o processamento.
     Aceita uma lista de indices representando a nova ordem desejada.
     Ex: [2, 0, 1] = clip 2 primeiro, clip 0 segundo, clip 1 terceiro.
     """
-    item = db.query(PendingApproval).filter(PendingApproval.id == item_id).first()
+    item = await db.get(PendingApproval, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item não encontrado")
 
     from core.clipper.models import ClipJob
-    job = db.query(ClipJob).filter(ClipJob.id == item.clip_job_id).first()
+    job = await db.get(ClipJob, item.clip_job_id)
 
     if not job:
         raise HTTPException(status_code=404, detail="Job associado não encontrado")
@@ -1019,8 +1114,8 @@ async def reorder_item(item_id: int, body: ReorderRequest, db: Session = Depends
             logger.warning(f"Falha ao remover arquivo antigo do job #{job.id}: {e}")
 
     # Remover o registro do PendingApproval, pois ele não é mais válido
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
 
     # Re-enfileirar o job no ARQ
     from core.queue_manager import QueueManager
@@ -1042,18 +1137,18 @@ class ReprocessRequest(BaseModel):
 
 
 @router.post("/reprocess/{item_id}")
-async def reprocess_item(item_id: int, req: Optional[ReprocessRequest] = None, db: Session = Depends(get_db)):
+async def reprocess_item(item_id: int, req: Optional[ReprocessRequest] = None, db: AsyncSession = Depends(get_async_db)):
     """
     Reprocessa um vídeo inteiro: reseta o job para pending e re-enfileira.
     Opcionalmente recebe overrides de layout por clipe.
     O vídeo antigo é removido e o PendingApproval é deletado.
     """
-    item = db.query(PendingApproval).filter(PendingApproval.id == item_id).first()
+    item = await db.get(PendingApproval, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item não encontrado")
 
     from core.clipper.models import ClipJob
-    job = db.query(ClipJob).filter(ClipJob.id == item.clip_job_id).first()
+    job = await db.get(ClipJob, item.clip_job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job associado não encontrado")
 
@@ -1081,8 +1176,8 @@ async def reprocess_item(item_id: int, req: Optional[ReprocessRequest] = None, d
         flag_modified(job, "layout_mode_overrides")
 
     # Deletar PendingApproval
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
 
     # Re-enfileirar no Redis
     from core.queue_manager import QueueManager
@@ -1105,17 +1200,17 @@ class RemoveClipRequest(BaseModel):
 
 
 @router.post("/remove-clip/{item_id}")
-async def remove_clip_and_reprocess(item_id: int, body: RemoveClipRequest, db: Session = Depends(get_db)):
+async def remove_clip_and_reprocess(item_id: int, body: RemoveClipRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Remove um clip específico de um job e reprocessa o vídeo sem ele.
     Útil quando um clip tem problema de áudio ou qualidade.
     """
-    item = db.query(PendingApproval).filter(PendingApproval.id == item_id).first()
+    item = await db.get(PendingApproval, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Item não encontrado")
 
     from core.clipper.models import ClipJob
-    job = db.query(ClipJob).filter(ClipJob.id == item.clip_job_id).first()
+    job = await db.get(ClipJob, item.clip_job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job associado não encontrado")
 
@@ -1155,8 +1250,8 @@ async def remove_clip_and_reprocess(item_id: int, body: RemoveClipRequest, db: S
     job.output_path = None
     job.error_message = None
 
-    db.delete(item)
-    db.commit()
+    await db.delete(item)
+    await db.commit()
 
     # Re-enfileirar
     from core.queue_manager import QueueManager
@@ -5,9 +5,11 @@ import os
 import json
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
+from core.log_index import parse_cursor
 from core.logger import logger
 
 router = APIRouter()
@@ -18,11 +20,17 @@ class LogEntry(BaseModel):
     level: str
     message: str
     source: str
+    full_timestamp: Optional[str] = None
+    job_id: Optional[str] = None
 
 class LogsResponse(BaseModel):
     logs: List[LogEntry]
     total: int
 
+class LogSearchResponse(BaseModel):
+    logs: List[LogEntry]
+    next_cursor: Optional[str] = None
+
 @router.get("/", response_model=LogsResponse)
 async def get_logs(
     level: Optional[str] = Query(None, description="Filter by log level"),
@@ -39,6 +47,32 @@ async def get_logs(
         total=len(logs)
     )
 
+@router.get("/search", response_model=LogSearchResponse)
+async def search_logs(
+    level: Optional[str] = Query(None, description="Filter by log level"),
+    source: Optional[str] = Query(None, description="Filter by source"),
+    job_id: Optional[str] = Query(None, description="Filter by job id"),
+    q: Optional[str] = Query(None, description="Full-text search on the message"),
+    since: Optional[str] = Query(None, description="ISO timestamp (inclusive)"),
+    until: Optional[str] = Query(None, description="ISO timestamp (inclusive)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=1000, description="Page size"),
+):
+    """
+    Search the full log history (on-disk index), newest first.
+    """
+    if cursor:
+        try:
+            parse_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    result = await run_in_threadpool(
+        logger.search,
+        level=level, source=source, job_id=job_id, text=q,
+        since=since, until=until, cursor=cursor, limit=limit,
+    )
+    return LogSearchResponse(**result)
+
 @router.post("/add")
 async def create_log(level: str, message: str, source: str = "api"):
     """
@@ -12,6 +12,8 @@ from datetime import datetime
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from pydantic import BaseModel
 
+from core.file_catalog import file_catalog
+
 from .. import websocket
 
 router = APIRouter()
@@ -45,53 +47,36 @@ class ApprovalRequest(BaseModel):
     caption: Optional[str] = None  # Feature: Edit caption during approval
 
 
+def _is_pending_entry(entry) -> bool:
+    # [FIX] Some files have full Windows paths as their literal filename
+    # e.g. "D:\\APPS...\\data\\approved\\file.mp4" — skip those that belong to other dirs
+    return 'approved' not in entry.name and 'exports' not in entry.name
+
+
 @router.get("/pending", response_model=List[PendingVideo])
 async def get_pending_videos():
     """
     List all pending videos awaiting manual approval.
+    Served from the file catalog (kept current by the factory watcher),
+    oldest first.
     """
-    pending_videos = []
-    
     try:
-        if not os.path.exists(PENDING_DIR):
-            return []
-        
-        # List all video files in pending
-        for raw_filename in os.listdir(PENDING_DIR):
-            if not raw_filename.endswith('.mp4'):
-                continue
-            
-            # [FIX] Some files have full Windows paths as their literal filename
-            # e.g. "D:\\APPS...\\data\\approved\\file.mp4" — skip those that belong to other dirs
-            if 'approved' in raw_filename or 'exports' in raw_filename:
-                continue
-            
-            # Use ntpath.basename to handle Windows-style paths on Linux
-            clean_filename = ntpath.basename(raw_filename)
-            
-            # Extract ID from filename (format: profile_id.mp4)
-            file_id = os.path.splitext(clean_filename)[0]
-            
-            # Load metadata if exists (try both raw and clean filenames)
-            metadata = {}
-            for meta_candidate in [f"{raw_filename}.json", f"{clean_filename}.json"]:
-                metadata_path = os.path.join(PENDING_DIR, meta_candidate)
-                if os.path.exists(metadata_path):
-                    with open(metadata_path, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    break
-            
+        pending_videos = []
+        for entry in file_catalog["pending"].list(newest_first=False, predicate=_is_pending_entry):
+            # entry.clean_name: ntpath.basename handles Windows-style paths on Linux
+            # entry.metadata: sidecar JSON (raw or clean filename)
+            metadata = entry.metadata
             pending_videos.append(PendingVideo(
-                id=file_id,
-                filename=clean_filename,
+                id=entry.id,
+                filename=entry.clean_name,
                 profile=metadata.get('profile_id', 'unknown'),
                 uploaded_at=metadata.get('uploaded_at', ''),
                 status='pending',
                 metadata=metadata
             ))
-        
+
         return pending_videos
-    
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error listing pending videos: {str(e)}")
 
@@ -109,20 +94,16 @@ async def stream_pending_video(filename: str):
     if safe_filename != filename:
         raise HTTPException(status_code=400, detail="Invalid filename")
     
-    # Try direct match first
+    # Catalog lookup: exact name or basename (handles corrupted full-path filenames)
+    entry = file_catalog["pending"].find(safe_filename)
+    if entry is not None:
+        return FileResponse(entry.path, media_type="video/mp4", filename=safe_filename)
+
+    # File may have landed before the watcher event was processed
     direct_path = os.path.join(PENDING_DIR, safe_filename)
     if os.path.exists(direct_path):
         return FileResponse(direct_path, media_type="video/mp4", filename=safe_filename)
     
-    # Search for file with matching basename (handles corrupted full-path filenames)
-    for raw_filename in os.listdir(PENDING_DIR):
-        if not raw_filename.endswith('.mp4'):
-            continue
-        clean = ntpath.basename(raw_filename)
-        if clean == safe_filename:
-            full_path = os.path.join(PENDING_DIR, raw_filename)
-            return FileResponse(full_path, media_type="video/mp4", filename=safe_filename)
-    
     raise HTTPException(status_code=404, detail=f"Video {filename} not found")
 
 
@@ -183,6 +164,9 @@ async def approve_video(request: ApprovalRequest, background_tasks: BackgroundTa
         # Remove old metadata if exists
         if os.path.exists(pending_metadata):
             os.remove(pending_metadata)
+
+        # Don't wait for the watcher event: the queue below must not list it
+        file_catalog["pending"].refresh(video_filename)
         
         # Execution is now handled by the Queue Worker (core/queue_worker.py)
         # which monitors the 'approved' directory and processes sequentially.
@@ -232,6 +216,7 @@ async def reject_video(video_id: str):
             if filename.startswith(safe_video_id):
                 file_path = os.path.join(PENDING_DIR, filename)
                 os.remove(file_path)
+                file_catalog["pending"].refresh(filename)
                 deleted = True
         
         if not deleted:
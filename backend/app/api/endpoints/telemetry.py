@@ -1,9 +1,8 @@
-import os
 import psutil
 import time
 import json
 import asyncio
-from typing import Dict, Any, List
+from typing import Dict, Any
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
 router = APIRouter()
@@ -11,9 +10,6 @@ router = APIRouter()
 # Time anchor at module load
 START_TIME = time.time()
 
-# Path to the JSONL log file
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-LOG_FILE = os.path.join(BASE_DIR, "logs", "app.jsonl")
 
 
 def get_uptime_str(seconds: float) -> str:
@@ -58,88 +54,56 @@ async def get_vitals() -> Dict[str, Any]:
     }
 
 
-def read_last_lines(filepath: str, n: int = 50) -> List[str]:
-    """Read last N lines from a file efficiently."""
-    try:
-        with open(filepath, "rb") as f:
-            f.seek(0, 2)
-            end = f.tell()
-            lines: List[bytes] = []
-            pos = end
-            while pos > 0 and len(lines) < n + 1:
-                pos = max(pos - 4096, 0)
-                f.seek(pos)
-                chunk = f.read(min(4096, end - pos))
-                chunk_lines = chunk.split(b"\n")
-                if lines:
-                    chunk_lines[-1] += lines[0]
-                    lines = chunk_lines + lines[1:]
-                else:
-                    lines = chunk_lines
-            return [line.decode("utf-8", errors="replace") for line in lines[-n:] if line.strip()]
-    except FileNotFoundError:
-        return []
+@router.get("/browser-pool")
+async def get_browser_pool_stats() -> Dict[str, Any]:
+    """
+    Returns the warm headless browser pool metrics (Oracle scrapers):
+    leases in use/waiting, per-browser uses and age, launches, recycles,
+    crashes, expired leases and acquire timeouts.
+    """
+    from core.browser_pool import get_browser_pool
+    return get_browser_pool().stats()
 
 
 @router.websocket("/stream")
 async def log_stream(websocket: WebSocket):
     """
-    WebSocket endpoint that tails logs/app.jsonl in real-time.
-    On connect: sends last 30 log lines as backfill.
-    Then polls the file for new lines every 1s and pushes them.
+    WebSocket stream of logs/app.jsonl in real-time.
+    On connect: sends the last 30 entries, or everything after `?after=<cursor>`
+    when resuming. Then pushes new entries from the shared LogTail reader.
+    Optional server-side filters: `?level=error,warning&source=worker`.
     """
-    await websocket.accept()
+    from app.api.log_tail import TOPIC, log_tail, matches_filters, parse_filter
+    from app.api.ws_hub import hub
 
-    # Backfill: send last 30 lines
-    initial_lines = read_last_lines(LOG_FILE, 30)
-    for line in initial_lines:
-        try:
-            entry = json.loads(line)
-            await websocket.send_json({"type": "log_entry", "data": entry})
-        except (json.JSONDecodeError, Exception):
-            await websocket.send_json({
-                "type": "log_entry",
-                "data": {"level": "INFO", "message": line.strip(), "module": "System"}
-            })
-
-    # Seek to end of file for tailing
-    try:
-        f = open(LOG_FILE, "r", encoding="utf-8", errors="replace")
-        f.seek(0, 2)  # seek to end
-    except FileNotFoundError:
-        f = None
+    await websocket.accept()
+    levels = parse_filter(websocket.query_params.get("level"))
+    sources = parse_filter(websocket.query_params.get("source"))
+
+    log_tail.ensure_started()
+    await log_tail.wait_ready()
+
+    backlog = await log_tail.backfill(websocket.query_params.get("after"))
+    # Sem await entre o backfill e o connect: nenhuma entrada publicada se perde
+    conn = hub.connect(
+        websocket, {TOPIC},
+        message_filter=lambda entry: matches_filters(entry, levels, sources),
+    )
+    for entry in backlog:
+        if matches_filters(entry, levels, sources):
+            conn.offer(json.dumps({"type": "log_entry", "data": entry}))
+    writer = asyncio.create_task(conn.run())
 
     try:
-        while True:
-            try:
-                # Check for client messages (ping/pong keepalive)
-                try:
-                    msg = await asyncio.wait_for(websocket.receive_text(), timeout=1.0)
-                    if msg == "ping":
-                        await websocket.send_json({"type": "pong"})
-                except asyncio.TimeoutError:
-                    pass
-
-                # Read new lines from file
-                if f:
-                    new_lines = f.readlines()
-                    for line in new_lines:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        try:
-                            entry = json.loads(line)
-                            await websocket.send_json({"type": "log_entry", "data": entry})
-                        except json.JSONDecodeError:
-                            await websocket.send_json({
-                                "type": "log_entry",
-                                "data": {"level": "INFO", "message": line, "module": "System"}
-                            })
-
-            except WebSocketDisconnect:
-                break
-            except Exception:
-                break
+        while not conn.closed:
+            # Client messages (ping/pong keepalive)
+            msg = await websocket.receive_text()
+            if msg == "ping":
+                conn.offer(json.dumps({"type": "pong"}))
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        pass
     finally:
-        if f:
-            f.close()
+        hub.disconnect(conn)
+        writer.cancel()
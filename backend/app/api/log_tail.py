@@ -0,0 +1,276 @@
+"""
+Log Tail - leitor único de logs/app.jsonl para o stream de telemetria
+=====================================================================
+
+Antes, cada cliente de /api/v1/telemetry/stream abria o arquivo e fazia
+readlines() a cada segundo, parseando e re-serializando cada linha.
+
+Aqui existe UM leitor por processo: ele é acordado pelo JsonLogger a cada
+lote gravado (add_write_listener) e, como rede de segurança para linhas de
+outros processos, também faz poll a cada POLL_INTERVAL_SECONDS. Cada linha é
+parseada uma vez e publicada no hub (tópico "telemetry:logs"); o filtro de
+level/source de cada cliente é aplicado no publish.
+
+Cada entrada carrega um `cursor` ("<inode>:<offset>"). Um cliente que
+reconecta com ?after=<cursor> recebe o que perdeu (do buffer em memória ou,
+se preciso, do próprio arquivo) em vez do backfill padrão.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core.logger import LOG_FILE, logger as json_logger, read_tail_lines
+
+from .ws_hub import hub
+
+TOPIC = "telemetry:logs"
+POLL_INTERVAL_SECONDS = float(os.getenv("LOG_TAIL_POLL_SECONDS", "1"))
+RECENT_ENTRIES = 1000
+MAX_RESUME_LINES = 5000
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    try:
+        inode, offset = str(cursor).split(":", 1)
+        return int(inode), int(offset)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_line(line: str) -> Dict[str, Any]:
+    try:
+        entry = json.loads(line)
+        if isinstance(entry, dict):
+            return entry
+    except ValueError:
+        pass
+    return {"level": "INFO", "message": line.strip(), "module": "System"}
+
+
+class LogTail:
+    def __init__(self, file_path: str = LOG_FILE, poll_interval: float = POLL_INTERVAL_SECONDS):
+        self.file_path = file_path
+        self.poll_interval = poll_interval
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT_ENTRIES)
+        self._file = None
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._partial = b""
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listening = False
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._wake = asyncio.Event()
+        self._ready = asyncio.Event()
+        if not self._listening:
+            json_logger.add_write_listener(self._notify)
+            self._listening = True
+        self._task = loop.create_task(self._run())
+
+    def _notify(self) -> None:
+        """Chamado pela thread do JsonLogger."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass
+
+    async def stop(self) -> None:
+        """Shutdown da API: para o leitor e solta o listener do JsonLogger."""
+        if self._listening:
+            json_logger.remove_write_listener(self._notify)
+            self._listening = False
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        self._close()
+
+    async def wait_ready(self) -> None:
+        await self._ready.wait()
+
+    async def _run(self) -> None:
+        try:
+            self.recent.extend(await asyncio.to_thread(self._prime))
+        except Exception as e:
+            # Sem backfill, mas o stream segue a partir do fim do arquivo
+            logger.error(f"LogTail: falha ao ler o backfill de {self.file_path}: {e}")
+            await asyncio.to_thread(self._open, True)
+        finally:
+            # Clientes em wait_ready() nunca ficam presos
+            self._ready.set()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                entries = await asyncio.to_thread(self.read_new)
+            except Exception as e:
+                logger.error(f"LogTail: falha ao ler {self.file_path}: {e}")
+                continue
+            # `recent` so e alterado aqui, no event loop
+            self.recent.extend(entries)
+            for entry in entries:
+                hub.publish(TOPIC, "log_entry", entry)
+
+    # ------------------------------------------------------------------
+    # Leitura (roda em thread)
+    # ------------------------------------------------------------------
+
+    def _close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+    def _open(self, seek_end: bool) -> bool:
+        self._close()
+        try:
+            self._file = open(self.file_path, "rb")
+        except FileNotFoundError:
+            return False
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._offset = self._file.seek(0, os.SEEK_END) if seek_end else 0
+        self._partial = b""
+        return True
+
+    def _prime(self) -> List[Dict[str, Any]]:
+        """Ultimas linhas para o backfill; posiciona a leitura no fim do arquivo."""
+        if not self._open(seek_end=True):
+            return []
+        entries = []
+        # Cursor aproximado para o backfill: todas apontam para o fim atual
+        for line in read_tail_lines(self.file_path, 200):
+            entry = _parse_line(line)
+            entry["cursor"] = f"{self._inode}:{self._offset}"
+            entries.append(entry)
+        return entries
+
+    def _read_available(self) -> List[Dict[str, Any]]:
+        chunk = self._file.read()
+        if not chunk:
+            return []
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()  # linha ainda sendo escrita
+        entries = []
+        offset = self._offset
+        for raw in lines:
+            offset += len(raw) + 1
+            if not raw.strip():
+                continue
+            entry = _parse_line(raw.decode("utf-8", errors="replace"))
+            entry["cursor"] = f"{self._inode}:{offset}"
+            entries.append(entry)
+        self._offset = offset
+        return entries
+
+    def read_new(self) -> List[Dict[str, Any]]:
+        """Linhas novas desde a última leitura (trata rotação/truncamento)."""
+        if self._file is None and not self._open(seek_end=False):
+            return []
+        entries = self._read_available()
+
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            return entries
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # Rotacionado ou truncado: termina o antigo (ja lido) e comeca o novo
+            if self._open(seek_end=False):
+                entries.extend(self._read_available())
+        return entries
+
+    # ------------------------------------------------------------------
+    # Backfill / resume
+    # ------------------------------------------------------------------
+
+    async def backfill(self, after: Optional[str] = None, limit: int = 30) -> List[Dict[str, Any]]:
+        """
+        Sem cursor: as ultimas `limit` entradas. Com cursor: tudo depois dele,
+        do buffer em memoria ou, se o cursor for mais antigo, do arquivo.
+        """
+        position = parse_cursor(after)
+        if position is None:
+            return list(self.recent)[-limit:]
+        inode, offset = position
+
+        recent = list(self.recent)
+        for i in range(len(recent) - 1, -1, -1):
+            seen = parse_cursor(recent[i].get("cursor"))
+            if seen and seen[0] == inode and seen[1] <= offset:
+                return recent[i + 1:]
+        if inode == self._inode:
+            end = self._offset
+            entries = await asyncio.to_thread(self._read_range, inode, offset, end)
+            # O que o leitor publicou enquanto o arquivo era lido
+            for entry in list(self.recent):
+                seen = parse_cursor(entry.get("cursor"))
+                if seen and seen[0] == inode and seen[1] > end:
+                    entries.append(entry)
+            return entries
+        # Cursor de um arquivo que ja saiu do buffer: nada melhor que o backfill
+        return recent[-limit:]
+
+    def _read_range(self, inode: int, offset: int, end: int) -> List[Dict[str, Any]]:
+        entries: List[Dict[str, Any]] = []
+        try:
+            with open(self.file_path, "rb") as f:
+                if os.fstat(f.fileno()).st_ino != inode:
+                    return []
+                f.seek(offset)
+                position = offset
+                while position < end and len(entries) < MAX_RESUME_LINES:
+                    raw = f.readline()
+                    if not raw.endswith(b"\n"):
+                        break
+                    position += len(raw)
+                    if raw.strip():
+                        entry = _parse_line(raw.decode("utf-8", errors="replace"))
+                        entry["cursor"] = f"{inode}:{position}"
+                        entries.append(entry)
+        except FileNotFoundError:
+            return []
+        return entries
+
+
+def matches_filters(entry: Dict[str, Any], levels: Optional[set], sources: Optional[set]) -> bool:
+    if levels and str(entry.get("level", "")).lower() not in levels:
+        return False
+    if sources and str(entry.get("source", "")).lower() not in sources:
+        return False
+    return True
+
+
+def parse_filter(raw: Optional[str]) -> Optional[set]:
+    values = {v.strip().lower() for v in (raw or "").split(",") if v.strip()}
+    return values or None
+
+
+log_tail = LogTail()
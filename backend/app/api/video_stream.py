@@ -0,0 +1,157 @@
+"""
+Video Stream - entrega de vídeos com Range, validação condicional e zero-copy
+============================================================================
+
+O stream antigo lia o arquivo em um gerador Python de 64KB por request de
+Range: cada scrub de um revisor num export de 100MB virava centenas de
+iterações no event loop.
+
+Aqui:
+    - VideoFileResponse (FileResponse do Starlette) já trata Range simples,
+      multi-range (multipart/byteranges) e If-Range. Quando o servidor ASGI
+      oferece a extensão "http.response.zerocopysend", o corpo vai por
+      sendfile (fd + offset + count) sem passar pelo Python; "pathsend" é
+      usado para o arquivo inteiro. Sem extensão, leitura em blocos de
+      VIDEO_STREAM_CHUNK_BYTES (1MB por padrão).
+    - ETag forte (inode-size-mtime_ns) e Last-Modified: If-None-Match /
+      If-Modified-Since respondem 304 sem abrir o arquivo.
+    - Atrás do nginx, com VIDEO_ACCEL_REDIRECT_PREFIX definido, a resposta é
+      só um X-Accel-Redirect para uma location `internal` — o nginx faz
+      sendfile e Range. Ex.:
+
+          location /_protected_videos/exports/ { internal; alias /app/backend/data/exports/; }
+          location /_protected_videos/pending/ { internal; alias /app/backend/data/pending/; }
+          location /_protected_videos/done/    { internal; alias /app/backend/done/; }
+
+O zero-copy sobrescreve FileResponse._handle_simple/_handle_single_range
+(privados; assinaturas do Starlette >= 0.47, fixado no requirements.txt).
+Se uma versao futura mudar essas assinaturas, a classe cai para o
+FileResponse puro em vez de quebrar a entrega.
+"""
+
+import inspect
+import logging
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Mapping, Optional
+from urllib.parse import quote
+
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+STREAM_CHUNK_BYTES = int(os.getenv("VIDEO_STREAM_CHUNK_BYTES", str(1024 * 1024)))
+ACCEL_REDIRECT_PREFIX = os.getenv("VIDEO_ACCEL_REDIRECT_PREFIX", "")
+CACHE_CONTROL = "public, max-age=3600"
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+logger = logging.getLogger(__name__)
+
+# Assinaturas dos metodos privados do FileResponse que sobrescrevemos
+_EXPECTED_HOOKS = {
+    "_handle_simple": ["self", "send", "send_header_only", "send_pathsend"],
+    "_handle_single_range": ["self", "send", "start", "end", "file_size", "send_header_only"],
+}
+
+
+def _file_response_hooks_match() -> bool:
+    for name, params in _EXPECTED_HOOKS.items():
+        method = getattr(FileResponse, name, None)
+        if method is None or list(inspect.signature(method).parameters) != params:
+            return False
+    return True
+
+
+def strong_etag(st: os.stat_result) -> str:
+    return f'"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+
+def is_not_modified(headers: Mapping[str, str], etag: str, mtime: float) -> bool:
+    """If-None-Match tem precedência; If-Modified-Since só vale sem ele (RFC 9110)."""
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.split(",")]
+        # Comparação fraca: W/"x" casa com "x"
+        return "*" in tags or any(t.removeprefix("W/") == etag for t in tags)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+def not_modified_response(etag: str, mtime: float) -> Response:
+    return Response(status_code=304, headers={
+        "ETag": etag,
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+    })
+
+
+def accel_redirect_response(directory_key: str, filename: str, etag: str, mtime: float) -> Response:
+    """Entrega delegada ao nginx (location interna por diretório)."""
+    prefix = ACCEL_REDIRECT_PREFIX.rstrip("/")
+    return Response(media_type="video/mp4", headers={
+        "X-Accel-Redirect": f"{prefix}/{directory_key}/{quote(filename)}",
+        "ETag": etag,
+        "Last-Modified": formatdate(mtime, usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+    })
+
+
+class _ZeroCopyFileResponse(FileResponse):
+    """Corpo via zerocopysend (sendfile) quando o servidor ASGI oferece a extensão."""
+
+    _zerocopy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self._zerocopy = scope["type"] == "http" and ZEROCOPY_EXTENSION in scope.get("extensions", {})
+        await super().__call__(scope, receive, send)
+
+    async def _zerocopy_send(self, send: Send, offset: int, count: int) -> None:
+        with open(self.path, "rb") as f:
+            await send({
+                "type": ZEROCOPY_EXTENSION,
+                "file": f,
+                "offset": offset,
+                "count": count,
+                "more_body": False,
+            })
+
+    async def _handle_simple(self, send: Send, send_header_only: bool, send_pathsend: bool) -> None:
+        if not (self._zerocopy and not send_header_only and not send_pathsend):
+            return await super()._handle_simple(send, send_header_only, send_pathsend)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        await self._zerocopy_send(send, 0, self.stat_result.st_size)
+
+    async def _handle_single_range(
+        self, send: Send, start: int, end: int, file_size: int, send_header_only: bool
+    ) -> None:
+        if not self._zerocopy or send_header_only:
+            return await super()._handle_single_range(send, start, end, file_size, send_header_only)
+        headers = [
+            (k, v) for k, v in self.raw_headers if k not in (b"content-range", b"content-length")
+        ]
+        headers.append((b"content-range", f"bytes {start}-{end - 1}/{file_size}".encode("latin-1")))
+        headers.append((b"content-length", str(end - start).encode("latin-1")))
+        await send({"type": "http.response.start", "status": 206, "headers": headers})
+        await self._zerocopy_send(send, start, end - start)
+
+
+ZEROCOPY_SUPPORTED = _file_response_hooks_match()
+if not ZEROCOPY_SUPPORTED:
+    logger.warning("Starlette FileResponse mudou os hooks de envio; zero-copy desativado (veja requirements.txt).")
+
+
+class VideoFileResponse(_ZeroCopyFileResponse if ZEROCOPY_SUPPORTED else FileResponse):
+    """FileResponse com ETag forte, blocos maiores e zero-copy quando disponível."""
+
+    chunk_size = STREAM_CHUNK_BYTES
+
+    def __init__(self, path: str, stat_result: os.stat_result, headers: Optional[Mapping[str, str]] = None):
+        merged = {"ETag": strong_etag(stat_result), "Cache-Control": CACHE_CONTROL, **(headers or {})}
+        super().__init__(path, media_type="video/mp4", headers=merged, stat_result=stat_result)
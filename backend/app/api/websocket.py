@@ -1,75 +1,97 @@
 """
 WebSocket endpoint para atualizações em tempo real
+
+Clientes escolhem tópicos via query string (`/ws/updates?topics=logs,pipeline`)
+ou mensagens {"action": "subscribe" | "unsubscribe", "topics": [...]}.
+Sem tópicos, recebem tudo. Entrega e backpressure ficam no hub (ws_hub.py).
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
 import asyncio
 import json
 
+from .ws_hub import hub, parse_topics
+
 router = APIRouter()
 
-# Lista de conexões ativas
-active_connections: List[WebSocket] = []
+# Tópico de cada tipo de evento
+EVENT_TOPICS = {
+    "pipeline_update": "pipeline",
+    "log_entry": "logs",
+    "profile_change": "profile",
+    "schedule_update": "schedule",
+    "queue_update": "queue",
+}
+
 
+async def broadcast(event_type: str, data: dict, topic: str = None, coalesce: bool = False):
+    """Publica para os clientes inscritos (não espera o envio)"""
+    hub.publish(topic or EVENT_TOPICS.get(event_type, event_type), event_type, data, coalesce=coalesce)
 
-async def broadcast(event_type: str, data: dict):
-    """Envia mensagem para todos os clientes conectados"""
-    message = json.dumps({"type": event_type, "data": data})
-    disconnected = []
-    
-    for connection in active_connections:
-        try:
-            await connection.send_text(message)
-        except Exception:
-            disconnected.append(connection)
-    
-    # Remove conexões mortas
-    for conn in disconnected:
-        if conn in active_connections:
-            active_connections.remove(conn)
+
+def _handle_client_message(conn, raw: str) -> bool:
+    """Processa subscribe/unsubscribe. Retorna False se não for um comando."""
+    try:
+        msg = json.loads(raw)
+    except ValueError:
+        return False
+    if not isinstance(msg, dict):
+        return False
+    topics = msg.get("topics") or []
+    if isinstance(topics, str):
+        topics = [topics]
+    if msg.get("action") == "subscribe":
+        conn.subscribe(topics)
+    elif msg.get("action") == "unsubscribe":
+        conn.unsubscribe(topics)
+    else:
+        return False
+    conn.offer(json.dumps({"type": "subscribed", "data": {"topics": sorted(conn.topics)}}))
+    return True
 
 
 @router.websocket("/ws/updates")
 async def websocket_endpoint(websocket: WebSocket):
     """Endpoint WebSocket para atualizações em tempo real"""
     await websocket.accept()
-    active_connections.append(websocket)
-    
+    conn = hub.connect(websocket, parse_topics(websocket.query_params.get("topics")))
+    writer = asyncio.create_task(conn.run())
+
     try:
         # Envia confirmação de conexão
-        await websocket.send_text(json.dumps({
+        conn.offer(json.dumps({
             "type": "connected",
-            "data": {"message": "WebSocket conectado com sucesso"}
+            "data": {"message": "WebSocket conectado com sucesso", "topics": sorted(conn.topics)}
         }))
-        
+
         # Mantém conexão aberta
-        while True:
+        while not conn.closed:
             try:
-                # Aguarda mensagens do cliente (heartbeat, etc)
+                # Aguarda mensagens do cliente (heartbeat, subscribe, etc)
                 data = await asyncio.wait_for(websocket.receive_text(), timeout=30)
-                
+
                 # Responde ping com pong
                 if data == "ping":
-                    await websocket.send_text(json.dumps({"type": "pong"}))
-                    
+                    conn.offer(json.dumps({"type": "pong"}))
+                else:
+                    _handle_client_message(conn, data)
+
             except asyncio.TimeoutError:
                 # Envia ping para manter conexão viva
-                try:
-                    await websocket.send_text(json.dumps({"type": "ping"}))
-                except Exception:
-                    break
-                    
+                conn.offer(json.dumps({"type": "ping"}))
+
     except WebSocketDisconnect:
         pass
+    except RuntimeError:
+        pass  # conexão fechada pelo writer (consumidor lento)
     finally:
-        if websocket in active_connections:
-            active_connections.remove(websocket)
+        hub.disconnect(conn)
+        writer.cancel()
 
 
 # Funções helper para outros módulos enviarem updates
 async def notify_pipeline_update(status: dict):
     """Notifica mudança no status do pipeline"""
-    await broadcast("pipeline_update", status)
+    await broadcast("pipeline_update", status, coalesce=True)
 
 
 async def notify_new_log(log_entry: dict):
@@ -79,14 +101,20 @@ async def notify_new_log(log_entry: dict):
 
 async def notify_profile_change(profile: dict):
     """Notifica mudança em perfil"""
-    await broadcast("profile_change", profile)
+    slug = profile.get("slug") or profile.get("id")
+    await broadcast("profile_change", profile, topic=f"profile:{slug}" if slug else "profile")
 
 
 async def notify_schedule_update(schedule: list):
     """Notifica atualização na agenda"""
-    await broadcast("schedule_update", schedule)
+    await broadcast("schedule_update", schedule, coalesce=True)
 
 
 async def notify_queue_update(queue: list):
     """Notifica atualização na fila"""
-    await broadcast("queue_update", queue)
+    await broadcast("queue_update", queue, coalesce=True)
+
+
+async def notify_clipper_job(job_id: int, data: dict):
+    """Notifica progresso de um ClipJob (tópico clipper:job:<id>)"""
+    await broadcast("clipper_job", {"job_id": job_id, **data}, topic=f"clipper:job:{job_id}", coalesce=True)
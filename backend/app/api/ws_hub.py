@@ -0,0 +1,176 @@
+"""
+Hub de WebSocket com tópicos e backpressure
+===========================================
+
+O broadcast antigo fazia `await send_text` para cada conexão em série: um
+navegador lento atrasava todos os outros clientes e quem publicou (callbacks
+do logger, status do pipeline).
+
+Aqui cada conexão tem uma fila limitada e uma task escritora própria.
+`publish` é síncrono: serializa a mensagem uma vez, entrega nas filas das
+conexões inscritas no tópico e retorna sem aguardar I/O.
+
+Tópicos são hierárquicos com ":" — inscrever em "clipper" recebe
+"clipper:job:12"; "profile" recebe "profile:<slug>". "*" recebe tudo
+(padrão para clientes que não escolhem tópicos), menos o namespace
+"telemetry": o LogTail republica ali as linhas que já saem como "logs",
+então só quem assina o tópico explicitamente recebe.
+
+Consumidor lento:
+    - Mensagens com coalesce_key (status do pipeline, filas) ficam só a
+      última versão pendente — são snapshots completos, a mais nova basta.
+    - Demais mensagens: fila cheia descarta a mais antiga e o cliente recebe
+      um aviso {"type": "overflow"} antes da próxima mensagem.
+    - Um send que passa de SEND_TIMEOUT_SECONDS derruba a conexão.
+
+Deve ser usado a partir do event loop (use run_coroutine_threadsafe de
+outras threads, como o logger já faz).
+"""
+
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+MAX_PENDING_MESSAGES = int(os.getenv("WS_MAX_PENDING_MESSAGES", "256"))
+SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "5"))
+
+ALL_TOPICS = "*"
+# Fora do "*": precisam ser assinados pelo nome
+EXPLICIT_NAMESPACES = ("telemetry",)
+
+
+def topic_matches(subscription: str, topic: str) -> bool:
+    if subscription == ALL_TOPICS:
+        return topic.split(":", 1)[0] not in EXPLICIT_NAMESPACES
+    return subscription == topic or topic.startswith(subscription + ":")
+
+
+def parse_topics(raw: Optional[str]) -> Set[str]:
+    """"logs,pipeline" -> {"logs", "pipeline"}; vazio -> {"*"}."""
+    topics = {t.strip() for t in (raw or "").split(",") if t.strip()}
+    return topics or {ALL_TOPICS}
+
+
+class _Coalesced:
+    __slots__ = ("key",)
+
+    def __init__(self, key: str):
+        self.key = key
+
+
+class HubConnection:
+    """Uma conexão: fila limitada + task escritora."""
+
+    def __init__(self, websocket, topics: Iterable[str], max_pending: int = MAX_PENDING_MESSAGES,
+                 message_filter: Optional[Callable[[Any], bool]] = None):
+        self.websocket = websocket
+        self.topics: Set[str] = set(topics)
+        # Filtro por conexão aplicado no publish (ex.: level/source dos logs)
+        self.message_filter = message_filter
+        self.max_pending = max_pending
+        self.dropped = 0
+        self.closed = False
+        self._pending: deque = deque()
+        self._coalesced: Dict[str, str] = {}  # key -> text
+        self._ready = asyncio.Event()
+        self._unreported_drops = 0
+
+    def wants(self, topic: str, data: Any = None) -> bool:
+        if not any(topic_matches(sub, topic) for sub in self.topics):
+            return False
+        return self.message_filter is None or self.message_filter(data)
+
+    def subscribe(self, topics: Iterable[str]) -> None:
+        self.topics.update(topics)
+
+    def unsubscribe(self, topics: Iterable[str]) -> None:
+        self.topics.difference_update(topics)
+
+    def offer(self, text: str, coalesce_key: Optional[str] = None) -> None:
+        if self.closed:
+            return
+        if coalesce_key is not None:
+            if coalesce_key not in self._coalesced:
+                self._pending.append(_Coalesced(coalesce_key))
+            self._coalesced[coalesce_key] = text
+        else:
+            if len(self._pending) >= self.max_pending:
+                self._drop_oldest()
+            self._pending.append(text)
+        self._ready.set()
+
+    def _drop_oldest(self) -> None:
+        for i, item in enumerate(self._pending):
+            if not isinstance(item, _Coalesced):
+                del self._pending[i]
+                self.dropped += 1
+                self._unreported_drops += 1
+                return
+
+    def _next_text(self) -> Optional[str]:
+        if self._unreported_drops:
+            count, self._unreported_drops = self._unreported_drops, 0
+            return json.dumps({"type": "overflow", "data": {"dropped": count}})
+        if not self._pending:
+            return None
+        item = self._pending.popleft()
+        if isinstance(item, _Coalesced):
+            return self._coalesced.pop(item.key)
+        return item
+
+    async def run(self) -> None:
+        """Task escritora: drena a fila; send lento demais encerra a conexão."""
+        try:
+            while not self.closed:
+                text = self._next_text()
+                if text is None:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=SEND_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.closed = True
+            try:
+                await self.websocket.close()
+            except Exception:
+                pass
+
+
+class WebSocketHub:
+    def __init__(self):
+        self.connections: Set[HubConnection] = set()
+
+    def connect(self, websocket, topics: Optional[Iterable[str]] = None,
+                message_filter: Optional[Callable[[Any], bool]] = None) -> HubConnection:
+        conn = HubConnection(websocket, topics or {ALL_TOPICS}, message_filter=message_filter)
+        self.connections.add(conn)
+        return conn
+
+    def disconnect(self, conn: HubConnection) -> None:
+        conn.closed = True
+        conn._ready.set()
+        self.connections.discard(conn)
+
+    def publish(self, topic: str, event_type: str, data: Any, coalesce: bool = False) -> int:
+        """Enfileira para os inscritos em `topic`. Retorna quantas conexões receberam."""
+        targets = [c for c in self.connections if not c.closed and c.wants(topic, data)]
+        if not targets:
+            return 0
+        text = json.dumps({"type": event_type, "data": data})
+        key = f"{topic}/{event_type}" if coalesce else None
+        for conn in targets:
+            conn.offer(text, coalesce_key=key)
+        return len(targets)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.connections),
+            "dropped": sum(c.dropped for c in self.connections),
+        }
+
+
+hub = WebSocketHub()
@@ -44,6 +44,7 @@ async def startup_event():
     # Registra o callback para enviar atualizações via WebSocket
     status_manager.set_async_callback(notify_pipeline_update)
     logger.set_async_callback(notify_new_log)
+    app.state.stats_sampler_task = asyncio.create_task(status_manager.run_stats_sampler())
     print("SYSTEM: Real-time updates handler registered.")
 
     # 🛡️ Validar Variáveis de Ambiente no Boot (SYN-121)
@@ -56,6 +57,15 @@ async def startup_event():
     import core.models  # noqa: F401 — garante que todos os models estejam registrados
     import core.phantom.models  # noqa: F401 — Phantom engine models
     Base.metadata.create_all(bind=engine, checkfirst=True)
+    from core.clipper.models import migrate_clip_job_transcript
+    migrate_clip_job_transcript(engine)
+    # schedule.scheduled_time_utc: o scheduler roda em outro container
+    # (DISABLE_SCHEDULER), mas API/queue worker ja consultam a coluna
+    try:
+        from core.scheduler import migrate_schedule_utc
+        migrate_schedule_utc(engine)
+    except Exception as e:
+        print(f"ERROR migrating schedule.scheduled_time_utc: {e}")
     print("SYSTEM: Database schema synchronized.")
 
     # 🛡️ PROCESS MANAGER (Cleanup Handlers)
@@ -85,6 +95,15 @@ async def startup_event():
             print("SYSTEM: Scheduler disabled by env var (Running in separate container)")
         
         
+        # Relay do progresso dos ClipJobs (worker ARQ -> Redis -> WebSocket)
+        from core.clipper.progress import relay_progress
+        from .api.websocket import notify_clipper_job
+        app.state.clipper_progress_relay = asyncio.create_task(relay_progress(notify_clipper_job))
+
+        # Pool de Chromium headless do Oracle: aquece e despeja ociosos
+        from core.browser_pool import get_browser_pool
+        app.state.browser_pool_task = asyncio.create_task(get_browser_pool().start())
+
         # Start Garbage Collector (120h TTL)
         try:
             from core.garbage_collector import start_gc_loop
@@ -114,6 +133,23 @@ async def shutdown_event():
         except asyncio.CancelledError:
             print("✅ Queue Worker stopped gracefully.")
             
+    if hasattr(app.state, "stats_sampler_task"):
+        app.state.stats_sampler_task.cancel()
+
+    if hasattr(app.state, "clipper_progress_relay"):
+        app.state.clipper_progress_relay.cancel()
+
+    from .api.log_tail import log_tail
+    await log_tail.stop()
+
+    from core.status_manager import status_manager
+    status_manager.flush()
+
+    if hasattr(app.state, "browser_pool_task"):
+        app.state.browser_pool_task.cancel()
+    from core.browser_pool import close_browser_pools
+    await close_browser_pools()
+
     from core.oracle.automation import oracle_automator
     if oracle_automator.is_running:
         print("Stopping Oracle Automation...")
@@ -7,39 +7,69 @@ import logging
 import os
 import random
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 from zoneinfo import ZoneInfo
 
 from core.database import get_db
 from core.models import VideoQueue, ScheduleItem
+from core.slot_allocator import SlotAllocator
 
 logger = logging.getLogger(__name__)
 
 SP_TZ = ZoneInfo("America/Sao_Paulo")
 
 
+MAX_SEARCH_DAYS = 90
+MIN_MARGIN_HOURS = 2
+
+
+def _search_start(schedule_hours: List[int], now: datetime) -> datetime:
+    """Hoje se ainda ha slots futuros (>= 2h de margem), senao amanha."""
+    latest_possible_hour = max(schedule_hours) if schedule_hours else 18
+    if now.hour + MIN_MARGIN_HOURS <= latest_possible_hour:
+        return now
+    return now + timedelta(days=1)
+
+
+def slot_search_window(schedule_hours: List[int]) -> Tuple[datetime, datetime]:
+    """Intervalo (naive, SP) que calculate_next_slots pode consultar."""
+    start = _search_start(schedule_hours, datetime.now(SP_TZ))
+    day_start = datetime(start.year, start.month, start.day)
+    return day_start, day_start + timedelta(days=MAX_SEARCH_DAYS)
+
+
+def preload_slot_allocator(profile_slugs: Sequence[str], schedule_hours: List[int], db) -> SlotAllocator:
+    """
+    Allocator com a ocupacao de todos os perfis carregada em 2 queries —
+    para aprovacoes multi-perfil, em vez de uma carga por perfil.
+    """
+    allocator = SlotAllocator(db)
+    allocator.preload(profile_slugs, *slot_search_window(schedule_hours))
+    return allocator
+
+
 def calculate_next_slots(
     profile_slug: str,
     count: int,
     schedule_hours: List[int],
-    db
+    db,
+    allocator: Optional[SlotAllocator] = None,
 ) -> List[datetime]:
     """
     Calcula os proximos `count` slots de agendamento disponiveis para o perfil.
     schedule_hours: lista de horas do dia para postar (ex: [12, 18]).
     Respeita slots ja ocupados na tabela schedule e na video_queue.
 
+    A ocupacao vem de um SlotAllocator (carregada uma vez, consultas em
+    memoria). Passar o mesmo allocator em chamadas seguidas reaproveita a
+    carga e evita que slots do mesmo lote colidam antes do commit.
+
     Retorna lista de datetimes (sem timezone, para compatibilidade com DB).
     """
     now = datetime.now(SP_TZ)
     # Começar a partir de hoje se ainda há slots futuros (>= 2h de margem),
     # senão amanhã — evita padrão previsível de "sempre D+1"
-    min_margin_hours = 2
-    latest_possible_hour = max(schedule_hours) if schedule_hours else 18
-    if now.hour + min_margin_hours <= latest_possible_hour:
-        check_date: datetime = now
-    else:
-        check_date: datetime = now + timedelta(days=1)
+    check_date: datetime = _search_start(schedule_hours, now)
 
     # Ordenar os horarios para distribuicao correta ao longo do dia
     sorted_hours = sorted(h for h in set(schedule_hours) if 0 <= h <= 23) if schedule_hours else [18]
@@ -48,41 +78,15 @@ def calculate_next_slots(
 
     slots = []
 
-    # Buscar slots ja ocupados na tabela de agendamentos
-    def _get_occupied_times(start_dt: datetime, end_dt: datetime) -> set:
-        start_naive = start_dt.replace(tzinfo=None)
-        end_naive = end_dt.replace(tzinfo=None)
-        existing = db.query(ScheduleItem).filter(
-            ScheduleItem.profile_slug == profile_slug,
-            ScheduleItem.scheduled_time >= start_naive,
-            ScheduleItem.scheduled_time <= end_naive,
-            ScheduleItem.status.in_(["pending", "processing", "completed", "posted"])
-        ).all()
-        # Arredonda para hora para comparacao
-        return {s.scheduled_time.replace(minute=0, second=0) for s in existing}
-
-    # Buscar slots ja ocupados na video_queue (agendados)
-    def _get_queued_times(start_dt: datetime, end_dt: datetime) -> set:
-        start_naive = start_dt.replace(tzinfo=None)
-        end_naive = end_dt.replace(tzinfo=None)
-        queued = db.query(VideoQueue).filter(
-            VideoQueue.profile_slug == profile_slug,
-            VideoQueue.status == "scheduled",
-            VideoQueue.scheduled_at >= start_naive,
-            VideoQueue.scheduled_at <= end_naive
-        ).all()
-        return {s.scheduled_at.replace(minute=0, second=0) for s in queued if s.scheduled_at}
-
-    max_search_days = 90
-    for _ in range(max_search_days):
+    # Slots ja ocupados (schedule + video_queue) para toda a janela de busca
+    allocator = allocator or SlotAllocator(db)
+    window_start = datetime(check_date.year, check_date.month, check_date.day)
+    occupied = allocator.index(profile_slug, window_start, window_start + timedelta(days=MAX_SEARCH_DAYS))
+
+    for _ in range(MAX_SEARCH_DAYS):
         if len(slots) >= count:
             break
 
-        day_start = datetime(check_date.year, check_date.month, check_date.day, 0, 0, 0, tzinfo=SP_TZ)
-        day_end = datetime(check_date.year, check_date.month, check_date.day, 23, 59, 59, tzinfo=SP_TZ)
-
-        occupied = _get_occupied_times(day_start, day_end) | _get_queued_times(day_start, day_end)
-
         # Variação semanal: fins de semana podem ter menos slots (humanos postam menos)
         weekday = check_date.weekday()  # 0=Mon, 6=Sun
         day_hours = list(sorted_hours)
@@ -106,19 +110,31 @@ def calculate_next_slots(
             if slot_dt <= now:
                 continue
 
-            slot_naive_hour = slot_dt.replace(tzinfo=None, minute=0, second=0)
-            if slot_naive_hour not in occupied:
+            if not occupied.hour_taken(slot_dt):
                 slots.append(slot_dt.replace(tzinfo=None))
-                occupied.add(slot_naive_hour)
+                allocator.reserve(profile_slug, slot_dt)
 
         check_date = check_date + timedelta(days=1)
 
     if len(slots) < count:
-        logger.warning(f"[AUTO-SCHEDULER] So foram encontrados {len(slots)} de {count} slots solicitados em {max_search_days} dias.")
+        logger.warning(f"[AUTO-SCHEDULER] So foram encontrados {len(slots)} de {count} slots solicitados em {MAX_SEARCH_DAYS} dias.")
 
     return slots
 
 
+def calculate_slots_for_profiles(
+    profile_counts: Dict[str, int],
+    schedule_hours: List[int],
+    db,
+) -> Dict[str, List[datetime]]:
+    """Aloca slots para varios perfis de uma vez (ocupacao carregada em lote)."""
+    allocator = preload_slot_allocator(list(profile_counts), schedule_hours, db)
+    return {
+        slug: calculate_next_slots(slug, count, schedule_hours, db, allocator=allocator)
+        for slug, count in profile_counts.items()
+    }
+
+
 def create_queue(
     profile_slug: str,
     videos: List[dict],  # [{"path": str, "caption": str, "hashtags": list, "privacy_level": str}]
@@ -164,7 +180,8 @@ def create_queue(
 async def schedule_next_batch(
     profile_slug: str,
     batch_size: int,
-    db
+    db,
+    allocator: Optional[SlotAllocator] = None,
 ) -> dict:
     """
     Agenda os proximos `batch_size` videos da fila criando ScheduleItems.
@@ -189,7 +206,8 @@ async def schedule_next_batch(
         profile_slug=profile_slug,
         count=len(pending),
         schedule_hours=schedule_hours,
-        db=db
+        db=db,
+        allocator=allocator,
     )
 
     scheduled_count: int = 0
@@ -15,8 +15,10 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
 from enum import Enum
 
+from core.database import SessionLocal
 from core.smart_logic import smart_logic
 from core.scheduler import scheduler_service
+from core.slot_allocator import SlotAllocator
 
 
 class BatchStatus(Enum):
@@ -271,41 +273,49 @@ class BatchManager:
         batch["status"] = BatchStatus.SCHEDULING
         scheduled = 0
         skipped = 0
+
+        # Ocupacao carregada uma vez para o lote inteiro; slots usados por
+        # eventos anteriores do lote ficam reservados no allocator
+        slot_db = SessionLocal()
+        try:
+            allocator = SlotAllocator(slot_db, schedule_statuses=None)
         
-        for event in batch["events"]:
-            # Pular inválidos se não forçar
-            if event.status == "invalid" and not force:
-                skipped += 1
-                continue
+            for event in batch["events"]:
+                # Pular inválidos se não forçar
+                if event.status == "invalid" and not force:
+                    skipped += 1
+                    continue
             
-            # Encontrar slot seguro
-            safe_time = scheduler_service.find_next_available_slot(
-                event.profile_id,
-                event.scheduled_time
-            )
+                # Encontrar slot seguro
+                safe_time = scheduler_service.find_next_available_slot(
+                    event.profile_id,
+                    event.scheduled_time,
+                    allocator=allocator,
+                )
             
-            # Agendar
-            try:
-                # [SYN-39] Prefer event metadata for sound config if present (Auto-Mix)
-                evt_meta = event.metadata or {}
+                # Agendar
+                try:
+                    # [SYN-39] Prefer event metadata for sound config if present (Auto-Mix)
+                    evt_meta = event.metadata or {}
                 
-                use_sound_id = evt_meta.get("sound_id") or config.get("sound_id")
-                use_sound_title = evt_meta.get("sound_title") or config.get("sound_title")
+                    use_sound_id = evt_meta.get("sound_id") or config.get("sound_id")
+                    use_sound_title = evt_meta.get("sound_title") or config.get("sound_title")
                 
-                scheduled_event = scheduler_service.add_event(
-                    profile_id=event.profile_id,
-                    video_path=event.video_path,
-                    scheduled_time=safe_time,
-                    viral_music_enabled=config.get("viral_music_enabled", False),
-                    sound_id=use_sound_id,
-                    sound_title=use_sound_title
-                )
-                event.event_id = scheduled_event.get("id")
-                event.status = "scheduled"
-                scheduled += 1
-            except Exception as e:
-                event.status = f"error: {str(e)}"
-        
+                    scheduled_event = scheduler_service.add_event(
+                        profile_id=event.profile_id,
+                        video_path=event.video_path,
+                        scheduled_time=safe_time,
+                        viral_music_enabled=config.get("viral_music_enabled", False),
+                        sound_id=use_sound_id,
+                        sound_title=use_sound_title
+                    )
+                    event.event_id = scheduled_event.get("id")
+                    event.status = "scheduled"
+                    scheduled += 1
+                except Exception as e:
+                    event.status = f"error: {str(e)}"
+        finally:
+            slot_db.close()
         batch["status"] = BatchStatus.COMPLETED
         
         return BatchResult(
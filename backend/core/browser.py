@@ -167,6 +167,448 @@ def _generate_fingerprint(seed: str = "") -> Dict[str, Any]:
     }
 
 
+def _browser_args(headless: bool) -> list:
+    """Chromium launch args (stealth + Docker/headless specifics)."""
+    # Build args list
+    browser_args = STEALTH_ARGS.copy()
+    if IN_DOCKER and headless:
+        browser_args.extend(DOCKER_HEADLESS_ARGS)
+        logger.info(f"[BROWSER] Docker headless mode - added {len(DOCKER_HEADLESS_ARGS)} extra args")
+    elif IN_DOCKER and not headless:
+        # Headful in Docker: add non-headless Docker args (no --headless=new!)
+        browser_args.extend([
+            "--disable-software-rasterizer",
+        ])
+        logger.info("[BROWSER] Docker headful mode (Xvfb)")
+    elif headless:
+        # On Windows/local, we might need fewer flags for stability
+        # But we still want some basic ones for headless
+        browser_args.append("--headless=new")
+        logger.info("[BROWSER] Headless mode (native)")
+
+    # Dynamically build --disable-features to avoid Chrome last-one-wins conflict
+    disable_features = ["UserAgentClientHint"]  # Prevent Sec-CH-UA-Platform: "Linux" leak
+    if IN_DOCKER and headless:
+        disable_features.append("VizDisplayCompositor")
+    browser_args.append(f"--disable-features={','.join(disable_features)}")
+    return browser_args
+
+
+async def apply_stealth(context: BrowserContext, page: Page, fingerprint_seed: str = "default") -> None:
+    """playwright-stealth on the page + per-fingerprint init scripts on the context."""
+    # Apply playwright-stealth
+    try:
+        from playwright_stealth import stealth_async
+        await stealth_async(page)
+        logger.info("[STEALTH] playwright-stealth applied successfully.")
+    except ImportError:
+        logger.warning("[STEALTH] playwright-stealth not installed. Skipping advanced stealth injection.")
+    except Exception as e:
+        logger.warning(f"[STEALTH] Failed to apply playwright-stealth: {e}")
+
+    # Hardware Spoofing to match a standard desktop profile
+    # Fingerprint único por perfil (determinístico via seed)
+    fp = _generate_fingerprint(fingerprint_seed)
+    fp_cores = fp["cores"]
+    fp_memory = fp["memory"]
+    fp_gpu_renderer = fp["gpu_renderer"]
+    fp_gpu_vendor = fp["gpu_vendor"]
+    fp_touch = fp["max_touch_points"]
+
+    await context.add_init_script(f"""
+        Object.defineProperty(navigator, 'hardwareConcurrency', {{get: () => {fp_cores}}});
+        Object.defineProperty(navigator, 'deviceMemory', {{get: () => {fp_memory}}});
+    """)
+    
+    # Stealth injection - comprehensive anti-detection (Common for both)
+    await context.add_init_script(f"""
+        // === 1. Hide webdriver flag ===
+        Object.defineProperty(navigator, 'webdriver', {{get: () => false}});
+        
+        // === 2. Platform consistency (must match UA "Windows NT 10.0") ===
+        Object.defineProperty(navigator, 'platform', {{get: () => 'Win32'}});
+        Object.defineProperty(navigator, 'oscpu', {{get: () => undefined}});
+
+        // === 3. Realistic navigator.languages ===
+        Object.defineProperty(navigator, 'languages', {{get: () => ['pt-BR', 'pt', 'en-US', 'en']}});
+        
+        // === 3. Realistic navigator.plugins (PDF Viewer + Chrome PDF Plugin) ===
+        (function() {{
+            const makePlugin = (name, filename, desc) => {{
+                const p = Object.create(Plugin.prototype);
+                Object.defineProperties(p, {{
+                    name: {{value: name, enumerable: true}},
+                    filename: {{value: filename, enumerable: true}},
+                    description: {{value: desc, enumerable: true}},
+                    length: {{value: 1, enumerable: true}},
+                }});
+                return p;
+            }};
+            const plugins = [
+                makePlugin('PDF Viewer', 'internal-pdf-viewer', 'Portable Document Format'),
+                makePlugin('Chrome PDF Plugin', 'internal-pdf-viewer', 'Portable Document Format'),
+                makePlugin('Chrome PDF Viewer', 'mhjfbmdgcfjbbpaeojofohoefgiehjai', 'Portable Document Format'),
+                makePlugin('Microsoft Edge PDF Viewer', 'internal-pdf-viewer', 'Portable Document Format'),
+                makePlugin('WebKit built-in PDF', 'internal-pdf-viewer', 'Portable Document Format'),
+            ];
+            Object.defineProperty(navigator, 'plugins', {{
+                get: () => {{
+                    const arr = Object.create(PluginArray.prototype);
+                    plugins.forEach((p, i) => {{ arr[i] = p; }});
+                    Object.defineProperty(arr, 'length', {{value: plugins.length}});
+                    arr.item = (i) => plugins[i];
+                    arr.namedItem = (n) => plugins.find(p => p.name === n);
+                    arr.refresh = () => {{}};
+                    return arr;
+                }}
+            }});
+            Object.defineProperty(navigator, 'mimeTypes', {{
+                get: () => {{
+                    const mt = Object.create(MimeTypeArray.prototype);
+                    const pdf = Object.create(MimeType.prototype);
+                    Object.defineProperties(pdf, {{
+                        type: {{value: 'application/pdf'}},
+                        suffixes: {{value: 'pdf'}},
+                        description: {{value: 'Portable Document Format'}},
+                        enabledPlugin: {{value: plugins[0]}},
+                    }});
+                    mt[0] = pdf;
+                    Object.defineProperty(mt, 'length', {{value: 1}});
+                    mt.item = (i) => i === 0 ? pdf : null;
+                    mt.namedItem = (n) => n === 'application/pdf' ? pdf : null;
+                    return mt;
+                }}
+            }});
+        }})();
+        
+        // === 4. maxTouchPoints (per-profile via fingerprint) ===
+        Object.defineProperty(navigator, 'maxTouchPoints', {{get: () => {fp_touch}}});
+        
+        // === 5. Full chrome.runtime object ===
+        window.chrome = {{
+            runtime: {{
+                connect: function() {{ return {{ onMessage: {{ addListener: function() {{}} }}, postMessage: function() {{}} }}; }},
+                sendMessage: function(msg, cb) {{ if (cb) cb(); }},
+                getURL: function(path) {{ return 'chrome-extension://placeholder/' + path; }},
+                id: undefined,
+                onMessage: {{ addListener: function() {{}}, removeListener: function() {{}} }},
+                onConnect: {{ addListener: function() {{}}, removeListener: function() {{}} }},
+                getManifest: function() {{ return {{}}; }},
+            }},
+            loadTimes: function() {{ return {{ requestTime: Date.now() / 1000, startLoadTime: Date.now() / 1000 }}; }},
+            csi: function() {{ return {{ pageT: Date.now(), startE: Date.now() }}; }},
+            app: {{ isInstalled: false, InstallState: {{ INSTALLED: 'installed', NOT_INSTALLED: 'not_installed' }}, RunningState: {{ CANNOT_RUN: 'cannot_run', READY_TO_RUN: 'ready_to_run', RUNNING: 'running' }} }},
+            webstore: {{ onInstallStageChanged: {{}}, onDownloadProgress: {{}} }},
+        }};
+        // Protect chrome object from detection via toString
+        window.chrome.runtime.connect.toString = () => 'function connect() {{ [native code] }}';
+        window.chrome.runtime.sendMessage.toString = () => 'function sendMessage() {{ [native code] }}';
+        
+        // === 6. NavigatorUAData matching real Chrome version ===
+        if (!navigator.userAgentData) {{
+            Object.defineProperty(navigator, 'userAgentData', {{
+                get: () => ({{
+                    brands: [
+                        {{brand: 'Not/A)Brand', version: '8'}},
+                        {{brand: 'Chromium', version: '{CHROME_MAJOR}'}},
+                        {{brand: 'Google Chrome', version: '{CHROME_MAJOR}'}},
+                    ],
+                    mobile: false,
+                    platform: 'Windows',
+                    getHighEntropyValues: (hints) => Promise.resolve({{
+                        architecture: 'x86',
+                        bitness: '64',
+                        brands: [
+                            {{brand: 'Not/A)Brand', version: '8.0.0.0'}},
+                            {{brand: 'Chromium', version: '{CHROME_VERSION}'}},
+                            {{brand: 'Google Chrome', version: '{CHROME_VERSION}'}},
+                        ],
+                        fullVersionList: [
+                            {{brand: 'Not/A)Brand', version: '8.0.0.0'}},
+                            {{brand: 'Chromium', version: '{CHROME_VERSION}'}},
+                            {{brand: 'Google Chrome', version: '{CHROME_VERSION}'}},
+                        ],
+                        mobile: false,
+                        model: '',
+                        platform: 'Windows',
+                        platformVersion: '15.0.0',
+                        uaFullVersion: '{CHROME_VERSION}',
+                        wow64: false,
+                    }}),
+                }})
+            }});
+        }}
+        
+        // === 7. Override permissions (all common types) ===
+        const originalQuery = window.navigator.permissions.query;
+        window.navigator.permissions.query = (parameters) => {{
+            const granted = ['notifications', 'geolocation', 'microphone', 'camera'];
+            if (granted.includes(parameters.name)) {{
+                return Promise.resolve({{ state: 'prompt', onchange: null }});
+            }}
+            return originalQuery(parameters);
+        }};
+
+        // === 7b. navigator.credentials (real browsers have this) ===
+        if (!navigator.credentials) {{
+            Object.defineProperty(navigator, 'credentials', {{
+                get: () => ({{
+                    create: () => Promise.resolve(null),
+                    get: () => Promise.resolve(null),
+                    preventSilentAccess: () => Promise.resolve(),
+                    store: () => Promise.resolve(),
+                }})
+            }});
+        }}
+
+        // === 7c. navigator.connection (Network Information API) ===
+        if (!navigator.connection) {{
+            Object.defineProperty(navigator, 'connection', {{
+                get: () => ({{
+                    effectiveType: '4g',
+                    rtt: 50,
+                    downlink: 10,
+                    saveData: false,
+                    onchange: null,
+                    addEventListener: function() {{}},
+                    removeEventListener: function() {{}},
+                }})
+            }});
+        }}
+
+        // === 7d. navigator.getBattery() ===
+        if (!navigator.getBattery) {{
+            navigator.getBattery = () => Promise.resolve({{
+                charging: true,
+                chargingTime: 0,
+                dischargingTime: Infinity,
+                level: 1.0,
+                onchargingchange: null,
+                onchargingtimechange: null,
+                ondischargingtimechange: null,
+                onlevelchange: null,
+                addEventListener: function() {{}},
+                removeEventListener: function() {{}},
+            }});
+        }}
+
+        // === 7e. mediaDevices.enumerateDevices() ===
+        if (navigator.mediaDevices && navigator.mediaDevices.enumerateDevices) {{
+            const origEnum = navigator.mediaDevices.enumerateDevices.bind(navigator.mediaDevices);
+            navigator.mediaDevices.enumerateDevices = () => Promise.resolve([
+                {{deviceId: 'default', kind: 'audioinput', label: '', groupId: 'default'}},
+                {{deviceId: 'default', kind: 'audiooutput', label: '', groupId: 'default'}},
+                {{deviceId: 'default', kind: 'videoinput', label: '', groupId: 'default'}},
+            ]);
+        }}
+        
+        // === 8. WebGL fingerprint protection (unique per profile) ===
+        (function() {{
+            const gpuVendor = '{fp_gpu_vendor}';
+            const gpuRenderer = '{fp_gpu_renderer}';
+            const getParameterOrig = WebGLRenderingContext.prototype.getParameter;
+            WebGLRenderingContext.prototype.getParameter = function(param) {{
+                if (param === 0x9245) return gpuVendor;
+                if (param === 0x9246) return gpuRenderer;
+                return getParameterOrig.call(this, param);
+            }};
+            if (typeof WebGL2RenderingContext !== 'undefined') {{
+                const getParam2Orig = WebGL2RenderingContext.prototype.getParameter;
+                WebGL2RenderingContext.prototype.getParameter = function(param) {{
+                    if (param === 0x9245) return gpuVendor;
+                    if (param === 0x9246) return gpuRenderer;
+                    return getParam2Orig.call(this, param);
+                }};
+            }}
+        }})();
+        
+        // === 8a. WebGL extensions normalization ===
+        (function() {{
+            // Return a consistent set of extensions (common on desktop Chrome + NVIDIA/Intel/AMD)
+            const commonExtensions = [
+                'ANGLE_instanced_arrays', 'EXT_blend_minmax', 'EXT_color_buffer_half_float',
+                'EXT_float_blend', 'EXT_frag_depth', 'EXT_shader_texture_lod',
+                'EXT_texture_filter_anisotropic', 'OES_element_index_uint',
+                'OES_standard_derivatives', 'OES_texture_float', 'OES_texture_float_linear',
+                'OES_texture_half_float', 'OES_texture_half_float_linear',
+                'OES_vertex_array_object', 'WEBGL_color_buffer_float',
+                'WEBGL_compressed_texture_s3tc', 'WEBGL_debug_renderer_info',
+                'WEBGL_depth_texture', 'WEBGL_draw_buffers', 'WEBGL_lose_context',
+            ];
+            const origGetExts = WebGLRenderingContext.prototype.getSupportedExtensions;
+            WebGLRenderingContext.prototype.getSupportedExtensions = function() {{
+                return commonExtensions;
+            }};
+            if (typeof WebGL2RenderingContext !== 'undefined') {{
+                const origGetExts2 = WebGL2RenderingContext.prototype.getSupportedExtensions;
+                WebGL2RenderingContext.prototype.getSupportedExtensions = function() {{
+                    return [...commonExtensions, 'EXT_color_buffer_float', 'OES_draw_buffers_indexed'];
+                }};
+            }}
+        }})();
+
+        // === 8b. Canvas fingerprint noise (per-profile, deterministic) ===
+        (function() {{
+            // Seed-based noise: small pixel-level perturbation unique to this profile
+            const seed = {fp_cores * 1000 + fp_memory * 100 + fp_touch};
+            const noiseLevel = 0.02;  // Imperceptible noise
+            const origToDataURL = HTMLCanvasElement.prototype.toDataURL;
+            HTMLCanvasElement.prototype.toDataURL = function(type, quality) {{
+                const ctx = this.getContext('2d');
+                if (ctx && this.width > 0 && this.height > 0) {{
+                    try {{
+                        const imageData = ctx.getImageData(0, 0, Math.min(this.width, 16), Math.min(this.height, 16));
+                        for (let i = 0; i < imageData.data.length; i += 4) {{
+                            // Deterministic per-profile noise using seed
+                            const noise = ((seed * (i + 1) * 9301 + 49297) % 233280) / 233280.0;
+                            if (noise < noiseLevel) {{
+                                imageData.data[i] = imageData.data[i] ^ 1;  // Flip LSB of red channel
+                            }}
+                        }}
+                        ctx.putImageData(imageData, 0, 0);
+                    }} catch(e) {{}}  // Skip if tainted canvas (CORS)
+                }}
+                return origToDataURL.call(this, type, quality);
+            }};
+            // Also protect toBlob
+            const origToBlob = HTMLCanvasElement.prototype.toBlob;
+            HTMLCanvasElement.prototype.toBlob = function(cb, type, quality) {{
+                this.toDataURL(type, quality);  // Apply noise first
+                return origToBlob.call(this, cb, type, quality);
+            }};
+        }})();
+
+        // === 8c. AudioContext fingerprint protection ===
+        (function() {{
+            if (typeof AudioContext !== 'undefined' || typeof webkitAudioContext !== 'undefined') {{
+                const AC = AudioContext || webkitAudioContext;
+                const origCreateOscillator = AC.prototype.createOscillator;
+                const origCreateDynamicsCompressor = AC.prototype.createDynamicsCompressor;
+                // Wrap createDynamicsCompressor to add subtle per-profile variation
+                AC.prototype.createDynamicsCompressor = function() {{
+                    const compressor = origCreateDynamicsCompressor.call(this);
+                    // Slightly vary default threshold per profile (imperceptible audio change)
+                    const offset = ({fp_cores} % 5) * 0.001;
+                    try {{
+                        compressor.threshold.value = -24 + offset;
+                        compressor.knee.value = 30 + offset;
+                    }} catch(e) {{}}
+                    return compressor;
+                }};
+                // Wrap getFloatFrequencyData to add noise
+                const origGetFloat = AnalyserNode.prototype.getFloatFrequencyData;
+                AnalyserNode.prototype.getFloatFrequencyData = function(array) {{
+                    origGetFloat.call(this, array);
+                    const noiseSeed = {fp_memory * 37 + fp_cores};
+                    for (let i = 0; i < array.length; i++) {{
+                        array[i] += ((noiseSeed * (i + 1) * 7919) % 100) / 100000.0;
+                    }}
+                }};
+            }}
+        }})();
+
+        // === 9. WebRTC IP leak prevention (JS-level) ===
+        (function() {{
+            const origRTC = window.RTCPeerConnection || window.webkitRTCPeerConnection;
+            if (origRTC) {{
+                const Wrapped = function(config, constraints) {{
+                    if (config && config.iceServers) {{
+                        config.iceServers = [];
+                    }}
+                    return new origRTC(config, constraints);
+                }};
+                Wrapped.prototype = origRTC.prototype;
+                window.RTCPeerConnection = Wrapped;
+                if (window.webkitRTCPeerConnection) window.webkitRTCPeerConnection = Wrapped;
+            }}
+        }})();
+
+        // === 10. Disable Notification constructor to avoid headless leak ===
+        if (typeof Notification !== 'undefined' && Notification.permission === 'denied') {{
+            Object.defineProperty(Notification, 'permission', {{get: () => 'default'}});
+        }}
+
+        // === 11. screen.orientation (Windows desktop default) ===
+        try {{
+            Object.defineProperty(screen, 'orientation', {{
+                get: () => ({{
+                    angle: 0,
+                    type: 'landscape-primary',
+                    onchange: null,
+                    addEventListener: function() {{}},
+                    removeEventListener: function() {{}},
+                    lock: function() {{ return Promise.reject(new DOMException('screen.orientation.lock() is not available on this device.')); }},
+                    unlock: function() {{}},
+                }})
+            }});
+        }} catch(e) {{}}
+
+        // === 12. window.external (IE/Edge legacy — Chrome on Windows has it) ===
+        if (!window.external || Object.keys(window.external).length === 0) {{
+            window.external = {{
+                AddSearchProvider: function() {{}},
+                IsSearchProviderInstalled: function() {{ return false; }},
+            }};
+        }}
+
+        // === 13. window.name (should be empty on fresh navigation) ===
+        if (window.name && window.name.length > 0) {{
+            window.name = '';
+        }}
+
+        // === 14. Protect injected properties from Reflect.ownKeys detection ===
+        // Wrap navigator.permissions.query toString to look native
+        try {{
+            const origPQ = navigator.permissions.query;
+            navigator.permissions.query.toString = () => 'function query() {{ [native code] }}';
+        }} catch(e) {{}}
+        // Wrap getBattery
+        try {{
+            if (navigator.getBattery) {{
+                navigator.getBattery.toString = () => 'function getBattery() {{ [native code] }}';
+            }}
+        }} catch(e) {{}}
+        // Wrap mediaDevices.enumerateDevices
+        try {{
+            if (navigator.mediaDevices && navigator.mediaDevices.enumerateDevices) {{
+                navigator.mediaDevices.enumerateDevices.toString = () => 'function enumerateDevices() {{ [native code] }}';
+            }}
+        }} catch(e) {{}}
+
+        // === 15. requestIdleCallback normalization ===
+        // In headless, idle callbacks fire immediately. Add realistic delay.
+        if (window.requestIdleCallback) {{
+            const origRIC = window.requestIdleCallback.bind(window);
+            window.requestIdleCallback = function(cb, opts) {{
+                return origRIC(function(deadline) {{
+                    // Wrap deadline to report realistic timeRemaining
+                    const wrapped = {{
+                        didTimeout: deadline.didTimeout,
+                        timeRemaining: () => Math.min(deadline.timeRemaining(), 49.9),
+                    }};
+                    cb(wrapped);
+                }}, opts);
+            }};
+            window.requestIdleCallback.toString = () => 'function requestIdleCallback() {{ [native code] }}';
+        }}
+
+        // === 16. Sanitize Error.stack traces (remove Playwright/puppeteer references) ===
+        (function() {{
+            const origPrepare = Error.prepareStackTrace;
+            Error.prepareStackTrace = function(error, stack) {{
+                if (origPrepare) {{
+                    const result = origPrepare(error, stack);
+                    if (typeof result === 'string') {{
+                        return result.replace(/playwright|puppeteer|__playwright/gi, 'anonymous');
+                    }}
+                    return result;
+                }}
+                return error.stack;
+            }};
+        }})();
+    """)
+
+
 async def launch_browser(
     headless: bool = True,
     proxy: Optional[Dict[str, str]] = None,
@@ -247,28 +689,7 @@ async def launch_browser(
                 headless = True
     
 
-    # Build args list
-    browser_args = STEALTH_ARGS.copy()
-    if IN_DOCKER and headless:
-        browser_args.extend(DOCKER_HEADLESS_ARGS)
-        logger.info(f"[BROWSER] Docker headless mode - added {len(DOCKER_HEADLESS_ARGS)} extra args")
-    elif IN_DOCKER and not headless:
-        # Headful in Docker: add non-headless Docker args (no --headless=new!)
-        browser_args.extend([
-            "--disable-software-rasterizer",
-        ])
-        logger.info("[BROWSER] Docker headful mode (Xvfb)")
-    elif headless:
-        # On Windows/local, we might need fewer flags for stability
-        # But we still want some basic ones for headless
-        browser_args.append("--headless=new")
-        logger.info("[BROWSER] Headless mode (native)")
-
-    # Dynamically build --disable-features to avoid Chrome last-one-wins conflict
-    disable_features = ["UserAgentClientHint"]  # Prevent Sec-CH-UA-Platform: "Linux" leak
-    if IN_DOCKER and headless:
-        disable_features.append("VizDisplayCompositor")
-    browser_args.append(f"--disable-features={','.join(disable_features)}")
+    browser_args = _browser_args(headless)
 
     launch_options: Dict[str, Any] = {
         "headless": headless,
@@ -365,418 +786,8 @@ async def launch_browser(
             context = await browser.new_context(**context_options)
             page = await context.new_page()
         
-        # Apply playwright-stealth
-        try:
-            from playwright_stealth import stealth_async
-            await stealth_async(page)
-            logger.info("[STEALTH] playwright-stealth applied successfully.")
-        except ImportError:
-            logger.warning("[STEALTH] playwright-stealth not installed. Skipping advanced stealth injection.")
-        except Exception as e:
-            logger.warning(f"[STEALTH] Failed to apply playwright-stealth: {e}")
-
-        # Hardware Spoofing to match a standard desktop profile
-        # Fingerprint único por perfil (determinístico via seed)
-        fp = _generate_fingerprint(fingerprint_seed or user_data_dir or "default")
-        fp_cores = fp["cores"]
-        fp_memory = fp["memory"]
-        fp_gpu_renderer = fp["gpu_renderer"]
-        fp_gpu_vendor = fp["gpu_vendor"]
-        fp_touch = fp["max_touch_points"]
-
-        await context.add_init_script(f"""
-            Object.defineProperty(navigator, 'hardwareConcurrency', {{get: () => {fp_cores}}});
-            Object.defineProperty(navigator, 'deviceMemory', {{get: () => {fp_memory}}});
-        """)
-        
-        # Stealth injection - comprehensive anti-detection (Common for both)
-        await context.add_init_script(f"""
-            // === 1. Hide webdriver flag ===
-            Object.defineProperty(navigator, 'webdriver', {{get: () => false}});
-            
-            // === 2. Platform consistency (must match UA "Windows NT 10.0") ===
-            Object.defineProperty(navigator, 'platform', {{get: () => 'Win32'}});
-            Object.defineProperty(navigator, 'oscpu', {{get: () => undefined}});
-
-            // === 3. Realistic navigator.languages ===
-            Object.defineProperty(navigator, 'languages', {{get: () => ['pt-BR', 'pt', 'en-US', 'en']}});
-            
-            // === 3. Realistic navigator.plugins (PDF Viewer + Chrome PDF Plugin) ===
-            (function() {{
-                const makePlugin = (name, filename, desc) => {{
-                    const p = Object.create(Plugin.prototype);
-                    Object.defineProperties(p, {{
-                        name: {{value: name, enumerable: true}},
-                        filename: {{value: filename, enumerable: true}},
-                        description: {{value: desc, enumerable: true}},
-                        length: {{value: 1, enumerable: true}},
-                    }});
-                    return p;
-                }};
-                const plugins = [
-                    makePlugin('PDF Viewer', 'internal-pdf-viewer', 'Portable Document Format'),
-                    makePlugin('Chrome PDF Plugin', 'internal-pdf-viewer', 'Portable Document Format'),
-                    makePlugin('Chrome PDF Viewer', 'mhjfbmdgcfjbbpaeojofohoefgiehjai', 'Portable Document Format'),
-                    makePlugin('Microsoft Edge PDF Viewer', 'internal-pdf-viewer', 'Portable Document Format'),
-                    makePlugin('WebKit built-in PDF', 'internal-pdf-viewer', 'Portable Document Format'),
-                ];
-                Object.defineProperty(navigator, 'plugins', {{
-                    get: () => {{
-                        const arr = Object.create(PluginArray.prototype);
-                        plugins.forEach((p, i) => {{ arr[i] = p; }});
-                        Object.defineProperty(arr, 'length', {{value: plugins.length}});
-                        arr.item = (i) => plugins[i];
-                        arr.namedItem = (n) => plugins.find(p => p.name === n);
-                        arr.refresh = () => {{}};
-                        return arr;
-                    }}
-                }});
-                Object.defineProperty(navigator, 'mimeTypes', {{
-                    get: () => {{
-                        const mt = Object.create(MimeTypeArray.prototype);
-                        const pdf = Object.create(MimeType.prototype);
-                        Object.defineProperties(pdf, {{
-                            type: {{value: 'application/pdf'}},
-                            suffixes: {{value: 'pdf'}},
-                            description: {{value: 'Portable Document Format'}},
-                            enabledPlugin: {{value: plugins[0]}},
-                        }});
-                        mt[0] = pdf;
-                        Object.defineProperty(mt, 'length', {{value: 1}});
-                        mt.item = (i) => i === 0 ? pdf : null;
-                        mt.namedItem = (n) => n === 'application/pdf' ? pdf : null;
-                        return mt;
-                    }}
-                }});
-            }})();
-            
-            // === 4. maxTouchPoints (per-profile via fingerprint) ===
-            Object.defineProperty(navigator, 'maxTouchPoints', {{get: () => {fp_touch}}});
-            
-            // === 5. Full chrome.runtime object ===
-            window.chrome = {{
-                runtime: {{
-                    connect: function() {{ return {{ onMessage: {{ addListener: function() {{}} }}, postMessage: function() {{}} }}; }},
-                    sendMessage: function(msg, cb) {{ if (cb) cb(); }},
-                    getURL: function(path) {{ return 'chrome-extension://placeholder/' + path; }},
-                    id: undefined,
-                    onMessage: {{ addListener: function() {{}}, removeListener: function() {{}} }},
-                    onConnect: {{ addListener: function() {{}}, removeListener: function() {{}} }},
-                    getManifest: function() {{ return {{}}; }},
-                }},
-                loadTimes: function() {{ return {{ requestTime: Date.now() / 1000, startLoadTime: Date.now() / 1000 }}; }},
-                csi: function() {{ return {{ pageT: Date.now(), startE: Date.now() }}; }},
-                app: {{ isInstalled: false, InstallState: {{ INSTALLED: 'installed', NOT_INSTALLED: 'not_installed' }}, RunningState: {{ CANNOT_RUN: 'cannot_run', READY_TO_RUN: 'ready_to_run', RUNNING: 'running' }} }},
-                webstore: {{ onInstallStageChanged: {{}}, onDownloadProgress: {{}} }},
-            }};
-            // Protect chrome object from detection via toString
-            window.chrome.runtime.connect.toString = () => 'function connect() {{ [native code] }}';
-            window.chrome.runtime.sendMessage.toString = () => 'function sendMessage() {{ [native code] }}';
-            
-            // === 6. NavigatorUAData matching real Chrome version ===
-            if (!navigator.userAgentData) {{
-                Object.defineProperty(navigator, 'userAgentData', {{
-                    get: () => ({{
-                        brands: [
-                            {{brand: 'Not/A)Brand', version: '8'}},
-                            {{brand: 'Chromium', version: '{CHROME_MAJOR}'}},
-                            {{brand: 'Google Chrome', version: '{CHROME_MAJOR}'}},
-                        ],
-                        mobile: false,
-                        platform: 'Windows',
-                        getHighEntropyValues: (hints) => Promise.resolve({{
-                            architecture: 'x86',
-                            bitness: '64',
-                            brands: [
-                                {{brand: 'Not/A)Brand', version: '8.0.0.0'}},
-                                {{brand: 'Chromium', version: '{CHROME_VERSION}'}},
-                                {{brand: 'Google Chrome', version: '{CHROME_VERSION}'}},
-                            ],
-                            fullVersionList: [
-                                {{brand: 'Not/A)Brand', version: '8.0.0.0'}},
-                                {{brand: 'Chromium', version: '{CHROME_VERSION}'}},
-                                {{brand: 'Google Chrome', version: '{CHROME_VERSION}'}},
-                            ],
-                            mobile: false,
-                            model: '',
-                            platform: 'Windows',
-                            platformVersion: '15.0.0',
-                            uaFullVersion: '{CHROME_VERSION}',
-                            wow64: false,
-                        }}),
-                    }})
-                }});
-            }}
-            
-            // === 7. Override permissions (all common types) ===
-            const originalQuery = window.navigator.permissions.query;
-            window.navigator.permissions.query = (parameters) => {{
-                const granted = ['notifications', 'geolocation', 'microphone', 'camera'];
-                if (granted.includes(parameters.name)) {{
-                    return Promise.resolve({{ state: 'prompt', onchange: null }});
-                }}
-                return originalQuery(parameters);
-            }};
-
-            // === 7b. navigator.credentials (real browsers have this) ===
-            if (!navigator.credentials) {{
-                Object.defineProperty(navigator, 'credentials', {{
-                    get: () => ({{
-                        create: () => Promise.resolve(null),
-                        get: () => Promise.resolve(null),
-                        preventSilentAccess: () => Promise.resolve(),
-                        store: () => Promise.resolve(),
-                    }})
-                }});
-            }}
-
-            // === 7c. navigator.connection (Network Information API) ===
-            if (!navigator.connection) {{
-                Object.defineProperty(navigator, 'connection', {{
-                    get: () => ({{
-                        effectiveType: '4g',
-                        rtt: 50,
-                        downlink: 10,
-                        saveData: false,
-                        onchange: null,
-                        addEventListener: function() {{}},
-                        removeEventListener: function() {{}},
-                    }})
-                }});
-            }}
-
-            // === 7d. navigator.getBattery() ===
-            if (!navigator.getBattery) {{
-                navigator.getBattery = () => Promise.resolve({{
-                    charging: true,
-                    chargingTime: 0,
-                    dischargingTime: Infinity,
-                    level: 1.0,
-                    onchargingchange: null,
-                    onchargingtimechange: null,
-                    ondischargingtimechange: null,
-                    onlevelchange: null,
-                    addEventListener: function() {{}},
-                    removeEventListener: function() {{}},
-                }});
-            }}
+        await apply_stealth(context, page, fingerprint_seed or user_data_dir or "default")
 
-            // === 7e. mediaDevices.enumerateDevices() ===
-            if (navigator.mediaDevices && navigator.mediaDevices.enumerateDevices) {{
-                const origEnum = navigator.mediaDevices.enumerateDevices.bind(navigator.mediaDevices);
-                navigator.mediaDevices.enumerateDevices = () => Promise.resolve([
-                    {{deviceId: 'default', kind: 'audioinput', label: '', groupId: 'default'}},
-                    {{deviceId: 'default', kind: 'audiooutput', label: '', groupId: 'default'}},
-                    {{deviceId: 'default', kind: 'videoinput', label: '', groupId: 'default'}},
-                ]);
-            }}
-            
-            // === 8. WebGL fingerprint protection (unique per profile) ===
-            (function() {{
-                const gpuVendor = '{fp_gpu_vendor}';
-                const gpuRenderer = '{fp_gpu_renderer}';
-                const getParameterOrig = WebGLRenderingContext.prototype.getParameter;
-                WebGLRenderingContext.prototype.getParameter = function(param) {{
-                    if (param === 0x9245) return gpuVendor;
-                    if (param === 0x9246) return gpuRenderer;
-                    return getParameterOrig.call(this, param);
-                }};
-                if (typeof WebGL2RenderingContext !== 'undefined') {{
-                    const getParam2Orig = WebGL2RenderingContext.prototype.getParameter;
-                    WebGL2RenderingContext.prototype.getParameter = function(param) {{
-                        if (param === 0x9245) return gpuVendor;
-                        if (param === 0x9246) return gpuRenderer;
-                        return getParam2Orig.call(this, param);
-                    }};
-                }}
-            }})();
-            
-            // === 8a. WebGL extensions normalization ===
-            (function() {{
-                // Return a consistent set of extensions (common on desktop Chrome + NVIDIA/Intel/AMD)
-                const commonExtensions = [
-                    'ANGLE_instanced_arrays', 'EXT_blend_minmax', 'EXT_color_buffer_half_float',
-                    'EXT_float_blend', 'EXT_frag_depth', 'EXT_shader_texture_lod',
-                    'EXT_texture_filter_anisotropic', 'OES_element_index_uint',
-                    'OES_standard_derivatives', 'OES_texture_float', 'OES_texture_float_linear',
-                    'OES_texture_half_float', 'OES_texture_half_float_linear',
-                    'OES_vertex_array_object', 'WEBGL_color_buffer_float',
-                    'WEBGL_compressed_texture_s3tc', 'WEBGL_debug_renderer_info',
-                    'WEBGL_depth_texture', 'WEBGL_draw_buffers', 'WEBGL_lose_context',
-                ];
-                const origGetExts = WebGLRenderingContext.prototype.getSupportedExtensions;
-                WebGLRenderingContext.prototype.getSupportedExtensions = function() {{
-                    return commonExtensions;
-                }};
-                if (typeof WebGL2RenderingContext !== 'undefined') {{
-                    const origGetExts2 = WebGL2RenderingContext.prototype.getSupportedExtensions;
-                    WebGL2RenderingContext.prototype.getSupportedExtensions = function() {{
-                        return [...commonExtensions, 'EXT_color_buffer_float', 'OES_draw_buffers_indexed'];
-                    }};
-                }}
-            }})();
-
-            // === 8b. Canvas fingerprint noise (per-profile, deterministic) ===
-            (function() {{
-                // Seed-based noise: small pixel-level perturbation unique to this profile
-                const seed = {fp_cores * 1000 + fp_memory * 100 + fp_touch};
-                const noiseLevel = 0.02;  // Imperceptible noise
-                const origToDataURL = HTMLCanvasElement.prototype.toDataURL;
-                HTMLCanvasElement.prototype.toDataURL = function(type, quality) {{
-                    const ctx = this.getContext('2d');
-                    if (ctx && this.width > 0 && this.height > 0) {{
-                        try {{
-                            const imageData = ctx.getImageData(0, 0, Math.min(this.width, 16), Math.min(this.height, 16));
-                            for (let i = 0; i < imageData.data.length; i += 4) {{
-                                // Deterministic per-profile noise using seed
-                                const noise = ((seed * (i + 1) * 9301 + 49297) % 233280) / 233280.0;
-                                if (noise < noiseLevel) {{
-                                    imageData.data[i] = imageData.data[i] ^ 1;  // Flip LSB of red channel
-                                }}
-                            }}
-                            ctx.putImageData(imageData, 0, 0);
-                        }} catch(e) {{}}  // Skip if tainted canvas (CORS)
-                    }}
-                    return origToDataURL.call(this, type, quality);
-                }};
-                // Also protect toBlob
-                const origToBlob = HTMLCanvasElement.prototype.toBlob;
-                HTMLCanvasElement.prototype.toBlob = function(cb, type, quality) {{
-                    this.toDataURL(type, quality);  // Apply noise first
-                    return origToBlob.call(this, cb, type, quality);
-                }};
-            }})();
-
-            // === 8c. AudioContext fingerprint protection ===
-            (function() {{
-                if (typeof AudioContext !== 'undefined' || typeof webkitAudioContext !== 'undefined') {{
-                    const AC = AudioContext || webkitAudioContext;
-                    const origCreateOscillator = AC.prototype.createOscillator;
-                    const origCreateDynamicsCompressor = AC.prototype.createDynamicsCompressor;
-                    // Wrap createDynamicsCompressor to add subtle per-profile variation
-                    AC.prototype.createDynamicsCompressor = function() {{
-                        const compressor = origCreateDynamicsCompressor.call(this);
-                        // Slightly vary default threshold per profile (imperceptible audio change)
-                        const offset = ({fp_cores} % 5) * 0.001;
-                        try {{
-                            compressor.threshold.value = -24 + offset;
-                            compressor.knee.value = 30 + offset;
-                        }} catch(e) {{}}
-                        return compressor;
-                    }};
-                    // Wrap getFloatFrequencyData to add noise
-                    const origGetFloat = AnalyserNode.prototype.getFloatFrequencyData;
-                    AnalyserNode.prototype.getFloatFrequencyData = function(array) {{
-                        origGetFloat.call(this, array);
-                        const noiseSeed = {fp_memory * 37 + fp_cores};
-                        for (let i = 0; i < array.length; i++) {{
-                            array[i] += ((noiseSeed * (i + 1) * 7919) % 100) / 100000.0;
-                        }}
-                    }};
-                }}
-            }})();
-
-            // === 9. WebRTC IP leak prevention (JS-level) ===
-            (function() {{
-                const origRTC = window.RTCPeerConnection || window.webkitRTCPeerConnection;
-                if (origRTC) {{
-                    const Wrapped = function(config, constraints) {{
-                        if (config && config.iceServers) {{
-                            config.iceServers = [];
-                        }}
-                        return new origRTC(config, constraints);
-                    }};
-                    Wrapped.prototype = origRTC.prototype;
-                    window.RTCPeerConnection = Wrapped;
-                    if (window.webkitRTCPeerConnection) window.webkitRTCPeerConnection = Wrapped;
-                }}
-            }})();
-
-            // === 10. Disable Notification constructor to avoid headless leak ===
-            if (typeof Notification !== 'undefined' && Notification.permission === 'denied') {{
-                Object.defineProperty(Notification, 'permission', {{get: () => 'default'}});
-            }}
-
-            // === 11. screen.orientation (Windows desktop default) ===
-            try {{
-                Object.defineProperty(screen, 'orientation', {{
-                    get: () => ({{
-                        angle: 0,
-                        type: 'landscape-primary',
-                        onchange: null,
-                        addEventListener: function() {{}},
-                        removeEventListener: function() {{}},
-                        lock: function() {{ return Promise.reject(new DOMException('screen.orientation.lock() is not available on this device.')); }},
-                        unlock: function() {{}},
-                    }})
-                }});
-            }} catch(e) {{}}
-
-            // === 12. window.external (IE/Edge legacy — Chrome on Windows has it) ===
-            if (!window.external || Object.keys(window.external).length === 0) {{
-                window.external = {{
-                    AddSearchProvider: function() {{}},
-                    IsSearchProviderInstalled: function() {{ return false; }},
-                }};
-            }}
-
-            // === 13. window.name (should be empty on fresh navigation) ===
-            if (window.name && window.name.length > 0) {{
-                window.name = '';
-            }}
-
-            // === 14. Protect injected properties from Reflect.ownKeys detection ===
-            // Wrap navigator.permissions.query toString to look native
-            try {{
-                const origPQ = navigator.permissions.query;
-                navigator.permissions.query.toString = () => 'function query() {{ [native code] }}';
-            }} catch(e) {{}}
-            // Wrap getBattery
-            try {{
-                if (navigator.getBattery) {{
-                    navigator.getBattery.toString = () => 'function getBattery() {{ [native code] }}';
-                }}
-            }} catch(e) {{}}
-            // Wrap mediaDevices.enumerateDevices
-            try {{
-                if (navigator.mediaDevices && navigator.mediaDevices.enumerateDevices) {{
-                    navigator.mediaDevices.enumerateDevices.toString = () => 'function enumerateDevices() {{ [native code] }}';
-                }}
-            }} catch(e) {{}}
-
-            // === 15. requestIdleCallback normalization ===
-            // In headless, idle callbacks fire immediately. Add realistic delay.
-            if (window.requestIdleCallback) {{
-                const origRIC = window.requestIdleCallback.bind(window);
-                window.requestIdleCallback = function(cb, opts) {{
-                    return origRIC(function(deadline) {{
-                        // Wrap deadline to report realistic timeRemaining
-                        const wrapped = {{
-                            didTimeout: deadline.didTimeout,
-                            timeRemaining: () => Math.min(deadline.timeRemaining(), 49.9),
-                        }};
-                        cb(wrapped);
-                    }}, opts);
-                }};
-                window.requestIdleCallback.toString = () => 'function requestIdleCallback() {{ [native code] }}';
-            }}
-
-            // === 16. Sanitize Error.stack traces (remove Playwright/puppeteer references) ===
-            (function() {{
-                const origPrepare = Error.prepareStackTrace;
-                Error.prepareStackTrace = function(error, stack) {{
-                    if (origPrepare) {{
-                        const result = origPrepare(error, stack);
-                        if (typeof result === 'string') {{
-                            return result.replace(/playwright|puppeteer|__playwright/gi, 'anonymous');
-                        }}
-                        return result;
-                    }}
-                    return error.stack;
-                }};
-            }})();
-        """)
-        
         logger.info(f"Browser launched successfully (Headless: {headless}, Persistent: {bool(user_data_dir)})")
         return p, browser, context, page
         
@@ -0,0 +1,446 @@
+"""
+Browser Pool - warm headless Chromium shared by the Oracle scrapers
+===================================================================
+
+Every scrape (profile stats, comments, trending sounds, hashtag checks) used
+to call launch_browser() and tear down a whole Chromium + Playwright driver
+afterwards: several seconds of launch per request, and concurrent scrapes
+spawned an unbounded number of browser processes.
+
+The pool keeps up to BROWSER_POOL_SIZE headless browsers alive and hands out
+isolated BrowserContexts (own cookies/storage, stealth scripts applied):
+
+    lease = await get_browser_pool().acquire(user_agent=ua)
+    try:
+        await lease.page.goto(url)
+    finally:
+        await lease.release()
+
+    # or: async with get_browser_pool().lease() as lease: ...
+
+    - At most BROWSER_POOL_SIZE * BROWSER_POOL_CONTEXTS_PER_BROWSER leases at
+      once; callers beyond that wait up to BROWSER_POOL_ACQUIRE_TIMEOUT_SECONDS
+    - A lease held longer than BROWSER_POOL_LEASE_TIMEOUT_SECONDS is expired:
+      its context is closed (pending page calls fail) and the slot returns
+    - A browser is recycled after BROWSER_POOL_MAX_USES leases, or as soon as
+      it disconnects (crash)
+    - start() (API startup) warms the pool up and runs the idle eviction: a
+      browser without leases for BROWSER_POOL_IDLE_SECONDS is closed, down
+      to BROWSER_POOL_MIN_WARM browsers
+    - stats() reports browsers, leases, waits, launches, recycles, crashes
+
+Playwright objects belong to one event loop, so there is one pool per loop.
+Persistent/headful/proxied sessions (uploads, repairs) keep using
+launch_browser().
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_POOL_CONTEXTS_PER_BROWSER = int(os.getenv("BROWSER_POOL_CONTEXTS_PER_BROWSER", "2"))
+BROWSER_POOL_MAX_USES = int(os.getenv("BROWSER_POOL_MAX_USES", "50"))
+BROWSER_POOL_LEASE_TIMEOUT = float(os.getenv("BROWSER_POOL_LEASE_TIMEOUT_SECONDS", "120"))
+BROWSER_POOL_ACQUIRE_TIMEOUT = float(os.getenv("BROWSER_POOL_ACQUIRE_TIMEOUT_SECONDS", "60"))
+BROWSER_POOL_IDLE_SECONDS = float(os.getenv("BROWSER_POOL_IDLE_SECONDS", "600"))
+BROWSER_POOL_MIN_WARM = int(os.getenv("BROWSER_POOL_MIN_WARM", "0"))
+
+# (playwright, browser) — injectable for tests, like the stealth hook
+Launcher = Callable[[], Awaitable[Tuple[Any, Any]]]
+Stealth = Callable[[Any, Any, str], Awaitable[None]]
+
+
+class BrowserPoolTimeout(TimeoutError):
+    """No context became available within the acquire timeout."""
+
+
+async def _launch_headless() -> Tuple[Any, Any]:
+    from playwright.async_api import async_playwright
+    from core.browser import SYSTEM_CHROMIUM_PATH, _browser_args
+    from core.process_manager import process_manager
+
+    p = await async_playwright().start()
+    process_manager.register(p)
+    launch_kwargs: Dict[str, Any] = {
+        "headless": True,
+        "args": _browser_args(True),
+        "ignore_default_args": ["--enable-automation"],
+    }
+    if SYSTEM_CHROMIUM_PATH:
+        launch_kwargs["executable_path"] = SYSTEM_CHROMIUM_PATH
+    try:
+        browser = await p.chromium.launch(**launch_kwargs)
+    except Exception:
+        process_manager.unregister(p)
+        await p.stop()
+        raise
+    process_manager.register(browser)
+    return p, browser
+
+
+class PooledBrowser:
+    _ids = itertools.count(1)
+
+    def __init__(self, playwright, browser):
+        self.id = next(self._ids)
+        self.playwright = playwright
+        self.browser = browser
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.uses = 0
+        self.active = 0
+        self.crashed = False
+        self.retire_reason: Optional[str] = None
+        try:
+            browser.on("disconnected", self._on_disconnected)
+        except Exception:
+            pass
+
+    def _on_disconnected(self, *_args) -> None:
+        self.crashed = True
+
+    @property
+    def healthy(self) -> bool:
+        if self.crashed:
+            return False
+        try:
+            return self.browser.is_connected()
+        except Exception:
+            return False
+
+    async def close(self) -> None:
+        from core.process_manager import process_manager
+        for resource in (self.browser, self.playwright):
+            try:
+                process_manager.unregister(resource)
+            except Exception:
+                pass
+        try:
+            await self.browser.close()
+        except Exception:
+            pass
+        try:
+            await self.playwright.stop()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "uses": self.uses,
+            "active": self.active,
+            "age_seconds": round(time.monotonic() - self.created_at, 1),
+            "idle_seconds": 0.0 if self.active else round(time.monotonic() - self.last_used_at, 1),
+            "healthy": self.healthy,
+            "retiring": self.retire_reason,
+        }
+
+
+class BrowserLease:
+    """An isolated context (+ first page) on a pooled browser."""
+
+    def __init__(self, pool: "BrowserPool", pooled: PooledBrowser, context, page, timeout: float):
+        self.pool = pool
+        self.pooled = pooled
+        self.context = context
+        self.page = page
+        self.acquired_at = time.monotonic()
+        self.expired = False
+        self.released = False
+        self._expiry_task: Optional[asyncio.Future] = None
+        self._expiry = asyncio.get_running_loop().call_later(timeout, self._expire)
+
+    def _expire(self) -> None:
+        if self.released:
+            return
+        self.expired = True
+        self.pool._expired += 1
+        logger.warning(
+            f"[BROWSER POOL] Lease on browser #{self.pooled.id} exceeded its timeout; closing its context."
+        )
+        self._expiry_task = asyncio.ensure_future(self.release())
+
+    async def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        self._expiry.cancel()
+        try:
+            await asyncio.wait_for(self.context.close(), timeout=10)
+        except Exception:
+            pass
+        await self.pool._return(self)
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        contexts_per_browser: int = BROWSER_POOL_CONTEXTS_PER_BROWSER,
+        max_uses: int = BROWSER_POOL_MAX_USES,
+        lease_timeout: float = BROWSER_POOL_LEASE_TIMEOUT,
+        acquire_timeout: float = BROWSER_POOL_ACQUIRE_TIMEOUT,
+        idle_timeout: float = BROWSER_POOL_IDLE_SECONDS,
+        min_warm: int = BROWSER_POOL_MIN_WARM,
+        launcher: Optional[Launcher] = None,
+        stealth: Optional[Stealth] = None,
+    ):
+        self.size = max(1, size)
+        self.contexts_per_browser = max(1, contexts_per_browser)
+        self.max_uses = max(1, max_uses)
+        self.lease_timeout = lease_timeout
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.min_warm = max(0, min(min_warm, self.size))
+        self._launcher = launcher or _launch_headless
+        self._stealth = stealth
+        self._browsers: List[PooledBrowser] = []
+        self._slots = asyncio.Semaphore(self.size * self.contexts_per_browser)
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self._evictor: Optional[asyncio.Task] = None
+        self._waiting = 0
+        self._leases = 0
+        self._launches = 0
+        self._recycles = 0
+        self._crashes = 0
+        self._expired = 0
+        self._idle_evictions = 0
+        self._acquire_timeouts = 0
+        self._wait_seconds = 0.0
+
+    async def warm_up(self, count: Optional[int] = None) -> None:
+        """Launch browsers up front so the first scrapes skip the launch cost."""
+        async with self._lock:
+            while len(self._browsers) < min(count or self.size, self.size):
+                await self._launch()
+
+    async def start(self) -> None:
+        """API startup: warm the pool up, then keep evicting idle browsers."""
+        try:
+            await self.warm_up()
+        except Exception as e:
+            logger.warning(f"[BROWSER POOL] Warm-up failed, browsers will launch on demand: {e}")
+        if self._evictor is None or self._evictor.done():
+            self._evictor = asyncio.create_task(self._evict_loop())
+
+    async def _evict_loop(self) -> None:
+        interval = max(1.0, min(self.idle_timeout / 4, 60.0))
+        while not self._closed:
+            await asyncio.sleep(interval)
+            try:
+                await self.evict_idle()
+            except Exception as e:
+                logger.error(f"[BROWSER POOL] Idle eviction failed: {e}")
+
+    async def evict_idle(self) -> int:
+        """Closes browsers idle for longer than idle_timeout, keeping min_warm alive."""
+        now = time.monotonic()
+        async with self._lock:
+            live = [b for b in self._browsers if b.retire_reason is None]
+            stale = sorted(
+                (b for b in live if b.active == 0 and now - b.last_used_at >= self.idle_timeout),
+                key=lambda b: b.last_used_at,
+            )
+            evicted = stale[:max(0, len(live) - self.min_warm)]
+            for pooled in evicted:
+                self._mark_retiring(pooled, "idle")
+            await self._retire_idle()
+            return len(evicted)
+
+    async def _launch(self) -> PooledBrowser:
+        playwright, browser = await self._launcher()
+        pooled = PooledBrowser(playwright, browser)
+        self._browsers.append(pooled)
+        self._launches += 1
+        logger.info(f"[BROWSER POOL] Browser #{pooled.id} launched ({len(self._browsers)}/{self.size})")
+        return pooled
+
+    def _mark_retiring(self, pooled: PooledBrowser, reason: str) -> None:
+        """Stops new leases on a browser; it closes once its leases return."""
+        if pooled.retire_reason is not None:
+            return
+        pooled.retire_reason = reason
+        if reason == "crash":
+            self._crashes += 1
+        elif reason == "idle":
+            self._idle_evictions += 1
+        else:
+            self._recycles += 1
+
+    async def _retire_idle(self) -> None:
+        """Closes retiring/crashed browsers with no active lease (caller holds the lock)."""
+        for pooled in list(self._browsers):
+            if not pooled.healthy:
+                self._mark_retiring(pooled, "crash")
+            if pooled.retire_reason is None or pooled.active > 0:
+                continue
+            self._browsers.remove(pooled)
+            logger.info(
+                f"[BROWSER POOL] Browser #{pooled.id} retired ({pooled.retire_reason}, {pooled.uses} uses)"
+            )
+            await pooled.close()
+
+    async def _pick_browser(self) -> PooledBrowser:
+        async with self._lock:
+            await self._retire_idle()
+            candidates = [
+                b for b in self._browsers
+                if b.retire_reason is None and b.active < self.contexts_per_browser
+            ]
+            # Prefer spreading load over launching while there is room for another browser
+            idle = [b for b in candidates if b.active == 0]
+            if idle:
+                pooled = idle[0]
+            elif len(self._browsers) < self.size or not candidates:
+                pooled = await self._launch()
+            else:
+                pooled = min(candidates, key=lambda b: b.active)
+            pooled.active += 1
+            pooled.uses += 1
+            if pooled.uses >= self.max_uses:
+                self._mark_retiring(pooled, "recycle")  # Finishes current leases, then closes
+            return pooled
+
+    async def acquire(
+        self,
+        user_agent: Optional[str] = None,
+        viewport: Optional[Dict[str, int]] = None,
+        storage_state: Optional[str] = None,
+        fingerprint_seed: str = "",
+        timeout: Optional[float] = None,
+    ) -> BrowserLease:
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        started = time.monotonic()
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self._acquire_timeouts += 1
+            raise BrowserPoolTimeout(f"No browser context available after {self.acquire_timeout:.0f}s")
+        finally:
+            self._waiting -= 1
+        self._wait_seconds += time.monotonic() - started
+
+        pooled = None
+        try:
+            pooled = await self._pick_browser()
+            context, page = await self._new_context(pooled, user_agent, viewport, storage_state, fingerprint_seed)
+        except BaseException:
+            if pooled is not None:
+                pooled.active -= 1
+                async with self._lock:
+                    await self._retire_idle()
+            self._slots.release()
+            raise
+        self._leases += 1
+        return BrowserLease(self, pooled, context, page, timeout or self.lease_timeout)
+
+    async def _new_context(self, pooled, user_agent, viewport, storage_state, fingerprint_seed):
+        from core.network_utils import DEFAULT_LOCALE, DEFAULT_TIMEZONE, get_random_user_agent
+
+        options: Dict[str, Any] = {
+            "viewport": viewport or {"width": 1920, "height": 1080},
+            "user_agent": user_agent or get_random_user_agent(),
+            "locale": DEFAULT_LOCALE,
+            "timezone_id": DEFAULT_TIMEZONE,
+        }
+        if storage_state and os.path.exists(storage_state):
+            options["storage_state"] = storage_state
+        context = await pooled.browser.new_context(**options)
+        try:
+            page = await context.new_page()
+            stealth = self._stealth
+            if stealth is None:
+                from core.browser import apply_stealth as stealth
+            await stealth(context, page, fingerprint_seed or f"pool-{pooled.id}")
+        except BaseException:
+            try:
+                await context.close()
+            except Exception:
+                pass
+            raise
+        return context, page
+
+    async def _return(self, lease: BrowserLease) -> None:
+        lease.pooled.active -= 1
+        lease.pooled.last_used_at = time.monotonic()
+        try:
+            async with self._lock:
+                await self._retire_idle()
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def lease(self, **kwargs):
+        lease = await self.acquire(**kwargs)
+        try:
+            yield lease
+        finally:
+            await lease.release()
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._evictor is not None:
+            self._evictor.cancel()
+            self._evictor = None
+        async with self._lock:
+            browsers, self._browsers = self._browsers, []
+        for pooled in browsers:
+            await pooled.close()
+
+    def stats(self) -> Dict[str, Any]:
+        capacity = self.size * self.contexts_per_browser
+        in_use = sum(b.active for b in self._browsers)
+        return {
+            "size": self.size,
+            "capacity": capacity,
+            "in_use": in_use,
+            "waiting": self._waiting,
+            "browsers": [b.stats() for b in self._browsers],
+            "leases": self._leases,
+            "avg_wait_ms": round(self._wait_seconds / self._leases * 1000, 1) if self._leases else 0.0,
+            "launches": self._launches,
+            "recycles": self._recycles,
+            "crashes": self._crashes,
+            "idle_evictions": self._idle_evictions,
+            "expired_leases": self._expired,
+            "acquire_timeouts": self._acquire_timeouts,
+        }
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BrowserPool]" = weakref.WeakKeyDictionary()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Pool of the running event loop (created on first use)."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = BrowserPool()
+        _pools[loop] = pool
+    return pool
+
+
+def browser_pool_stats() -> List[Dict[str, Any]]:
+    return [pool.stats() for pool in list(_pools.values())]
+
+
+async def close_browser_pools() -> None:
+    """Shutdown: close the pool of the running loop."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    pool = _pools.pop(loop, None)
+    if pool is not None:
+        await pool.close()
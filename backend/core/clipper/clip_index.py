@@ -0,0 +1,178 @@
+"""
+Clip URL Index - Dedup global de clipes consumidos por jobs
+============================================================
+
+Tabela normalizada url -> (job, status, retries) mantida pelos listeners
+de ClipJob (core/clipper/models.py). O monitor consulta apenas as URLs
+candidatas com WHERE url IN (...), em vez de carregar os arrays JSON de
+milhares de jobs a cada verificacao de target.
+
+Cada URL aponta para o job mais recente que a consumiu (retries criam um
+job novo com as mesmas URLs). Remover um job libera suas URLs, como antes.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from core.clipper.models import ClipJob, ClipURL
+
+logger = logging.getLogger(__name__)
+
+# Status que bloqueiam o reprocessamento de um clipe
+PROCESSED_STATUSES = (
+    "pending", "downloading", "transcribing", "editing",
+    "stitching", "completed", "waiting_clips",
+)
+
+# SQLite limita o numero de parametros por statement
+LOOKUP_BATCH_SIZE = 500
+
+
+def _status_value(status) -> Optional[str]:
+    """ClipJob.status aceita JobStatus (str Enum) ou str puro."""
+    return getattr(status, "value", status)
+
+
+def _upsert_rows(connection, rows: List[dict]) -> None:
+    """INSERT ... ON CONFLICT(url) — so sobrescreve se o job e igual ou mais novo."""
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(ClipURL).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ClipURL.url],
+            set_={
+                "job_id": stmt.excluded.job_id,
+                "target_id": stmt.excluded.target_id,
+                "status": stmt.excluded.status,
+                "retry_count": stmt.excluded.retry_count,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=ClipURL.job_id <= stmt.excluded.job_id,
+        )
+        connection.execute(stmt)
+        return
+
+    # Fallback generico (sem upsert nativo)
+    for row in rows:
+        existing = connection.execute(
+            select(ClipURL.job_id).where(ClipURL.url == row["url"])
+        ).first()
+        if existing is None:
+            connection.execute(ClipURL.__table__.insert().values(**row))
+        elif existing.job_id <= row["job_id"]:
+            values = {k: v for k, v in row.items() if k not in ("url", "first_seen_at")}
+            connection.execute(
+                update(ClipURL).where(ClipURL.url == row["url"]).values(**values)
+            )
+
+
+def sync_job_urls(
+    connection,
+    job_id: int,
+    target_id: Optional[int],
+    urls: Iterable[str],
+    status,
+    retry_count: Optional[int],
+) -> None:
+    """Reflete o estado atual de um ClipJob no indice (chamado dentro do flush)."""
+    urls = list(dict.fromkeys(u for u in (urls or []) if u))
+    now = datetime.now(timezone.utc)
+
+    if urls:
+        rows = [
+            {
+                "url": u,
+                "job_id": job_id,
+                "target_id": target_id,
+                "status": _status_value(status),
+                "retry_count": retry_count or 0,
+                "first_seen_at": now,
+                "updated_at": now,
+            }
+            for u in urls
+        ]
+        for i in range(0, len(rows), LOOKUP_BATCH_SIZE):
+            _upsert_rows(connection, rows[i:i + LOOKUP_BATCH_SIZE])
+
+    # URLs removidas do job (reorder/remove/merge) deixam de apontar para ele
+    stale = delete(ClipURL).where(ClipURL.job_id == job_id)
+    if urls:
+        stale = stale.where(ClipURL.url.notin_(urls))
+    connection.execute(stale)
+
+
+def drop_job_urls(connection, job_id: int) -> None:
+    """Remove as URLs de um job deletado (libera para reprocessamento)."""
+    connection.execute(delete(ClipURL).where(ClipURL.job_id == job_id))
+
+
+def delete_jobs(db: Session, job_ids: Iterable[int]) -> int:
+    """
+    Delete em massa de ClipJobs junto com as URLs do indice. O delete por
+    query nao dispara o after_delete; sem isto as URLs ficariam consumidas.
+    """
+    job_ids = list(job_ids)
+    if not job_ids:
+        return 0
+    db.execute(delete(ClipURL).where(ClipURL.job_id.in_(job_ids)))
+    return db.query(ClipJob).filter(ClipJob.id.in_(job_ids)).delete(synchronize_session=False)
+
+
+def lookup_urls(db: Session, urls: Iterable[str]) -> Dict[str, Tuple[str, int]]:
+    """Retorna {url: (status, retry_count)} para as URLs presentes no indice."""
+    urls = list(dict.fromkeys(u for u in urls if u))
+    found: Dict[str, Tuple[str, int]] = {}
+    for i in range(0, len(urls), LOOKUP_BATCH_SIZE):
+        batch = urls[i:i + LOOKUP_BATCH_SIZE]
+        rows = db.execute(
+            select(ClipURL.url, ClipURL.status, ClipURL.retry_count)
+            .where(ClipURL.url.in_(batch))
+        ).all()
+        for url, status, retries in rows:
+            found[url] = (status, retries or 0)
+    return found
+
+
+def processed_urls(db: Session, urls: Iterable[str], max_retries: int) -> Set[str]:
+    """URLs que nao devem ser reprocessadas: jobs vivos/concluidos ou falhas esgotadas."""
+    return {
+        url
+        for url, (status, retries) in lookup_urls(db, urls).items()
+        if status in PROCESSED_STATUSES or (status == "failed" and retries >= max_retries)
+    }
+
+
+def backfill_clip_url_index(db: Session, batch_size: int = 1000) -> int:
+    """
+    Popula o indice a partir dos ClipJobs existentes (ordem crescente de id,
+    para que o job mais recente de cada URL prevaleca). Idempotente.
+    """
+    connection = db.connection()
+    last_id = 0
+    total = 0
+    while True:
+        jobs = db.execute(
+            select(ClipJob.id, ClipJob.target_id, ClipJob.clip_urls, ClipJob.status, ClipJob.retry_count)
+            .where(ClipJob.id > last_id)
+            .order_by(ClipJob.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not jobs:
+            break
+        for job_id, target_id, urls, status, retries in jobs:
+            sync_job_urls(connection, job_id, target_id, urls or [], status, retries)
+            total += len(urls or [])
+        last_id = jobs[-1].id
+        db.commit()
+        connection = db.connection()
+
+    logger.info(f"Clip URL index: {total} URL(s) indexadas a partir dos jobs existentes.")
+    return total
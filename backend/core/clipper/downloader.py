@@ -16,13 +16,15 @@ Requisitos:
 import os
 import asyncio
 import logging
-import json
 from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
+from urllib.parse import urlparse
 
 from core.database import safe_session
 from core.clipper.models import ClipJob
+from core.clipper.progress import progress_writer
 from core.config import DATA_DIR
+from core.clipper.media_info import MediaInfo, probe_media
 
 logger = logging.getLogger("ClipperDownloader")
 
@@ -30,6 +32,20 @@ logger = logging.getLogger("ClipperDownloader")
 CLIPS_DIR = os.path.join(DATA_DIR, "clipper", "clips")
 os.makedirs(CLIPS_DIR, exist_ok=True)
 
+# Downloads simultaneos por host (compartilhado entre jobs do processo)
+DOWNLOAD_PER_HOST_LIMIT = int(os.getenv("CLIPPER_DOWNLOAD_PER_HOST", "3"))
+_HOST_SEMAPHORES: Dict[str, asyncio.Semaphore] = {}
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    """Semaforo global do host da URL (clips.twitch.tv, www.twitch.tv, ...)."""
+    host = (urlparse(url).hostname or "").lower()
+    sem = _HOST_SEMAPHORES.get(host)
+    if sem is None:
+        sem = asyncio.Semaphore(max(1, DOWNLOAD_PER_HOST_LIMIT))
+        _HOST_SEMAPHORES[host] = sem
+    return sem
+
 
 def _sanitize_filename(text: str, max_len: int = 60) -> str:
     """Remove caracteres invalidos para nomes de arquivo."""
@@ -77,19 +93,20 @@ async def download_clip(
         timeout_seconds: Timeout maximo para o download
 
     Returns:
-        Dict com: success, path, duration, file_size, error
+        Dict com: success, path, duration, file_size, probe, error
     """
     if os.path.exists(output_path):
         # Ja baixado (idempotencia)
         file_size = os.path.getsize(output_path)
         if file_size > 1000:  # >1KB = provavelmente valido
             logger.info(f"Clipe ja existe: {output_path} ({file_size} bytes)")
-            duration = await _get_duration(output_path)
+            probe = await _probe_media(output_path)
             return {
                 "success": True,
                 "path": output_path,
-                "duration": duration,
+                "duration": probe["duration"],
                 "file_size": file_size,
+                "probe": probe,
                 "error": None,
             }
 
@@ -142,18 +159,19 @@ async def download_clip(
                 }
 
         file_size = os.path.getsize(output_path)
-        duration = await _get_duration(output_path)
+        probe = await _probe_media(output_path)
 
         logger.info(
             f"Clipe baixado: {os.path.basename(output_path)} "
-            f"({file_size / 1024 / 1024:.1f}MB, {duration:.1f}s)"
+            f"({file_size / 1024 / 1024:.1f}MB, {probe['duration']:.1f}s)"
         )
 
         return {
             "success": True,
             "path": output_path,
-            "duration": duration,
+            "duration": probe["duration"],
             "file_size": file_size,
+            "probe": probe,
             "error": None,
         }
 
@@ -186,28 +204,6 @@ async def download_clip(
         }
 
 
-async def _has_audio_stream(file_path: str) -> bool:
-    """Verifica se um arquivo de vídeo possui stream de áudio via ffprobe."""
-    try:
-        cmd = [
-            "ffprobe", "-v", "quiet",
-            "-select_streams", "a",
-            "-show_entries", "stream=codec_type",
-            "-of", "csv=p=0",
-            file_path,
-        ]
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=10)
-        return bool(stdout.decode().strip())
-    except Exception as e:
-        logger.warning(f"Falha ao verificar audio de {file_path}: {e}")
-        return True  # Assume que tem audio (fail-safe)
-
-
 def _cleanup_partial_files(output_path: str) -> None:
     """Remove arquivos .part e temporários associados a um download."""
     base = os.path.splitext(output_path)[0]
@@ -227,33 +223,25 @@ def _cleanup_partial_files(output_path: str) -> None:
             pass
 
 
-async def _get_duration(file_path: str) -> float:
+async def _probe_media(file_path: str) -> Dict[str, Any]:
     """
-    Obtem a duracao de um arquivo de video usando ffprobe.
-    Retorna 0.0 se falhar.
+    Um unico ffprobe por arquivo (cacheado em media_info): duracao + streams.
+    Falhas retornam duracao 0 e assumem audio presente (fail-safe).
+
+    O resultado e persistido em ClipJob.clip_metadata[i]["probe"] para que
+    as etapas seguintes (edicao/render) nao precisem probar de novo.
     """
     try:
-        cmd = [
-            "ffprobe",
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_format",
-            file_path,
-        ]
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=15)
-
-        if process.returncode == 0:
-            info = json.loads(stdout.decode("utf-8", errors="replace"))
-            return float(info.get("format", {}).get("duration", 0))
-    except Exception as e:
-        logger.warning(f"Nao foi possivel obter duracao de {file_path}: {e}")
-
-    return 0.0
+        return (await probe_media(file_path)).as_dict()
+    except RuntimeError as e:
+        logger.warning(f"Nao foi possivel probar {file_path}: {e}")
+        return MediaInfo(
+            path=file_path,
+            duration=0.0,
+            has_audio=True,
+            has_video=True,
+            file_size=os.path.getsize(file_path) if os.path.exists(file_path) else 0,
+        ).as_dict()
 
 
 async def download_job_clips(job_id: int) -> Dict[str, Any]:
@@ -279,26 +267,40 @@ async def download_job_clips(job_id: int) -> Dict[str, Any]:
     local_paths = []
     total_duration = 0.0
     errors = []
+    probes: Dict[int, Dict[str, Any]] = {}
+    done = 0
 
-    for i, url in enumerate(clip_urls):
+    async def _download_one(i: int, url: str) -> Dict[str, Any]:
+        nonlocal done
         title = clip_metadata[i].get("title", f"clip_{i}") if i < len(clip_metadata) else f"clip_{i}"
         output_path = _build_output_path(job_id, i, title)
-        result = await download_clip(url, output_path)
-
-        if result["success"]:
-            # Validação de áudio: clips sem áudio falham no Whisper
-            has_audio = await _has_audio_stream(result["path"])
-            if not has_audio:
-                logger.warning(f"Job #{job_id}: Clip {i} sem stream de audio, pulando: {title}")
-                errors.append(f"Clip {i} ({url}): sem audio")
-                continue
-            local_paths.append(result["path"])
-            total_duration += result.get("duration", 0)
-        else:
-            errors.append(f"Clip {i} ({url}): {result['error']}")
+        async with _host_semaphore(url):
+            result = await download_clip(url, output_path)
+        if not result["success"]:
             _cleanup_partial_files(output_path)
-
-        _update_job_progress(job_id, i + 1, len(clip_urls))
+        result["title"] = title
+        done += 1
+        _update_job_progress(job_id, done, len(clip_urls))
+        return result
+
+    results = await asyncio.gather(*(
+        _download_one(i, url) for i, url in enumerate(clip_urls)
+    ))
+
+    # Consolidar na ordem original dos clipes
+    for i, (url, result) in enumerate(zip(clip_urls, results)):
+        if not result["success"]:
+            errors.append(f"Clip {i} ({url}): {result['error']}")
+            continue
+        probe = result["probe"]
+        probes[i] = probe
+        # Validação de áudio: clips sem áudio falham no Whisper
+        if not probe["has_audio"]:
+            logger.warning(f"Job #{job_id}: Clip {i} sem stream de audio, pulando: {result['title']}")
+            errors.append(f"Clip {i} ({url}): sem audio")
+            continue
+        local_paths.append(result["path"])
+        total_duration += result.get("duration", 0)
 
     # Duration check: se downloads parciais resultaram em duração muito curta,
     # não vale continuar (transcrição + edição serão desperdiçados)
@@ -316,7 +318,7 @@ async def download_job_clips(job_id: int) -> Dict[str, Any]:
             "errors": errors + [f"Duração total {total_duration:.1f}s < {MIN_VIABLE_DOWNLOAD_DURATION}s mínimo"],
         }
 
-    _finalize_job_download(job_id, local_paths, total_duration, errors)
+    _finalize_job_download(job_id, local_paths, total_duration, errors, probes)
 
     logger.info(
         f"Job #{job_id}: {len(local_paths)}/{len(clip_urls)} clipes baixados. "
@@ -347,26 +349,32 @@ def _start_download_job(job_id: int):
 
 
 def _update_job_progress(job_id: int, current: int, total: int) -> None:
-    """Atualiza o progresso de download no banco (Weight: 0-25%)."""
+    """Reporta o progresso de download (Weight: 0-25%); gravado em lote pelo progress_writer."""
     progress = int((current / total) * 25)
-    with safe_session() as db:
-        j = db.query(ClipJob).filter(ClipJob.id == job_id).first()
-        if j:
-            j.progress_pct = progress
-            j.current_step = f"Baixando clipe {current}/{total}..."
-            db.commit()
+    progress_writer.report(job_id, progress, f"Baixando clipe {current}/{total}...", status="downloading")
 
 
 def _finalize_job_download(
-    job_id: int, local_paths: List[str], total_duration: float, errors: List[str]
+    job_id: int,
+    local_paths: List[str],
+    total_duration: float,
+    errors: List[str],
+    probes: Optional[Dict[int, Dict[str, Any]]] = None,
 ) -> None:
-    """Atualiza o job com os resultados finais do download."""
+    """Atualiza o job com os resultados finais do download (+ probe de cada clipe)."""
     with safe_session() as db:
         job = db.query(ClipJob).filter(ClipJob.id == job_id).first()
         if not job:
             logger.error(f"Job #{job_id} nao encontrado em _finalize_job_download.")
             return
         job.clip_local_paths = local_paths
+        if probes:
+            # Lista nova: JSON mutado in-place nao e detectado pelo SQLAlchemy
+            metadata = [dict(m) if isinstance(m, dict) else m for m in (job.clip_metadata or [])]
+            for i, probe in probes.items():
+                if i < len(metadata) and isinstance(metadata[i], dict):
+                    metadata[i]["probe"] = probe
+            job.clip_metadata = metadata
         if local_paths:
             job.status = "transcribing"
             job.current_step = "Download concluido. Aguardando transcricao."
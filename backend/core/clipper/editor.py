@@ -27,12 +27,12 @@ Requisitos:
 
 import os
 import asyncio
-import json
 import logging
 import random
 from typing import Optional, Dict, Any, Tuple
 
 from core.config import DATA_DIR
+from .media_info import probe_media
 from .vision import detect_facecam_box
 
 logger = logging.getLogger("ClipperEditor")
@@ -76,6 +76,37 @@ AUDIO_BITRATE = "192k"
 PRESET = "medium"
 CRF = "20"
 
+# ── Concorrencia da etapa de edicao ──────────────────────────────────
+# Encodes libx264 1080x1920 escalam mal acima de ~8 threads; rodar varios
+# clipes em paralelo com um orcamento de threads cada aproveita melhor os cores.
+EDIT_MAX_PARALLEL = int(os.getenv("CLIPPER_EDIT_PARALLEL", "4"))
+EDIT_THREADS_PER_CLIP = int(os.getenv("CLIPPER_EDIT_THREADS", "0"))  # 0 = auto
+MIN_THREADS_PER_EDIT = 4
+
+
+def plan_edit_concurrency(
+    n_clips: int,
+    cpu_count: Optional[int] = None,
+    max_parallel: int = EDIT_MAX_PARALLEL,
+    threads_per_clip: int = EDIT_THREADS_PER_CLIP,
+) -> Tuple[int, Optional[int]]:
+    """
+    Decide quantos clipes editar em paralelo e quantas threads cada FFmpeg usa.
+
+    Returns:
+        (workers, threads) — threads None = deixar o FFmpeg decidir (so quando
+        ha um unico encode por vez e nenhum orcamento explicito).
+    """
+    cores = cpu_count or os.cpu_count() or 1
+    per_clip = threads_per_clip if threads_per_clip > 0 else MIN_THREADS_PER_EDIT
+    workers = max(1, min(n_clips, max_parallel, cores // per_clip))
+
+    if threads_per_clip > 0:
+        return workers, threads_per_clip
+    if workers == 1:
+        return 1, None
+    return workers, max(1, cores // workers)
+
 
 # ── Ken Burns: Zoom dinâmico para layouts estáticos ──────────────────
 # Cria movimento sutil onde a câmera seria fixa (podcast/street).
@@ -448,55 +479,20 @@ def _build_edit_filter(
 
 async def _probe_video(video_path: str) -> Dict[str, Any]:
     """
-    Obtem informacoes do video via ffprobe.
+    Obtem informacoes do video via ffprobe (cacheado em media_info).
     Retorna dict com: width, height, duration, codec, fps
     """
-    cmd = [
-        "ffprobe",
-        "-v", "quiet",
-        "-print_format", "json",
-        "-show_streams",
-        "-show_format",
-        video_path,
-    ]
+    info = await probe_media(video_path)
 
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=15)
-
-    if process.returncode != 0:
-        error = stderr.decode("utf-8", errors="replace").strip()
-        raise RuntimeError(f"ffprobe falhou para {video_path}: {error[:200]}")
-
-    import json
-    data = json.loads(stdout.decode("utf-8", errors="replace"))
-
-    # Encontrar stream de video
-    video_stream = None
-    for stream in data.get("streams", []):
-        if stream.get("codec_type") == "video":
-            video_stream = stream
-            break
-
-    if not video_stream:
+    if not info.has_video:
         raise RuntimeError(f"Nenhum stream de video encontrado em {video_path}")
 
-    fmt = data.get("format", {})
-
-    # Parsear FPS de r_frame_rate (ex: "30/1" ou "30000/1001")
-    fps_str = video_stream.get("r_frame_rate", "30/1")
-    fps_parts = fps_str.split("/")
-    fps = float(fps_parts[0]) / float(fps_parts[1]) if len(fps_parts) == 2 else 30.0
-
     return {
-        "width": int(video_stream.get("width", 1920)),
-        "height": int(video_stream.get("height", 1080)),
-        "duration": float(fmt.get("duration", 0)),
-        "codec": video_stream.get("codec_name", "unknown"),
-        "fps": round(fps, 2),
+        "width": info.width or 1920,
+        "height": info.height or 1080,
+        "duration": info.duration,
+        "codec": info.codec or "unknown",
+        "fps": info.fps or 30.0,
     }
 
 
@@ -509,6 +505,8 @@ async def edit_clip(
     layout_mode: str = "gameplay",
     asb_params: Optional[Dict[str, Any]] = None,
     clip_title: Optional[str] = None,
+    threads: Optional[int] = None,
+    probe: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
     """
     Processa um unico clipe: recorta facecam/gameplay, verticaliza 9:16,
@@ -521,6 +519,8 @@ async def edit_clip(
         timeout_seconds: Timeout maximo para o FFmpeg
         asb_params: Anti-shadowban params (de generate_asb_params()). None = gerar auto.
         clip_title: Titulo do clip para metadados do MP4.
+        threads: Orcamento de threads do FFmpeg (filtros + libx264). None = auto.
+        probe: Probe ja feito no download (clip_metadata[i]["probe"]). None = probar.
 
     Returns:
         Dict com: success, output_path, duration, file_size, error
@@ -532,11 +532,12 @@ async def edit_clip(
         logger.warning(f"Arquivo .ass nao encontrado: {ass_path}. Editando sem legendas.")
         ass_path = None
 
-    # Probar video source para obter dimensoes
-    try:
-        probe = await _probe_video(video_path)
-    except RuntimeError as e:
-        return _error_result(str(e))
+    # Probar video source para obter dimensoes (reusa o probe do download)
+    if not (probe and probe.get("width") and probe.get("height") and probe.get("duration")):
+        try:
+            probe = await _probe_video(video_path)
+        except RuntimeError as e:
+            return _error_result(str(e))
 
     source_w = probe["width"]
     source_h = probe["height"]
@@ -553,7 +554,11 @@ async def edit_clip(
 
     # Analise visual para buscar a facecam
     logger.info(f"Analisando video (layout_mode={layout_mode})...")
-    facecam_box = detect_facecam_box(video_path, channel_name=channel_name)
+    # Em executor: a deteccao e CPU-bound e bloquearia edicoes paralelas
+    loop = asyncio.get_running_loop()
+    facecam_box = await loop.run_in_executor(
+        None, lambda: detect_facecam_box(video_path, channel_name=channel_name)
+    )
 
     # ── Anti-Shadowban: params ──
     if asb_params is None:
@@ -587,9 +592,15 @@ async def edit_clip(
     # Encoding com variação anti-fingerprint
     r_crf, r_vbr, r_abr, r_preset = _randomized_encoding()
 
+    # Orcamento de threads (evita oversubscription com edicoes em paralelo)
+    thread_args = []
+    if threads:
+        thread_args = ["-filter_complex_threads", str(threads), "-threads", str(threads)]
+
     # Comando FFmpeg
     cmd = [
         "ffmpeg", "-y",
+        *thread_args,
         "-i", video_path,
         "-filter_complex", filter_str,
         "-map", output_label,
@@ -0,0 +1,407 @@
+"""
+Clipper Fused Render - Edit + Stitch + Loop-Tail em um unico encode
+=====================================================================
+
+O pipeline classico re-encoda cada clipe ate 4x (edit_clip ->
+ensure_minimum_duration -> _apply_loop_tail -> trim de 160s). Aqui o grafo
+de cada clipe (layouts de editor._build_edit_filter + anti-shadowban) e
+encadeado com os crossfades do stitcher, o cap de duracao e o loop-tail
+num unico filter_complex, com uma unica invocacao do FFmpeg por job.
+
+Diferencas em relacao ao pipeline classico:
+    - O cap de duracao (MAX_OUTPUT_DURATION) e aplicado ANTES do loop-tail,
+      entao o video cortado continua com replay seamless
+    - Jobs que precisariam do fallback de loop + CTA (< MIN_OUTPUT_DURATION)
+      nao sao elegiveis: o resultado vem com fallback=True e o worker usa o
+      caminho classico
+
+Intermediarios por clipe so sao gravados com CLIPPER_FUSED_DEBUG=1.
+
+Requisitos:
+    - FFmpeg com libass, libx264 no PATH
+"""
+
+import os
+import re
+import uuid
+import asyncio
+import logging
+from typing import List, Dict, Any, Optional
+
+from core.clipper.editor import (
+    OUTPUT_DIR,
+    FACECAM_RATIO,
+    GAMEPLAY_RATIO,
+    _build_edit_filter,
+    _apply_antishadowban,
+    _probe_video,
+    _randomized_encoding,
+)
+from core.clipper.stitcher import (
+    _AUDIO_FORMAT,
+    _rand_crossfade,
+    _xfade_chain_parts,
+    _loop_tail_crossfade,
+    _build_loop_tail_filter,
+    _has_audio_stream,
+    _get_duration,
+    _cleanup,
+)
+from core.clipper.vision import detect_facecam_box
+
+logger = logging.getLogger("ClipperFused")
+
+# Ativa o modo fundido no worker (0 = pipeline classico por etapas)
+FUSED_PIPELINE = os.getenv("CLIPPER_FUSED_PIPELINE", "0") == "1"
+
+# Grava tambem cada clipe editado (para inspecao) na mesma invocacao
+FUSED_DEBUG = os.getenv("CLIPPER_FUSED_DEBUG", "0") == "1"
+
+# Mesmos limites do worker
+MIN_OUTPUT_DURATION = 61.0
+MAX_OUTPUT_DURATION = 160.0
+LOOP_TAIL_CROSSFADE = 1.5
+
+# Labels de filtro gerados pelos builders do editor (ex: [cam_src], [_asb_out])
+_LABEL_RE = re.compile(r"\[([A-Za-z_][A-Za-z0-9_]*)\]")
+
+
+def _namespace_filter(filter_str: str, output_label: str, idx: int) -> tuple:
+    """
+    Adapta o grafo de um clipe (escrito para input unico [0:v]) para o input
+    `idx` de um grafo multi-clipe, sufixando todos os labels internos.
+    """
+    suffix = f"_c{idx}"
+    ns = filter_str.replace("[0:v]", f"[{idx}:v]")
+    ns = _LABEL_RE.sub(lambda m: f"[{m.group(1)}{suffix}]", ns)
+    out = _LABEL_RE.sub(lambda m: f"[{m.group(1)}{suffix}]", output_label)
+    return ns, out
+
+
+def _clip_parts(idx: int, clip: Dict[str, Any], speed: float, v_out: str, a_out: str) -> List[str]:
+    """Grafo de um clipe + normalizacao de video/audio para o formato do stitcher."""
+    out_dur = clip["duration"] / speed
+    af = f"asetpts=PTS-STARTPTS,atempo={speed},loudnorm=I=-14:LRA=11:TP=-1.5,{_AUDIO_FORMAT}"
+    parts = [
+        clip["filter"],
+        # Mesmo formato que edit_clip entrega ao stitcher: 60fps CFR, yuv420p
+        f"{clip['label']}settb=1/60,setpts=PTS-STARTPTS,fps=60,format=yuv420p[{v_out}]",
+    ]
+    if clip["has_audio"]:
+        parts.append(f"[{idx}:a]{af}[{a_out}]")
+    else:
+        parts.append(
+            f"anullsrc=channel_layout=stereo:sample_rate=44100,atrim=0:{out_dur:.4f}[{a_out}]"
+        )
+    return parts
+
+
+def build_debug_filter(clip_graphs: List[Dict[str, Any]], speed: float) -> str:
+    """
+    Grafo com uma saida [dbgv{i}]/[dbga{i}] por clipe editado.
+
+    Roda numa invocacao separada: dividir os clipes do grafo principal com
+    split forcaria o FFmpeg a bufferizar frames ate o offset de cada xfade.
+    """
+    parts = []
+    for i, clip in enumerate(clip_graphs):
+        parts.extend(_clip_parts(i, clip, speed, f"dbgv{i}", f"dbga{i}"))
+    return ";\n".join(parts)
+
+
+def build_fused_filter(
+    clip_graphs: List[Dict[str, Any]],
+    speed: float,
+    fades: List[float],
+    max_duration: float = MAX_OUTPUT_DURATION,
+    loop_tail_crossfade: float = LOOP_TAIL_CROSSFADE,
+) -> Dict[str, Any]:
+    """
+    Compoe o filter_complex completo do job.
+
+    Args:
+        clip_graphs: Por clipe: {"filter", "label", "duration", "has_audio"}
+                     (filter/label ja com ASB e namespaced para o input i)
+        speed: Velocidade ASB (a duracao de saida de cada clipe e duration/speed)
+        fades: Duracao de cada juncao (len = n - 1)
+        max_duration: Cap de duracao aplicado antes do loop-tail
+
+    Returns:
+        Dict com: filter, video_label, audio_label, duration, loop_tail
+    """
+    n = len(clip_graphs)
+    if n < 1 or len(fades) != max(n - 1, 0):
+        raise ValueError("Parametros inconsistentes para o grafo fundido.")
+
+    parts = []
+    v_labels = [f"v{i}" for i in range(n)]
+    a_labels = [f"a{i}" for i in range(n)]
+    durations = [clip["duration"] / speed for clip in clip_graphs]
+    for i, clip in enumerate(clip_graphs):
+        parts.extend(_clip_parts(i, clip, speed, v_labels[i], a_labels[i]))
+
+    if n > 1:
+        chain_parts, total = _xfade_chain_parts(
+            v_labels, a_labels, durations, fades, out_v="vchain", out_a="achain"
+        )
+        parts.extend(chain_parts)
+        v_cur, a_cur = "[vchain]", "[achain]"
+    else:
+        total = durations[0]
+        v_cur, a_cur = "[v0]", "[a0]"
+
+    # Cap de duracao antes do loop-tail (mantem o replay seamless)
+    if total > max_duration:
+        parts.append(f"{v_cur}trim=0:{max_duration:.4f},setpts=PTS-STARTPTS[vcap]")
+        parts.append(f"{a_cur}atrim=0:{max_duration:.4f},asetpts=PTS-STARTPTS[acap]")
+        v_cur, a_cur = "[vcap]", "[acap]"
+        total = max_duration
+
+    loop_tail = total >= loop_tail_crossfade * 3
+    if loop_tail:
+        cf = _loop_tail_crossfade(total, loop_tail_crossfade)
+        parts.append(_build_loop_tail_filter(total, cf, v_cur, a_cur, "[vout]", "[aout]"))
+        v_cur, a_cur = "[vout]", "[aout]"
+
+    return {
+        "filter": ";\n".join(parts),
+        "video_label": v_cur,
+        "audio_label": a_cur,
+        "duration": total,
+        "loop_tail": loop_tail,
+    }
+
+
+async def render_job_fused(
+    clips: List[Dict[str, Any]],
+    asb_params: Dict[str, Any],
+    channel_name: Optional[str] = None,
+    output_path: Optional[str] = None,
+    min_duration: float = MIN_OUTPUT_DURATION,
+    max_duration: float = MAX_OUTPUT_DURATION,
+    timeout_seconds: int = 1800,
+    debug: bool = FUSED_DEBUG,
+) -> Dict[str, Any]:
+    """
+    Renderiza o video final de um job em uma unica invocacao do FFmpeg.
+
+    Args:
+        clips: Lista de {"video_path", "ass_path", "layout_mode", "probe"?} na ordem final
+        asb_params: Params anti-shadowban do job (generate_asb_params())
+        channel_name: Canal (para deteccao de facecam)
+        output_path: Caminho de saida (opcional, gera em data/exports)
+
+    Returns:
+        Dict com: success, output_path, duration, file_size, strategy, error,
+        fallback (True quando o job deve seguir o pipeline classico)
+    """
+    clips = [c for c in clips if c.get("video_path") and os.path.exists(c["video_path"])]
+    if not clips:
+        return _error_result("Nenhum clipe fonte encontrado no disco.")
+
+    speed = asb_params["speed"]
+    cam_ratio = asb_params.get("facecam_ratio", FACECAM_RATIO)
+    game_ratio = asb_params.get("gameplay_ratio", GAMEPLAY_RATIO)
+    loop = asyncio.get_event_loop()
+
+    clip_graphs = []
+    for i, clip in enumerate(clips):
+        path = clip["video_path"]
+        ass_path = clip.get("ass_path")
+        if ass_path and not os.path.exists(ass_path):
+            ass_path = None
+
+        probe = clip.get("probe")
+        if not (probe and probe.get("width") and probe.get("height") and probe.get("duration")):
+            try:
+                probe = await _probe_video(path)
+            except RuntimeError as e:
+                return _error_result(str(e))
+        has_audio = probe["has_audio"] if "has_audio" in probe else await _has_audio_stream(path)
+
+        facecam_box = await loop.run_in_executor(
+            None, lambda p=path: detect_facecam_box(p, channel_name=channel_name)
+        )
+
+        filter_str, label = _build_edit_filter(
+            probe["width"], probe["height"], ass_path, facecam_box,
+            clip.get("layout_mode", "gameplay"),
+            cam_ratio=cam_ratio, game_ratio=game_ratio,
+        )
+        filter_str, label = _apply_antishadowban(
+            filter_str, label, speed, asb_params["grain"], asb_params["color_idx"]
+        )
+        filter_str, label = _namespace_filter(filter_str, label, i)
+
+        clip_graphs.append({
+            "filter": filter_str,
+            "label": label,
+            "duration": probe["duration"],
+            "has_audio": has_audio,
+        })
+
+    fades = [_rand_crossfade() for _ in range(len(clip_graphs) - 1)]
+    estimated = sum(c["duration"] / speed for c in clip_graphs) - sum(fades)
+    if estimated < min_duration:
+        result = _error_result(
+            f"Duracao estimada {estimated:.1f}s < {min_duration:.0f}s: requer loop + CTA (pipeline classico)."
+        )
+        result["fallback"] = True
+        return result
+
+    for i, c in enumerate(clip_graphs):
+        needed = (fades[i - 1] if i > 0 else 0) + (fades[i] if i < len(fades) else 0)
+        if c["duration"] / speed <= needed:
+            result = _error_result(f"Clipe {i + 1} muito curto para crossfade.")
+            result["fallback"] = True
+            return result
+
+    graph = build_fused_filter(clip_graphs, speed, fades, max_duration=max_duration)
+
+    if output_path is None:
+        base_backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        exports_dir = os.path.join(base_backend_dir, "data", "exports")
+        os.makedirs(exports_dir, exist_ok=True)
+        output_path = os.path.join(exports_dir, f"stitch_{uuid.uuid4().hex[:12]}.mp4")
+
+    r_crf, r_vbr, r_abr, r_preset = _randomized_encoding()
+
+    input_args = []
+    for clip in clips:
+        input_args += ["-i", clip["video_path"]]
+
+    cmd = ["ffmpeg", "-y"] + input_args + [
+        "-filter_complex", graph["filter"],
+        "-map", graph["video_label"],
+        "-map", graph["audio_label"],
+        "-c:v", "libx264",
+        "-profile:v", "high",
+        "-level:v", "4.1",
+        "-preset", r_preset,
+        "-crf", r_crf,
+        "-r", "60",
+        "-fps_mode", "cfr",
+        "-b:v", r_vbr,
+        "-maxrate", r_vbr,
+        "-bufsize", "10M",
+        "-c:a", "aac",
+        "-b:a", r_abr,
+        "-ar", "44100",
+        "-map_metadata", "-1",
+        "-movflags", "+faststart",
+        "-pix_fmt", "yuv420p",
+        output_path,
+    ]
+
+    logger.info(
+        f"Fused: {len(clip_graphs)} clipe(s) em encode unico "
+        f"(estimado={graph['duration']:.1f}s, loop_tail={graph['loop_tail']}, "
+        f"speed={speed}x, fades={fades}, debug={debug})"
+    )
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout_seconds)
+    except asyncio.TimeoutError:
+        process.kill()
+        _cleanup(output_path)
+        return _error_result(f"FFmpeg fused timeout apos {timeout_seconds}s")
+    except Exception:
+        process.kill()
+        _cleanup(output_path)
+        raise
+
+    if process.returncode != 0:
+        error = stderr.decode("utf-8", errors="replace").strip()
+        error_lines = error.split("\n")[-5:]
+        _cleanup(output_path)
+        return _error_result(f"FFmpeg fused falhou: {' | '.join(error_lines)}")
+
+    if not os.path.exists(output_path):
+        return _error_result("Arquivo de saida do fused nao gerado.")
+
+    duration = await _get_duration(output_path)
+    file_size = os.path.getsize(output_path)
+    logger.info(f"Fused concluido: {duration:.1f}s, {file_size / 1024 / 1024:.1f}MB")
+
+    debug_paths = []
+    if debug:
+        debug_paths = await _write_debug_clips(
+            input_args, clip_graphs, speed, output_path, timeout_seconds
+        )
+
+    return {
+        "success": True,
+        "output_path": output_path,
+        "duration": duration,
+        "file_size": file_size,
+        "strategy": "fused",
+        "debug_paths": debug_paths,
+        "fallback": False,
+        "error": None,
+    }
+
+
+async def _write_debug_clips(
+    input_args: List[str],
+    clip_graphs: List[Dict[str, Any]],
+    speed: float,
+    output_path: str,
+    timeout_seconds: int,
+) -> List[str]:
+    """Grava cada clipe editado (antes dos crossfades) para inspecao. Best-effort."""
+    stem = os.path.splitext(os.path.basename(output_path))[0]
+    cmd = ["ffmpeg", "-y"] + input_args + [
+        "-filter_complex", build_debug_filter(clip_graphs, speed),
+    ]
+    debug_paths = []
+    for i in range(len(clip_graphs)):
+        dbg_path = os.path.join(OUTPUT_DIR, f"_fused_debug_{stem}_clip{i}.mp4")
+        debug_paths.append(dbg_path)
+        cmd += [
+            "-map", f"[dbgv{i}]",
+            "-map", f"[dbga{i}]",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "23",
+            "-c:a", "aac", "-b:a", "128k",
+            "-pix_fmt", "yuv420p",
+            dbg_path,
+        ]
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout_seconds)
+    except asyncio.TimeoutError:
+        process.kill()
+        logger.warning("Fused debug: timeout gravando intermediarios.")
+        return []
+
+    if process.returncode != 0:
+        error = stderr.decode("utf-8", errors="replace").strip().split("\n")[-3:]
+        logger.warning(f"Fused debug: falha gravando intermediarios: {' | '.join(error)}")
+        return []
+
+    logger.info(f"Fused debug: {len(debug_paths)} intermediario(s) em {OUTPUT_DIR}")
+    return debug_paths
+
+
+def _error_result(error: str) -> Dict[str, Any]:
+    """Resultado padrao de erro."""
+    logger.error(f"Fused: {error}")
+    return {
+        "success": False,
+        "output_path": None,
+        "duration": 0,
+        "file_size": 0,
+        "strategy": None,
+        "fallback": False,
+        "error": error,
+    }
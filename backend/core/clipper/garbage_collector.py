@@ -7,6 +7,7 @@ Regras:
 3. Vídeos postados com sucesso → deletados 24h após confirmação de post no TikTok
 4. Traces/screenshots de debug → deletados após 7 dias
 5. Exports órfãos (sem PendingApproval correspondente) → deletados após 48h
+6. Previews da curadoria (poster/sprite/MP4 leve) → deletados quando o item sai de "pending"
 
 Segurança:
 - NUNCA deleta vídeos pendentes de aprovação
@@ -23,6 +24,7 @@ from datetime import datetime, timezone, timedelta
 from core.database import safe_session
 from core.clipper.models import ClipJob
 from core.models import PendingApproval, ScheduleItem
+from core.clipper.preview import PREVIEWS_DIR
 
 logger = logging.getLogger("GarbageCollector")
 
@@ -40,6 +42,7 @@ VARIANTS_DIR = "/app/data/clipper/variants"
 VARIANT_RETENTION_HOURS = 24   # Manter variantes 24h após postagem
 ORPHAN_VARIANT_HOURS = 48      # Variantes sem referência: limpar após 48h
 MAX_VARIANTS_DIR_GB = 3        # Limite máximo de espaço para variantes
+PREVIEW_GRACE_MINUTES = 60     # Não tocar em previews recém-criados (geração em andamento)
 
 
 def run_gc():
@@ -54,6 +57,7 @@ def run_gc():
     freed += _clean_orphan_exports()
     freed += _clean_temp_files()
     freed += _clean_old_variants()
+    freed += _clean_previews()
     freed += _enforce_clips_size_limit()
     freed += _enforce_variants_size_limit()
 
@@ -253,6 +257,56 @@ def _clean_orphan_exports() -> int:
     return freed
 
 
+def _clean_previews() -> int:
+    """
+    Remove os previews (PREVIEWS_DIR/<approval_id>/) de itens que saíram da
+    curadoria — aprovados, rejeitados ou apagados no reprocessamento — e limpa
+    o thumbnail_path que apontava para eles.
+    """
+    freed = 0
+    if not os.path.isdir(PREVIEWS_DIR):
+        return 0
+
+    cutoff_ts = (datetime.now() - timedelta(minutes=PREVIEW_GRACE_MINUTES)).timestamp()
+    with safe_session() as db:
+        pending_ids = {
+            row.id for row in db.query(PendingApproval.id).filter(PendingApproval.status == "pending").all()
+        }
+
+    removed_ids = []
+    for name in os.listdir(PREVIEWS_DIR):
+        dpath = os.path.join(PREVIEWS_DIR, name)
+        try:
+            approval_id = int(name)
+        except ValueError:
+            continue
+        if approval_id in pending_ids or not os.path.isdir(dpath):
+            continue
+        try:
+            if os.path.getmtime(dpath) >= cutoff_ts:
+                continue
+        except OSError:
+            continue
+
+        for f in os.listdir(dpath):
+            freed += _remove_file(os.path.join(dpath, f))
+        try:
+            os.rmdir(dpath)
+        except OSError:
+            continue
+        removed_ids.append(approval_id)
+
+    if removed_ids:
+        with safe_session() as db:
+            db.query(PendingApproval).filter(
+                PendingApproval.id.in_(removed_ids),
+                PendingApproval.thumbnail_path.isnot(None),
+            ).update({PendingApproval.thumbnail_path: None}, synchronize_session=False)
+            db.commit()
+        logger.info(f"  🖼️ Previews: {len(removed_ids)} itens fora da curadoria ({freed / 1024 / 1024:.1f} MB)")
+    return freed
+
+
 def _clean_temp_files() -> int:
     """Remove arquivos temporários de áudio e legendas antigas."""
     freed = 0
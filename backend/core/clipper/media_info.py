@@ -0,0 +1,295 @@
+"""
+Media Info - Cache compartilhado de ffprobe para o pipeline de cortes
+=====================================================================
+
+Um job proba o mesmo arquivo varias vezes (download, edicao, stitch,
+loop-tail, verificacao final). Este modulo centraliza o ffprobe:
+
+    - Um unico probe por arquivo retorna MediaInfo (duracao, streams, dimensoes)
+    - Cache LRU em memoria chaveado por (path, size, mtime_ns) — um arquivo
+      reescrito no mesmo path invalida a entrada automaticamente
+    - Probes concorrentes do mesmo arquivo compartilham o mesmo subprocess
+    - Persistencia opcional em SQLite (sobrevive a restart do worker e e
+      compartilhada entre processos)
+
+Uso:
+    info = await probe_media(path)
+    info.duration, info.has_audio, info.width
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from core.config import DATA_DIR
+
+logger = logging.getLogger("MediaInfo")
+
+MEDIA_INFO_CACHE_SIZE = int(os.getenv("MEDIA_INFO_CACHE_SIZE", "512"))
+MEDIA_INFO_PERSIST = os.getenv("MEDIA_INFO_PERSIST", "1") != "0"
+MEDIA_INFO_DB_PATH = os.getenv(
+    "MEDIA_INFO_DB_PATH", os.path.join(DATA_DIR, "clipper", "media_info.db")
+)
+MEDIA_INFO_DB_MAX_ROWS = 20000
+
+CacheKey = Tuple[str, int, int]
+
+
+def _number(value: Any, cast=float, default=0):
+    """ffprobe devolve "N/A" (ou nada) em streams/containers sem o campo."""
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """Resultado tipado de um ffprobe."""
+    path: str
+    duration: float
+    has_audio: bool
+    has_video: bool
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    codec: Optional[str] = None
+    file_size: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_ffprobe(cls, path: str, file_size: int, data: Dict[str, Any]) -> "MediaInfo":
+        streams = data.get("streams", [])
+        video = next((st for st in streams if st.get("codec_type") == "video"), None)
+        fields: Dict[str, Any] = {
+            "duration": _number(data.get("format", {}).get("duration"), float, 0.0),
+            "has_audio": any(st.get("codec_type") == "audio" for st in streams),
+            "has_video": video is not None,
+        }
+        if video:
+            fps_parts = video.get("r_frame_rate", "30/1").split("/")
+            try:
+                fps = float(fps_parts[0]) / float(fps_parts[1]) if len(fps_parts) == 2 else 30.0
+            except (ValueError, ZeroDivisionError):
+                fps = 30.0
+            fields.update({
+                "width": _number(video.get("width"), int, 0),
+                "height": _number(video.get("height"), int, 0),
+                "fps": round(fps, 2),
+                "codec": video.get("codec_name", "unknown"),
+            })
+        return cls(path=path, file_size=file_size, **fields)
+
+
+def _cache_key(path: str) -> Optional[CacheKey]:
+    """(path absoluto, size, mtime_ns) — None se o arquivo nao existe."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+class _PersistentStore:
+    """Tabela key -> JSON em um SQLite proprio (nao o banco principal)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS media_info ("
+                " key TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(key: CacheKey) -> str:
+        return f"{key[0]}|{key[1]}|{key[2]}"
+
+    def get(self, key: CacheKey) -> Optional[MediaInfo]:
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT data FROM media_info WHERE key = ?", (self._key(key),)
+                ).fetchone()
+            return MediaInfo(**json.loads(row[0])) if row else None
+        except Exception as e:
+            logger.warning(f"MediaInfo: leitura do cache persistente falhou: {e}")
+            return None
+
+    def put(self, key: CacheKey, info: MediaInfo) -> None:
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO media_info (key, data, updated_at) VALUES (?, ?, ?)",
+                    (self._key(key), json.dumps(info.as_dict()), time.time()),
+                )
+                self._writes += 1
+                if self._writes % 500 == 0:
+                    # Poda as entradas mais antigas (arquivos temporarios ja apagados)
+                    conn.execute(
+                        "DELETE FROM media_info WHERE key NOT IN ("
+                        " SELECT key FROM media_info ORDER BY updated_at DESC LIMIT ?)",
+                        (MEDIA_INFO_DB_MAX_ROWS,),
+                    )
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"MediaInfo: escrita do cache persistente falhou: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class MediaInfoCache:
+    """LRU em memoria + persistencia opcional + dedup de probes em voo."""
+
+    def __init__(self, max_entries: int = MEDIA_INFO_CACHE_SIZE, db_path: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[CacheKey, MediaInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._store = _PersistentStore(db_path) if db_path else None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[MediaInfo]:
+        with self._lock:
+            info = self._entries.get(key)
+            if info is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return info
+        if self._store is not None:
+            info = self._store.get(key)
+            if info is not None:
+                self._remember(key, info)
+                with self._lock:
+                    self.hits += 1
+                return info
+        return None
+
+    def put(self, key: CacheKey, info: MediaInfo) -> None:
+        self._remember(key, info)
+        if self._store is not None:
+            self._store.put(key, info)
+
+    def _remember(self, key: CacheKey, info: MediaInfo) -> None:
+        with self._lock:
+            self._entries[key] = info
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def probe(self, path: str, timeout: float = 15) -> MediaInfo:
+        key = _cache_key(path)
+        if key is None:
+            raise RuntimeError(f"Arquivo nao encontrado para ffprobe: {path}")
+
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            with self._lock:
+                self.misses += 1
+            info = await _run_ffprobe(path, key[1], timeout)
+            self.put(key, info)
+            future.set_result(info)
+            return info
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita "exception was never retrieved" quando ninguem esperava
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+async def _run_ffprobe(path: str, file_size: int, timeout: float) -> MediaInfo:
+    cmd = [
+        "ffprobe",
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_streams",
+        "-show_format",
+        path,
+    ]
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        raise RuntimeError(f"ffprobe timeout ({timeout}s) para {path}")
+
+    if process.returncode != 0:
+        error = stderr.decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"ffprobe falhou para {path}: {error[:200]}")
+
+    try:
+        data = json.loads(stdout.decode("utf-8", errors="replace"))
+    except json.JSONDecodeError as e:
+        raise RuntimeError(f"ffprobe JSON invalido para {path}: {e}")
+
+    try:
+        return MediaInfo.from_ffprobe(path, file_size, data)
+    except (AttributeError, TypeError, ValueError) as e:
+        # Quem chama so trata RuntimeError (ver stitcher._get_duration)
+        raise RuntimeError(f"ffprobe com saida inesperada para {path}: {e}")
+
+
+# ─── Instancia global ───────────────────────────────────────────────────
+
+_cache = MediaInfoCache(db_path=MEDIA_INFO_DB_PATH if MEDIA_INFO_PERSIST else None)
+
+
+def get_media_cache() -> MediaInfoCache:
+    return _cache
+
+
+async def probe_media(path: str, timeout: float = 15) -> MediaInfo:
+    """
+    Retorna o MediaInfo de um arquivo (cacheado).
+    Levanta RuntimeError se o arquivo nao existe ou o ffprobe falha.
+    """
+    return await _cache.probe(path, timeout=timeout)
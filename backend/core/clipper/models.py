@@ -4,12 +4,13 @@ Clipper Models - Modelos SQLAlchemy para o Pipeline de Cortes
 
 TwitchTarget: Canal da Twitch monitorado pelo CronJob.
 ClipJob: Estado do pipeline de processamento para cada lote de clipes.
+ClipURL: Indice url -> job para o dedup global do monitor.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, JSON, ForeignKey, DateTime, Float, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, JSON, ForeignKey, DateTime, Float, UniqueConstraint, event, inspect
 from datetime import datetime, timezone
 from enum import Enum
-from typing import TypedDict, List
+from typing import TypedDict, List, Optional
 from pydantic import BaseModel
 
 from core.database import Base
@@ -105,6 +106,7 @@ class ClipJob(Base):
 
     # Resultados intermediarios
     whisper_result = Column(JSON, nullable=True)    # Transcricao word-level
+    transcript_text = Column(String, nullable=True) # Textos de whisper_result concatenados (listagens)
 
     # Layout do video (herdado do target ou auto-detectado)
     layout_mode = Column(String, default="auto")  # auto | podcast | street | gameplay
@@ -125,6 +127,101 @@ class ClipJob(Base):
     completed_at = Column(DateTime, nullable=True)
 
 
+class ClipURL(Base):
+    """
+    Indice normalizado das URLs de clipe consumidas por ClipJobs.
+    Mantido pelos listeners abaixo; consultado pelo dedup do monitor.
+    """
+    __tablename__ = "clip_urls"
+
+    url = Column(String, primary_key=True)
+    job_id = Column(Integer, nullable=False, index=True)  # Job mais recente que usou a URL
+    target_id = Column(Integer, nullable=True, index=True)
+    status = Column(String, nullable=True)
+    retry_count = Column(Integer, default=0)
+    first_seen_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+
+_CLIP_URL_TRACKED_ATTRS = ("clip_urls", "status", "retry_count", "target_id")
+
+
+@event.listens_for(ClipJob, "after_insert")
+def _index_new_job_urls(mapper, connection, target):
+    from core.clipper.clip_index import sync_job_urls
+    sync_job_urls(connection, target.id, target.target_id, target.clip_urls, target.status, target.retry_count)
+
+
+@event.listens_for(ClipJob, "after_update")
+def _index_updated_job_urls(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[a].history.has_changes() for a in _CLIP_URL_TRACKED_ATTRS):
+        return
+    from core.clipper.clip_index import sync_job_urls
+    sync_job_urls(connection, target.id, target.target_id, target.clip_urls, target.status, target.retry_count)
+
+
+@event.listens_for(ClipJob, "after_delete")
+def _drop_deleted_job_urls(mapper, connection, target):
+    from core.clipper.clip_index import drop_job_urls
+    drop_job_urls(connection, target.id)
+
+
+def transcript_from_whisper(whisper_result) -> Optional[str]:
+    """Junta o "text" de cada clip de whisper_result (None se vazio)."""
+    parts = [t.get("text", "") for t in (whisper_result or []) if isinstance(t, dict) and t.get("text")]
+    return " ".join(parts) if parts else None
+
+
+@event.listens_for(ClipJob, "before_insert")
+@event.listens_for(ClipJob, "before_update")
+def _sync_transcript_text(mapper, connection, target):
+    # Mantem transcript_text junto com whisper_result (transcricao, reorder, remove)
+    if inspect(target).attrs.whisper_result.history.has_changes() or (
+        target.transcript_text is None and target.whisper_result
+    ):
+        target.transcript_text = transcript_from_whisper(target.whisper_result)
+
+
+TRANSCRIPT_BACKFILL_BATCH = 200
+
+
+def migrate_clip_job_transcript(engine) -> int:
+    """
+    Adiciona clip_jobs.transcript_text em bancos existentes e preenche a partir
+    de whisper_result. Idempotente; retorna quantos jobs foram preenchidos.
+    """
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+
+    columns = [col["name"] for col in inspect(engine).get_columns("clip_jobs")]
+    if "transcript_text" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE clip_jobs ADD COLUMN transcript_text VARCHAR"))
+
+    total = 0
+    last_id = 0
+    with Session(engine) as db:
+        while True:
+            rows = db.query(ClipJob.id, ClipJob.whisper_result).filter(
+                ClipJob.id > last_id,
+                ClipJob.transcript_text.is_(None),
+                ClipJob.whisper_result.isnot(None),
+            ).order_by(ClipJob.id).limit(TRANSCRIPT_BACKFILL_BATCH).all()
+            if not rows:
+                break
+            for job_id, whisper_result in rows:
+                transcript = transcript_from_whisper(whisper_result)
+                if transcript:
+                    db.query(ClipJob).filter(ClipJob.id == job_id).update(
+                        {ClipJob.transcript_text: transcript}, synchronize_session=False
+                    )
+                    total += 1
+            last_id = rows[-1][0]
+            db.commit()
+    return total
+
+
 class ClipperBlockedStreamer(Base):
     """
     Streamer bloqueado globalmente — clips deste criador são descartados
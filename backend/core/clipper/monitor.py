@@ -26,8 +26,11 @@ import httpx
 from arq import create_pool
 from arq.connections import RedisSettings
 
-from core.database import safe_session
+from sqlalchemy import select
+
+from core.database import async_session, safe_session
 from core.clipper.models import TwitchTarget, ClipJob, ClipperBlockedStreamer
+from core.clipper.clip_index import lookup_urls, processed_urls
 from core.config import TWITCH_CLIENT_ID, TWITCH_CLIENT_SECRET
 
 logger = logging.getLogger("ClipperMonitor")
@@ -591,33 +594,12 @@ def _filter_already_processed(target_id: int, clips: List[Dict]) -> List[Dict]:
     """
     Remove clipes que ja foram processados por jobs anteriores (dedup global).
     Inclui jobs 'failed' que ja esgotaram retries, evitando loop infinito.
+
+    Consulta o indice clip_urls apenas para as URLs candidatas (sem janela
+    de jobs recentes, entao clipes antigos nao voltam a ser processados).
     """
     with safe_session() as db:
-        # Jobs ativos ou concluidos — nunca reprocessar
-        active_urls = (
-            db.query(ClipJob.clip_urls)
-            .filter(ClipJob.status.in_(["pending", "downloading", "transcribing", "editing", "stitching", "completed", "waiting_clips"]))
-            .order_by(ClipJob.id.desc())
-            .limit(2000)
-            .all()
-        )
-        already_processed = set()
-        for (urls,) in active_urls:
-            if urls:
-                already_processed.update(urls)
-
-        # Jobs falhados que ja esgotaram retries — nao reprocessar
-        failed_maxed = (
-            db.query(ClipJob.clip_urls)
-            .filter(ClipJob.status == "failed")
-            .filter(ClipJob.retry_count >= MAX_JOB_RETRIES)
-            .order_by(ClipJob.id.desc())
-            .limit(2000)
-            .all()
-        )
-        for (urls,) in failed_maxed:
-            if urls:
-                already_processed.update(urls)
+        already_processed = processed_urls(db, [c["url"] for c in clips], MAX_JOB_RETRIES)
 
     return [c for c in clips if c["url"] not in already_processed]
 
@@ -833,16 +815,10 @@ async def _create_clip_jobs(target_id: int, channel_name: str, new_clips: List[D
     # Buscar retry counts de jobs falhados anteriores para estes clips
     clip_retry_counts: Dict[str, int] = {}
     with safe_session() as db:
-        failed_jobs = (
-            db.query(ClipJob.clip_urls, ClipJob.retry_count)
-            .filter(ClipJob.status == "failed")
-            .filter(ClipJob.retry_count < MAX_JOB_RETRIES)
-            .all()
-        )
-        for urls, count in failed_jobs:
-            if urls:
-                for u in urls:
-                    clip_retry_counts[u] = max(clip_retry_counts.get(u, 0), (count or 0))
+        indexed = lookup_urls(db, [c["url"] for c in new_clips])
+        for u, (status, count) in indexed.items():
+            if status == "failed" and count < MAX_JOB_RETRIES:
+                clip_retry_counts[u] = count
 
     from core.config import REDIS_HOST, REDIS_PORT
     try:
@@ -1072,15 +1048,14 @@ async def _consolidate_waiting_jobs() -> None:
     """
     from sqlalchemy import func
 
-    with safe_session() as db:
+    async with async_session() as db:
         # Encontrar targets com mais de 1 job waiting_clips
-        duplicates = (
-            db.query(ClipJob.target_id, func.count(ClipJob.id).label("cnt"))
-            .filter(ClipJob.status == "waiting_clips")
+        duplicates = (await db.execute(
+            select(ClipJob.target_id, func.count(ClipJob.id).label("cnt"))
+            .where(ClipJob.status == "waiting_clips")
             .group_by(ClipJob.target_id)
             .having(func.count(ClipJob.id) > 1)
-            .all()
-        )
+        )).all()
 
         if not duplicates:
             return
@@ -1090,12 +1065,11 @@ async def _consolidate_waiting_jobs() -> None:
 
         for target_id, count in duplicates:
             # Buscar todos os waiting jobs deste target, ordenados por criação
-            jobs = (
-                db.query(ClipJob)
-                .filter(ClipJob.target_id == target_id, ClipJob.status == "waiting_clips")
+            jobs = (await db.execute(
+                select(ClipJob)
+                .where(ClipJob.target_id == target_id, ClipJob.status == "waiting_clips")
                 .order_by(ClipJob.created_at.asc())
-                .all()
-            )
+            )).scalars().all()
 
             if len(jobs) <= 1:
                 continue
@@ -1116,7 +1090,7 @@ async def _consolidate_waiting_jobs() -> None:
                         merged_meta.append(meta)
 
                 absorbed_ids.append(donor.id)
-                db.delete(donor)
+                await db.delete(donor)
 
             primary.clip_urls = merged_urls
             primary.clip_metadata = merged_meta
@@ -1142,7 +1116,7 @@ async def _consolidate_waiting_jobs() -> None:
                     f"{total_dur:.0f}s (absorveu jobs {absorbed_ids}, faltam {61 - total_dur:.0f}s)"
                 )
 
-        db.commit()
+        await db.commit()
 
         # Enfileirar jobs promovidos
         if promoted_ids:
@@ -1164,16 +1138,15 @@ async def _promote_expired_waiting_jobs() -> None:
     Esses jobs serão processados com loop-tail como fallback.
     Chamado no início de cada ciclo de scan.
     """
-    with safe_session() as db:
+    async with async_session() as db:
         cutoff = datetime.now(timezone.utc) - timedelta(hours=WAITING_JOB_TIMEOUT_HOURS)
-        expired = (
-            db.query(ClipJob)
-            .filter(
+        expired = (await db.execute(
+            select(ClipJob)
+            .where(
                 ClipJob.status == "waiting_clips",
                 ClipJob.created_at < cutoff,
             )
-            .all()
-        )
+        )).scalars().all()
 
         if not expired:
             return
@@ -1205,7 +1178,7 @@ async def _promote_expired_waiting_jobs() -> None:
                 f"{len(job.clip_urls or [])} clips, {total_dur:.0f}s. Forçando processamento."
             )
 
-        db.commit()
+        await db.commit()
 
         # Enfileirar apenas os promovidos (não os descartados)
         if promoted:
@@ -1238,27 +1211,26 @@ async def monitor_loop(interval_seconds: int = 60):
         await asyncio.sleep(interval_seconds)
 
 
-def _get_ready_target_ids() -> List[int]:
-    """Sincrono: Fetches ready targets from DB para rodar fora do event loop."""
+async def _get_ready_target_ids() -> List[int]:
+    """Targets ativos cujo intervalo de check ja expirou (so as colunas usadas)."""
     now = datetime.now(timezone.utc)
-    with safe_session() as db:
-        targets = (
-            db.query(TwitchTarget)
-            .filter(TwitchTarget.active.is_(True))
-            .all()
-        )
-        ready_targets = []
-        for t in targets:
-            interval_minutes = t.check_interval_minutes or 15
-            if t.last_checked_at is None:
+    async with async_session() as db:
+        targets = (await db.execute(
+            select(TwitchTarget.id, TwitchTarget.check_interval_minutes, TwitchTarget.last_checked_at)
+            .where(TwitchTarget.active.is_(True))
+        )).all()
+    ready_targets = []
+    for t in targets:
+        interval_minutes = t.check_interval_minutes or 15
+        if t.last_checked_at is None:
+            ready_targets.append(t.id)
+        else:
+            last = t.last_checked_at
+            if last.tzinfo is None:
+                last = last.replace(tzinfo=timezone.utc)
+            if (now - last).total_seconds() >= interval_minutes * 60:
                 ready_targets.append(t.id)
-            else:
-                last = t.last_checked_at
-                if last.tzinfo is None:
-                    last = last.replace(tzinfo=timezone.utc)
-                if (now - last).total_seconds() >= interval_minutes * 60:
-                    ready_targets.append(t.id)
-        return ready_targets
+    return ready_targets
 
 async def _check_all_targets() -> None:
     """Verifica targets ativos cujo intervalo de check ja expirou."""
@@ -1274,8 +1246,7 @@ async def _check_all_targets() -> None:
     except Exception as e:
         logger.error(f"Erro ao promover waiting jobs expirados: {e}", exc_info=True)
 
-    # Roda DB call bloqueante em thread separada
-    ready_targets = await asyncio.to_thread(_get_ready_target_ids)
+    ready_targets = await _get_ready_target_ids()
 
     if not ready_targets:
         return
@@ -0,0 +1,154 @@
+"""
+Clipper Pipeline - Execucao em estagios entre jobs
+==================================================
+
+O worker processava um job inteiro por vez: enquanto um job encodava, a rede
+e o Whisper ficavam ociosos (e vice-versa). Aqui cada etapa tem seu proprio
+limite de concorrencia, e varios jobs ficam em voo ao mesmo tempo:
+
+    download (rede)  ->  transcribe (Whisper)  ->  render (FFmpeg)
+
+Back-pressure: cada estagio aceita no maximo `concurrency + backlog` jobs
+(rodando + aguardando). Um job so libera o slot do estagio atual depois de
+ser admitido no proximo — se o render esta congestionado, os downloads param
+em vez de lotar o disco com clipes esperando.
+
+A passagem entre estagios segue o ClipJob.status que cada etapa ja grava
+(downloading -> transcribing -> editing -> completed/failed).
+"""
+
+import asyncio
+import inspect
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("ClipperPipeline")
+
+DOWNLOAD_CONCURRENCY = int(os.getenv("CLIPPER_DOWNLOAD_SLOTS", "2"))
+TRANSCRIBE_CONCURRENCY = int(os.getenv("CLIPPER_TRANSCRIBE_SLOTS", os.getenv("WHISPER_POOL_SIZE", "1")))
+RENDER_CONCURRENCY = int(os.getenv("CLIPPER_RENDER_SLOTS", "1"))
+STAGE_BACKLOG = int(os.getenv("CLIPPER_STAGE_BACKLOG", "1"))
+
+StageFn = Callable[[], Awaitable[bool]]
+
+
+class PipelineStage:
+    """Um estagio com slots de execucao e admissao limitada (back-pressure)."""
+
+    def __init__(self, name: str, concurrency: int, backlog: int = STAGE_BACKLOG):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.capacity = self.concurrency + max(0, backlog)
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._admission = asyncio.Semaphore(self.capacity)
+        self.admitted = 0
+        self.running = 0
+
+    async def admit(self) -> None:
+        """Reserva lugar no estagio (bloqueia se running + waiting == capacity)."""
+        await self._admission.acquire()
+        self.admitted += 1
+
+    def leave(self) -> None:
+        self.admitted -= 1
+        self._admission.release()
+
+    async def acquire_slot(self) -> None:
+        await self._slots.acquire()
+        self.running += 1
+
+    def release_slot(self) -> None:
+        self.running -= 1
+        self._slots.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "waiting": self.admitted - self.running,
+            "concurrency": self.concurrency,
+            "capacity": self.capacity,
+        }
+
+
+class ClipPipeline:
+    """Encadeia os estagios de um job respeitando os limites de cada um."""
+
+    def __init__(self, stages: List[PipelineStage]):
+        self.stages = {s.name: s for s in stages}
+        self.order = [s.name for s in stages]
+
+    @property
+    def max_inflight(self) -> int:
+        """Jobs simultaneos que o pipeline comporta (dimensiona o max_jobs do ARQ)."""
+        return sum(s.capacity for s in self.stages.values())
+
+    async def run(
+        self,
+        job_id: int,
+        steps: List[Tuple[str, StageFn]],
+        on_wait: Optional[Callable[[str], Any]] = None,
+    ) -> bool:
+        """
+        Executa `steps` (nome do estagio, coroutine factory) em ordem.
+        Cada step retorna True para seguir adiante; False encerra o job.
+        Retorna True se todos os steps concluiram.
+        """
+        if not steps:
+            return True
+
+        current = self.stages[steps[0][0]]
+        await current.admit()
+        try:
+            for i, (name, fn) in enumerate(steps):
+                stage = self.stages[name]
+                if stage is not current:
+                    raise ValueError(f"Estagio fora de ordem: {name}")
+
+                if stage.running >= stage.concurrency:
+                    logger.info(f"Job {job_id}: aguardando slot de {name} ({stage.stats()})")
+                    if on_wait:
+                        waiting = on_wait(name)
+                        if inspect.isawaitable(waiting):
+                            await waiting
+                await stage.acquire_slot()
+                try:
+                    ok = await fn()
+                    if not ok:
+                        return False
+                    if i + 1 < len(steps):
+                        # Admissao no proximo estagio ANTES de liberar o slot atual
+                        nxt = self.stages[steps[i + 1][0]]
+                        await nxt.admit()
+                finally:
+                    stage.release_slot()
+
+                current.leave()
+                current = self.stages[steps[i + 1][0]] if i + 1 < len(steps) else None
+            return True
+        finally:
+            if current is not None:
+                current.leave()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: self.stages[name].stats() for name in self.order}
+
+
+_pipeline: Optional[ClipPipeline] = None
+
+
+def get_clip_pipeline() -> ClipPipeline:
+    """Pipeline global do worker (criado sob demanda, dentro do event loop)."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = ClipPipeline([
+            PipelineStage("download", DOWNLOAD_CONCURRENCY),
+            PipelineStage("transcribe", TRANSCRIBE_CONCURRENCY),
+            PipelineStage("render", RENDER_CONCURRENCY),
+        ])
+    return _pipeline
+
+
+def pipeline_max_jobs() -> int:
+    """max_jobs do ARQ: cabe exatamente o que o pipeline admite."""
+    return get_clip_pipeline().max_inflight
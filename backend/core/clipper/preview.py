@@ -0,0 +1,238 @@
+"""
+Clipper Preview - Proxies leves para a fila de curadoria
+========================================================
+
+Os revisores assistiam/scrubavam o export final (1080x1920, alta taxa) pelo
+stream de videos, e PendingApproval.thumbnail_path nunca era preenchido: a
+pagina da fila baixava o video inteiro so para mostrar um quadro.
+
+Depois que o job vira PendingApproval, uma tarefa em background gera em
+PREVIEWS_DIR/<approval_id>/:
+    - poster.jpg   — um quadro (~360px) para a listagem
+    - sprite.jpg   — folha de miniaturas (grade SPRITE_COLUMNS x N)
+    - sprite.vtt   — indice WebVTT (#xywh) para o scrub da timeline
+    - preview.mp4  — ~480p, baixa taxa, faststart
+
+thumbnail_path recebe o poster. Os arquivos sao servidos por
+/api/v1/factory/preview/{id}/{arquivo} e removidos pelo garbage collector
+quando o item sai da curadoria.
+"""
+
+import asyncio
+import logging
+import math
+import os
+import shutil
+from typing import Dict, Optional, Set
+
+from core.config import DATA_DIR
+from core.database import async_session
+from core.models import PendingApproval
+from core.clipper.media_info import probe_media
+
+logger = logging.getLogger("ClipperPreview")
+
+PREVIEWS_DIR = os.getenv("CLIPPER_PREVIEWS_DIR", os.path.join(DATA_DIR, "clipper", "previews"))
+
+# Encodes de preview em paralelo (fora dos slots de render do pipeline)
+PREVIEW_CONCURRENCY = int(os.getenv("CLIPPER_PREVIEW_SLOTS", "1"))
+PREVIEW_SHORT_SIDE = int(os.getenv("CLIPPER_PREVIEW_SHORT_SIDE", "480"))
+PREVIEW_VIDEO_BITRATE = os.getenv("CLIPPER_PREVIEW_BITRATE", "600k")
+PREVIEW_TIMEOUT_SECONDS = int(os.getenv("CLIPPER_PREVIEW_TIMEOUT", "300"))
+
+POSTER_WIDTH = 360
+SPRITE_THUMB_WIDTH = 120
+SPRITE_COLUMNS = 10
+SPRITE_MAX_THUMBS = 100
+
+# Arquivos servidos pelo endpoint (nome -> media type)
+PREVIEW_FILES = {
+    "poster.jpg": "image/jpeg",
+    "sprite.jpg": "image/jpeg",
+    "sprite.vtt": "text/vtt",
+    "preview.mp4": "video/mp4",
+}
+
+_semaphore: Optional[asyncio.Semaphore] = None
+_tasks: Set[asyncio.Task] = set()
+
+
+def preview_dir(approval_id: int) -> str:
+    return os.path.join(PREVIEWS_DIR, str(approval_id))
+
+
+def preview_file(approval_id: int, name: str) -> Optional[str]:
+    """Caminho de um arquivo de preview existente (None se nao gerado)."""
+    if name not in PREVIEW_FILES:
+        return None
+    path = os.path.join(preview_dir(approval_id), name)
+    return path if os.path.isfile(path) else None
+
+
+def sprite_layout(duration: float, width: Optional[int], height: Optional[int]) -> Dict[str, int]:
+    """Intervalo entre miniaturas e geometria da grade (no maximo SPRITE_MAX_THUMBS quadros)."""
+    duration = max(duration, 1.0)
+    interval = max(1, math.ceil(duration / SPRITE_MAX_THUMBS))
+    count = max(1, min(SPRITE_MAX_THUMBS, math.ceil(duration / interval)))
+    columns = min(count, SPRITE_COLUMNS)
+    tile_w = SPRITE_THUMB_WIDTH
+    if width and height:
+        tile_h = max(2, int(round(tile_w * height / width / 2)) * 2)
+    else:
+        tile_h = int(round(tile_w * 16 / 9 / 2)) * 2
+    return {
+        "interval": interval,
+        "count": count,
+        "columns": columns,
+        "rows": math.ceil(count / columns),
+        "tile_w": tile_w,
+        "tile_h": tile_h,
+    }
+
+
+def _vtt_time(seconds: float) -> str:
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}.{ms:03d}"
+
+
+def build_sprite_vtt(layout: Dict[str, int], duration: float, sprite_name: str = "sprite.jpg") -> str:
+    """Indice WebVTT: cada cue aponta para um retangulo da folha (media fragment #xywh)."""
+    lines = ["WEBVTT", ""]
+    for i in range(layout["count"]):
+        start = i * layout["interval"]
+        if start >= duration and i:
+            break
+        end = min(start + layout["interval"], duration) if duration > start else start + layout["interval"]
+        x = (i % layout["columns"]) * layout["tile_w"]
+        y = (i // layout["columns"]) * layout["tile_h"]
+        lines.append(f"{_vtt_time(start)} --> {_vtt_time(end)}")
+        lines.append(f"{sprite_name}#xywh={x},{y},{layout['tile_w']},{layout['tile_h']}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+async def _run_ffmpeg(cmd: list, timeout: int = PREVIEW_TIMEOUT_SECONDS) -> Optional[str]:
+    """Roda o FFmpeg; retorna a mensagem de erro ou None."""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        return f"timeout apos {timeout}s"
+    except BaseException:
+        process.kill()
+        raise
+    if process.returncode != 0:
+        error_lines = stderr.decode("utf-8", errors="replace").strip().split("\n")[-3:]
+        return " | ".join(error_lines)
+    return None
+
+
+async def generate_previews(video_path: str, out_dir: str) -> Dict[str, str]:
+    """Gera poster, sprite + VTT e MP4 leve. Retorna {nome: caminho} do que foi gerado."""
+    info = await probe_media(video_path)
+    duration = info.duration or 0.0
+    os.makedirs(out_dir, exist_ok=True)
+    produced: Dict[str, str] = {}
+
+    poster = os.path.join(out_dir, "poster.jpg")
+    error = await _run_ffmpeg([
+        "ffmpeg", "-y", "-v", "error",
+        "-ss", f"{min(1.0, duration / 3):.2f}", "-i", video_path,
+        "-frames:v", "1", "-vf", f"scale={POSTER_WIDTH}:-2", "-q:v", "4",
+        poster,
+    ])
+    if error is None:
+        produced["poster.jpg"] = poster
+    else:
+        logger.warning(f"Preview: poster falhou para {video_path}: {error}")
+
+    layout = sprite_layout(duration, info.width, info.height)
+    sprite = os.path.join(out_dir, "sprite.jpg")
+    error = await _run_ffmpeg([
+        "ffmpeg", "-y", "-v", "error", "-i", video_path,
+        "-vf", (
+            f"fps=1/{layout['interval']},scale={layout['tile_w']}:{layout['tile_h']},"
+            f"tile={layout['columns']}x{layout['rows']}"
+        ),
+        "-frames:v", "1", "-q:v", "5",
+        sprite,
+    ])
+    if error is None:
+        vtt = os.path.join(out_dir, "sprite.vtt")
+        with open(vtt, "w", encoding="utf-8") as f:
+            f.write(build_sprite_vtt(layout, duration))
+        produced["sprite.jpg"] = sprite
+        produced["sprite.vtt"] = vtt
+    else:
+        logger.warning(f"Preview: sprite falhou para {video_path}: {error}")
+
+    # Lado menor em PREVIEW_SHORT_SIDE (shorts verticais: 480x854)
+    side = PREVIEW_SHORT_SIDE
+    video = os.path.join(out_dir, "preview.mp4")
+    partial = video + ".part.mp4"
+    error = await _run_ffmpeg([
+        "ffmpeg", "-y", "-v", "error", "-i", video_path,
+        "-vf", f"scale='if(gte(iw,ih),-2,{side})':'if(gte(iw,ih),{side},-2)'",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "30",
+        "-maxrate", PREVIEW_VIDEO_BITRATE, "-bufsize", "1200k",
+        "-c:a", "aac", "-b:a", "64k", "-ac", "1",
+        "-movflags", "+faststart", "-pix_fmt", "yuv420p",
+        partial,
+    ])
+    if error is None:
+        os.replace(partial, video)
+        produced["preview.mp4"] = video
+    else:
+        logger.warning(f"Preview: mp4 leve falhou para {video_path}: {error}")
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    return produced
+
+
+async def build_approval_previews(approval_id: int, video_path: str) -> Dict[str, str]:
+    """Gera os previews de um PendingApproval e grava o poster em thumbnail_path."""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(max(1, PREVIEW_CONCURRENCY))
+
+    out_dir = preview_dir(approval_id)
+    async with _semaphore:
+        try:
+            produced = await generate_previews(video_path, out_dir)
+        except Exception as e:
+            logger.error(f"Preview do item #{approval_id} falhou: {e}", exc_info=True)
+            shutil.rmtree(out_dir, ignore_errors=True)
+            return {}
+
+    if "poster.jpg" in produced:
+        async with async_session() as db:
+            approval = await db.get(PendingApproval, approval_id)
+            if approval:
+                approval.thumbnail_path = produced["poster.jpg"]
+    logger.info(f"Preview do item #{approval_id}: {', '.join(sorted(produced)) or 'nada gerado'}")
+    return produced
+
+
+def schedule_previews(approval_id: int, video_path: str) -> Optional[asyncio.Task]:
+    """Dispara a geracao em background (nao bloqueia a entrada na curadoria)."""
+    if not video_path or not os.path.exists(video_path):
+        return None
+    task = asyncio.get_running_loop().create_task(build_approval_previews(approval_id, video_path))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+def cancel_previews() -> None:
+    """Shutdown do worker: o GC remove diretorios incompletos depois."""
+    for task in list(_tasks):
+        task.cancel()
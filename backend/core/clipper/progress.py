@@ -0,0 +1,187 @@
+"""
+Clipper Progress - Escritor em lote do progresso dos ClipJobs
+=============================================================
+
+Cada estagio (download, transcricao, edicao, costura) reportava progresso
+abrindo uma sessao, fazendo SELECT do ClipJob e um commit — as vezes varias
+vezes por segundo por job. Com varios jobs em voo no SQLite esses commits
+minusculos disputavam o lock de escrita com o trabalho de verdade.
+
+Agora os estagios chamam `progress_writer.report(...)`:
+    - Atualizacoes coalescidas por job em memoria (so a ultima importa)
+    - Um UPDATE (executemany) por flush, no maximo a cada
+      CLIPPER_PROGRESS_FLUSH_SECONDS
+    - O UPDATE so vale enquanto o job continua no status do reporte: um
+      progresso atrasado nunca sobrescreve uma transicao (editing -> stitching,
+      completed, failed) gravada direto pelo worker
+    - Publicacao imediata para o WebSocket (topico clipper:job:<id>) pelo
+      publisher configurado — no worker ARQ, Redis pub/sub; a API repassa
+      para o hub com relay_progress()
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import bindparam, update
+
+from core.database import async_session
+from core.clipper.models import ClipJob
+
+logger = logging.getLogger("ClipperProgress")
+
+CLIPPER_PROGRESS_FLUSH_SECONDS = float(os.getenv("CLIPPER_PROGRESS_FLUSH_SECONDS", "1.0"))
+
+# Canal Redis entre o worker ARQ e a API
+PROGRESS_CHANNEL = "clipper:progress"
+
+Publisher = Callable[[int, Dict[str, Any]], Awaitable[None]]
+
+_UPDATE_PROGRESS = (
+    update(ClipJob.__table__)
+    .where(
+        ClipJob.__table__.c.id == bindparam("job_id"),
+        ClipJob.__table__.c.status == bindparam("expected_status"),
+    )
+    .values(progress_pct=bindparam("pct"), current_step=bindparam("step"))
+)
+
+
+class JobProgressWriter:
+    def __init__(self, flush_interval: float = CLIPPER_PROGRESS_FLUSH_SECONDS):
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._publisher: Optional[Publisher] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.flushes = 0
+
+    def set_publisher(self, publisher: Optional[Publisher]) -> None:
+        self._publisher = publisher
+
+    def report(self, job_id: int, progress_pct: int, current_step: str, status: str) -> None:
+        """
+        Registra o progresso de um job (chamar do event loop).
+        `status` e o status em que o job deve estar para o UPDATE valer.
+        """
+        data = {"progress_pct": progress_pct, "current_step": current_step, "status": status}
+        with self._lock:
+            self._pending[job_id] = data
+        self._ensure_task()
+        if self._wake is not None:
+            self._wake.set()
+        if self._publisher is not None:
+            try:
+                asyncio.get_running_loop().create_task(self._publish(job_id, data))
+            except RuntimeError:
+                pass  # Sem loop (chamada sync isolada): so persiste
+
+    async def _publish(self, job_id: int, data: Dict[str, Any]) -> None:
+        try:
+            await self._publisher(job_id, data)
+        except Exception as e:
+            logger.debug(f"Falha ao publicar progresso do job #{job_id}: {e}")
+
+    def _ensure_task(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._task is not None and not self._task.done() and self._task.get_loop() is loop:
+            return
+        self._wake = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Falha ao gravar progresso dos jobs: {e}")
+            # Limita a taxa de escrita: reportes durante a espera so coalescem
+            await asyncio.sleep(self.flush_interval)
+
+    async def flush(self) -> int:
+        """Grava tudo o que esta pendente num UPDATE. Retorna quantos jobs."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        rows = [
+            {
+                "job_id": job_id,
+                "expected_status": data["status"],
+                "pct": data["progress_pct"],
+                "step": data["current_step"],
+            }
+            for job_id, data in pending.items()
+        ]
+        try:
+            async with async_session() as db:
+                await db.execute(_UPDATE_PROGRESS, rows)
+        except BaseException:
+            # Falha ou cancelamento no meio do flush: devolve o que nao foi substituido
+            with self._lock:
+                for job_id, data in pending.items():
+                    self._pending.setdefault(job_id, data)
+            raise
+        self.flushes += 1
+        return len(rows)
+
+    async def close(self) -> None:
+        """Para o loop e grava o que sobrou (shutdown do worker)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+progress_writer = JobProgressWriter()
+
+
+def redis_publisher(redis) -> Publisher:
+    """Publisher para o worker ARQ (processo sem clientes WebSocket)."""
+    async def publish(job_id: int, data: Dict[str, Any]) -> None:
+        await redis.publish(PROGRESS_CHANNEL, json.dumps({"job_id": job_id, **data}))
+    return publish
+
+
+async def relay_progress(publish: Publisher) -> None:
+    """Lado da API: repassa o progresso publicado pelos workers para o hub."""
+    from redis.asyncio import Redis
+    from core.config import REDIS_HOST, REDIS_PORT
+
+    while True:
+        client = Redis(host=REDIS_HOST, port=REDIS_PORT)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(PROGRESS_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    data = json.loads(message["data"])
+                    await publish(int(data.pop("job_id")), data)
+                except (ValueError, KeyError, TypeError) as e:
+                    logger.debug(f"Mensagem de progresso invalida: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Relay de progresso desconectado: {e}. Reconectando em 5s.")
+        finally:
+            try:
+                await pubsub.aclose()
+                await client.aclose()
+            except Exception:
+                pass
+        await asyncio.sleep(5)
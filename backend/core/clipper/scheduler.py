@@ -18,7 +18,9 @@ from datetime import datetime, timezone
 from typing import Optional
 from zoneinfo import ZoneInfo
 
-from core.database import safe_session
+from sqlalchemy import select
+
+from core.database import async_session
 from core.clipper.models import TwitchTarget
 from core.clipper.monitor import check_target
 
@@ -147,7 +149,7 @@ async def _scheduled_check_cycle() -> None:
     """
     try:
         ready_targets = await asyncio.wait_for(
-            asyncio.to_thread(_get_ready_target_ids_with_priority), timeout=30
+            _get_ready_target_ids_with_priority(), timeout=30
         )
     except asyncio.TimeoutError:
         logger.warning("Scheduler: DB query timeout (30s) ao buscar targets prontos.")
@@ -186,7 +188,7 @@ async def _scheduled_check_cycle() -> None:
         await asyncio.sleep(base_delay + extra_delay)
 
 
-def _get_ready_target_ids_with_priority() -> list[tuple[int, str]]:
+async def _get_ready_target_ids_with_priority() -> list[tuple[int, str]]:
     """
     Busca targets prontos para check, ordenados por prioridade:
     1. Categorias (precisam do radar + whitelist, mais custoso)
@@ -195,25 +197,27 @@ def _get_ready_target_ids_with_priority() -> list[tuple[int, str]]:
     Retorna lista de (target_id, target_type).
     """
     now = datetime.now(timezone.utc)
-    with safe_session() as db:
-        targets = (
-            db.query(TwitchTarget)
-            .filter(TwitchTarget.active.is_(True))
-            .all()
-        )
-        ready: list[tuple[int, str]] = []
-        for t in targets:
-            interval_minutes = t.check_interval_minutes or 15
-            if t.last_checked_at is None:
+    async with async_session() as db:
+        targets = (await db.execute(
+            select(
+                TwitchTarget.id, TwitchTarget.target_type,
+                TwitchTarget.check_interval_minutes, TwitchTarget.last_checked_at,
+            )
+            .where(TwitchTarget.active.is_(True))
+        )).all()
+    ready: list[tuple[int, str]] = []
+    for t in targets:
+        interval_minutes = t.check_interval_minutes or 15
+        if t.last_checked_at is None:
+            ready.append((t.id, t.target_type))
+        else:
+            # Normalizar timezone: DB pode retornar naive datetime
+            last = t.last_checked_at
+            if last.tzinfo is None:
+                last = last.replace(tzinfo=timezone.utc)
+            if (now - last).total_seconds() >= interval_minutes * 60:
                 ready.append((t.id, t.target_type))
-            else:
-                # Normalizar timezone: DB pode retornar naive datetime
-                last = t.last_checked_at
-                if last.tzinfo is None:
-                    last = last.replace(tzinfo=timezone.utc)
-                if (now - last).total_seconds() >= interval_minutes * 60:
-                    ready.append((t.id, t.target_type))
-
-        # Canais primeiro (mais rápidos), depois categorias
-        ready.sort(key=lambda x: 0 if x[1] != "category" else 1)
-        return ready
+
+    # Canais primeiro (mais rápidos), depois categorias
+    ready.sort(key=lambda x: 0 if x[1] != "category" else 1)
+    return ready
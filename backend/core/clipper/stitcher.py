@@ -8,8 +8,10 @@ duracao adequada, dispensando padding artificial.
 
 Estrategias:
     1. Clipe unico -> passthrough (copia direta)
-    2. Multiplos clipes -> crossfade de 0.5s entre eles
-    3. Fallback -> concat simples (corte seco)
+    2. Multiplos clipes -> crossfade de ~0.5s entre eles, num unico encode
+       (grafo xfade/acrossfade encadeado sobre todos os inputs)
+    3. Fallback -> crossfade par-a-par (re-encode por juncao)
+    4. Fallback -> concat simples (corte seco)
 
 Requisitos:
     - FFmpeg com libx264 no PATH
@@ -18,7 +20,6 @@ Requisitos:
 import os
 import uuid
 import asyncio
-import json
 import logging
 import random
 import shutil
@@ -27,6 +28,7 @@ from hashlib import md5
 from typing import List, Optional, Dict, Any
 
 from core.config import DATA_DIR
+from core.clipper.media_info import probe_media
 
 logger = logging.getLogger("ClipperStitcher")
 
@@ -46,51 +48,29 @@ VIDEO_BITRATE = "5M"
 CRF = "20"
 PRESET = "medium"
 
+# Crossfade N-way em passo unico (0 = sempre usar o modo par-a-par legado)
+SINGLE_PASS_CROSSFADE = os.getenv("STITCH_SINGLE_PASS", "1") != "0"
 
-async def _get_duration(file_path: str) -> float:
-    """Obtem duracao de um video via ffprobe."""
-    cmd = [
-        "ffprobe", "-v", "quiet",
-        "-print_format", "json",
-        "-show_format",
-        file_path,
-    ]
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, _ = await asyncio.wait_for(process.communicate(), timeout=15)
-
-    if process.returncode == 0:
-        try:
-            data = json.loads(stdout.decode("utf-8", errors="replace"))
-            return float(data.get("format", {}).get("duration", 0))
-        except (json.JSONDecodeError, ValueError, TypeError) as e:
-            logger.warning(f"ffprobe JSON parse failed for {file_path}: {e}")
-            return 0.0
-
-    return 0.0
+# Formato de audio comum antes do acrossfade
+_AUDIO_FORMAT = "aformat=sample_fmts=fltp:sample_rates=44100:channel_layouts=stereo"
 
 
+async def _get_duration(file_path: str) -> float:
+    """Obtem duracao de um video via ffprobe (cacheado). Retorna 0.0 se falhar."""
+    try:
+        return (await probe_media(file_path)).duration
+    except RuntimeError as e:
+        logger.warning(f"ffprobe falhou para {file_path}: {e}")
+        return 0.0
 
 
 async def _has_audio_stream(file_path: str) -> bool:
-    """Verifica se um video possui stream de audio."""
-    cmd = [
-        "ffprobe", "-v", "quiet",
-        "-select_streams", "a",
-        "-show_entries", "stream=codec_type",
-        "-of", "csv=p=0",
-        file_path,
-    ]
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, _ = await asyncio.wait_for(process.communicate(), timeout=10)
-    return bool(stdout.decode().strip())
+    """Verifica se um video possui stream de audio (ffprobe cacheado)."""
+    try:
+        return (await probe_media(file_path)).has_audio
+    except RuntimeError as e:
+        logger.warning(f"ffprobe falhou para {file_path}: {e}")
+        return False
 
 
 async def crossfade_two_clips(
@@ -236,6 +216,185 @@ async def crossfade_two_clips(
     }
 
 
+def _xfade_chain_parts(
+    v_labels: List[str],
+    a_labels: List[str],
+    durations: List[float],
+    fades: List[float],
+    out_v: str = "v",
+    out_a: str = "a",
+) -> tuple:
+    """
+    Encadeia xfade/acrossfade sobre labels ja normalizados (sem colchetes).
+
+    Returns:
+        (lista de filtros, duracao final estimada)
+    """
+    # Cada juncao i comeca no fim acumulado da cadeia menos o fade atual
+    parts = []
+    n = len(v_labels)
+    v_prev, a_prev = v_labels[0], a_labels[0]
+    chain_dur = durations[0]
+    for i in range(1, n):
+        fade = fades[i - 1]
+        offset = chain_dur - fade
+        v_next = out_v if i == n - 1 else f"vx{i}"
+        a_next = out_a if i == n - 1 else f"ax{i}"
+        parts.append(
+            f"[{v_prev}][{v_labels[i]}]xfade=transition=fade:duration={fade}:offset={offset:.4f}[{v_next}]"
+        )
+        parts.append(f"[{a_prev}][{a_labels[i]}]acrossfade=d={fade}:c1=tri:c2=tri[{a_next}]")
+        v_prev, a_prev = v_next, a_next
+        chain_dur = chain_dur + durations[i] - fade
+    return parts, chain_dur
+
+
+def _build_xfade_chain_filter(
+    durations: List[float],
+    has_audio: List[bool],
+    fades: List[float],
+) -> str:
+    """
+    Monta um filter_complex que costura N clipes com xfade/acrossfade encadeados.
+
+    Args:
+        durations: Duracao de cada clipe (s)
+        has_audio: Se cada clipe possui stream de audio
+        fades: Duracao de cada juncao (len = len(durations) - 1)
+
+    Returns:
+        filter_complex com saidas [v] e [a]
+    """
+    n = len(durations)
+    if n < 2 or len(has_audio) != n or len(fades) != n - 1:
+        raise ValueError("Parametros inconsistentes para crossfade N-way.")
+
+    parts = []
+    for i in range(n):
+        parts.append(f"[{i}:v]settb=1/60,setpts=PTS-STARTPTS[v{i}]")
+        if has_audio[i]:
+            parts.append(f"[{i}:a]{_AUDIO_FORMAT}[a{i}]")
+        else:
+            # Clip sem audio: silencio com a mesma duracao
+            parts.append(
+                f"anullsrc=channel_layout=stereo:sample_rate=44100,"
+                f"atrim=0:{durations[i]:.4f}[a{i}]"
+            )
+
+    chain_parts, _ = _xfade_chain_parts(
+        [f"v{i}" for i in range(n)],
+        [f"a{i}" for i in range(n)],
+        durations,
+        fades,
+    )
+    parts.extend(chain_parts)
+
+    return ";".join(parts)
+
+
+async def crossfade_multi_clips(
+    clip_paths: List[str],
+    output_path: str,
+    durations: Optional[List[float]] = None,
+    timeout_seconds: int = 600,
+) -> Dict[str, Any]:
+    """
+    Costura N clipes com crossfade em um unico encode FFmpeg.
+
+    Equivalente a encadear crossfade_two_clips, mas sem re-encodar o
+    intermediario a cada juncao nem gravar _stitch_temp_*.mp4 no disco.
+    """
+    if len(clip_paths) < 2:
+        return _error_result("Precisa de pelo menos 2 clipes para crossfade.")
+    for path in clip_paths:
+        if not os.path.exists(path):
+            return _error_result(f"Clipe nao encontrado: {path}")
+
+    if durations is None or len(durations) != len(clip_paths):
+        durations = [await _get_duration(p) for p in clip_paths]
+    has_audio = [await _has_audio_stream(p) for p in clip_paths]
+    fades = [_rand_crossfade() for _ in range(len(clip_paths) - 1)]
+
+    # Cada clipe precisa cobrir os fades das suas duas bordas
+    for i, dur in enumerate(durations):
+        needed = (fades[i - 1] if i > 0 else 0) + (fades[i] if i < len(fades) else 0)
+        if dur <= needed:
+            return _error_result(
+                f"Clipe {i + 1} muito curto ({dur:.1f}s) para crossfade de {needed:.2f}s"
+            )
+
+    if not all(has_audio):
+        logger.warning(
+            f"Crossfade N-way: {has_audio.count(False)} clip(s) sem audio, gerando silencio"
+        )
+
+    filter_complex = _build_xfade_chain_filter(durations, has_audio, fades)
+
+    cmd = ["ffmpeg", "-y"]
+    for path in clip_paths:
+        cmd += ["-i", path]
+    cmd += [
+        "-filter_complex", filter_complex,
+        "-map", "[v]",
+        "-map", "[a]",
+        "-c:v", "libx264",
+        "-profile:v", "high",
+        "-level:v", "4.1",
+        "-preset", PRESET,
+        "-crf", CRF,
+        "-b:v", VIDEO_BITRATE,
+        "-c:a", "aac",
+        "-b:a", "192k",
+        "-pix_fmt", "yuv420p",
+        "-map_metadata", "-1",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+
+    logger.info(
+        f"Crossfade N-way: {len(clip_paths)} clipes em passo unico "
+        f"(fades={fades}, estimado={sum(durations) - sum(fades):.1f}s)"
+    )
+
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    try:
+        _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout_seconds)
+    except asyncio.TimeoutError:
+        process.kill()
+        _cleanup(output_path)
+        return _error_result(f"FFmpeg crossfade N-way timeout apos {timeout_seconds}s")
+    except Exception:
+        process.kill()
+        _cleanup(output_path)
+        raise
+
+    if process.returncode != 0:
+        error = stderr.decode("utf-8", errors="replace").strip()
+        error_lines = error.split("\n")[-5:]
+        _cleanup(output_path)
+        return _error_result(f"FFmpeg crossfade N-way falhou: {' | '.join(error_lines)}")
+
+    if not os.path.exists(output_path):
+        return _error_result("Arquivo de saida do crossfade N-way nao gerado.")
+
+    duration = await _get_duration(output_path)
+    file_size = os.path.getsize(output_path)
+    logger.info(f"Crossfade N-way concluido: {duration:.1f}s, {file_size / 1024 / 1024:.1f}MB")
+
+    return {
+        "success": True,
+        "output_path": output_path,
+        "duration": duration,
+        "file_size": file_size,
+        "error": None,
+    }
+
+
 async def concat_simple(
     clip_paths: List[str],
     output_path: str,
@@ -368,7 +527,7 @@ async def ensure_minimum_duration(
 
     # Estrategia 2: Multiplos clipes, usar crossfade
     logger.info("Estrategia: Crossfade entre multiplos clipes.")
-    result = await _stitch_with_crossfade(valid_clips, output_path)
+    result = await _stitch_with_crossfade(valid_clips, output_path, durations)
     if result["success"]:
         return {**result, "strategy": "crossfade"}
     
@@ -381,8 +540,29 @@ async def ensure_minimum_duration(
     return result
 
 
-async def _stitch_with_crossfade(clips: List[str], output_path: str) -> Dict[str, Any]:
-    """Costura todos os clipes com crossfade sequencial."""
+async def _stitch_with_crossfade(
+    clips: List[str],
+    output_path: str,
+    durations: Optional[List[float]] = None,
+) -> Dict[str, Any]:
+    """
+    Costura todos os clipes com crossfade.
+    Tenta o grafo N-way em encode unico; se falhar, cai no par-a-par.
+    """
+    if len(clips) < 2:
+        return _error_result("Precisa de pelo menos 2 clipes para crossfade.")
+
+    if SINGLE_PASS_CROSSFADE and len(clips) > 2:
+        result = await crossfade_multi_clips(clips, output_path, durations=durations)
+        if result["success"]:
+            return result
+        logger.warning(f"Crossfade N-way falhou: {result['error']}. Tentando par-a-par...")
+
+    return await _stitch_with_pairwise_crossfade(clips, output_path)
+
+
+async def _stitch_with_pairwise_crossfade(clips: List[str], output_path: str) -> Dict[str, Any]:
+    """Costura todos os clipes com crossfade sequencial (um re-encode por juncao)."""
     if len(clips) < 2:
         return _error_result("Precisa de pelo menos 2 clipes para crossfade.")
 
@@ -518,36 +698,24 @@ async def create_seamless_loop(
                 _cleanup(tf)
 
 
-async def _apply_loop_tail(
-    clip_path: str,
-    output_path: str,
-    crossfade_sec: float = 1.5,
-    timeout_seconds: int = 300,
-) -> Dict[str, Any]:
-    """
-    Blend in-place para loop pixel-perfect no TikTok.
-
-    Em vez de appendar o início ao final (que duplica frames), substituímos
-    os últimos `crossfade_sec` do vídeo por um blend gradual:
-      - No início da zona de transição: 100% vídeo original (final)
-      - No final da zona de transição: 100% início do vídeo (primeiros frames)
+def _loop_tail_crossfade(clip_dur: float, crossfade_sec: float = 1.5) -> float:
+    """Duracao da zona de blend do loop-tail: max 10% do video, min 0.5s."""
+    cf = min(crossfade_sec, clip_dur * 0.10)
+    return max(cf, 0.5)  # Mínimo 0.5s para ser perceptível
 
-    Resultado: o último frame do output é visualmente idêntico ao primeiro.
-    Quando o TikTok reinicia automaticamente, a emenda é imperceptível.
 
-    O vídeo mantém a mesma duração — nenhum frame extra é adicionado.
+def _build_loop_tail_filter(
+    clip_dur: float,
+    cf: float,
+    v_in: str = "[0:v]",
+    a_in: str = "[0:a]",
+    v_out: str = "[v_out]",
+    a_out: str = "[a_out]",
+) -> str:
+    """
+    filter_complex do loop-tail pixel-perfect (ver _apply_loop_tail).
+    Os labels de entrada/saida sao parametrizaveis para compor em grafos maiores.
     """
-    clip_dur = await _get_duration(clip_path)
-
-    if clip_dur < crossfade_sec * 3:
-        # Vídeo muito curto para blend seguro — cópia direta
-        shutil.copy2(clip_path, output_path)
-        dur = await _get_duration(output_path)
-        return _success_result(output_path, dur, "loop_tail_fallback")
-
-    # Limitar crossfade a no máximo 10% da duração do vídeo
-    cf = min(crossfade_sec, clip_dur * 0.10)
-    cf = max(cf, 0.5)  # Mínimo 0.5s para ser perceptível
     body_end = clip_dur - cf
 
     # FFmpeg filter_complex em passo único:
@@ -556,9 +724,9 @@ async def _apply_loop_tail(
     # 3. Overlay HEAD sobre TAIL → zona de blend
     # 4. Concat BODY + BLEND → output com mesma duração
     # 5. Áudio: body_audio + crossfade(tail_audio, head_audio)
-    filter_complex = (
+    return (
         # Vídeo: split em 3 cópias
-        f"[0:v]split=3[body_src][tail_src][head_src];"
+        f"{v_in}split=3[body_src][tail_src][head_src];"
 
         # BODY: do início até o ponto de transição
         f"[body_src]trim=0:{body_end:.4f},setpts=PTS-STARTPTS[body_v];"
@@ -578,16 +746,49 @@ async def _apply_loop_tail(
         f"[tail_rgba][head_fade]overlay=format=auto,format=yuv420p[blend_v];"
 
         # Concatenar BODY + BLEND
-        f"[body_v][blend_v]concat=n=2:v=1:a=0[v_out];"
+        f"[body_v][blend_v]concat=n=2:v=1:a=0{v_out};"
 
         # Áudio: mesma lógica — body_audio + crossfade de tail/head
-        f"[0:a]atrim=0:{body_end:.4f},asetpts=PTS-STARTPTS[body_a];"
-        f"[0:a]atrim={body_end:.4f}:{clip_dur:.4f},asetpts=PTS-STARTPTS[tail_a];"
-        f"[0:a]atrim=0:{cf:.4f},asetpts=PTS-STARTPTS[head_a];"
+        f"{a_in}asplit=3[body_asrc][tail_asrc][head_asrc];"
+        f"[body_asrc]atrim=0:{body_end:.4f},asetpts=PTS-STARTPTS[body_a];"
+        f"[tail_asrc]atrim={body_end:.4f}:{clip_dur:.4f},asetpts=PTS-STARTPTS[tail_a];"
+        f"[head_asrc]atrim=0:{cf:.4f},asetpts=PTS-STARTPTS[head_a];"
         f"[tail_a][head_a]acrossfade=d={cf:.4f}:c1=tri:c2=tri[blend_a];"
-        f"[body_a][blend_a]concat=n=2:v=0:a=1[a_out]"
+        f"[body_a][blend_a]concat=n=2:v=0:a=1{a_out}"
     )
 
+
+async def _apply_loop_tail(
+    clip_path: str,
+    output_path: str,
+    crossfade_sec: float = 1.5,
+    timeout_seconds: int = 300,
+) -> Dict[str, Any]:
+    """
+    Blend in-place para loop pixel-perfect no TikTok.
+
+    Em vez de appendar o início ao final (que duplica frames), substituímos
+    os últimos `crossfade_sec` do vídeo por um blend gradual:
+      - No início da zona de transição: 100% vídeo original (final)
+      - No final da zona de transição: 100% início do vídeo (primeiros frames)
+
+    Resultado: o último frame do output é visualmente idêntico ao primeiro.
+    Quando o TikTok reinicia automaticamente, a emenda é imperceptível.
+
+    O vídeo mantém a mesma duração — nenhum frame extra é adicionado.
+    """
+    clip_dur = await _get_duration(clip_path)
+
+    if clip_dur < crossfade_sec * 3:
+        # Vídeo muito curto para blend seguro — cópia direta
+        shutil.copy2(clip_path, output_path)
+        dur = await _get_duration(output_path)
+        return _success_result(output_path, dur, "loop_tail_fallback")
+
+    cf = _loop_tail_crossfade(clip_dur, crossfade_sec)
+    body_end = clip_dur - cf
+    filter_complex = _build_loop_tail_filter(clip_dur, cf)
+
     cmd = [
         "ffmpeg", "-y",
         "-i", clip_path,
@@ -10,6 +10,7 @@ Gerenciamento de memoria:
     - Tenta CUDA (float16) se GPU disponivel
     - Fallback para CPU (int8) automaticamente
     - Libera modelo da memoria apos uso via context manager
+    - No worker do clipper, reusa modelos do pool (core/clipper/whisper_pool.py)
 
 Requisitos:
     - pip install faster-whisper
@@ -25,6 +26,7 @@ from datetime import datetime, timezone
 
 from core.database import safe_session
 from core.clipper.models import ClipJob
+from core.clipper.progress import progress_writer
 from core.config import DATA_DIR
 
 logger = logging.getLogger("ClipperTranscriber")
@@ -323,8 +325,19 @@ async def transcribe_video(video_path: str, language: Optional[str] = "pt") -> D
 
 
 def _transcribe_sync(audio_path: str, language: Optional[str] = "pt") -> Dict[str, Any]:
-    """Execucao sincrona da transcricao (para rodar em executor)."""
+    """
+    Execucao sincrona da transcricao (para rodar em executor).
+
+    Dentro do worker do clipper usa o pool persistente de modelos; fora dele
+    (ex: chamadas avulsas) carrega e libera o modelo por chamada.
+    """
+    from core.clipper.whisper_pool import get_whisper_pool
+
     try:
+        pool = get_whisper_pool()
+        if pool is not None:
+            with pool.lease() as ctx:
+                return ctx.transcribe_file(audio_path, language=language)
         with TranscriberContext() as ctx:
             return ctx.transcribe_file(audio_path, language=language)
     except Exception as e:
@@ -413,15 +426,10 @@ async def transcribe_job_clips(job_id: int) -> Dict[str, Any]:
 
 
 def _update_job_progress(job_id: int, current: int, total: int) -> None:
-    """Atualiza progresso da transcricao no banco (Weight: 25-50%)."""
+    """Reporta o progresso da transcricao (Weight: 25-50%); gravado em lote pelo progress_writer."""
     base_progress = 25
     progress = base_progress + int((current / total) * 25)
-    with safe_session() as db:
-        j = db.query(ClipJob).filter(ClipJob.id == job_id).first()
-        if j:
-            j.progress_pct = progress
-            j.current_step = f"Transcrevendo clipe {current}/{total}..."
-            db.commit()
+    progress_writer.report(job_id, progress, f"Transcrevendo clipe {current}/{total}...", status="transcribing")
 
 
 def _fail_job(job_id: int, error: str) -> None:
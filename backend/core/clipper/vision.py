@@ -11,12 +11,26 @@ v2 Melhorias:
 Usa facenet_pytorch.MTCNN para localizar faces humanas reais no video.
 MTCNN detecta landmarks faciais biometricos (olhos, nariz, boca), sendo
 imune a texturas de personagens de videogame.
+
+Performance:
+- Frames amostrados em um unico passo FFmpeg (so keyframes, ja reduzidos)
+  em vez de 10 seeks no OpenCV; MTCNN roda no lote inteiro de uma vez
+- Box cacheado por canal + resolucao: clipes seguintes do mesmo streamer
+  so fazem uma verificacao leve (3 frames, recorte do box) e caem para a
+  deteccao completa se a confianca cair
 """
 
 import cv2
 import logging
 import math
-from typing import Tuple, Optional, List
+import os
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Tuple, Optional, List
+
+import numpy as np
 
 logger = logging.getLogger("ClipperVision")
 
@@ -36,6 +50,14 @@ CORNER_BONUS = 1.5  # 50% de peso extra
 # Size consistency bonus
 SIZE_CONSISTENCY_BONUS = 1.3  # 30% de peso extra para tamanho estavel
 
+# Maior lado do frame entregue ao MTCNN (coords sao reescaladas depois)
+DETECT_MAX_SIDE = int(os.getenv("VISION_DETECT_MAX_SIDE", "960"))
+
+# Cache de box por canal + resolucao
+FACECAM_CACHE_TTL = float(os.getenv("VISION_CACHE_TTL_HOURS", "6")) * 3600
+VERIFY_SAMPLE_POSITIONS = [0.2, 0.5, 0.8]
+VERIFY_MIN_HITS = 2
+
 
 def _read_frame_at(cap: cv2.VideoCapture, position: float):
     """Le um frame na posicao relativa (0.0 a 1.0) do video."""
@@ -47,27 +69,133 @@ def _read_frame_at(cap: cv2.VideoCapture, position: float):
     return frame if ret else None
 
 
-def _detect_all_faces_mtcnn(frame, detector) -> List[Tuple[float, int, int, int, int]]:
+def _detect_size(width: int, height: int, max_side: int = DETECT_MAX_SIDE) -> Tuple[int, int, float]:
+    """Dimensoes (pares) de deteccao e a escala aplicada ao frame original."""
+    scale = min(1.0, max_side / float(max(width, height, 1)))
+    dw = max(2, int(width * scale) // 2 * 2)
+    dh = max(2, int(height * scale) // 2 * 2)
+    return dw, dh, dw / float(width)
+
+
+def _decode_sample_frames(
+    video_path: str,
+    positions: List[float],
+    duration: float,
+    size: Tuple[int, int],
+    timeout: int = 60,
+) -> List[np.ndarray]:
     """
-    Roda MTCNN no frame e retorna lista de (confianca, x, y, w, h)
-    para todas as faces com confianca >= MIN_CONFIDENCE.
+    Decodifica os frames amostrados em um unico passo FFmpeg (RGB, ja reduzidos).
+
+    Primeiro tenta so keyframes (-skip_frame nokey, muito barato); se o GOP
+    for longo demais para cobrir as posicoes, refaz decodificando tudo. Em
+    ambos os casos o select limita quantos frames saem pelo pipe.
     """
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    boxes, probs = detector.detect(rgb_frame)
+    dw, dh = size
+    frame_bytes = dw * dh * 3
+
+    for keyframes_only in (True, False):
+        # Keyframes: espacamento minimo de meio intervalo (GOP irregular);
+        # decode completo: exatamente um frame por intervalo
+        divisor = len(positions) * (2 if keyframes_only else 1)
+        interval = duration / divisor if duration > 0 else 0.0
+        vf = f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{interval:.3f})',scale={dw}:{dh}"
+        cmd = ["ffmpeg", "-v", "error"]
+        if keyframes_only:
+            cmd += ["-skip_frame", "nokey"]
+        cmd += [
+            "-i", video_path,
+            "-an",
+            "-vf", vf,
+            "-fps_mode", "passthrough",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-",
+        ]
+        proc = subprocess.run(cmd, capture_output=True, timeout=timeout)
+        n = len(proc.stdout) // frame_bytes
+        if proc.returncode != 0 or n == 0:
+            continue
+
+        frames = np.frombuffer(proc.stdout[: n * frame_bytes], dtype=np.uint8).reshape(n, dh, dw, 3)
+        picks = sorted({min(n - 1, int(round(p * (n - 1)))) for p in positions})
+        if keyframes_only and len(picks) < (len(positions) + 1) // 2:
+            continue
+        return [frames[i] for i in picks]
+
+    return []
+
+
+def _read_sample_frames_cv2(
+    video_path: str, positions: List[float], size: Tuple[int, int]
+) -> List[np.ndarray]:
+    """Fallback: seeks no OpenCV (lento, mas nao depende do FFmpeg no PATH)."""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    try:
+        for pos in positions:
+            frame = _read_frame_at(cap, pos)
+            if frame is None:
+                continue
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    finally:
+        cap.release()
+    return frames
+
 
+def _sample_frames(
+    video_path: str, positions: List[float], duration: float, size: Tuple[int, int]
+) -> List[np.ndarray]:
+    try:
+        frames = _decode_sample_frames(video_path, positions, duration, size)
+        if frames:
+            return frames
+    except Exception as e:
+        logger.warning(f"Decode FFmpeg falhou ({e}). Usando seeks do OpenCV.")
+    return _read_sample_frames_cv2(video_path, positions, size)
+
+
+def _faces_from_detection(boxes, probs, scale: float, offset=(0, 0)) -> List[Tuple[float, int, int, int, int]]:
+    """Converte a saida do MTCNN em (confianca, x, y, w, h) no frame original."""
     valid_faces = []
     if boxes is None or probs is None or len(boxes) == 0:
         return valid_faces
 
+    ox, oy = offset
     for box, prob in zip(boxes, probs):
         if prob is not None and prob >= MIN_CONFIDENCE:
-            x1, y1, x2, y2 = int(box[0]), int(box[1]), int(box[2]), int(box[3])
+            x1, y1 = int(box[0] / scale) + ox, int(box[1] / scale) + oy
+            x2, y2 = int(box[2] / scale) + ox, int(box[3] / scale) + oy
             if x2 > x1 and y2 > y1:
                 valid_faces.append((float(prob), x1, y1, x2 - x1, y2 - y1))
 
     return valid_faces
 
 
+def _detect_faces_batch(
+    frames: List[np.ndarray], detector, scale: float, offset=(0, 0)
+) -> List[List[Tuple[float, int, int, int, int]]]:
+    """
+    Roda o MTCNN no lote de frames RGB (mesmas dimensoes) de uma vez.
+    Retorna, por frame, a lista de faces com confianca >= MIN_CONFIDENCE.
+    """
+    if not frames:
+        return []
+    try:
+        batch_boxes, batch_probs = detector.detect(list(frames))
+    except Exception as e:
+        logger.warning(f"MTCNN em lote falhou ({e}). Detectando frame a frame.")
+        results = [detector.detect(f) for f in frames]
+        batch_boxes = [r[0] for r in results]
+        batch_probs = [r[1] for r in results]
+
+    return [
+        _faces_from_detection(boxes, probs, scale, offset)
+        for boxes, probs in zip(batch_boxes, batch_probs)
+    ]
+
+
 def _compute_iou(boxA, boxB):
     """Calcula a Intersection over Union (IoU) entre dois bounding boxes (x, y, w, h)."""
     xA = max(boxA[0], boxB[0])
@@ -146,11 +274,17 @@ def _cluster_score(cluster, frame_w, frame_h) -> float:
 
 # ── Singleton MTCNN ──────────────────────────────────────────────────────
 _MTCNN_INSTANCE = None
+_MTCNN_LOCK = threading.Lock()
 
 def _get_detector():
     """Retorna a instancia singleton do MTCNN, criando na primeira chamada."""
     global _MTCNN_INSTANCE
-    if _MTCNN_INSTANCE is None:
+    if _MTCNN_INSTANCE is not None:
+        return _MTCNN_INSTANCE
+    # Edicoes paralelas chamam a deteccao de threads do executor
+    with _MTCNN_LOCK:
+        if _MTCNN_INSTANCE is not None:
+            return _MTCNN_INSTANCE
         try:
             from facenet_pytorch import MTCNN
             import torch
@@ -168,11 +302,97 @@ def _get_detector():
     return _MTCNN_INSTANCE
 
 
+# ── Cache de box por canal ───────────────────────────────────────────────
+
+@dataclass
+class _CachedFacecam:
+    box: Tuple[int, int, int, int]     # Box final (com padding)
+    face: Tuple[int, int, int, int]    # Face eleita (sem padding)
+    is_irl: bool
+    created_at: float
+
+
+_FACECAM_CACHE: Dict[tuple, _CachedFacecam] = {}
+_FACECAM_CACHE_LOCK = threading.Lock()
+
+
+def _cache_get(key) -> Optional[_CachedFacecam]:
+    if key is None:
+        return None
+    with _FACECAM_CACHE_LOCK:
+        entry = _FACECAM_CACHE.get(key)
+        if entry and time.time() - entry.created_at > FACECAM_CACHE_TTL:
+            _FACECAM_CACHE.pop(key, None)
+            return None
+        return entry
+
+
+def _cache_set(key, entry: Optional[_CachedFacecam]) -> None:
+    if key is None:
+        return
+    with _FACECAM_CACHE_LOCK:
+        if entry is None:
+            _FACECAM_CACHE.pop(key, None)
+        else:
+            _FACECAM_CACHE[key] = entry
+
+
+def clear_facecam_cache() -> None:
+    with _FACECAM_CACHE_LOCK:
+        _FACECAM_CACHE.clear()
+
+
+def _video_meta(video_path: str) -> Optional[Tuple[int, int, float]]:
+    """(largura, altura, duracao) via OpenCV (so le o header)."""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            return None
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0
+        duration = frames / fps if fps > 0 else 0.0
+        return width, height, duration
+    finally:
+        cap.release()
+
+
+def _verify_cached_face(
+    video_path: str, cached: _CachedFacecam, width: int, height: int, duration: float, detector
+) -> bool:
+    """
+    Confere se a face cacheada continua no mesmo lugar: MTCNN so no recorte
+    do box em VERIFY_SAMPLE_POSITIONS frames.
+    """
+    dw, dh, scale = _detect_size(width, height)
+    frames = _sample_frames(video_path, VERIFY_SAMPLE_POSITIONS, duration, (dw, dh))
+    if not frames:
+        return False
+
+    bx, by, bw, bh = cached.box
+    x1, y1 = int(bx * scale), int(by * scale)
+    x2, y2 = min(dw, int((bx + bw) * scale)), min(dh, int((by + bh) * scale))
+    if x2 - x1 < 24 or y2 - y1 < 24:
+        return False
+
+    crops = [np.ascontiguousarray(f[y1:y2, x1:x2]) for f in frames]
+    per_frame = _detect_faces_batch(crops, detector, scale, offset=(bx, by))
+
+    hits = sum(
+        1 for faces in per_frame
+        if any(_compute_iou(f[1:], cached.face) >= 0.30 for f in faces)
+    )
+    return hits >= min(VERIFY_MIN_HITS, len(frames))
+
+
 def detect_facecam_box(
     video_path: str,
     padding_pct_up: float = 1.00,
     padding_pct_down: float = 0.50,
     padding_pct_sides: float = 1.50,
+    channel_name: Optional[str] = None,
+    use_cache: bool = True,
     **kwargs,
 ) -> Optional[Tuple[int, int, int, int]]:
     """
@@ -183,6 +403,9 @@ def detect_facecam_box(
     - Size Consistency: facecams tem tamanho estavel vs faces em conteudo de react
     - IRL Detection: se a maior face ocupa >15% da tela, assume IRL mode
 
+    Com channel_name, o box fica cacheado por canal + resolucao + padding e
+    e reusado enquanto a verificacao leve confirmar a face no mesmo lugar.
+
     Retorna (x, y, w, h) para crop, ou None se nenhuma face consistente encontrada.
     """
     try:
@@ -191,36 +414,41 @@ def detect_facecam_box(
             logger.error("MTCNN nao disponivel. Pulando deteccao facial.")
             return None
 
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
+        meta = _video_meta(video_path)
+        if meta is None:
             logger.error(f"Nao foi possivel abrir o video: {video_path}")
             return None
 
-        frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        frame_width, frame_height, duration = meta
         total_area = frame_width * frame_height
 
+        cache_key = None
+        if use_cache and channel_name:
+            cache_key = (
+                channel_name.lower(), frame_width, frame_height,
+                padding_pct_up, padding_pct_down, padding_pct_sides,
+            )
+            cached = _cache_get(cache_key)
+            if cached is not None:
+                if _verify_cached_face(video_path, cached, frame_width, frame_height, duration, detector):
+                    logger.info(f"[{channel_name}] Box de facecam reusado do cache: {cached.box}")
+                    return cached.box
+                logger.info(f"[{channel_name}] Face cacheada nao confirmada. Redetectando.")
+                _cache_set(cache_key, None)
+
+        dw, dh, scale = _detect_size(frame_width, frame_height)
+        frames = _sample_frames(video_path, SAMPLE_POSITIONS, duration, (dw, dh))
+        frames_tested = len(frames)
+
         # Filtro geometrico: face >= 0.5% da tela (filtra avatares de jogo)
         min_face_area = total_area * 0.005
 
-        all_detections = []
-        frames_tested = 0
-
-        for pos in SAMPLE_POSITIONS:
-            frame = _read_frame_at(cap, pos)
-            if frame is None:
-                continue
-
-            frames_tested += 1
-            faces = _detect_all_faces_mtcnn(frame, detector)
-
-            for f in faces:
-                _, bx, by, bw, bh = f
-                face_area = bw * bh
-                if face_area >= min_face_area:
-                    all_detections.append(f)
-
-        cap.release()
+        all_detections = [
+            f
+            for faces in _detect_faces_batch(frames, detector, scale)
+            for f in faces
+            if f[3] * f[4] >= min_face_area
+        ]
 
         if not all_detections:
             logger.warning(f"Nenhuma face detectada em {frames_tested} frames.")
@@ -300,6 +528,9 @@ def detect_facecam_box(
         mode_str = "IRL" if is_irl else "FACECAM"
         logger.info(f"[{mode_str}] Box final: {box} (pad: up={pad_up} down={pad_down} sides={pad_sides})")
 
+        _cache_set(cache_key, _CachedFacecam(
+            box=box, face=(bx, by, bw, bh), is_irl=is_irl, created_at=time.time(),
+        ))
         return box
 
     except Exception as e:
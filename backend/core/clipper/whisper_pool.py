@@ -0,0 +1,288 @@
+"""
+Clipper Whisper Pool - Modelos faster-whisper persistentes por worker
+======================================================================
+
+Mantem replicas de `WhisperModel` carregadas durante a vida do worker ARQ
+do clipper, em vez de carregar/descarregar o modelo a cada clipe.
+
+Comportamento:
+    - Carregamento preguicoso ate WHISPER_POOL_SIZE replicas
+    - Replica ociosa ha mais de WHISPER_IDLE_EVICT_MINUTES e descarregada
+    - Guarda de memoria: sem RAM livre suficiente, nao carrega replica extra
+      (espera uma existente) e libera as ociosas
+
+Uso:
+    pool = init_whisper_pool()          # no startup do worker
+    with pool.lease() as ctx:           # em thread (executor)
+        ctx.transcribe_file(audio_path)
+    shutdown_whisper_pool()             # no shutdown do worker
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from core.clipper.transcriber import TranscriberContext, DEFAULT_MODEL_SIZE
+
+logger = logging.getLogger("ClipperWhisperPool")
+
+# Numero maximo de replicas do modelo (cada replica "small" int8 ~ 0.5-1GB RAM)
+POOL_SIZE = int(os.getenv("WHISPER_POOL_SIZE", "1"))
+
+# Replicas ociosas por mais que isso sao descarregadas (0 = nunca)
+IDLE_EVICT_MINUTES = float(os.getenv("WHISPER_IDLE_EVICT_MINUTES", "15"))
+
+# RAM livre minima (MB) para carregar uma replica adicional
+MIN_FREE_MEMORY_MB = int(os.getenv("WHISPER_MIN_FREE_MEMORY_MB", "1536"))
+
+# Intervalo do reaper de replicas ociosas (segundos)
+REAPER_INTERVAL = 60
+
+# Tempo maximo esperando uma replica livre antes de desistir (segundos)
+LEASE_TIMEOUT = 900
+
+
+def _available_memory_mb() -> Optional[float]:
+    """RAM disponivel em MB (None se psutil indisponivel)."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class _Replica:
+    """Uma instancia carregada do modelo + timestamp do ultimo uso."""
+
+    def __init__(self, ctx: TranscriberContext):
+        self.ctx = ctx
+        self.last_used = time.monotonic()
+
+
+class WhisperModelPool:
+    """
+    Pool thread-safe de modelos faster-whisper.
+
+    As transcricoes rodam em threads do executor, entao a sincronizacao usa
+    `threading.Condition` (nao asyncio).
+    """
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        model_size: str = DEFAULT_MODEL_SIZE,
+        idle_evict_seconds: float = IDLE_EVICT_MINUTES * 60,
+        min_free_memory_mb: int = MIN_FREE_MEMORY_MB,
+        loader: Optional[Callable[[str], TranscriberContext]] = None,
+        memory_probe: Callable[[], Optional[float]] = _available_memory_mb,
+    ):
+        self.size = max(1, size)
+        self.model_size = model_size
+        self.idle_evict_seconds = idle_evict_seconds
+        self.min_free_memory_mb = min_free_memory_mb
+        self._loader = loader or self._default_loader
+        self._memory_probe = memory_probe
+
+        self._cond = threading.Condition()
+        self._idle: List[_Replica] = []
+        self._total = 0      # replicas carregadas (ociosas + em uso)
+        self._loading = 0    # replicas sendo carregadas agora
+        self._closed = False
+
+    @staticmethod
+    def _default_loader(model_size: str) -> TranscriberContext:
+        ctx = TranscriberContext(model_size=model_size)
+        return ctx.__enter__()
+
+    # ── Memoria ────────────────────────────────────────────────────────
+
+    def _memory_ok(self) -> bool:
+        available = self._memory_probe()
+        if available is None:
+            return True
+        return available >= self.min_free_memory_mb
+
+    # ── Lease ──────────────────────────────────────────────────────────
+
+    def warm_up(self) -> None:
+        """Carrega a primeira replica (chamado no startup do worker)."""
+        with self.lease():
+            pass
+
+    @contextmanager
+    def lease(self, timeout: float = LEASE_TIMEOUT):
+        """Empresta uma replica carregada; devolve ao pool ao sair."""
+        replica = self._acquire(timeout)
+        try:
+            yield replica.ctx
+        finally:
+            self._release(replica)
+
+    def _acquire(self, timeout: float) -> _Replica:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Whisper pool encerrado.")
+                if self._idle:
+                    return self._idle.pop()
+
+                in_flight = self._total + self._loading
+                if in_flight < self.size:
+                    # Sempre permite a primeira replica; as extras exigem RAM livre
+                    if in_flight == 0 or self._memory_ok():
+                        self._loading += 1
+                        break
+                    logger.warning(
+                        f"Whisper pool: memoria baixa, aguardando replica existente "
+                        f"({self._total} carregada(s))."
+                    )
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Nenhuma replica Whisper disponivel a tempo.")
+                self._cond.wait(remaining)
+
+        # Carrega fora do lock (pode levar varios segundos)
+        try:
+            logger.info(f"Whisper pool: carregando replica {self._total + 1}/{self.size}...")
+            ctx = self._loader(self.model_size)
+        except Exception:
+            with self._cond:
+                self._loading -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._loading -= 1
+            self._total += 1
+        return _Replica(ctx)
+
+    def _release(self, replica: _Replica) -> None:
+        replica.last_used = time.monotonic()
+        with self._cond:
+            if self._closed:
+                self._total -= 1
+                drop = True
+            else:
+                self._idle.append(replica)
+                drop = False
+            self._cond.notify()
+        if drop:
+            self._unload(replica)
+        elif not self._memory_ok():
+            # Pressao de memoria: mantem apenas uma replica ociosa
+            self.evict_idle(keep=1, force=True)
+
+    # ── Eviction ───────────────────────────────────────────────────────
+
+    def evict_idle(self, keep: int = 0, force: bool = False) -> int:
+        """
+        Descarrega replicas ociosas.
+
+        Args:
+            keep: Minimo de replicas ociosas a manter.
+            force: Ignora o tempo de ociosidade (usado sob pressao de memoria).
+
+        Returns:
+            Quantidade de replicas descarregadas.
+        """
+        now = time.monotonic()
+        victims = []
+        with self._cond:
+            # Mais antigas primeiro (o pool reusa do fim da lista)
+            self._idle.sort(key=lambda r: r.last_used)
+            while len(self._idle) > keep:
+                candidate = self._idle[0]
+                idle_for = now - candidate.last_used
+                if not force and (self.idle_evict_seconds <= 0 or idle_for < self.idle_evict_seconds):
+                    break
+                victims.append(self._idle.pop(0))
+                self._total -= 1
+            if victims:
+                self._cond.notify_all()
+
+        for replica in victims:
+            self._unload(replica)
+        if victims:
+            logger.info(f"Whisper pool: {len(victims)} replica(s) ociosa(s) descarregada(s).")
+        return len(victims)
+
+    def close(self) -> None:
+        """Descarrega todas as replicas; replicas em uso sao liberadas na devolucao."""
+        with self._cond:
+            self._closed = True
+            victims = list(self._idle)
+            self._idle.clear()
+            self._total -= len(victims)
+            self._cond.notify_all()
+        for replica in victims:
+            self._unload(replica)
+
+    @staticmethod
+    def _unload(replica: _Replica) -> None:
+        try:
+            replica.ctx.__exit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Whisper pool: falha ao descarregar replica: {e}")
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "loaded": self._total,
+                "idle": len(self._idle),
+                "loading": self._loading,
+                "in_use": self._total - len(self._idle),
+            }
+
+
+# ── Pool global do worker ──────────────────────────────────────────────
+
+_pool: Optional[WhisperModelPool] = None
+
+
+def get_whisper_pool() -> Optional[WhisperModelPool]:
+    """Pool ativo do worker (None fora do worker do clipper)."""
+    return _pool
+
+
+def init_whisper_pool(**kwargs) -> WhisperModelPool:
+    """Cria o pool global (idempotente)."""
+    global _pool
+    if _pool is None:
+        _pool = WhisperModelPool(**kwargs)
+        logger.info(
+            f"Whisper pool iniciado: size={_pool.size}, model={_pool.model_size}, "
+            f"idle_evict={IDLE_EVICT_MINUTES}min, min_free={MIN_FREE_MEMORY_MB}MB"
+        )
+    return _pool
+
+
+def shutdown_whisper_pool() -> None:
+    """Encerra o pool global e libera a memoria dos modelos."""
+    global _pool
+    if _pool is not None:
+        _pool.close()
+        _pool = None
+        logger.info("Whisper pool encerrado.")
+
+
+async def whisper_pool_reaper(interval: float = REAPER_INTERVAL):
+    """Loop que descarrega replicas ociosas periodicamente."""
+    while True:
+        await asyncio.sleep(interval)
+        pool = _pool
+        if pool is None:
+            continue
+        try:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, pool.evict_idle)
+            if not pool._memory_ok():
+                await loop.run_in_executor(None, lambda: pool.evict_idle(keep=1, force=True))
+        except Exception as e:
+            logger.error(f"Whisper pool reaper: {e}")
@@ -13,6 +13,7 @@ import sys
 import logging
 import os
 from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
 from arq.connections import RedisSettings
 from dotenv import load_dotenv
 
@@ -27,10 +28,16 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from core.clipper.downloader import download_job_clips
 from core.clipper.transcriber import transcribe_job_clips
 from core.clipper.subtitle_engine import generate_ass_for_multiple
-from core.clipper.editor import edit_clip
-from core.clipper.stitcher import ensure_minimum_duration
+from core.clipper.editor import edit_clip, plan_edit_concurrency
+from core.clipper.stitcher import ensure_minimum_duration, _get_duration
+from core.clipper.fused import FUSED_PIPELINE, render_job_fused
+from core.clipper.pipeline import get_clip_pipeline, pipeline_max_jobs
+from core.clipper.progress import progress_writer, redis_publisher
+from core.clipper.preview import cancel_previews, schedule_previews
 
-from core.database import safe_session
+from sqlalchemy import select
+
+from core.database import async_session, safe_session
 from core.clipper.models import ClipJob, TwitchTarget
 from core.models import PendingApproval
 
@@ -39,16 +46,18 @@ logger = logging.getLogger("ClipperWorker")
 # Track job IDs enqueued during startup to prevent double-enqueue in the first orphan scan
 _startup_enqueued_ids: set = set()
 
+# Jobs em voo neste worker (max_jobs > 1: um job aguardando slot ainda esta "pending")
+_inflight_job_ids: set = set()
+
 
-def _fail_job_db(job_id: int, error_message: str, current_step: str = "Falha no pipeline."):
+async def _fail_job_db(job_id: int, error_message: str, current_step: str = "Falha no pipeline."):
     """Helper para marcar job como falhado no DB."""
-    with safe_session() as db:
-        job = db.query(ClipJob).filter(ClipJob.id == job_id).first()
+    async with async_session() as db:
+        job = await db.get(ClipJob, job_id)
         if job:
             job.status = "failed"
             job.error_message = error_message[:500]
             job.current_step = current_step
-            db.commit()
     logger.error(f"Job #{job_id} falhado: {error_message[:200]}")
 
 
@@ -60,46 +69,110 @@ async def _process_clip_job_inner(ctx, job_id: int):
     3. ASS (legendas estilizadas)
     4. FFmpeg Edit (facecam crop, ass burn, 9:16)
     5. Stitcher (crossfade se multiplos clipes)
+
+    As etapas rodam em estagios do ClipPipeline (download / transcribe /
+    render), cada um com seu limite — varios jobs ficam em voo ao mesmo tempo.
     """
     logger.info(f"==> Iniciando processamento do ClipJob #{job_id}")
 
     # Guard: só processar jobs que estão na fila (pending) ou em etapas intermediárias
     # NUNCA processar waiting_clips diretamente — devem ser promovidos para pending primeiro
-    with safe_session() as db:
-        guard_job = db.query(ClipJob).filter(ClipJob.id == job_id).first()
-        if not guard_job:
-            logger.warning(f"Job #{job_id} nao encontrado no DB, pulando.")
-            return
-        if guard_job.status not in ("pending", "downloading", "transcribing", "editing", "stitching"):
-            logger.info(f"Job #{job_id} em status '{guard_job.status}', não pode ser processado. Deve ir para fila (pending) primeiro.")
-            return
+    async with async_session() as db:
+        guard_status = (await db.execute(select(ClipJob.status).where(ClipJob.id == job_id))).first()
+    if not guard_status:
+        logger.warning(f"Job #{job_id} nao encontrado no DB, pulando.")
+        return
+    if guard_status.status not in ("pending", "downloading", "transcribing", "editing", "stitching"):
+        logger.info(f"Job #{job_id} em status '{guard_status.status}', não pode ser processado. Deve ir para fila (pending) primeiro.")
+        return
 
-    # 1. Download
+    start_stage = await _resume_stage(job_id)
+    steps = [
+        ("download", lambda: _stage_download(job_id)),
+        ("transcribe", lambda: _stage_transcribe(job_id)),
+        ("render", lambda: _stage_render(ctx, job_id)),
+    ]
+    steps = steps[[name for name, _ in steps].index(start_stage):]
+    if start_stage != "download":
+        logger.info(f"Job #{job_id}: retomando a partir do estagio '{start_stage}'")
+
+    await get_clip_pipeline().run(job_id, steps, on_wait=lambda stage: _mark_waiting(job_id, stage))
+
+
+_STAGE_LABELS = {"download": "download", "transcribe": "transcricao", "render": "edicao"}
+
+
+async def _mark_waiting(job_id: int, stage: str) -> None:
+    """Sinaliza no job que ele esta na fila de um estagio congestionado."""
+    async with async_session() as db:
+        job = await db.get(ClipJob, job_id)
+        if job:
+            job.current_step = f"Aguardando slot de {_STAGE_LABELS.get(stage, stage)}..."
+
+
+async def _resume_stage(job_id: int) -> str:
+    """
+    Estagio inicial a partir do ClipJob.status: um job que ja passou do
+    download (arquivos no disco) ou da transcricao nao refaz essas etapas.
+    """
+    async with async_session() as db:
+        row = (await db.execute(
+            select(ClipJob.status, ClipJob.clip_local_paths, ClipJob.whisper_result).where(ClipJob.id == job_id)
+        )).first()
+    if not row:
+        return "download"
+    status = row.status
+    local_paths = row.clip_local_paths or []
+    has_transcripts = bool(row.whisper_result)
+
+    if not local_paths or not all(os.path.exists(p) for p in local_paths):
+        return "download"
+    if status in ("editing", "stitching") and has_transcripts:
+        return "render"
+    if status in ("transcribing", "editing", "stitching"):
+        return "transcribe"
+    return "download"
+
+
+async def _stage_download(job_id: int) -> bool:
     dl_result = await download_job_clips(job_id)
     if not dl_result.get("success"):
         error_msg = dl_result.get("error", "Unknown error")
-        _fail_job_db(job_id, f"Download error: {error_msg}", "Falha no download dos clipes.")
-        return
+        await _fail_job_db(job_id, f"Download error: {error_msg}", "Falha no download dos clipes.")
+        return False
+    return True
+
 
-    # 2. Transcricao (Whisper)
+async def _stage_transcribe(job_id: int) -> bool:
     tr_result = await transcribe_job_clips(job_id)
     if not tr_result.get("success"):
         error_msg = tr_result.get("error", "Unknown error")
         errors = tr_result.get("errors", [])
         full_error = f"Transcription error: {error_msg}" + (f" | {' | '.join(errors)}" if errors else "")
-        _fail_job_db(job_id, full_error, "Falha na transcricao de audio.")
-        return
+        await _fail_job_db(job_id, full_error, "Falha na transcricao de audio.")
+        return False
+    return True
+
+
+async def _stage_render(ctx, job_id: int) -> bool:
+    """Edicao, stitch, aprovacao e variantes — ultimo estagio do pipeline."""
+    await _render_job(ctx, job_id)
+    return True
 
+
+async def _render_job(ctx, job_id: int):
     # Preparar para edicao
-    with safe_session() as db:
-        job = db.query(ClipJob).filter(ClipJob.id == job_id).first()
-        if not job:
-            return
-        local_paths = job.clip_local_paths or []
-        transcriptions = job.whisper_result or []
+    async with async_session() as db:
+        row = (await db.execute(
+            select(ClipJob.clip_local_paths, ClipJob.whisper_result).where(ClipJob.id == job_id)
+        )).first()
+    if not row:
+        return
+    local_paths = row.clip_local_paths or []
+    transcriptions = row.whisper_result or []
 
     if not local_paths or not transcriptions:
-        _fail_job_db(job_id, "Arquivos locais ou transcricoes nao encontrados.", "Falha ao preparar para edicao.")
+        await _fail_job_db(job_id, "Arquivos locais ou transcricoes nao encontrados.", "Falha ao preparar para edicao.")
         return
 
     # Diagnóstico: rastrear mismatch entre local_paths e transcriptions
@@ -118,7 +191,7 @@ async def _process_clip_job_inner(ctx, job_id: int):
         logger.info(f"Job #{job_id}: {len(wordless)} clip(s) sem palavras — serão editados sem legendas.")
 
     if not valid_pairs:
-        _fail_job_db(job_id, "Nenhum clipe encontrado para edição.", "Falha: lista de clips vazia.")
+        await _fail_job_db(job_id, "Nenhum clipe encontrado para edição.", "Falha: lista de clips vazia.")
         return
 
     # Buscar dados principais em uma única transação
@@ -129,10 +202,11 @@ async def _process_clip_job_inner(ctx, job_id: int):
     layout_mode = "auto"
     clip_titles = []
     clip_metadata = []
+    clip_probes = {}
     layout_overrides = {}
 
-    with safe_session() as db:
-        job_obj = db.query(ClipJob).filter(ClipJob.id == job_id).first()
+    async with async_session() as db:
+        job_obj = await db.get(ClipJob, job_id)
         if job_obj:
             clip_metadata = job_obj.clip_metadata or []
             layout_overrides = job_obj.layout_mode_overrides or {}
@@ -141,9 +215,16 @@ async def _process_clip_job_inner(ctx, job_id: int):
             # Extrair títulos dos clips para metadados ricos
             clip_titles = [meta.get("title", "") for meta in clip_metadata]
 
+            # Probes persistidos pelo downloader (evita re-probar cada clipe)
+            clip_probes = {
+                meta["probe"]["path"]: meta["probe"]
+                for meta in clip_metadata
+                if isinstance(meta, dict) and isinstance(meta.get("probe"), dict) and meta["probe"].get("path")
+            }
+
             if job_obj.target_id:
                 target_id = job_obj.target_id
-                target = db.query(TwitchTarget).filter(TwitchTarget.id == job_obj.target_id).first()
+                target = await db.get(TwitchTarget, job_obj.target_id)
                 if target:
                     channel_name = target.channel_name
                     target_type = getattr(target, 'target_type', 'channel') or 'channel'
@@ -158,10 +239,6 @@ async def _process_clip_job_inner(ctx, job_id: int):
             job_obj.status = "editing"
             job_obj.current_step = f"Editando 0/{len(valid_pairs)} clipes..."
             job_obj.progress_pct = 50
-            db.commit()
-
-    # 3. Gerar ASS & 4. FFmpeg Edit (por clipe individual)
-    edited_paths = []
 
     # ── Anti-Shadowban: gerar params UMA VEZ por job (consistência entre clips) ──
     import random as _random
@@ -210,176 +287,40 @@ async def _process_clip_job_inner(ctx, job_id: int):
 
         return "gameplay"  # default: split facecam + gameplay
 
-    for idx, (path, trans) in enumerate(valid_pairs):
-        ass_path = None
-        clip_layout = _resolve_layout(idx)
-        clip_title = clip_titles[idx] if idx < len(clip_titles) else None
-        try:
-            # Hook textual: título do clip nos 3 primeiros seg (apenas no 1o clip do job)
-            hook = clip_title if idx == 0 else None
-            # Gerar legendas apenas para clips com palavras transcritas
-            if trans.get("word_count", 0) > 0:
-                ass_path = generate_ass_for_multiple(
-                    transcriptions=[trans],
-                    style_name=asb_style,
-                    time_offsets=[0.0],
-                    hook_title=hook,
-                    layout_mode=clip_layout,
-                )
-            else:
-                ass_path = None
-
-            edit_res = await edit_clip(
-                video_path=path,
-                ass_path=ass_path,
-                timeout_seconds=900,
-                channel_name=channel_name,
-                layout_mode=clip_layout,
-                asb_params=asb_params,
-                clip_title=clip_title,
-            )
-
-            if edit_res.get("success"):
-                edited_paths.append(edit_res.get("output_path"))
-            else:
-                logger.error(f"Job #{job_id} falhou na edicao do clipe {idx}: {edit_res.get('error')}")
-        except Exception as e:
-            logger.error(f"Job #{job_id} excecao na edicao do clipe {idx}: {e}", exc_info=True)
-        finally:
-            if ass_path and os.path.exists(ass_path):
-                try:
-                    os.remove(ass_path)
-                except OSError:
-                    pass
-
-        with safe_session() as db:
-            job = db.query(ClipJob).filter(ClipJob.id == job_id).first()
-            if job:
-                job.current_step = f"Editando {idx + 1}/{len(valid_pairs)} clipes..."
-                job.progress_pct = 50 + int(((idx + 1) / len(valid_pairs)) * 40)
-                db.commit()
-
-    if not edited_paths:
-        _fail_job_db(job_id, "Nenhum clipe foi editado com sucesso.", "Falha na edicao.")
-        return
-
-    # Diagnóstico: quantos clips editados com sucesso vs total
-    logger.info(
-        f"Job #{job_id}: Edição concluída — {len(edited_paths)}/{len(valid_pairs)} clips editados. "
-        f"Paths: {[os.path.basename(p) for p in edited_paths]}"
-    )
-
-    # ── 5. Stitching + Loop-Tail Seamless ─────────────────────────────────
-    # Estratégia:
-    #   - Clips normalmente >= 61s (chunking garante isso via waiting_clips)
-    #   - Loop-tail: crossfade end→start para replay seamless no TikTok
-    #   - Fallback para jobs expirados (timeout 72h): loop + CTA para atingir 61s
-    MIN_VIDEO_DURATION = 61.0
-    CTA_DURATION = 5.0
-
-    streamer_name = channel_name or ""
-
-    with safe_session() as db:
-        job = db.query(ClipJob).filter(ClipJob.id == job_id).first()
-        if job:
-            job.status = "stitching"
-            job.current_step = "Aplicando costura final..."
-            job.progress_pct = 85
-            db.commit()
-
-    stitch_res = await ensure_minimum_duration(edited_clips=edited_paths)
+    stitch_res = None
+    stitch_strategy = "unknown"
 
-    if not stitch_res.get("success"):
-        _fail_job_db(job_id, f"Stitch error: {stitch_res.get('error')}", "Falha na costura.")
-        return
-
-    # Tracking: registrar estratégia do stitcher nos metadados
-    stitch_strategy = stitch_res.get("strategy", "unknown")
-    if stitch_strategy != "crossfade":
-        logger.warning(f"Job #{job_id}: Stitcher usou fallback '{stitch_strategy}' (não crossfade)")
-
-    stitched_path = stitch_res.get("output_path")
-    from core.clipper.stitcher import _get_duration, create_seamless_loop, _apply_loop_tail
-    stitched_duration = await _get_duration(stitched_path)
-
-    if stitched_duration < MIN_VIDEO_DURATION:
-        # ── Fallback: job expirado do waiting_clips (timeout 72h) ──
-        # Não tinha clips suficientes após 72h, então usamos loop + CTA
-        logger.warning(
-            f"Job #{job_id}: Duração {stitched_duration:.1f}s < 61s mínimo. "
-            f"Aplicando loop fallback (job expirado de waiting_clips)."
+    # ── Modo fundido: edit + stitch + loop-tail em um unico encode FFmpeg ──
+    if FUSED_PIPELINE:
+        stitch_res = await _render_fused(
+            job_id, valid_pairs, clip_titles, _resolve_layout,
+            asb_params, asb_style, channel_name, clip_probes,
         )
-        loop_target = MIN_VIDEO_DURATION - CTA_DURATION  # ~56s
-
-        with safe_session() as db:
-            j = db.query(ClipJob).filter(ClipJob.id == job_id).first()
-            if j:
-                j.current_step = f"Loop fallback ({stitched_duration:.0f}s → {loop_target:.0f}s)..."
-                j.progress_pct = 88
-                db.commit()
-
-        loop_output = stitched_path.replace(".mp4", "_looped.mp4")
-        loop_res = await create_seamless_loop(
-            clip_path=stitched_path,
-            target_duration=loop_target,
-            output_path=loop_output,
+        if stitch_res is not None:
+            stitch_strategy = "fused"
+
+    if stitch_res is None:
+        # 3. Gerar ASS & 4. FFmpeg Edit (por clipe individual)
+        edited_paths = await _edit_clips(
+            job_id, valid_pairs, clip_titles, _resolve_layout,
+            asb_params, asb_style, channel_name, clip_probes,
         )
 
-        if loop_res.get("success"):
-            logger.info(f"Job #{job_id}: Loop fallback criado ({stitched_duration:.1f}s → {loop_res.get('duration', 0):.1f}s)")
-            if os.path.exists(stitched_path) and stitched_path != loop_output:
-                try:
-                    os.remove(stitched_path)
-                except OSError:
-                    pass
-            edited_paths_for_final = [loop_output]
-        else:
-            logger.warning(f"Job #{job_id}: Loop fallback falhou, usando clip original")
-            edited_paths_for_final = [stitched_path]
-
-        # CTA outro (~5s) para fechar em 61s
-        if streamer_name:
-            try:
-                from core.clipper.hook_generator import generate_outro_filler
-                hook_res = await generate_outro_filler(
-                    streamer=streamer_name,
-                    target_duration=CTA_DURATION,
-                    bg_video_path=edited_paths_for_final[0],
-                )
-                if hook_res.get("success"):
-                    hook_path = hook_res.get("output_path")
-                    if hook_path and os.path.exists(hook_path):
-                        edited_paths_for_final.append(hook_path)
-            except Exception as e:
-                logger.error(f"Job #{job_id}: Erro no CTA outro: {e}", exc_info=True)
-
-        stitch_res = await ensure_minimum_duration(edited_clips=edited_paths_for_final)
-        if not stitch_res.get("success"):
-            _fail_job_db(job_id, f"Stitch final error: {stitch_res.get('error')}", "Falha na costura final.")
+        if not edited_paths:
+            await _fail_job_db(job_id, "Nenhum clipe foi editado com sucesso.", "Falha na edicao.")
             return
 
-    else:
-        # ── Clip longo (>= 61s): loop-tail para seamless replay no TikTok ──
-        with safe_session() as db:
-            j = db.query(ClipJob).filter(ClipJob.id == job_id).first()
-            if j:
-                j.current_step = "Aplicando loop-tail seamless..."
-                j.progress_pct = 92
-                db.commit()
-
-        loop_tail_output = stitched_path.replace(".mp4", "_looptail.mp4")
-        tail_res = await _apply_loop_tail(stitched_path, loop_tail_output)
+        # Diagnóstico: quantos clips editados com sucesso vs total
+        logger.info(
+            f"Job #{job_id}: Edição concluída — {len(edited_paths)}/{len(valid_pairs)} clips editados. "
+            f"Paths: {[os.path.basename(p) for p in edited_paths]}"
+        )
 
-        if tail_res.get("success"):
-            logger.info(f"Job #{job_id}: Loop-tail aplicado para seamless replay.")
-            if os.path.exists(stitched_path) and stitched_path != loop_tail_output:
-                try:
-                    os.remove(stitched_path)
-                except OSError:
-                    pass
-            stitch_res = tail_res
-        else:
-            logger.warning(f"Job #{job_id}: Loop-tail falhou, mantendo original.")
+        # 5. Stitching + Loop-Tail
+        stitched = await _stitch_edited_clips(job_id, edited_paths, channel_name)
+        if stitched is None:
+            return
+        stitch_res, stitch_strategy = stitched
 
     # Marcar como concluido
     output_path = stitch_res.get("output_path")
@@ -420,11 +361,11 @@ async def _process_clip_job_inner(ctx, job_id: int):
                 logger.info(f"Job #{job_id}: Trimmed para {duration:.1f}s")
             else:
                 logger.error(f"Job #{job_id}: FFmpeg trim falhou")
-                _fail_job_db(job_id, f"Trim failed for {duration:.0f}s video", "Falha no trim")
+                await _fail_job_db(job_id, f"Trim failed for {duration:.0f}s video", "Falha no trim")
                 return
         except Exception as e:
             logger.error(f"Job #{job_id}: Erro no trim: {e}")
-            _fail_job_db(job_id, f"Trim error: {e}", "Falha no trim")
+            await _fail_job_db(job_id, f"Trim error: {e}", "Falha no trim")
             return
 
     with safe_session() as db:
@@ -497,6 +438,10 @@ async def _process_clip_job_inner(ctx, job_id: int):
             db.refresh(approval)
             approval_id = approval.id
 
+        # Poster, sprite/VTT e MP4 leve para a curadoria (background, nao bloqueia)
+        if approval_status == "pending":
+            schedule_previews(approval_id, output_path)
+
         # Pré-gerar caption via Oracle (best-effort, não bloqueia o pipeline)
         try:
             game_name = ""
@@ -600,7 +545,7 @@ Responda SOMENTE com o JSON."""
         if target_auto_approve:
             logger.info(f"Job #{job_id} Auto-Approved (PendingApproval #{approval_id}).")
             try:
-                from core.auto_scheduler import create_queue, schedule_next_batch
+                from core.auto_scheduler import create_queue, schedule_next_batch, preload_slot_allocator
                 from core.models import Profile, Army
                 from core.clipper.uniquifier import generate_variants, InsufficientDiskError
                 from core.caption_engine import generate_caption_variations
@@ -640,6 +585,8 @@ Responda SOMENTE com o JSON."""
                             count=len(active_profiles),
                         )
 
+                        slot_allocator = preload_slot_allocator(profile_slugs, [12, 18], db)
+
                         for i, p in enumerate(active_profiles):
                             v = variant_map.get(p.slug, {})
                             p_video_path = v.get("variant_path", output_path) if v.get("success") else output_path
@@ -661,6 +608,7 @@ Responda SOMENTE com o JSON."""
                                 profile_slug=p.slug,
                                 batch_size=1,
                                 db=db,
+                                allocator=slot_allocator,
                             )
                             variant_tag = " [variante]" if v.get("success") and p_video_path != output_path else ""
                             logger.info(f"Job #{job_id} Auto-Enfileirado no perfil @{p.slug}{variant_tag}: {result}")
@@ -681,6 +629,273 @@ Responda SOMENTE com o JSON."""
         logger.error(f"Job #{job_id} concluido mas falhou ao inserir na curadoria: {e}", exc_info=True)
 
 
+def _generate_clip_ass(
+    trans: dict,
+    idx: int,
+    clip_title: Optional[str],
+    asb_style: str,
+    clip_layout: str,
+) -> Optional[str]:
+    """Gera o .ass de um clipe (None se o clipe nao tem palavras transcritas)."""
+    # Gerar legendas apenas para clips com palavras transcritas
+    if trans.get("word_count", 0) <= 0:
+        return None
+    # Hook textual: título do clip nos 3 primeiros seg (apenas no 1o clip do job)
+    hook = clip_title if idx == 0 else None
+    return generate_ass_for_multiple(
+        transcriptions=[trans],
+        style_name=asb_style,
+        time_offsets=[0.0],
+        hook_title=hook,
+        layout_mode=clip_layout,
+    )
+
+
+async def _edit_clips(
+    job_id: int,
+    valid_pairs: List[tuple],
+    clip_titles: List[str],
+    resolve_layout: Callable[[int], str],
+    asb_params: dict,
+    asb_style: str,
+    channel_name: Optional[str],
+    clip_probes: Optional[Dict[str, dict]] = None,
+) -> List[str]:
+    """
+    Gera ASS + edita cada clipe (9:16). Retorna os paths editados com sucesso, em ordem.
+
+    Os clipes sao independentes: rodam em paralelo ate o limite de
+    plan_edit_concurrency(), cada FFmpeg com seu orcamento de threads.
+    """
+    import asyncio
+
+    total = len(valid_pairs)
+    workers, threads = plan_edit_concurrency(total)
+    logger.info(f"Job #{job_id}: Editando {total} clipe(s) — {workers} em paralelo, threads={threads or 'auto'}")
+
+    semaphore = asyncio.Semaphore(workers)
+    results: List[Optional[str]] = [None] * total
+    done = 0
+
+    async def _edit_one(idx: int, path: str, trans: dict) -> None:
+        nonlocal done
+        ass_path = None
+        clip_layout = resolve_layout(idx)
+        clip_title = clip_titles[idx] if idx < len(clip_titles) else None
+        async with semaphore:
+            try:
+                ass_path = _generate_clip_ass(trans, idx, clip_title, asb_style, clip_layout)
+
+                edit_res = await edit_clip(
+                    video_path=path,
+                    ass_path=ass_path,
+                    timeout_seconds=900,
+                    channel_name=channel_name,
+                    layout_mode=clip_layout,
+                    asb_params=asb_params,
+                    clip_title=clip_title,
+                    threads=threads,
+                    probe=(clip_probes or {}).get(path),
+                )
+
+                if edit_res.get("success"):
+                    results[idx] = edit_res.get("output_path")
+                else:
+                    logger.error(f"Job #{job_id} falhou na edicao do clipe {idx}: {edit_res.get('error')}")
+            except Exception as e:
+                logger.error(f"Job #{job_id} excecao na edicao do clipe {idx}: {e}", exc_info=True)
+            finally:
+                if ass_path and os.path.exists(ass_path):
+                    try:
+                        os.remove(ass_path)
+                    except OSError:
+                        pass
+
+        done += 1
+        progress_writer.report(
+            job_id, 50 + int((done / total) * 40), f"Editando {done}/{total} clipes...", status="editing"
+        )
+
+    await asyncio.gather(*(
+        _edit_one(idx, path, trans) for idx, (path, trans) in enumerate(valid_pairs)
+    ))
+
+    return [p for p in results if p]
+
+
+async def _render_fused(
+    job_id: int,
+    valid_pairs: List[tuple],
+    clip_titles: List[str],
+    resolve_layout: Callable[[int], str],
+    asb_params: dict,
+    asb_style: str,
+    channel_name: Optional[str],
+    clip_probes: Optional[Dict[str, dict]] = None,
+) -> Optional[dict]:
+    """
+    Renderiza o job inteiro com um unico encode (core/clipper/fused.py).
+    Retorna None quando o job deve seguir o pipeline classico por etapas.
+    """
+    progress_writer.report(
+        job_id, 50, f"Renderizando {len(valid_pairs)} clipe(s) em passo unico...", status="editing"
+    )
+
+    clips = []
+    try:
+        for idx, (path, trans) in enumerate(valid_pairs):
+            clip_layout = resolve_layout(idx)
+            clip_title = clip_titles[idx] if idx < len(clip_titles) else None
+            clips.append({
+                "video_path": path,
+                "ass_path": _generate_clip_ass(trans, idx, clip_title, asb_style, clip_layout),
+                "layout_mode": clip_layout,
+                "probe": (clip_probes or {}).get(path),
+            })
+
+        result = await render_job_fused(
+            clips=clips,
+            asb_params=asb_params,
+            channel_name=channel_name,
+        )
+    except Exception as e:
+        logger.error(f"Job #{job_id}: excecao no render fundido: {e}", exc_info=True)
+        return None
+    finally:
+        for c in clips:
+            ass_path = c.get("ass_path")
+            if ass_path and os.path.exists(ass_path):
+                try:
+                    os.remove(ass_path)
+                except OSError:
+                    pass
+
+    if not result.get("success"):
+        logger.warning(
+            f"Job #{job_id}: render fundido indisponivel ({result.get('error')}). "
+            f"Usando pipeline por etapas."
+        )
+        return None
+
+    logger.info(f"Job #{job_id}: render fundido concluido ({result.get('duration', 0):.1f}s).")
+    return result
+
+
+async def _stitch_edited_clips(
+    job_id: int,
+    edited_paths: List[str],
+    channel_name: Optional[str],
+) -> Optional[Tuple[dict, str]]:
+    """
+    Costura os clipes editados e aplica loop-tail (ou loop + CTA em jobs curtos).
+    Retorna (resultado, estrategia do stitcher) ou None se o job falhou.
+    """
+    # Estratégia:
+    #   - Clips normalmente >= 61s (chunking garante isso via waiting_clips)
+    #   - Loop-tail: crossfade end→start para replay seamless no TikTok
+    #   - Fallback para jobs expirados (timeout 72h): loop + CTA para atingir 61s
+    MIN_VIDEO_DURATION = 61.0
+    CTA_DURATION = 5.0
+
+    streamer_name = channel_name or ""
+
+    with safe_session() as db:
+        job = db.query(ClipJob).filter(ClipJob.id == job_id).first()
+        if job:
+            job.status = "stitching"
+            job.current_step = "Aplicando costura final..."
+            job.progress_pct = 85
+            db.commit()
+
+    stitch_res = await ensure_minimum_duration(edited_clips=edited_paths)
+
+    if not stitch_res.get("success"):
+        await _fail_job_db(job_id, f"Stitch error: {stitch_res.get('error')}", "Falha na costura.")
+        return None
+
+    # Tracking: registrar estratégia do stitcher nos metadados
+    stitch_strategy = stitch_res.get("strategy", "unknown")
+    if stitch_strategy != "crossfade":
+        logger.warning(f"Job #{job_id}: Stitcher usou fallback '{stitch_strategy}' (não crossfade)")
+
+    stitched_path = stitch_res.get("output_path")
+    from core.clipper.stitcher import create_seamless_loop, _apply_loop_tail
+    stitched_duration = await _get_duration(stitched_path)
+
+    if stitched_duration < MIN_VIDEO_DURATION:
+        # ── Fallback: job expirado do waiting_clips (timeout 72h) ──
+        # Não tinha clips suficientes após 72h, então usamos loop + CTA
+        logger.warning(
+            f"Job #{job_id}: Duração {stitched_duration:.1f}s < 61s mínimo. "
+            f"Aplicando loop fallback (job expirado de waiting_clips)."
+        )
+        loop_target = MIN_VIDEO_DURATION - CTA_DURATION  # ~56s
+
+        progress_writer.report(
+            job_id, 88, f"Loop fallback ({stitched_duration:.0f}s → {loop_target:.0f}s)...", status="stitching"
+        )
+
+        loop_output = stitched_path.replace(".mp4", "_looped.mp4")
+        loop_res = await create_seamless_loop(
+            clip_path=stitched_path,
+            target_duration=loop_target,
+            output_path=loop_output,
+        )
+
+        if loop_res.get("success"):
+            logger.info(f"Job #{job_id}: Loop fallback criado ({stitched_duration:.1f}s → {loop_res.get('duration', 0):.1f}s)")
+            if os.path.exists(stitched_path) and stitched_path != loop_output:
+                try:
+                    os.remove(stitched_path)
+                except OSError:
+                    pass
+            edited_paths_for_final = [loop_output]
+        else:
+            logger.warning(f"Job #{job_id}: Loop fallback falhou, usando clip original")
+            edited_paths_for_final = [stitched_path]
+
+        # CTA outro (~5s) para fechar em 61s
+        if streamer_name:
+            try:
+                from core.clipper.hook_generator import generate_outro_filler
+                hook_res = await generate_outro_filler(
+                    streamer=streamer_name,
+                    target_duration=CTA_DURATION,
+                    bg_video_path=edited_paths_for_final[0],
+                )
+                if hook_res.get("success"):
+                    hook_path = hook_res.get("output_path")
+                    if hook_path and os.path.exists(hook_path):
+                        edited_paths_for_final.append(hook_path)
+            except Exception as e:
+                logger.error(f"Job #{job_id}: Erro no CTA outro: {e}", exc_info=True)
+
+        stitch_res = await ensure_minimum_duration(edited_clips=edited_paths_for_final)
+        if not stitch_res.get("success"):
+            await _fail_job_db(job_id, f"Stitch final error: {stitch_res.get('error')}", "Falha na costura final.")
+            return None
+
+    else:
+        # ── Clip longo (>= 61s): loop-tail para seamless replay no TikTok ──
+        progress_writer.report(job_id, 92, "Aplicando loop-tail seamless...", status="stitching")
+
+        loop_tail_output = stitched_path.replace(".mp4", "_looptail.mp4")
+        tail_res = await _apply_loop_tail(stitched_path, loop_tail_output)
+
+        if tail_res.get("success"):
+            logger.info(f"Job #{job_id}: Loop-tail aplicado para seamless replay.")
+            if os.path.exists(stitched_path) and stitched_path != loop_tail_output:
+                try:
+                    os.remove(stitched_path)
+                except OSError:
+                    pass
+            stitch_res = tail_res
+        else:
+            logger.warning(f"Job #{job_id}: Loop-tail falhou, mantendo original.")
+
+    return stitch_res, stitch_strategy
+
+
 async def process_clip_job(ctx, job_id: int):
     """
     Ponto de entrada do ARQ. Antes de processar o job recebido,
@@ -689,46 +904,55 @@ async def process_clip_job(ctx, job_id: int):
     # Checar se ha job de alta prioridade que deve passar na frente
     actual_job_id = job_id
     try:
-        with safe_session() as db:
-            priority_job = (
-                db.query(ClipJob)
-                .filter(ClipJob.status == "pending", ClipJob.priority >= 1)
+        async with async_session() as db:
+            priority_job = (await db.execute(
+                select(ClipJob)
+                .where(ClipJob.status == "pending", ClipJob.priority >= 1)
+                .where(ClipJob.id.notin_(list(_inflight_job_ids) or [-1]))
                 .order_by(ClipJob.priority.desc(), ClipJob.id.asc())
-                .first()
-            )
+                .limit(1)
+            )).scalars().first()
             if priority_job and priority_job.id != job_id:
                 # Ha um job prioritario diferente do que recebemos — processa ele primeiro
                 logger.info(f"Job #{priority_job.id} tem prioridade {priority_job.priority}, processando antes de #{job_id}")
                 actual_job_id = priority_job.id
                 # Resetar prioridade para evitar loop
                 priority_job.priority = 0
-                db.commit()
     except Exception as e:
         logger.warning(f"Erro ao checar prioridade: {e}")
 
+    if actual_job_id in _inflight_job_ids:
+        logger.info(f"Job #{actual_job_id} ja esta em processamento neste worker, ignorando duplicata.")
+        return
+
+    _inflight_job_ids.add(actual_job_id)
     try:
         await _process_clip_job_inner(ctx, actual_job_id)
     except Exception as e:
         logger.error(f"Erro fatal orfao processando job #{actual_job_id}: {e}", exc_info=True)
         try:
-            _fail_job_db(actual_job_id, str(e), "Falha critica no worker pipeline.")
+            await _fail_job_db(actual_job_id, str(e), "Falha critica no worker pipeline.")
         except Exception as cleanup_err:
             logger.error(f"Falha secundaria ao marcar job #{actual_job_id} como falhado: {cleanup_err}")
+    finally:
+        _inflight_job_ids.discard(actual_job_id)
 
     # Se trocamos o job, re-enfileirar o original para nao perder
     if actual_job_id != job_id:
         try:
-            with safe_session() as db:
-                orig = db.query(ClipJob).filter(ClipJob.id == job_id, ClipJob.status == "pending").first()
-                if orig:
-                    from core.config import REDIS_HOST, REDIS_PORT
-                    from arq.connections import RedisSettings, create_pool as arq_create_pool
-                    pool = await arq_create_pool(RedisSettings(host=REDIS_HOST, port=REDIS_PORT))
-                    try:
-                        await pool.enqueue_job("process_clip_job", job_id, _queue_name="clipper:queue")
-                        logger.info(f"Job #{job_id} re-enfileirado apos processar prioritario #{actual_job_id}")
-                    finally:
-                        await pool.close()
+            async with async_session() as db:
+                orig = (await db.execute(
+                    select(ClipJob.id).where(ClipJob.id == job_id, ClipJob.status == "pending")
+                )).first()
+            if orig:
+                from core.config import REDIS_HOST, REDIS_PORT
+                from arq.connections import RedisSettings, create_pool as arq_create_pool
+                pool = await arq_create_pool(RedisSettings(host=REDIS_HOST, port=REDIS_PORT))
+                try:
+                    await pool.enqueue_job("process_clip_job", job_id, _queue_name="clipper:queue")
+                    logger.info(f"Job #{job_id} re-enfileirado apos processar prioritario #{actual_job_id}")
+                finally:
+                    await pool.close()
         except Exception as e:
             logger.warning(f"Falha ao re-enfileirar job #{job_id}: {e}")
 
@@ -739,6 +963,26 @@ async def startup(ctx):
     logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s: %(message)s')
     logger.info("Clipper Worker Conectado.")
 
+    # Progresso dos jobs: gravado em lote; WebSocket via Redis pub/sub (API faz o relay)
+    if ctx.get("redis") is not None:
+        progress_writer.set_publisher(redis_publisher(ctx["redis"]))
+
+    # Coluna clip_jobs.transcript_text (idempotente; no-op depois da primeira vez)
+    try:
+        from core.database import engine
+        from core.clipper.models import migrate_clip_job_transcript
+        migrate_clip_job_transcript(engine)
+    except Exception as e:
+        logger.error(f"Falha ao migrar clip_jobs.transcript_text: {e}")
+
+    # Coluna schedule.scheduled_time_utc (GC e curadoria consultam ScheduleItem)
+    try:
+        from core.database import engine
+        from core.scheduler import migrate_schedule_utc
+        migrate_schedule_utc(engine)
+    except Exception as e:
+        logger.error(f"Falha ao migrar schedule.scheduled_time_utc: {e}")
+
     # Recovery: resetar jobs orfaos que ficaram travados em estados intermediarios
     stuck_statuses = ["processing", "downloading", "transcribing", "editing", "stitching"]
     recovered_ids = []
@@ -746,13 +990,23 @@ async def startup(ctx):
         stuck_jobs = db.query(ClipJob).filter(ClipJob.status.in_(stuck_statuses)).all()
         if stuck_jobs:
             for job in stuck_jobs:
-                logger.warning(f"Job #{job.id} orfao (status={job.status}). Resetando para pending.")
-                job.status = "pending"
-                job.current_step = "Reagendado apos recovery do worker"
-                job.progress_pct = 0
+                local_paths = job.clip_local_paths or []
+                if (
+                    job.status in ("transcribing", "editing", "stitching")
+                    and local_paths
+                    and all(os.path.exists(p) for p in local_paths)
+                ):
+                    # Downloads ainda no disco: o pipeline retoma do estagio do status
+                    logger.warning(f"Job #{job.id} orfao (status={job.status}). Retomando do estagio atual.")
+                    job.current_step = "Retomando apos recovery do worker"
+                else:
+                    logger.warning(f"Job #{job.id} orfao (status={job.status}). Resetando para pending.")
+                    job.status = "pending"
+                    job.current_step = "Reagendado apos recovery do worker"
+                    job.progress_pct = 0
                 recovered_ids.append(job.id)
             db.commit()
-            logger.info(f"{len(stuck_jobs)} jobs orfaos resetados para reprocessamento.")
+            logger.info(f"{len(stuck_jobs)} jobs orfaos recuperados para reprocessamento.")
 
         # Também buscar jobs pending que nunca foram enfileirados no Redis
         pending_jobs = db.query(ClipJob).filter(ClipJob.status == "pending").all()
@@ -795,6 +1049,17 @@ async def startup(ctx):
     except Exception as e:
         logger.error(f"Falha ao iniciar Orphan Scanner: {e}", exc_info=True)
 
+    # Pool persistente de modelos Whisper (carrega 1 replica agora, evita load por clipe)
+    try:
+        import asyncio
+        from core.clipper.whisper_pool import init_whisper_pool, whisper_pool_reaper
+        pool = init_whisper_pool()
+        await asyncio.get_event_loop().run_in_executor(None, pool.warm_up)
+        ctx["whisper_reaper_task"] = asyncio.create_task(whisper_pool_reaper())
+        logger.info(f"Whisper pool aquecido: {pool.stats()}")
+    except Exception as e:
+        logger.error(f"Falha ao aquecer Whisper pool (modelo sera carregado sob demanda): {e}", exc_info=True)
+
 
 async def _orphan_pending_scanner():
     """
@@ -807,20 +1072,20 @@ async def _orphan_pending_scanner():
 
     while True:
         try:
-            with safe_session() as db:
-                pending_jobs = db.query(ClipJob).filter(ClipJob.status == "pending").all()
-                if pending_jobs:
-                    from core.config import REDIS_HOST, REDIS_PORT
-                    from arq.connections import RedisSettings, create_pool as arq_create_pool
-                    pool = await arq_create_pool(RedisSettings(host=REDIS_HOST, port=REDIS_PORT))
-                    try:
-                        for job in pending_jobs:
-                            if job.id in _startup_enqueued_ids:
-                                continue
-                            await pool.enqueue_job("process_clip_job", job.id, _queue_name="clipper:queue")
-                            logger.info(f"[ORPHAN SCAN] Job #{job.id} re-enfileirado (status=pending sem worker)")
-                    finally:
-                        await pool.close()
+            async with async_session() as db:
+                pending_jobs = (await db.execute(select(ClipJob.id).where(ClipJob.status == "pending"))).all()
+            if pending_jobs:
+                from core.config import REDIS_HOST, REDIS_PORT
+                from arq.connections import RedisSettings, create_pool as arq_create_pool
+                pool = await arq_create_pool(RedisSettings(host=REDIS_HOST, port=REDIS_PORT))
+                try:
+                    for job in pending_jobs:
+                        if job.id in _startup_enqueued_ids:
+                            continue
+                        await pool.enqueue_job("process_clip_job", job.id, _queue_name="clipper:queue")
+                        logger.info(f"[ORPHAN SCAN] Job #{job.id} re-enfileirado (status=pending sem worker)")
+                finally:
+                    await pool.close()
         except Exception as e:
             logger.error(f"[ORPHAN SCAN] Erro: {e}")
 
@@ -840,6 +1105,21 @@ async def shutdown(ctx):
     if orphan_task and not orphan_task.done():
         orphan_task.cancel()
         logger.info("Orphan Scanner cancelado.")
+    cancel_previews()
+    # Gravar o ultimo progresso coalescido
+    try:
+        await progress_writer.close()
+    except Exception as e:
+        logger.error(f"Falha ao gravar progresso pendente: {e}")
+    # Descarregar modelos Whisper do pool
+    reaper_task = ctx.get("whisper_reaper_task")
+    if reaper_task and not reaper_task.done():
+        reaper_task.cancel()
+    try:
+        from core.clipper.whisper_pool import shutdown_whisper_pool
+        shutdown_whisper_pool()
+    except Exception as e:
+        logger.error(f"Falha ao encerrar Whisper pool: {e}")
     logger.info("Clipper Worker Desligando.")
 
 
@@ -854,7 +1134,10 @@ class WorkerSettings:
     functions = [process_clip_job]
     redis_settings = RedisSettings.from_dsn(redis_url)
     queue_name = "clipper:queue"
-    max_jobs = 1  # Conservador devido a VRAM/RAM (Whisper e FFmpeg limitados a 1 por vez neste container)
+    # Whisper e FFmpeg continuam limitados pelos slots de cada estagio (pipeline.py);
+    # o ARQ so precisa aceitar jobs suficientes para manter os estagios ocupados.
+    max_jobs = pipeline_max_jobs()
     on_startup = startup
     on_shutdown = shutdown
-    job_timeout = 1800  # Pode demorar bastante (download + whisper + edicao + stitch)
+    # Inclui o tempo aguardando slot nos estagios congestionados
+    job_timeout = int(os.getenv("CLIPPER_JOB_TIMEOUT", "3600"))
@@ -1,6 +1,8 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
 import os
 
 # Create engine for SQLite
@@ -12,9 +14,23 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 POSTGRES_SERVER = os.getenv("POSTGRES_SERVER")
 POSTGRES_DB = os.getenv("POSTGRES_DB")
 
+# Postgres pool sizing (applies to the sync and the async engine; each has its own pool)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE_SECONDS = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_TIMEOUT_SECONDS = int(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+
 if POSTGRES_SERVER:
     # PostgreSQL Connection
     SQLALCHEMY_DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
+    ASYNC_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}/{POSTGRES_DB}"
+    _engine_kwargs = {
+        "pool_pre_ping": True,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": DB_POOL_TIMEOUT_SECONDS,
+    }
     
     # [LOGGING] Identify where we are connecting from
     if POSTGRES_SERVER == "db":
@@ -24,15 +40,14 @@ if POSTGRES_SERVER:
     else:
         print(f"[DATABASE] Connecting to custom server: {POSTGRES_SERVER}")
 
-    engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, 
-        pool_pre_ping=True
-    )
+    engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_kwargs)
 else:
     # SQLite Connection (Fallback)
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     DB_PATH = os.path.join(BASE_DIR, "synapse.db")
     SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
+    ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DB_PATH}"
+    _engine_kwargs = {"pool_pre_ping": True}
 
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL, 
@@ -40,7 +55,6 @@ else:
         pool_pre_ping=True
     )
 
-    from sqlalchemy import event
     @event.listens_for(engine, "connect")
     def set_sqlite_pragma(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
@@ -51,6 +65,23 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for coroutine code paths (scheduler loop, clipper worker/monitor, async endpoints).
+# A sync SessionLocal call inside `async def` blocks the event loop for the whole round-trip.
+# expire_on_commit=False: attribute access after commit must not trigger an implicit (sync) refresh.
+try:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_kwargs)
+except ImportError as e:
+    print(f"[DATABASE] Async driver not installed ({e}); async sessions disabled")
+    async_engine = None
+
+if async_engine is not None and not POSTGRES_SERVER:
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragma)
+
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    if async_engine is not None else None
+)
+
 Base = declarative_base()
 
 from contextlib import contextmanager
@@ -78,3 +109,28 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+@asynccontextmanager
+async def async_session():
+    """
+    Async counterpart of safe_session.
+    Commits on success, rolls back on error, always closes.
+    """
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database driver not installed (aiosqlite/asyncpg)")
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+
+async def get_async_db():
+    """FastAPI Dependency (AsyncSession)."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database driver not installed (aiosqlite/asyncpg)")
+    async with AsyncSessionLocal() as db:
+        yield db
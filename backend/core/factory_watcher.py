@@ -13,6 +13,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from core.uploader_monitored import upload_video_monitored
 from core import brain
 from core.status_manager import status_manager
+from core.file_catalog import file_catalog
 from core.oracle.visual_cortex import visual_cortex
 
 # Configuração de Logger
@@ -150,6 +151,8 @@ async def start_watcher():
     handler = QueueHandler(queue, loop)
     observer = Observer()
     observer.schedule(handler, INPUTS_DIR)
+    # Mesmo Observer mantém o catálogo de pending/done/errors/exports
+    file_catalog.watch(observer)
     observer.start()
     
     # Scan Initial
@@ -0,0 +1,291 @@
+"""
+File Catalog - Indice em memoria dos videos em pending/done/errors/exports
+=========================================================================
+
+As listagens de videos (queue/pending, videos/completed|failed|stats) faziam
+os.listdir + stat + leitura do sidecar JSON de cada arquivo a cada request.
+Aqui cada diretorio tem um catalogo (tamanho, mtime, sidecar, status),
+ordenado por mtime, mantido pelos eventos do watchdog Observer do
+factory_watcher. Listagens viram um slice do indice ordenado.
+
+Sem Observer (scripts, outro processo), o catalogo confere o mtime do
+diretorio a cada acesso (1 stat) e reescaneia quando mudou ou a cada
+CATALOG_RESCAN_SECONDS (sidecar reescrito no lugar nao muda o diretorio).
+
+Sidecars reconhecidos:
+    <video>.mp4.json       -> metadata
+    <video>.mp4.error.txt  -> error_message (primeiros 500 chars)
+"""
+
+import bisect
+import json
+import logging
+import ntpath
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.config import DATA_DIR, DONE_DIR, ERRORS_DIR
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXT = ".mp4"
+META_SUFFIX = ".json"
+ERROR_SUFFIX = ".error.txt"
+ERROR_MESSAGE_CHARS = 500
+CATALOG_RESCAN_SECONDS = float(os.getenv("CATALOG_RESCAN_SECONDS", "30"))
+
+CATALOG_DIRS = {
+    "pending": os.path.join(DATA_DIR, "pending"),
+    "exports": os.path.join(DATA_DIR, "exports"),
+    "done": DONE_DIR,
+    "errors": ERRORS_DIR,
+}
+
+
+@dataclass
+class CatalogEntry:
+    name: str                 # nome no disco (pode ser um path Windows corrompido)
+    clean_name: str           # basename "limpo" (ntpath)
+    path: str
+    size: int
+    mtime: float
+    metadata: Dict = field(default_factory=dict)
+    error_message: Optional[str] = None
+
+    @property
+    def id(self) -> str:
+        return os.path.splitext(self.clean_name)[0]
+
+
+def _video_name_for(filename: str) -> Optional[str]:
+    """Nome do video ao qual um arquivo (video ou sidecar) pertence."""
+    if filename.endswith(VIDEO_EXT):
+        return filename
+    for suffix in (META_SUFFIX, ERROR_SUFFIX):
+        if filename.endswith(suffix) and filename[: -len(suffix)].endswith(VIDEO_EXT):
+            return filename[: -len(suffix)]
+    return None
+
+
+class DirectoryCatalog:
+    """Videos de um diretorio, ordenados por (mtime, nome)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._by_clean: Dict[str, str] = {}
+        self._order: List[Tuple[float, str]] = []
+        self._lock = threading.RLock()
+        self._built = False
+        self._dir_mtime: Optional[float] = None
+        self._scanned_at = 0.0
+        self._stale = False
+        self.watched = False
+        self.scans = 0
+
+    # ------------------------------------------------------------------
+    # Construcao / atualizacao
+    # ------------------------------------------------------------------
+
+    def _load_entry(self, name: str) -> Optional[CatalogEntry]:
+        path = os.path.join(self.directory, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        clean = ntpath.basename(name)
+
+        metadata: Dict = {}
+        for candidate in (f"{name}{META_SUFFIX}", f"{clean}{META_SUFFIX}"):
+            meta_path = os.path.join(self.directory, candidate)
+            if os.path.exists(meta_path):
+                try:
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        metadata = json.load(f)
+                except Exception:
+                    metadata = {}
+                break
+
+        error_message = None
+        error_path = path + ERROR_SUFFIX
+        if os.path.exists(error_path):
+            try:
+                with open(error_path, "r", encoding="utf-8") as f:
+                    error_message = f.read()[:ERROR_MESSAGE_CHARS]
+            except Exception:
+                pass
+
+        return CatalogEntry(
+            name=name, clean_name=clean, path=path, size=st.st_size, mtime=st.st_mtime,
+            metadata=metadata if isinstance(metadata, dict) else {}, error_message=error_message,
+        )
+
+    def _put(self, entry: CatalogEntry) -> None:
+        self._drop(entry.name)
+        self._entries[entry.name] = entry
+        self._by_clean[entry.clean_name] = entry.name
+        bisect.insort(self._order, (entry.mtime, entry.name))
+
+    def _drop(self, name: str) -> None:
+        old = self._entries.pop(name, None)
+        if old is None:
+            return
+        if self._by_clean.get(old.clean_name) == name:
+            del self._by_clean[old.clean_name]
+        i = bisect.bisect_left(self._order, (old.mtime, name))
+        if i < len(self._order) and self._order[i] == (old.mtime, name):
+            del self._order[i]
+
+    def rescan(self) -> None:
+        # Eventos que chegam durante o scan marcam _stale: o scan repete
+        with self._lock:
+            self._stale = False
+        for attempt in range(3):
+            try:
+                dir_mtime = os.stat(self.directory).st_mtime
+                names = [n for n in os.listdir(self.directory) if n.endswith(VIDEO_EXT)]
+            except OSError:
+                dir_mtime, names = None, []
+            loaded = [e for e in (self._load_entry(n) for n in names) if e is not None]
+            with self._lock:
+                if self._stale and attempt < 2:
+                    self._stale = False
+                    continue
+                self._entries.clear()
+                self._by_clean.clear()
+                self._order = []
+                for entry in loaded:
+                    self._put(entry)
+                self._built = True
+                self._dir_mtime = dir_mtime
+                self._scanned_at = time.monotonic()
+                self.scans += 1
+                return
+
+    def refresh(self, filename: str) -> None:
+        """Evento do watchdog para `filename` (video ou sidecar) neste diretorio."""
+        video = _video_name_for(filename)
+        if video is None:
+            return
+        with self._lock:
+            self._stale = True
+            if not self._built:
+                return
+        entry = self._load_entry(video)
+        with self._lock:
+            if entry is None:
+                self._drop(video)
+            else:
+                self._put(entry)
+
+    def _ensure_fresh(self) -> None:
+        if self._built and self.watched:
+            return
+        if self._built and time.monotonic() - self._scanned_at < CATALOG_RESCAN_SECONDS:
+            try:
+                if os.stat(self.directory).st_mtime == self._dir_mtime:
+                    return
+            except OSError:
+                pass
+        self.rescan()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def list(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        newest_first: bool = True,
+        predicate: Optional[Callable[[CatalogEntry], bool]] = None,
+    ) -> List[CatalogEntry]:
+        self._ensure_fresh()
+        with self._lock:
+            order = reversed(self._order) if newest_first else iter(self._order)
+            result: List[CatalogEntry] = []
+            skipped = 0
+            for _, name in order:
+                entry = self._entries[name]
+                if predicate is not None and not predicate(entry):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                result.append(entry)
+                if limit is not None and len(result) >= limit:
+                    break
+            return result
+
+    def count(self, predicate: Optional[Callable[[CatalogEntry], bool]] = None) -> int:
+        self._ensure_fresh()
+        with self._lock:
+            if predicate is None:
+                return len(self._entries)
+            return sum(1 for e in self._entries.values() if predicate(e))
+
+    def find(self, filename: str) -> Optional[CatalogEntry]:
+        """Por nome exato ou pelo basename limpo (nomes corrompidos)."""
+        self._ensure_fresh()
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is None and filename in self._by_clean:
+                entry = self._entries.get(self._by_clean[filename])
+        if entry is not None and not os.path.exists(entry.path):
+            # Removido sem evento (ainda nao processado): corrige o indice
+            self.refresh(entry.name)
+            return None
+        return entry
+
+
+class FileCatalog:
+    def __init__(self, directories: Dict[str, str] = CATALOG_DIRS):
+        self.catalogs: Dict[str, DirectoryCatalog] = {
+            key: DirectoryCatalog(path) for key, path in directories.items()
+        }
+
+    def __getitem__(self, key: str) -> DirectoryCatalog:
+        return self.catalogs[key]
+
+    def resolve(self, filename: str, keys) -> Optional[Tuple[str, CatalogEntry]]:
+        """Primeiro diretorio (na ordem de `keys`) que contem `filename`."""
+        for key in keys:
+            entry = self.catalogs[key].find(filename)
+            if entry is not None:
+                return key, entry
+        return None
+
+    def watch(self, observer) -> None:
+        """Registra os diretorios no watchdog Observer (ja existente)."""
+        from watchdog.events import FileSystemEventHandler
+
+        catalog = self
+
+        class _CatalogHandler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+                    if path:
+                        catalog._on_path(os.fsdecode(path))
+
+        handler = _CatalogHandler()
+        for directory in self.catalogs.values():
+            os.makedirs(directory.directory, exist_ok=True)
+            observer.schedule(handler, directory.directory)
+            directory.watched = True
+
+    def _on_path(self, path: str) -> None:
+        parent, filename = os.path.split(path)
+        for directory in self.catalogs.values():
+            if os.path.normcase(directory.directory) == os.path.normcase(parent):
+                try:
+                    directory.refresh(filename)
+                except Exception as e:
+                    logger.warning(f"FileCatalog: falha ao atualizar {path}: {e}")
+
+
+file_catalog = FileCatalog()
@@ -82,10 +82,12 @@ def _clean_database_records():
         now_utc = datetime.now(timezone.utc)
         threshold = now_utc - timedelta(hours=TTL_HOURS)
         
-        deleted_jobs = db.query(ClipJob).filter(
+        from core.clipper.clip_index import delete_jobs
+        stale_job_ids = [row.id for row in db.query(ClipJob.id).filter(
             ClipJob.status == 'failed',
             ClipJob.created_at < threshold
-        ).delete()
+        )]
+        deleted_jobs = delete_jobs(db, stale_job_ids)
         
         pending_threshold = now_utc - timedelta(days=30)
         deleted_pending = db.query(PendingApproval).filter(
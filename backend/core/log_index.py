@@ -0,0 +1,335 @@
+"""
+Log Index - historical, queryable log store
+===========================================
+
+JsonLogger keeps only the last N entries in memory; everything else lives in
+app.jsonl and its rotated generations. This module mirrors those files into
+a compact SQLite database (logs/app_index.db) with b-tree indexes on
+time / level / source / job id and an FTS5 table for message text, so the
+logs API can page through days of history without loading files.
+
+Ingestion is incremental and file based: each file has its (inode, offset)
+stored in the database and `ingest_file` only reads what was appended since.
+That also picks up lines written to app.jsonl by other processes. Entries are
+keyed by their uuid, so re-reading a line is harmless.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+LOG_INDEX_RETENTION_DAYS = int(os.getenv("LOG_INDEX_RETENTION_DAYS", "30"))
+PRUNE_INTERVAL_SECONDS = 3600
+INGEST_BATCH_SIZE = 1000
+
+# "Job #123", "ClipJob #123", "job 123"
+_JOB_ID_RE = re.compile(r"job\s*#?(\d+)", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    rowid INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    ts TEXT NOT NULL,
+    level TEXT,
+    source TEXT,
+    job_id TEXT,
+    message TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_logs_ts ON logs (ts);
+CREATE INDEX IF NOT EXISTS ix_logs_level_ts ON logs (level, ts);
+CREATE INDEX IF NOT EXISTS ix_logs_source_ts ON logs (source, ts);
+CREATE INDEX IF NOT EXISTS ix_logs_job_ts ON logs (job_id, ts);
+CREATE TABLE IF NOT EXISTS ingest_state (
+    path TEXT PRIMARY KEY,
+    inode INTEGER,
+    offset INTEGER NOT NULL
+);
+"""
+
+
+def extract_job_id(entry: Dict) -> Optional[str]:
+    if entry.get("job_id") is not None:
+        return str(entry["job_id"])
+    match = _JOB_ID_RE.search(entry.get("message") or "")
+    return match.group(1) if match else None
+
+
+def entry_timestamp(entry: Dict, now: Optional[datetime] = None) -> str:
+    """
+    Full naive ISO datetime for the `ts` column. Retention and paging compare
+    ts as strings, so a bare "HH:MM:SS" (JsonLogger's display timestamp) must
+    not be stored as is: it gets today's date (yesterday if that would be in
+    the future).
+    """
+    now = now or datetime.now()
+    for value in (entry.get("full_timestamp"), entry.get("timestamp")):
+        if not value:
+            continue
+        try:
+            parsed = datetime.fromisoformat(str(value))
+        except ValueError:
+            try:
+                clock = datetime.strptime(str(value), "%H:%M:%S").time()
+            except ValueError:
+                continue
+            parsed = datetime.combine(now.date(), clock)
+            if parsed > now:
+                parsed -= timedelta(days=1)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed.isoformat()
+    return now.isoformat()
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int]:
+    """Splits a next_cursor ("<ts>|<rowid>"); ValueError if malformed."""
+    ts, sep, rowid = cursor.rpartition("|")
+    if not sep or not ts or not rowid.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return ts, int(rowid)
+
+
+def _fts_query(text: str) -> str:
+    """Each word becomes a quoted prefix term (no FTS syntax from users)."""
+    terms = [t.replace('"', '""') for t in text.split() if t]
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+class LogIndex:
+    def __init__(self, db_path: str, retention_days: int = LOG_INDEX_RETENTION_DAYS):
+        self.db_path = db_path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_prune = 0.0
+        self.has_fts = False
+
+    # ------------------------------------------------------------------
+    # Connection
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _writer(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = self._connect()
+            conn.executescript(_SCHEMA)
+            try:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS logs_fts USING fts5("
+                    "message, content='logs', content_rowid='rowid')"
+                )
+                self.has_fts = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: text search falls back to LIKE
+                self.has_fts = False
+            # Rows indexed before ts was normalized ("HH:MM:SS") would sort
+            # before every ISO cutoff and be pruned at once
+            conn.execute(
+                "UPDATE logs SET ts = ? WHERE ts NOT GLOB '[0-9][0-9][0-9][0-9]-*'",
+                (datetime.now().isoformat(),),
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def add_entries(self, entries: Iterable[Dict]) -> int:
+        with self._lock:
+            conn = self._writer()
+            added = self._insert(conn, entries)
+            conn.commit()
+            self._maybe_prune(conn)
+            return added
+
+    def _insert(self, conn: sqlite3.Connection, entries: Iterable[Dict]) -> int:
+        added = 0
+        for entry in entries:
+            raw = json.dumps(entry)
+            uid = str(entry.get("id") or hashlib.sha1(raw.encode("utf-8")).hexdigest())
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO logs (uid, ts, level, source, job_id, message, raw) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    uid,
+                    entry_timestamp(entry),
+                    entry.get("level"),
+                    entry.get("source"),
+                    extract_job_id(entry),
+                    entry.get("message"),
+                    raw,
+                ),
+            )
+            if cur.rowcount:
+                added += 1
+                if self.has_fts:
+                    conn.execute(
+                        "INSERT INTO logs_fts (rowid, message) VALUES (?, ?)",
+                        (cur.lastrowid, entry.get("message") or ""),
+                    )
+        return added
+
+    def ingest_file(self, path: str) -> int:
+        """Indexes lines appended to `path` since the last call."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return 0
+
+        with self._lock:
+            conn = self._writer()
+            row = conn.execute("SELECT inode, offset FROM ingest_state WHERE path = ?", (path,)).fetchone()
+            offset = 0
+            if row and row["inode"] == st.st_ino and row["offset"] <= st.st_size:
+                offset = row["offset"]
+            if offset >= st.st_size:
+                return 0
+
+            added = 0
+            with open(path, "rb") as f:
+                f.seek(offset)
+                batch: List[Dict] = []
+                for raw_line in f:
+                    if not raw_line.endswith(b"\n"):
+                        break  # line still being written
+                    offset += len(raw_line)
+                    try:
+                        batch.append(json.loads(raw_line))
+                    except ValueError:
+                        continue
+                    if len(batch) >= INGEST_BATCH_SIZE:
+                        added += self._insert(conn, batch)
+                        batch = []
+                added += self._insert(conn, batch)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO ingest_state (path, inode, offset) VALUES (?, ?, ?)",
+                (path, st.st_ino, offset),
+            )
+            conn.commit()
+            self._maybe_prune(conn)
+            return added
+
+    def clear(self) -> None:
+        with self._lock:
+            conn = self._writer()
+            conn.execute("DELETE FROM logs")
+            if self.has_fts:
+                conn.execute("INSERT INTO logs_fts (logs_fts) VALUES ('delete-all')")
+            conn.execute("DELETE FROM ingest_state")
+            conn.commit()
+
+    def _maybe_prune(self, conn: sqlite3.Connection) -> None:
+        if not self.retention_days or time.monotonic() - self._last_prune < PRUNE_INTERVAL_SECONDS:
+            return
+        self._last_prune = time.monotonic()
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat()
+        if self.has_fts:
+            conn.execute(
+                "INSERT INTO logs_fts (logs_fts, rowid, message) "
+                "SELECT 'delete', rowid, COALESCE(message, '') FROM logs WHERE ts < ?",
+                (cutoff,),
+            )
+        conn.execute("DELETE FROM logs WHERE ts < ?", (cutoff,))
+        conn.commit()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        level: Optional[str] = None,
+        source: Optional[str] = None,
+        job_id: Optional[str] = None,
+        text: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Newest first. Returns (entries, next_cursor); pass next_cursor back
+        to get the following (older) page. Keyset pagination on (ts, rowid).
+        Raises ValueError for a malformed cursor.
+        """
+        where: List[str] = []
+        params: List = []
+        if level and level != "all":
+            where.append("l.level = ?")
+            params.append(level)
+        if source:
+            where.append("l.source = ?")
+            params.append(source)
+        if job_id:
+            where.append("l.job_id = ?")
+            params.append(str(job_id))
+        if since:
+            where.append("l.ts >= ?")
+            params.append(since)
+        if until:
+            where.append("l.ts <= ?")
+            params.append(until)
+        if cursor:
+            ts, rowid = parse_cursor(cursor)
+            where.append("(l.ts < ? OR (l.ts = ? AND l.rowid < ?))")
+            params.extend([ts, ts, rowid])
+
+        with self._lock:
+            self._writer()  # ensures the schema exists
+        has_fts = self.has_fts
+
+        sql = "SELECT l.rowid AS rowid, l.ts AS ts, l.raw AS raw FROM logs l"
+        if text and has_fts and _fts_query(text):
+            sql += " JOIN logs_fts f ON f.rowid = l.rowid"
+            where.append("logs_fts MATCH ?")
+            params.append(_fts_query(text))
+        elif text:
+            where.append("l.message LIKE ?")
+            params.append(f"%{text}%")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY l.ts DESC, l.rowid DESC LIMIT ?"
+        params.append(limit + 1)
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['ts']}|{rows[-1]['rowid']}"
+        return [json.loads(r["raw"]) for r in rows], next_cursor
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT COUNT(*) FROM logs").fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+        finally:
+            conn.close()
@@ -1,29 +1,123 @@
 import os
 import json
 import uuid
+import queue
+import atexit
 import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from core.consts import ScheduleStatus
 
+try:
+    import fcntl
+except ImportError:  # Windows: rotation falls back to the unlocked path
+    fcntl = None
+
 # Constants
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOGS_DIR = os.path.join(BASE_DIR, "logs")
 LOG_FILE = os.path.join(LOGS_DIR, "app.jsonl")
 
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "3"))
+LOG_BUFFER_SIZE = int(os.getenv("LOG_BUFFER_SIZE", "200"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "0.5"))
+LOG_BATCH_SIZE = 500
+LOG_INDEX_PATH = os.getenv("LOG_INDEX_PATH", os.path.join(LOGS_DIR, "app_index.db"))
+LOG_INDEX_ENABLED = os.getenv("LOG_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+
 if not os.path.exists(LOGS_DIR):
     os.makedirs(LOGS_DIR)
 
+
+def rotated_path(file_path: str, generation: int) -> str:
+    """app.jsonl -> app.1.jsonl, app.2.jsonl, ... (1 = most recent)."""
+    root, ext = os.path.splitext(file_path)
+    return f"{root}.{generation}{ext}"
+
+
+def read_tail_lines(file_path: str, n: int, chunk_size: int = 8192) -> List[str]:
+    """Reads the last N non-empty lines by seeking backwards from EOF."""
+    try:
+        with open(file_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            buf = b""
+            while pos > 0 and buf.count(b"\n") <= n:
+                step = min(chunk_size, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+    except FileNotFoundError:
+        return []
+
+    lines = [line for line in buf.split(b"\n") if line.strip()]
+    # Without reaching the start of the file the first line may be partial
+    if pos > 0 and lines:
+        lines = lines[1:]
+    return [line.decode("utf-8", errors="replace") for line in lines[-n:]]
+
+
 class JsonLogger:
-    def __init__(self, file_path: str = LOG_FILE):
+    """
+    log() only builds the entry, updates the in-memory ring buffer and
+    enqueues the line. A daemon writer thread drains the queue in batches
+    (one write + flush per batch) and handles size-based rotation, so the
+    event loop never touches the disk.
+
+    With an `index` (core.log_index.LogIndex) the writer thread also mirrors
+    the file into it after each batch, backfilling rotated generations first.
+    """
+
+    _CLEAR = object()
+
+    def __init__(
+        self,
+        file_path: str = LOG_FILE,
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+        buffer_size: int = LOG_BUFFER_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        index=None,
+    ):
         self.file_path = file_path
-        self._mem_buffer: List[Dict] = []
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.index = index
+        self._mem_buffer: deque = deque(maxlen=buffer_size)  # Newest first
+        self._buffer_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._file = None
+        self._size = 0
         self._load_from_file()
-        self.async_callback = None  # NEW: Callback for Websocket
+        self.async_callback = None  # Callback for Websocket
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._write_listeners: List[Any] = []
+        atexit.register(self.flush)
 
     def set_async_callback(self, callback):
         """Sets the async callback for real-time updates."""
         self.async_callback = callback
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+
+    def add_write_listener(self, callback):
+        """callback() runs on the writer thread after each batch hits the file."""
+        self._write_listeners.append(callback)
+
+    def remove_write_listener(self, callback):
+        try:
+            self._write_listeners.remove(callback)
+        except ValueError:
+            pass
 
     def info(self, message: str, source: str = "system"):
         return self.log("info", message, source)
@@ -33,104 +127,280 @@ class JsonLogger:
 
     def error(self, message: str, source: str = "system", exc_info=None):
         return self.log("error", message, source)
-    
+
     def critical(self, message: str, source: str = "system"):
         return self.log("critical", message, source)
 
     def _load_from_file(self):
-        """Loads last N logs from file into memory."""
-        if not os.path.exists(self.file_path):
-            self._mem_buffer = []
-            return
-
-        try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                last_lines = lines[-200:]
-                self._mem_buffer = [json.loads(line) for line in last_lines if line.strip()]
-                self._mem_buffer.reverse() 
-        except Exception as e:
-            print(f"Error loading logs: {e}")
-            self._mem_buffer = []
+        """Loads last N logs from the tail of the file into memory."""
+        entries = []
+        for line in read_tail_lines(self.file_path, self._mem_buffer.maxlen):
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        self._mem_buffer.clear()
+        self._mem_buffer.extendleft(entries)
 
-    def log(self, level: str, message: str, source: str = "system") -> Dict:
+    def log(self, level: str, message: str, source: str = "system", job_id: Optional[Any] = None) -> Dict:
         """Adds a log entry."""
+        now = datetime.now()
         entry = {
             "id": str(uuid.uuid4()),
-            "timestamp": datetime.now().strftime("%H:%M:%S"),
-            "full_timestamp": datetime.now().isoformat(),
+            "timestamp": now.strftime("%H:%M:%S"),
+            "full_timestamp": now.isoformat(),
             "level": level,
             "message": message.strip(),
             "source": source
         }
-        
-        # ROTATION CHECK (5MB limit)
+        if job_id is not None:
+            entry["job_id"] = str(job_id)
+
+        with self._buffer_lock:
+            self._mem_buffer.appendleft(entry)
+        self._ensure_writer()
+        self._queue.put(json.dumps(entry) + "\n")
+
+        # Trigger Async Callback (WebSocket Broadcast)
+        if self.async_callback:
+            self._dispatch(entry)
+
+        return entry
+
+    def _dispatch(self, entry: Dict):
+        loop = self._loop
+        try:
+            if loop is None or loop.is_closed():
+                loop = asyncio.get_running_loop()
+            asyncio.run_coroutine_threadsafe(self.async_callback(entry), loop)
+        except Exception:
+            # Fail silently to avoid breaking the logger
+            pass
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._writer_loop, name="json-log-writer", daemon=True)
+                self._writer.start()
+
+    def _writer_loop(self):
+        self._backfill_index()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [item]
+            # Drain whatever accumulated so one write covers the burst
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"Failed to write log: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch: List[Any]):
+        lines: List[str] = []
+        for item in batch:
+            if item is self._CLEAR:
+                self._write_lines(lines)
+                lines = []
+                self._truncate()
+            elif isinstance(item, threading.Event):
+                self._write_lines(lines)
+                lines = []
+                item.set()
+            else:
+                lines.append(item)
+        self._write_lines(lines)
+
+    def _write_lines(self, lines: List[str]):
+        if not lines:
+            return
+        f = self._open()
+        data = "".join(lines)
+        f.write(data)
+        f.flush()
+        # fstat also picks up lines other writers appended to the same file
+        self._size = os.fstat(f.fileno()).st_size
+        self._index_file(self.file_path)
+        for callback in list(self._write_listeners):
+            try:
+                callback()
+            except Exception:
+                pass
+        if self.max_bytes and self._size > self.max_bytes:
+            self._rotate()
+
+    def _index_file(self, path: str):
+        if self.index is None:
+            return
         try:
-            if os.path.exists(self.file_path) and os.path.getsize(self.file_path) > 5 * 1024 * 1024:
-                # Rotate: app.jsonl -> app_backup.jsonl
-                backup_path = self.file_path.replace(".jsonl", "_backup.jsonl")
-                if os.path.exists(backup_path):
-                    os.remove(backup_path) # Overwrite previous backup
-                os.rename(self.file_path, backup_path)
-                
-                # Add rotation log to new file
-                self.log("info", "♻️ Log rotated due to size limit", "system")
+            self.index.ingest_file(path)
         except Exception as e:
-            print(f"Log rotation failed: {e}")
+            print(f"Log index update failed: {e}")
+
+    def _backfill_index(self):
+        """Indexes whatever the files hold that the index has not seen yet."""
+        if self.index is None:
+            return
+        for gen in range(self.backup_count, 0, -1):
+            self._index_file(rotated_path(self.file_path, gen))
+        self._index_file(self.file_path)
+
+    def _open(self):
+        # Other processes append to and rotate the same file; like
+        # WatchedFileHandler, reopen when the path no longer is our handle
+        if self._file is not None and not self._file.closed and not self._is_current():
+            self._close()
+        if self._file is None or self._file.closed:
+            self._file = open(self.file_path, "a", encoding="utf-8")
+            self._size = os.fstat(self._file.fileno()).st_size
+        return self._file
+
+    def _is_current(self) -> bool:
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            return False
+        fst = os.fstat(self._file.fileno())
+        return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
+
+    def _close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+
+    def _rotate(self):
+        """app.jsonl -> app.1.jsonl -> ... -> app.N.jsonl (oldest dropped).
 
-        # Write to file (Append)
+        Serialized across processes by a lock file; the size and inode are
+        re-checked under it so a file another writer already rotated is only
+        reopened, never shifted a second time.
+        """
         try:
-            with open(self.file_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(entry) + "\n")
+            with self._rotation_lock():
+                if self._file is not None and not self._file.closed and not self._is_current():
+                    return
+                try:
+                    if os.stat(self.file_path).st_size <= self.max_bytes:
+                        return
+                except FileNotFoundError:
+                    return
+                self._close()
+                if self.backup_count > 0:
+                    oldest = rotated_path(self.file_path, self.backup_count)
+                    if os.path.exists(oldest):
+                        os.remove(oldest)
+                    for gen in range(self.backup_count - 1, 0, -1):
+                        src = rotated_path(self.file_path, gen)
+                        if os.path.exists(src):
+                            os.replace(src, rotated_path(self.file_path, gen + 1))
+                    os.replace(self.file_path, rotated_path(self.file_path, 1))
+                else:
+                    os.remove(self.file_path)
         except Exception as e:
-            print(f"Failed to write log: {e}")
+            print(f"Log rotation failed: {e}")
+        finally:
+            self._close()
+            self._size = 0
 
-        # Update Buffer
-        self._mem_buffer.insert(0, entry) # Newest first
-        if len(self._mem_buffer) > 200:
-            self._mem_buffer.pop()
-        
-        # Trigger Async Callback (WebSocket Broadcast)
-        if self.async_callback:
+    @contextmanager
+    def _rotation_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.file_path + ".lock", "a") as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _truncate(self):
+        self._close()
+        open(self.file_path, "w").close()
+        self._size = 0
+        if self.index is not None:
             try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    asyncio.run_coroutine_threadsafe(self.async_callback(entry), loop)
+                self.index.clear()
             except Exception as e:
-                 # Fail silently to avoid breaking the logger
-                 pass
+                print(f"Log index clear failed: {e}")
 
-        return entry
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Blocks until everything enqueued so far is on disk."""
+        if self._writer is None or not self._writer.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
 
     def get_logs(self, limit: int = 50, level: Optional[str] = None, source: Optional[str] = None) -> List[Dict]:
         """Get logs from buffer."""
-        filtered = self._mem_buffer
-        
+        with self._buffer_lock:
+            filtered = list(self._mem_buffer)
+
         if level and level != "all":
             filtered = [l for l in filtered if l['level'] == level]
-        
+
         if source:
             filtered = [l for l in filtered if l['source'] == source]
-            
+
         return filtered[:limit]
 
+    def search(self, **filters) -> Dict:
+        """
+        History search over the on-disk index (see LogIndex.search).
+        Without an index, falls back to the in-memory buffer.
+        """
+        if self.index is not None:
+            logs, next_cursor = self.index.search(**filters)
+            return {"logs": logs, "next_cursor": next_cursor}
+        logs = self.get_logs(
+            limit=filters.get("limit", 100), level=filters.get("level"), source=filters.get("source")
+        )
+        return {"logs": logs, "next_cursor": None}
+
     def clear(self):
         """Clears the log file and buffer."""
-        self._mem_buffer = []
-        try:
-            open(self.file_path, 'w').close()
-            self.log("info", "Logs limpos pelo administrador", "system")
-        except:
-            pass
+        with self._buffer_lock:
+            self._mem_buffer.clear()
+        self._ensure_writer()
+        self._queue.put(self._CLEAR)
+        self.log("info", "Logs limpos pelo administrador", "system")
 
     def get_stats(self) -> Dict:
+        with self._buffer_lock:
+            entries = list(self._mem_buffer)
         return {
-            "info": len([l for l in self._mem_buffer if l['level'] == "info"]),
-            "success": len([l for l in self._mem_buffer if l['level'] in (ScheduleStatus.SUCCESS, ScheduleStatus.COMPLETED, ScheduleStatus.READY)]),
-            "warning": len([l for l in self._mem_buffer if l['level'] == "warning"]),
-            "error": len([l for l in self._mem_buffer if l['level'] == ScheduleStatus.FAILED or l['level'] == "error"]),
-            "total": len(self._mem_buffer)
+            "info": len([l for l in entries if l['level'] == "info"]),
+            "success": len([l for l in entries if l['level'] in (ScheduleStatus.SUCCESS, ScheduleStatus.COMPLETED, ScheduleStatus.READY)]),
+            "warning": len([l for l in entries if l['level'] == "warning"]),
+            "error": len([l for l in entries if l['level'] == ScheduleStatus.FAILED or l['level'] == "error"]),
+            "total": len(entries)
         }
 
+def _default_index():
+    if not LOG_INDEX_ENABLED:
+        return None
+    from core.log_index import LogIndex
+    return LogIndex(LOG_INDEX_PATH)
+
+
 # Singleton instance
-logger = JsonLogger()
+logger = JsonLogger(index=_default_index())
@@ -0,0 +1,141 @@
+"""
+Managed Paths - Indice em memoria dos videos controlados pelo Scheduler
+=======================================================================
+
+O Queue Worker so processa arquivos "orfaos" de data/approved (drag & drop
+manual); os que tem ScheduleItem ativo sao do Scheduler. Antes, a cada
+passada de 2-5s com arquivos na pasta, o worker buscava TODOS os
+video_path nao-terminais no banco.
+
+Aqui o conjunto de basenames gerenciados fica em memoria:
+    - Carga lazy com uma query (id, video_path) dos status gerenciados
+    - Listeners ORM de ScheduleItem aplicam insert/update/delete na hora
+    - Eventos do Scheduler (updates/deletes em massa) forcam recarga
+    - reload() periodico do worker como rede de seguranca (outros
+      processos, rollbacks depois do flush)
+
+Callbacks de on_change sao chamados (de qualquer thread) quando o conjunto
+pode ter mudado — o worker usa para reavaliar a fila.
+"""
+
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Set
+
+from sqlalchemy import event
+
+from core.database import SessionLocal
+from core.models import ScheduleItem
+
+logger = logging.getLogger(__name__)
+
+# ScheduleItem nesses status "segura" o arquivo (o worker nao toca)
+MANAGED_STATUSES = ("pending", "scheduled", "processing", "queued", "failed")
+
+
+def _managed_name(status: Optional[str], video_path: Optional[str]) -> Optional[str]:
+    if not video_path or status not in MANAGED_STATUSES:
+        return None
+    return os.path.basename(video_path)
+
+
+class ManagedPathIndex:
+    def __init__(self):
+        self._by_item: Dict[int, str] = {}
+        self._names: Counter = Counter()
+        self._loaded = False
+        self._lock = threading.Lock()
+        # Incrementa a cada invalidacao: uma carga concorrente nao grava dado velho
+        self._generation = 0
+        self._listeners: List[Callable[[], None]] = []
+        self.loads = 0
+
+    def on_change(self, callback: Callable[[], None]) -> None:
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _emit(self) -> None:
+        for callback in self._listeners:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"ManagedPathIndex: listener falhou: {e}")
+
+    def invalidate(self, *_args) -> None:
+        """Proxima consulta recarrega do banco (aceita o profile_id do Scheduler)."""
+        with self._lock:
+            self._generation += 1
+            self._loaded = False
+        self._emit()
+
+    def reload(self) -> bool:
+        with self._lock:
+            generation = self._generation
+        db = SessionLocal()
+        try:
+            rows = db.query(ScheduleItem.id, ScheduleItem.video_path).filter(
+                ScheduleItem.status.in_(MANAGED_STATUSES),
+                ScheduleItem.video_path.isnot(None),
+            ).all()
+        except Exception as e:
+            logger.error(f"ManagedPathIndex: DB Error checking managed files: {e}")
+            return False
+        finally:
+            db.close()
+
+        by_item = {item_id: os.path.basename(path) for item_id, path in rows if path}
+        with self._lock:
+            if generation != self._generation:
+                return False  # Mudou durante a query: a proxima consulta recarrega
+            self._by_item = by_item
+            self._names = Counter(by_item.values())
+            self._loaded = True
+            self.loads += 1
+        return True
+
+    def names(self) -> Set[str]:
+        with self._lock:
+            loaded = self._loaded
+        if not loaded:
+            self.reload()
+        with self._lock:
+            return set(self._names)
+
+    def is_managed(self, filename: str) -> bool:
+        return filename in self.names()
+
+    def apply(self, item_id: Optional[int], name: Optional[str]) -> None:
+        """Estado atual de um ScheduleItem (name=None: nao gerenciado/removido)."""
+        if item_id is None:
+            return
+        with self._lock:
+            self._generation += 1
+            changed = True
+            if self._loaded:
+                old = self._by_item.pop(item_id, None)
+                if old is not None:
+                    self._names[old] -= 1
+                    if self._names[old] <= 0:
+                        del self._names[old]
+                if name is not None:
+                    self._by_item[item_id] = name
+                    self._names[name] += 1
+                changed = old != name
+        if changed:
+            self._emit()
+
+
+managed_paths = ManagedPathIndex()
+
+
+@event.listens_for(ScheduleItem, "after_insert")
+@event.listens_for(ScheduleItem, "after_update")
+def _apply_on_change(mapper, connection, target):
+    managed_paths.apply(target.id, _managed_name(target.status, target.video_path))
+
+
+@event.listens_for(ScheduleItem, "after_delete")
+def _apply_on_delete(mapper, connection, target):
+    managed_paths.apply(target.id, None)
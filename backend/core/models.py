@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, Boolean, JSON, ForeignKey, DateTime, Table
+from sqlalchemy import Column, Integer, String, Boolean, JSON, ForeignKey, DateTime, Table, Index, event
 from sqlalchemy.orm import relationship
 from .database import Base
 from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from typing import Optional
 
 army_profiles = Table(
     "army_profiles",
@@ -118,6 +120,38 @@ class ScheduleItem(Base):
     status = Column(String, default="pending") # pending, posted, failed, processing
     error_message = Column(String, nullable=True)
     metadata_info = Column(JSON, default=dict) # Title, caption, tags
+    # Normalized copy of scheduled_time (naive UTC) kept by the listeners below.
+    # The due-item query filters on it with the (status, scheduled_time_utc) index.
+    scheduled_time_utc = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_schedule_status_due_utc", "status", "scheduled_time_utc"),
+    )
+
+
+SCHEDULE_TZ = ZoneInfo("America/Sao_Paulo")
+
+
+def schedule_time_to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Converts a ScheduleItem.scheduled_time to naive UTC.
+    The column has no timezone: both SQLite and Postgres keep only the wall
+    time (any offset is dropped on write), and naive values mean Sao Paulo
+    time. Normalizing the wall time keeps the UTC copy equal to what gets
+    read back from the DB.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    local = value.replace(tzinfo=None).replace(tzinfo=SCHEDULE_TZ)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@event.listens_for(ScheduleItem, "before_insert")
+@event.listens_for(ScheduleItem, "before_update")
+def _sync_schedule_time_utc(mapper, connection, target):
+    target.scheduled_time_utc = schedule_time_to_utc(target.scheduled_time)
 
 class Trend(Base):
     """
@@ -226,4 +260,4 @@ class PendingApproval(Base):
 # ─── Clipper Module Models ──────────────────────────────────────────────
 # Importados aqui para garantir que o SQLAlchemy registre as tabelas
 # quando Base.metadata.create_all() for executado.
-from core.clipper.models import TwitchTarget, ClipJob, TwitchKnownStreamer  # noqa: F401, E402
+from core.clipper.models import TwitchTarget, ClipJob, ClipURL, TwitchKnownStreamer  # noqa: F401, E402
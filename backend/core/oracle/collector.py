@@ -2,7 +2,7 @@ import logging
 import asyncio
 from typing import Dict, Optional, List
 from playwright.async_api import Page
-from core.browser import launch_browser, close_browser
+from core.browser_pool import get_browser_pool
 
 logger = logging.getLogger(__name__)
 
@@ -20,10 +20,8 @@ class OracleCollector:
         logger.info(f"🕵️ OracleCollector: Targeting @{username}...")
         
         from core.network_utils import get_random_user_agent
-        p, browser, context, page = await launch_browser(
-            headless=True, # TikTok is tough on headless, but let's try.
-            user_agent=get_random_user_agent()
-        )
+        lease = await get_browser_pool().acquire(user_agent=get_random_user_agent())
+        page = lease.page
         
         try:
             url = f"https://www.tiktok.com/@{username}"
@@ -98,7 +96,7 @@ class OracleCollector:
             return {"error": str(e)}
             
         finally:
-            await close_browser(p, browser)
+            await lease.release()
 
     async def extract_comments(self, video_url: str, max_comments: int = 30) -> List[Dict[str, str]]:
         """
@@ -110,7 +108,8 @@ class OracleCollector:
         if not video_url.startswith('http'):
             video_url = f"https://www.tiktok.com{video_url}"
             
-        p, browser, context, page = await launch_browser(headless=True)
+        lease = await get_browser_pool().acquire()
+        page = lease.page
         comments = []
 
         try:
@@ -151,7 +150,7 @@ class OracleCollector:
             return []
             
         finally:
-            await close_browser(p, browser)
+            await lease.release()
 
 # Singleton instance
 oracle_collector = OracleCollector()
@@ -7,7 +7,7 @@ import logging
 import asyncio
 from typing import Dict, Any, List, Optional
 from playwright.async_api import Page
-from core.browser import launch_browser, close_browser
+from core.browser_pool import get_browser_pool
 
 logger = logging.getLogger(__name__)
 
@@ -54,10 +54,10 @@ class SenseFaculty:
         else:
             logger.warning("⚠️ No authenticated session resolved, using anonymous mode")
         
-        p, browser, context, page = await launch_browser(
-            headless=True,
+        lease = await get_browser_pool().acquire(
             storage_state=session_path  # Load authenticated cookies if found
         )
+        page = lease.page
 
         try:
             url = f"https://www.tiktok.com/@{username}"
@@ -200,7 +200,7 @@ class SenseFaculty:
             return {"error": str(e)}
 
         finally:
-            await close_browser(p, browser)
+            await lease.release()
 
     async def collect_comments(self, video_url: str, max_comments: int = 30) -> List[Dict[str, str]]:
         """
@@ -211,7 +211,8 @@ class SenseFaculty:
         if not video_url.startswith('http'):
             video_url = f"https://www.tiktok.com{video_url}"
 
-        p, browser, context, page = await launch_browser(headless=True)
+        lease = await get_browser_pool().acquire()
+        page = lease.page
         comments = []
 
         try:
@@ -248,7 +249,7 @@ class SenseFaculty:
             return []
 
         finally:
-            await close_browser(p, browser)
+            await lease.release()
 
     async def capture_profile_screenshot(self, username: str) -> str:
         """
@@ -261,10 +262,8 @@ class SenseFaculty:
         path = os.path.join(SCREENSHOTS_DIR, filename)
 
         from core.network_utils import get_random_user_agent
-        p, browser, context, page = await launch_browser(
-            headless=True,
-            user_agent=get_random_user_agent()
-        )
+        lease = await get_browser_pool().acquire(user_agent=get_random_user_agent())
+        page = lease.page
 
         try:
             url = f"https://www.tiktok.com/@{username}"
@@ -293,7 +292,7 @@ class SenseFaculty:
             return ""
             
         finally:
-            await close_browser(p, browser)
+            await lease.release()
 
     async def spy_competitor(self, target_username: str) -> Dict[str, Any]:
         """
@@ -9,7 +9,7 @@ import asyncio
 from datetime import datetime, timezone
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass, asdict
-from core.browser import launch_browser, close_browser
+from core.browser_pool import get_browser_pool
 
 logger = logging.getLogger(__name__)
 
@@ -150,7 +150,8 @@ class TrendChecker:
         logger.info(f"[TRENDS] Fetching trending sounds (category={category}, min_growth={min_growth}%)...")
         
         from core.network_utils import get_random_user_agent
-        p, browser, context, page = await launch_browser(headless=True, user_agent=get_random_user_agent())
+        lease = await get_browser_pool().acquire(user_agent=get_random_user_agent())
+        page = lease.page
         trends = []
         
         try:
@@ -254,7 +255,7 @@ class TrendChecker:
             return self.trends_cache  # Return cached data on failure
             
         finally:
-            await close_browser(p, browser)
+            await lease.release()
     
     async def _fallback_extraction(self, page, min_growth: float) -> List[TrendData]:
         """Fallback extraction using page content analysis."""
@@ -305,7 +306,8 @@ class TrendChecker:
         hashtag = hashtag.lstrip('#').lower()
         
         from core.network_utils import get_random_user_agent
-        p, browser, context, page = await launch_browser(headless=True, user_agent=get_random_user_agent())
+        lease = await get_browser_pool().acquire(user_agent=get_random_user_agent())
+        page = lease.page
         
         try:
             url = f"https://www.tiktok.com/tag/{hashtag}"
@@ -341,7 +343,7 @@ class TrendChecker:
             }
             
         finally:
-            await close_browser(p, browser)
+            await lease.release()
     
     def get_cached_trends(self) -> Dict[str, Any]:
         """Get cached trends without fetching."""
@@ -4,6 +4,10 @@ import os
 import time
 import asyncio
 import logging
+from typing import Callable, Optional, Set
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
 
 # Configuração de Logs
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -15,11 +19,15 @@ APPROVED_DIR = os.path.join(BASE_DIR, "data", "approved")
 PROCESSING_DIR = os.path.join(BASE_DIR, "processing") # Where zombies live
 DONE_DIR = os.path.join(BASE_DIR, "data", "done")
 
+# Sem eventos, o índice de arquivos gerenciados é reconciliado com o banco nesse intervalo
+QUEUE_RECONCILE_SECONDS = float(os.getenv("QUEUE_RECONCILE_SECONDS", "60"))
+
 # Adicionar root ao path para imports
 sys.path.append(BASE_DIR)
 
 from core.manual_executor import execute_approved_video
 from core.status_manager import status_manager
+from core.managed_paths import managed_paths
 
 import shutil
 
@@ -125,148 +133,173 @@ def recover_zombie_tasks():
     if moved_count > 0:
         logger.info(f"✅ {moved_count} tarefas zumbis recuperadas e enfileiradas novamente.")
 
+class ApprovedFolderHandler(FileSystemEventHandler):
+    """Acorda o worker quando um .mp4 entra/sai de approved/ (thread do watchdog)."""
+
+    def __init__(self, wake: Callable[[], None]):
+        self.wake = wake
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        paths = (event.src_path, getattr(event, "dest_path", None))
+        if any(p and os.fsdecode(p).endswith(".mp4") for p in paths):
+            self.wake()
+
+
+def next_orphan_file(managed_filenames: Set[str]) -> Optional[str]:
+    """
+    Próximo arquivo de approved/ para o worker (FIFO por mtime), ou None.
+    Ignora os gerenciados pelo Scheduler (ScheduleItem ativo) e os do Clipper.
+    """
+    if not os.path.exists(APPROVED_DIR):
+        os.makedirs(APPROVED_DIR)
+
+    files_with_time = []
+    for f in os.listdir(APPROVED_DIR):
+        if not f.endswith('.mp4'):
+            continue
+        if f in managed_filenames:
+            continue  # Managed by scheduler
+        if f.startswith("stitch_"):
+            continue  # Clipper output — managed by scheduler, not queue_worker
+        try:
+            files_with_time.append((os.path.getmtime(os.path.join(APPROVED_DIR, f)), f))
+        except OSError:
+            continue  # Movido entre o listdir e o stat
+
+    if not files_with_time:
+        return None
+    # Queremos o mais antigo primeiro
+    return min(files_with_time)[1]
+
+
 async def worker_loop():
     logger.info("🚀 Queue Worker Iniciado - Monitorando pasta APPROVED...")
     logger.info(f"📂 Diretório: {APPROVED_DIR}")
     
     # [SYN-SAFETY] Initialize Circuit Breaker
     from core.circuit_breaker import circuit_breaker
+    from core.scheduler import scheduler_service
     
     # Run Validations/Cleanups
     recover_zombie_tasks()
     cleanup_done_files()
-    
-    while True:
+    os.makedirs(APPROVED_DIR, exist_ok=True)
+
+    # Acordado por eventos (watchdog em approved/ + mudanças de agenda), não por polling
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def notify():
+        if loop.is_closed():
+            return
         try:
-            # [SYN-SAFETY] Check Circuit Breaker
-            if circuit_breaker.is_open():
-                logger.warning("🛑 CIRCUIT OPEN: Pausing Worker for 60s...")
-                status_manager.update_status("paused", step="Circuit Breaker Open", logs=["Too many failures. System paused."])
-                await asyncio.sleep(60)
-                continue
+            loop.call_soon_threadsafe(wake.set)
+        except RuntimeError:
+            pass
 
-            # Lista arquivos
-            if not os.path.exists(APPROVED_DIR):
-                os.makedirs(APPROVED_DIR)
-                
-            files = [f for f in os.listdir(APPROVED_DIR) if f.endswith('.mp4')]
-            
-            if not files:
-                # Fila vazia
-                await asyncio.sleep(5)
-                continue
+    observer = Observer()
+    observer.schedule(ApprovedFolderHandler(notify), APPROVED_DIR)
+    observer.start()
+    managed_paths.on_change(notify)
+    # Updates/deletes em massa do Scheduler não disparam os listeners ORM
+    scheduler_service.on_schedule_change(managed_paths.invalidate)
+    last_reconcile = time.monotonic()
 
-            # [SYN-FIX] Race Condition Prevention
-            # Filter out files that are already managed by Scheduler (DB)
-            # If it's in DB as pending/scheduled/processing, Scheduler handles it.
-            # Queue Worker only handles "orphan" files (Manual Drag & Drop).
-            from core.database import SessionLocal
-            from core.models import ScheduleItem
-            
-            # Get list of managed filenames (any non-terminal status)
-            managed_filenames = set()
-            db = SessionLocal()
+    try:
+        while True:
             try:
-                active_items = db.query(ScheduleItem.video_path).filter(
-                    ScheduleItem.status.in_(['pending', 'scheduled', 'processing', 'queued', 'failed'])
-                ).all()
+                # [SYN-SAFETY] Check Circuit Breaker
+                if circuit_breaker.is_open():
+                    logger.warning("🛑 CIRCUIT OPEN: Pausing Worker for 60s...")
+                    status_manager.update_status("paused", step="Circuit Breaker Open", logs=["Too many failures. System paused."])
+                    await asyncio.sleep(60)
+                    continue
 
-                for item in active_items:
-                    if item.video_path:
-                        managed_filenames.add(os.path.basename(item.video_path))
-            except Exception as e:
-                logger.error(f"DB Error checking managed files: {e}")
-            finally:
-                db.close()
-            
-            # Filter files
-            actual_files = []
-            for f in files:
-                if f in managed_filenames:
-                    pass  # Managed by scheduler
-                elif f.startswith("stitch_"):
-                    pass  # Clipper output — managed by scheduler, not queue_worker
-                else:
-                    actual_files.append(f)
-            
-            if not actual_files:
-                # All files are managed by scheduler or empty
-                await asyncio.sleep(2)
-                continue
-                
-            # Ordenar por data de modificação (FIFO - First In First Out)
-            # Queremos o mais antigo primeiro
-            files_with_time = []
-            for f in actual_files:
-                full_path = os.path.join(APPROVED_DIR, f)
-                mtime = os.path.getmtime(full_path)
-                files_with_time.append((f, mtime))
-            
-            # Sort by timestamp ascending (oldest first)
-            files_with_time.sort(key=lambda x: x[1])
-            
-            # Select first
-            target_file = files_with_time[0][0]
-            logger.info(f"⚡ Processando item da fila: {target_file}")
+                # Eventos que chegarem durante a varredura acordam de novo
+                wake.clear()
+
+                # [SYN-FIX] Race Condition Prevention
+                # Files managed by Scheduler (DB: pending/scheduled/processing/...) are skipped.
+                # Queue Worker only handles "orphan" files (Manual Drag & Drop).
+                managed_filenames = await asyncio.to_thread(managed_paths.names)
+                target_file = next_orphan_file(managed_filenames)
+
+                if target_file is None:
+                    # Fila vazia (ou tudo do Scheduler): espera um evento ou a reconciliação
+                    timeout = max(0.0, QUEUE_RECONCILE_SECONDS - (time.monotonic() - last_reconcile))
+                    try:
+                        await asyncio.wait_for(wake.wait(), timeout=timeout)
+                    except asyncio.TimeoutError:
+                        # Rede de segurança: escritas de outros processos / eventos perdidos
+                        await asyncio.to_thread(managed_paths.reload)
+                        last_reconcile = time.monotonic()
+                    continue
+
+                logger.info(f"⚡ Processando item da fila: {target_file}")
             
-            # Execute (Síncrono para o worker, espera terminar)
-            start_time = time.time()
-            try:
-                # Report Start
-                status_manager.update_status(
-                    state="busy",
-                    current_task=target_file,
-                    step="Iniciando processamento...",
-                    progress=5,
-                    logs=[f"Encontrado: {target_file}"]
-                )
-
-                result = await execute_approved_video(target_file)
-                duration = time.time() - start_time
+                # Execute (Síncrono para o worker, espera terminar)
+                start_time = time.time()
+                try:
+                    # Report Start
+                    status_manager.update_status(
+                        state="busy",
+                        current_task=target_file,
+                        step="Iniciando processamento...",
+                        progress=5,
+                        logs=[f"Encontrado: {target_file}"]
+                    )
+
+                    result = await execute_approved_video(target_file)
+                    duration = time.time() - start_time
                 
-                status = result.get('status', 'unknown')
-                logger.info(f"✅ Concluído: {target_file} | Status: {status} | Tempo: {duration:.1f}s")
+                    status = result.get('status', 'unknown')
+                    logger.info(f"✅ Concluído: {target_file} | Status: {status} | Tempo: {duration:.1f}s")
                 
-                # Report Done
-                if status == 'success':
-                    status_manager.update_status("idle", progress=100, step="Concluído com sucesso", logs=[f"Finalizado em {duration:.1f}s"])
-                else:
-                    status_manager.update_status("error", step="Falha no processamento", logs=[result.get('message', 'Erro desconhecido')])
-                    # [SYN-SAFETY] Record Failure (Soft)
-                    logger.error(f"Execution failed: {result.get('message')}")
-                    await circuit_breaker.record_failure()
+                    # Report Done
+                    if status == 'success':
+                        status_manager.update_status("idle", progress=100, step="Concluído com sucesso", logs=[f"Finalizado em {duration:.1f}s"])
+                    else:
+                        status_manager.update_status("error", step="Falha no processamento", logs=[result.get('message', 'Erro desconhecido')])
+                        # [SYN-SAFETY] Record Failure (Soft)
+                        logger.error(f"Execution failed: {result.get('message')}")
+                        await circuit_breaker.record_failure()
                     
-                    await asyncio.sleep(5) # Pause to let user see error status before idle
-                    status_manager.set_idle()
+                        await asyncio.sleep(5) # Pause to let user see error status before idle
+                        status_manager.set_idle()
                 
-            except Exception as e:
-                logger.error(f"❌ Falha ao processar {target_file}: {e}")
-                # [SYN-SAFETY] Record Critical Failure
-                await circuit_breaker.record_failure()
+                except Exception as e:
+                    logger.error(f"❌ Falha ao processar {target_file}: {e}")
+                    # [SYN-SAFETY] Record Critical Failure
+                    await circuit_breaker.record_failure()
                 
-                import traceback
-                traceback.print_exc()
+                    import traceback
+                    traceback.print_exc()
                 
-                # IMPORTANT: Se falhar e não mover o arquivo, vai entrar em loop infinito tentando o mesmo arquivo.
-                # O execute_approved_video já deve mover para errors/ ou done/.
-                # Se ainda estiver em approved, precisamos mover para errors forçadamente.
-                if os.path.exists(os.path.join(APPROVED_DIR, target_file)):
-                     logger.warning(f"⚠️ Arquivo preso em approved após erro: {target_file}. Movendo para ERROR_FORCE.")
-                     # ... (implementar movimento forçado se necessário, mas manual_executor já tem try/except global que move para errors)
+                    # IMPORTANT: Se falhar e não mover o arquivo, vai entrar em loop infinito tentando o mesmo arquivo.
+                    # O execute_approved_video já deve mover para errors/ ou done/.
+                    # Se ainda estiver em approved, precisamos mover para errors forçadamente.
+                    if os.path.exists(os.path.join(APPROVED_DIR, target_file)):
+                         logger.warning(f"⚠️ Arquivo preso em approved após erro: {target_file}. Movendo para ERROR_FORCE.")
+                         # ... (implementar movimento forçado se necessário, mas manual_executor já tem try/except global que move para errors)
             
-            # Pequena pausa entre jobs para o sistema respirar
-            await asyncio.sleep(2)
+                # Pequena pausa entre jobs para o sistema respirar
+                await asyncio.sleep(2)
             
-        except KeyboardInterrupt:
-            logger.info("🛑 Worker interrompido pelo usuário.")
-            break
-        except asyncio.CancelledError:
-            logger.info("🛑 Worker cancelado pelo sistema (Shutdown).")
-            # Cleanup if needed
-            break
-        except Exception as global_e:
-            logger.error(f"💥 Erro crítico no worker loop: {global_e}")
-            await asyncio.sleep(10) # Wait before restart loop
+            except KeyboardInterrupt:
+                logger.info("🛑 Worker interrompido pelo usuário.")
+                break
+            except asyncio.CancelledError:
+                logger.info("🛑 Worker cancelado pelo sistema (Shutdown).")
+                # Cleanup if needed
+                break
+            except Exception as global_e:
+                logger.error(f"💥 Erro crítico no worker loop: {global_e}")
+                await asyncio.sleep(10) # Wait before restart loop
+    finally:
+        observer.stop()
+        observer.join(timeout=5)
 
 if __name__ == "__main__":
     try:
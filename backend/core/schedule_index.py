@@ -0,0 +1,159 @@
+"""
+Schedule Index - Indice em memoria do calendario por perfil
+===========================================================
+
+O SmartLogic chamava Scheduler.load_schedule() (todos os ScheduleItems do
+banco, convertidos em dicts) a cada contagem de posts do dia e a cada busca
+do evento mais proximo — validate_batch/suggest_slot fazem isso em loop.
+
+Aqui cada perfil tem uma lista ordenada por horario dos eventos ativos,
+carregada com uma query so daquele perfil. Contagem por dia e evento mais
+proximo viram buscas binarias.
+
+Invalidacao:
+    - Listeners ORM de ScheduleItem (insert/update/delete neste processo)
+    - Eventos do Scheduler para updates/deletes em massa (query.update/delete)
+    - TTL como rede de seguranca para escritas de outros processos
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import event, inspect as sa_inspect, or_
+
+from core.database import SessionLocal
+from core.models import ScheduleItem
+
+logger = logging.getLogger(__name__)
+
+SP_TZ = ZoneInfo("America/Sao_Paulo")
+SCHEDULE_INDEX_TTL_SECONDS = float(os.getenv("SCHEDULE_INDEX_TTL_SECONDS", "60"))
+
+# Eventos nesses status nao contam para conflitos
+INACTIVE_STATUSES = ("completed", "failed", "cancelled")
+
+
+def _aware(value: datetime) -> datetime:
+    """Naive = horario de Sao Paulo (mesma convencao do banco)."""
+    return value.replace(tzinfo=SP_TZ) if value.tzinfo is None else value
+
+
+@dataclass
+class _ProfileSchedule:
+    times: List[datetime] = field(default_factory=list)  # aware, ordenados
+    ids: List[str] = field(default_factory=list)
+    loaded_at: float = 0.0
+
+
+class ScheduleIndex:
+    """Eventos ativos por perfil, ordenados por horario."""
+
+    def __init__(self, ttl_seconds: float = SCHEDULE_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._profiles: Dict[str, _ProfileSchedule] = {}
+        self._lock = threading.Lock()
+        # Incrementa a cada invalidacao: uma carga concorrente nao grava dado velho
+        self._generation = 0
+        self.loads = 0
+
+    def invalidate(self, profile_id: Optional[str] = None) -> None:
+        """Descarta um perfil (ou todos, se profile_id=None)."""
+        with self._lock:
+            self._generation += 1
+            if profile_id is None:
+                self._profiles.clear()
+            else:
+                self._profiles.pop(profile_id, None)
+
+    def _get(self, profile_id: str) -> _ProfileSchedule:
+        with self._lock:
+            cached = self._profiles.get(profile_id)
+            if cached and time.monotonic() - cached.loaded_at < self.ttl_seconds:
+                return cached
+            generation = self._generation
+
+        loaded = self._load(profile_id)
+        if loaded is None:
+            return _ProfileSchedule()
+        with self._lock:
+            if generation == self._generation:
+                self._profiles[profile_id] = loaded
+        return loaded
+
+    def _load(self, profile_id: str) -> Optional[_ProfileSchedule]:
+        db = SessionLocal()
+        try:
+            rows = db.query(ScheduleItem.id, ScheduleItem.scheduled_time).filter(
+                ScheduleItem.profile_slug == profile_id,
+                ScheduleItem.scheduled_time.isnot(None),
+                or_(ScheduleItem.status.is_(None), ScheduleItem.status.notin_(INACTIVE_STATUSES)),
+            ).all()
+        except Exception as e:
+            logger.warning(f"ScheduleIndex: falha ao carregar {profile_id}: {e}")
+            return None
+        finally:
+            db.close()
+
+        entries = sorted((_aware(t), str(item_id)) for item_id, t in rows)
+        self.loads += 1
+        return _ProfileSchedule(
+            times=[t for t, _ in entries],
+            ids=[i for _, i in entries],
+            loaded_at=time.monotonic(),
+        )
+
+    def count_between(
+        self, profile_id: str, start: datetime, end: datetime, exclude_id: Optional[str] = None
+    ) -> int:
+        """Eventos ativos em [start, end)."""
+        sched = self._get(profile_id)
+        lo = bisect.bisect_left(sched.times, _aware(start))
+        hi = bisect.bisect_left(sched.times, _aware(end))
+        count = hi - lo
+        if exclude_id is not None and exclude_id in sched.ids[lo:hi]:
+            count -= 1
+        return count
+
+    def nearest(
+        self, profile_id: str, target: datetime, exclude_id: Optional[str] = None
+    ) -> Optional[Tuple[datetime, float]]:
+        """Evento ativo mais proximo de target e a distancia em horas."""
+        sched = self._get(profile_id)
+        target = _aware(target)
+        i = bisect.bisect_left(sched.times, target)
+
+        best: Optional[Tuple[datetime, float]] = None
+        # Vizinho anterior e seguinte (pulando o evento excluido)
+        for step, j in ((-1, i - 1), (1, i)):
+            while 0 <= j < len(sched.times) and sched.ids[j] == exclude_id:
+                j += step
+            if 0 <= j < len(sched.times):
+                distance = abs((sched.times[j] - target).total_seconds() / 3600)
+                if best is None or distance < best[1]:
+                    best = (sched.times[j], distance)
+        return best
+
+
+schedule_index = ScheduleIndex()
+
+
+def _previous_profiles(target) -> List[str]:
+    """Valores anteriores de profile_slug (edicao que troca o perfil)."""
+    history = sa_inspect(target).attrs.profile_slug.history
+    return [p for p in (history.deleted or ()) if p]
+
+
+@event.listens_for(ScheduleItem, "after_insert")
+@event.listens_for(ScheduleItem, "after_update")
+@event.listens_for(ScheduleItem, "after_delete")
+def _invalidate_on_change(mapper, connection, target):
+    schedule_index.invalidate(target.profile_slug)
+    for old_profile in _previous_profiles(target):
+        schedule_index.invalidate(old_profile)
@@ -1,14 +1,17 @@
 import shutil
 import os
 import asyncio
+import heapq
 import uuid
 import json
 import time
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
-from typing import List, Dict, Optional, Any
-from core.database import SessionLocal
-from core.models import ScheduleItem
+from typing import Callable, List, Dict, Optional, Any, Tuple
+from sqlalchemy import inspect as sa_inspect, select, text, update
+from core.database import SessionLocal, async_session
+from core.models import ScheduleItem, schedule_time_to_utc
+from core.slot_allocator import SlotAllocator
 from core.logger import logger
 from core.consts import ScheduleStatus
 from core.database_utils import with_db_retries, retry_db_op
@@ -43,12 +46,123 @@ def normalize_video_path(docker_path: str) -> str:
             # Already a Windows path or other
             return docker_path
 
+# Housekeeping cadence (heartbeat, keepalive, phantom tick) and upper bound for a
+# single sleep: items written by another process are still picked up on time.
+HOUSEKEEPING_INTERVAL_SECONDS = 30
+# How many upcoming pending items the in-memory heap holds between refreshes
+DUE_HEAP_WINDOW = int(os.getenv("SCHEDULER_DUE_HEAP_WINDOW", "256"))
+UTC_BACKFILL_BATCH = 500
+
+
+def _utc_now_naive() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def migrate_schedule_utc(engine) -> int:
+    """
+    Adds schedule.scheduled_time_utc + the (status, scheduled_time_utc) index on
+    existing databases and backfills it. Idempotent; returns rows backfilled.
+    """
+    columns = [col["name"] for col in sa_inspect(engine).get_columns("schedule")]
+    if "scheduled_time_utc" not in columns:
+        column_type = "TIMESTAMP" if engine.dialect.name == "postgresql" else "DATETIME"
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE schedule ADD COLUMN scheduled_time_utc {column_type}"))
+        except Exception:
+            # API, workers and scheduler all migrate on startup: another one may have won
+            if "scheduled_time_utc" not in [col["name"] for col in sa_inspect(engine).get_columns("schedule")]:
+                raise
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_schedule_status_due_utc "
+            "ON schedule (status, scheduled_time_utc)"
+        ))
+
+    total = 0
+    db = SessionLocal()
+    try:
+        while True:
+            items = db.query(ScheduleItem).filter(
+                ScheduleItem.scheduled_time_utc.is_(None),
+                ScheduleItem.scheduled_time.isnot(None),
+            ).limit(UTC_BACKFILL_BATCH).all()
+            if not items:
+                break
+            for item in items:
+                item.scheduled_time_utc = schedule_time_to_utc(item.scheduled_time)
+            db.commit()
+            total += len(items)
+    finally:
+        db.close()
+    return total
+
+
+class DueHeap:
+    """
+    Min-heap of (due_utc, item_id) for the next pending items.
+    Entries may go stale (item rescheduled/deleted elsewhere): a stale entry only
+    causes an early wake-up, and the heap is rebuilt from the DB on every check.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int]] = []
+
+    def reset(self, entries: List[Tuple[datetime, int]]) -> None:
+        self._heap = list(entries)
+        heapq.heapify(self._heap)
+
+    def push(self, due_utc: datetime, item_id: int) -> None:
+        heapq.heappush(self._heap, (due_utc, item_id))
+
+    def next_due(self) -> Optional[datetime]:
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
 class Scheduler:
     def __init__(self):
         # Database is auto-initialized by core.database
         self.semaphore = asyncio.Semaphore(1) # [SYN-FIX] Limit to 1 concurrent upload to save RAM
         self._keepalive_counter = 0
         self._keepalive_interval = 480  # 480 * 30s = 4 horas
+        self._due_heap = DueHeap()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._change_listeners: List[Callable[[Optional[str]], None]] = []
+
+    def on_schedule_change(self, callback: Callable[[Optional[str]], None]) -> None:
+        """Registers callback(profile_id) fired on add/update/delete (None = many profiles)."""
+        if callback not in self._change_listeners:
+            self._change_listeners.append(callback)
+
+    def _emit_schedule_change(self, profile_id: Optional[str] = None) -> None:
+        for callback in self._change_listeners:
+            try:
+                callback(profile_id)
+            except Exception as e:
+                print(f"[SCHEDULER] Schedule change listener error: {e}")
+
+    def _notify_schedule_change(self, item_id: int, scheduled_time_utc: Optional[datetime]) -> None:
+        """Pushes a new/rescheduled item into the heap and wakes the loop (thread-safe)."""
+        loop = self._loop
+        if loop is None or scheduled_time_utc is None or loop.is_closed():
+            return  # Loop runs in another process: it sees the item on its next check
+
+        def _apply():
+            self._due_heap.push(scheduled_time_utc, item_id)
+            if self._wake is not None:
+                self._wake.set()
+
+        try:
+            if asyncio.get_running_loop() is loop:
+                _apply()
+                return
+        except RuntimeError:
+            pass
+        loop.call_soon_threadsafe(_apply)
 
 
     @with_db_retries()
@@ -186,6 +300,8 @@ class Scheduler:
             db.add(new_item)
             db.commit()
             db.refresh(new_item)
+            self._notify_schedule_change(new_item.id, new_item.scheduled_time_utc)
+            self._emit_schedule_change(profile_id)
             
             # Return dict format
             return {
@@ -227,8 +343,10 @@ class Scheduler:
             db.query(VideoQueue).filter(VideoQueue.schedule_item_id == pk).update(
                 {"schedule_item_id": None}, synchronize_session="fetch"
             )
+            profile_id = item.profile_slug
             db.delete(item)
             db.commit()
+            self._emit_schedule_change(profile_id)
             return True
         except Exception as e:
             db.rollback()
@@ -304,6 +422,8 @@ class Scheduler:
             if deleted > 0:
                 print(f"[SCHEDULER] Cleaned up {deleted} phantom events")
                 db.commit()
+                # Bulk delete bypasses ORM events
+                self._emit_schedule_change(None)
         except Exception as e:
             print(f"[SCHEDULER] Cleanup error: {e}")
             db.rollback()
@@ -333,24 +453,27 @@ class Scheduler:
         finally:
             db.close()
 
-    def find_next_available_slot(self, profile_id: str, start_time: datetime) -> str:
-        """Finds the next available slot starting from start_time."""
-        current_check = start_time
-        
-        # Optimization: Instead of 600 queries, we could fetch all future events once.
-        # But for 'find next', usually it's close.
-        
-        max_attempts = 672 # 7 days
-        attempts = 0
-        
-        while attempts < max_attempts:
-            if self.is_slot_available(profile_id, current_check):
-                return current_check.isoformat()
-            
-            # Move forward by 15 minutes
-            current_check += timedelta(minutes=15)
-            attempts += 1
-            
+    def find_next_available_slot(self, profile_id: str, start_time: datetime, allocator: Optional[SlotAllocator] = None) -> str:
+        """
+        Finds the next available slot starting from start_time.
+        Occupied times are loaded once into a SlotAllocator (one query pair
+        instead of a COUNT per 15-minute step). Pass a shared allocator when
+        placing several events so they also avoid each other before commit.
+        """
+        db = None
+        try:
+            if allocator is None:
+                db = SessionLocal()
+                allocator = SlotAllocator(db, schedule_statuses=None)
+            slot = allocator.next_free_slot(profile_id, start_time, max_attempts=672)  # 7 days
+            if slot is not None:
+                return slot.isoformat()
+        except Exception as e:
+            print(f"DB Error finding slot: {e}")
+        finally:
+            if db is not None:
+                db.close()
+
         return (start_time + timedelta(days=7)).isoformat()
 
     @with_db_retries() # type: ignore
@@ -380,6 +503,7 @@ class Scheduler:
             
             if item:
                 print(f"DEBUG: found item {item.id}, updating...")
+                previous_profile = item.profile_slug
 
                 # --- Update Scheduled Time (if provided) ---
                 if scheduled_time:
@@ -415,6 +539,11 @@ class Scheduler:
 
                 db.commit()
                 db.refresh(item)
+                if item.status == 'pending':
+                    self._notify_schedule_change(item.id, item.scheduled_time_utc)
+                self._emit_schedule_change(item.profile_slug)
+                if previous_profile != item.profile_slug:
+                    self._emit_schedule_change(previous_profile)
                 
                 # Build enriched response
                 refreshed_meta = item.metadata_info or {}
@@ -477,36 +606,98 @@ class Scheduler:
     async def start_loop(self):
         """Starts the background scheduler loop."""
         print("[SCHEDULER] Loop Started...")
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+
+        # Existing databases: add/backfill the normalized UTC column + index
+        try:
+            from core.database import engine
+            backfilled = migrate_schedule_utc(engine)
+            if backfilled:
+                print(f"[SCHEDULER] Backfilled scheduled_time_utc for {backfilled} items.")
+        except Exception as e:
+            print(f"[SCHEDULER] scheduled_time_utc migration error: {e}")
 
         # [SYN-FIX] Run cleanup on startup
         self.cleanup_phantom_events()
 
+        next_housekeeping = time.monotonic()
         while True:
             try:
                 await self.check_due_items()
             except Exception as e:
                 print(f"Scheduler Loop Error: {e}")
 
-            # Session Keepalive periódico
-            self._keepalive_counter += 1
-            if self._keepalive_counter >= self._keepalive_interval:
-                self._keepalive_counter = 0
-                try:
-                    from core.session_keepalive import keepalive_all_profiles
-                    await keepalive_all_profiles()
-                except Exception as e:
-                    print(f"[SCHEDULER] Session keepalive error: {e}")
+            if time.monotonic() >= next_housekeeping:
+                next_housekeeping = time.monotonic() + HOUSEKEEPING_INTERVAL_SECONDS
+                await self._housekeeping_tick()
+
+            await self._sleep_until_next_due(next_housekeeping)
 
-            # 👻 Phantom Trust Engine — Periodic session dispatch
+    async def _housekeeping_tick(self):
+        """Periodic work that runs every HOUSEKEEPING_INTERVAL_SECONDS."""
+        # Session Keepalive periódico
+        self._keepalive_counter += 1
+        if self._keepalive_counter >= self._keepalive_interval:
+            self._keepalive_counter = 0
             try:
-                from core.phantom.scheduler_integration import phantom_tick
-                await phantom_tick()
-            except ImportError:
-                pass  # Phantom module not installed
+                from core.session_keepalive import keepalive_all_profiles
+                await keepalive_all_profiles()
             except Exception as e:
-                print(f"[SCHEDULER] Phantom tick error: {e}")
+                print(f"[SCHEDULER] Session keepalive error: {e}")
+
+        # 👻 Phantom Trust Engine — Periodic session dispatch
+        try:
+            from core.phantom.scheduler_integration import phantom_tick
+            await phantom_tick()
+        except ImportError:
+            pass  # Phantom module not installed
+        except Exception as e:
+            print(f"[SCHEDULER] Phantom tick error: {e}")
 
-            await asyncio.sleep(30) # Check every 30 seconds
+    def _seconds_until_next_wake(self, next_housekeeping: float) -> float:
+        """Sleeps until the next due item, but never past the housekeeping tick."""
+        delay = max(0.0, next_housekeeping - time.monotonic())
+        next_due = self._due_heap.next_due()
+        if next_due is not None:
+            delay = min(delay, max(0.0, (next_due - _utc_now_naive()).total_seconds()))
+        return delay
+
+    async def _sleep_until_next_due(self, next_housekeeping: float):
+        if self._wake is None:
+            await asyncio.sleep(self._seconds_until_next_wake(next_housekeeping))
+            return
+        # Clear before computing the delay: a push after this point wakes us up
+        self._wake.clear()
+        delay = self._seconds_until_next_wake(next_housekeeping)
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _refresh_due_heap(self, db, now_utc: datetime):
+        """Reloads the next DUE_HEAP_WINDOW pending items (index range scan)."""
+        upcoming = (await db.execute(
+            select(ScheduleItem.scheduled_time_utc, ScheduleItem.id).where(
+                ScheduleItem.status == 'pending',
+                ScheduleItem.scheduled_time_utc > now_utc
+            ).order_by(ScheduleItem.scheduled_time_utc).limit(DUE_HEAP_WINDOW)
+        )).all()
+        self._due_heap.reset([(row[0], row[1]) for row in upcoming])
+
+    async def _backfill_missing_utc(self, db):
+        """Items written via raw SQL (maintenance scripts) have no UTC copy yet."""
+        missing = (await db.execute(
+            select(ScheduleItem).where(
+                ScheduleItem.status == 'pending',
+                ScheduleItem.scheduled_time_utc.is_(None),
+                ScheduleItem.scheduled_time.isnot(None)
+            ).limit(UTC_BACKFILL_BATCH)
+        )).scalars().all()
+        for item in missing:
+            item.scheduled_time_utc = schedule_time_to_utc(item.scheduled_time)
+        if missing:
+            await db.commit()
 
     @with_db_retries()
     async def check_due_items(self):
@@ -532,76 +723,63 @@ class Scheduler:
         except Exception as e:
             print(f"Error writing heartbeat: {e}")
 
-        db = SessionLocal()
+        # AsyncSession: the loop keeps serving API/WebSocket traffic during each round-trip
         try:
-            # [SYN-FIX] Standardize on America/Sao_Paulo (User Request)
-            sp_tz = ZoneInfo("America/Sao_Paulo")
-            now = datetime.now(sp_tz)
-            
-            # Fetching pending items to handle TZ normalization in Python for SQLite safety
-            pending_items = db.query(ScheduleItem).filter(
-                ScheduleItem.status == 'pending'
-            ).all()
+            async with async_session() as db:
+                # Timestamps are normalized to UTC on write (see schedule_time_to_utc),
+                # so the due check is a single range query on the (status, time) index.
+                now_utc = _utc_now_naive()
+                await self._backfill_missing_utc(db)
+
+                due_items = (await db.execute(
+                    select(ScheduleItem).where(
+                        ScheduleItem.status == 'pending',
+                        ScheduleItem.scheduled_time_utc <= now_utc
+                    ).order_by(ScheduleItem.scheduled_time_utc)
+                )).scalars().all()
+                for item in due_items:
+                    print(f"[SCHEDULER] Found Due Item {item.id}: {item.scheduled_time_utc} UTC <= {now_utc} UTC")
+
+                if due_items:
+                    logger.log("info", f"Found {len(due_items)} due items. Processing concurrently...", "scheduler")
             
-            due_items = []
-            for item in pending_items:
-                s_time = item.scheduled_time
-                if not s_time:
-                    continue
-                
-                # Normalize item time to SP
-                if s_time.tzinfo is None:
-                    # If naive, assume SP (Standardized)
-                    s_time = s_time.replace(tzinfo=sp_tz)
-                else:
-                    # Convert to SP
-                    s_time = s_time.astimezone(sp_tz)
+                    # [SYN-FIX] Concurrent Execution (asyncio.gather)
+                    # This fixes the bug where items were processed sequentially or loop was broken
+                    # [SYN-FIX] Semaphore-controlled concurrency
+                    # We iterate and acquire semaphore for each task, or just run them sequentially for safety.
+                    # Given the machine freeze, let's process SEQUENTIALLY for now or use the semaphore.
                 
-                if s_time <= now:
-                    due_items.append(item)
-                    print(f"[SCHEDULER] Found Due Item {item.id}: {s_time} <= {now}")
-
-            if due_items:
-                logger.log("info", f"Found {len(due_items)} due items. Processing concurrently...", "scheduler")
-            
-                # [SYN-FIX] Concurrent Execution (asyncio.gather)
-                # This fixes the bug where items were processed sequentially or loop was broken
-                # [SYN-FIX] Semaphore-controlled concurrency
-                # We iterate and acquire semaphore for each task, or just run them sequentially for safety.
-                # Given the machine freeze, let's process SEQUENTIALLY for now or use the semaphore.
-                
-                for item in due_items:
-                    async with self.semaphore:
-                        logger.log("info", f"Triggering item {item.id}", "scheduler")
-                        await self.execute_due_item(item, db)
-
-            # Since check_due_items runs every minute, we can do a quick check here.
-            # [SYN-FIX] Use SP Time for threshold to match DB storage (Naive = SP)
-            now_sp = datetime.now(ZoneInfo("America/Sao_Paulo")).replace(tzinfo=None)
-            zombie_threshold = now_sp - timedelta(hours=1)
-            print(f"[DEBUG] Zombie Check: NowSP={now_sp}, Threshold={zombie_threshold}")
-            zombies = db.query(ScheduleItem).filter(
-                ScheduleItem.status == 'processing',
-                ScheduleItem.scheduled_time < zombie_threshold
-            ).all()
-            if zombies:
-                 print(f"[DEBUG] Found Zombies: {[z.id for z in zombies]}")
+                    for item in due_items:
+                        async with self.semaphore:
+                            logger.log("info", f"Triggering item {item.id}", "scheduler")
+                            await self.execute_due_item(item, db)
+
+                # Zombie check rides on the same pass (indexed on status + UTC time).
+                zombie_threshold = now_utc - timedelta(hours=1)
+                zombies = (await db.execute(
+                    select(ScheduleItem).where(
+                        ScheduleItem.status == 'processing',
+                        ScheduleItem.scheduled_time_utc < zombie_threshold
+                    )
+                )).scalars().all()
+                if zombies:
+                     print(f"[DEBUG] Found Zombies: {[z.id for z in zombies]}")
             
-            for zombie in zombies:
-                logger.log("warning", f"Zombie detected: Item {zombie.id} stuck in processing. Marking as failed.", "scheduler")
-                zombie.status = 'failed'
-                zombie.error_message = "ZOMBIE HOST DETECTED: Pipeline stuck for >1h"
+                for zombie in zombies:
+                    logger.log("warning", f"Zombie detected: Item {zombie.id} stuck in processing. Marking as failed.", "scheduler")
+                    zombie.status = 'failed'
+                    zombie.error_message = "ZOMBIE HOST DETECTED: Pipeline stuck for >1h"
             
-            if zombies:
-                db.commit()
+                if zombies:
+                    await db.commit()
+
+                await self._refresh_due_heap(db, _utc_now_naive())
 
-            # Heartbeat (Sonar)
-            self._update_heartbeat()
+                # Heartbeat (Sonar)
+                self._update_heartbeat()
                 
         except Exception as e:
             print(f"Error checking due items: {e}")
-        finally:
-            db.close()
 
     def _update_heartbeat(self):
         """Updates the heartbeat file for Sonar monitoring."""
@@ -627,23 +805,21 @@ class Scheduler:
         Atomically tries to claim an item by setting status to new_status (default 'processing').
         Returns True if successful, False if race condition lost.
         """
-        db = SessionLocal()
-        try:
-            result = db.query(ScheduleItem).filter(
-                ScheduleItem.id == item_id,
-                ScheduleItem.status == 'pending'
-            ).update({"status": new_status}, synchronize_session=False)
-            db.commit()
-            return result > 0
-        finally:
-            db.close()
+        async with async_session() as db:
+            result = await db.execute(
+                update(ScheduleItem).where(
+                    ScheduleItem.id == item_id,
+                    ScheduleItem.status == 'pending'
+                ).values(status=new_status).execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            return result.rowcount > 0
 
     @with_db_retries()
     async def _finalize_scheduled_item(self, item_id: int, status: str, result: Dict):
         """Finalizes item status to COMPLETED or FAILED."""
-        db = SessionLocal()
-        try:
-            item = db.query(ScheduleItem).filter(ScheduleItem.id == item_id).first()
+        async with async_session() as db:
+            item = await db.get(ScheduleItem, item_id)
             if not item: return
 
             item.status = status
@@ -659,9 +835,7 @@ class Scheduler:
                  meta['error'] = result.get('message')
                  item.metadata_info = meta
 
-            db.commit()
-        finally:
-            db.close()
+            await db.commit()
 
     def update_video_path(self, old_path: str, new_path: str):
         """Updates the video path for scheduled items when moving from pending to approved."""
@@ -677,6 +851,9 @@ class Scheduler:
             
             db.commit()
             print(f"[SCHEDULER] Updated video path for {updated} items: {old_path} -> {new_path}")
+            if updated:
+                # Bulk update bypasses ORM events
+                self._emit_schedule_change(None)
         except Exception as e:
             db.rollback()
             print(f"[SCHEDULER] Error updating video path: {e}")
@@ -900,16 +1077,15 @@ class Scheduler:
                 check_date = (datetime.now(sp_tz) + timedelta(days=1)).date()
                 found_empty_day = None
 
+                # Ocupacao dos proximos 60 dias carregada uma vez (em vez de 1 COUNT por dia)
+                search_start = datetime(check_date.year, check_date.month, check_date.day)
+                occupied = SlotAllocator(db).index(item.profile_slug, search_start, search_start + timedelta(days=60))
+
                 for _ in range(60):  # Procurar no maximo 60 dias para frente
                     # Contar quantos agendamentos existem neste dia para este perfil
                     day_start = datetime(check_date.year, check_date.month, check_date.day, 0, 0, 0)
                     day_end = datetime(check_date.year, check_date.month, check_date.day, 23, 59, 59)
-                    count = db.query(ScheduleItem).filter(
-                        ScheduleItem.profile_slug == item.profile_slug,
-                        ScheduleItem.scheduled_time >= day_start,
-                        ScheduleItem.scheduled_time <= day_end,
-                        ScheduleItem.status.in_(["pending", "processing", "completed", "posted"])
-                    ).count()
+                    count = occupied.count_between(day_start, day_end)
 
                     if count == 0:
                         found_empty_day = check_date
@@ -952,11 +1128,10 @@ class Scheduler:
 
             db.commit()
             db.refresh(item)
+            self._notify_schedule_change(item.id, item.scheduled_time_utc)
             
             # [SYN-FIX] For "now" mode, trigger immediate execution in background
             if mode == "now":
-                import asyncio
-                import threading
                 item_id = item.id  # Capture ID before db closes
                 print(f"[RETRY] Triggering immediate execution for item {item_id}")
                 
@@ -984,22 +1159,23 @@ class Scheduler:
                         exec_db.close()
                 
                 # Robust Async Trigger
+                # The async engine's pooled connections belong to the scheduler loop,
+                # so the execution must run there, never on a throwaway loop.
+                loop = self._loop
                 try:
-                    # 1. Try to get the running loop (FastAPI main loop)
-                    loop = asyncio.get_running_loop()
-                    loop.create_task(execute_single_item(item_id))
-                    print(f"[RETRY] Task created in running loop.")
+                    running = asyncio.get_running_loop()
                 except RuntimeError:
-                    # 2. No running loop (e.g. called from synchronous context or thread), start a new one in a thread
-                    print(f"[RETRY] No running loop, spawning thread...")
-                    def run_execution():
-                        new_loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(new_loop)
-                        new_loop.run_until_complete(execute_single_item(item_id))
-                        new_loop.close()
-                        
-                    thread = threading.Thread(target=run_execution, daemon=True)
-                    thread.start()
+                    running = None
+                if running is not None and (loop is None or running is loop):
+                    running.create_task(execute_single_item(item_id))
+                    print(f"[RETRY] Task created in running loop.")
+                elif loop is not None and not loop.is_closed():
+                    # Sync endpoint (threadpool): hand the coroutine to the scheduler loop
+                    asyncio.run_coroutine_threadsafe(execute_single_item(item_id), loop)
+                    print(f"[RETRY] Task scheduled on the scheduler loop.")
+                else:
+                    # Scheduler runs in another process: the item is pending and due now
+                    print(f"[RETRY] Scheduler loop not in this process; item {item_id} runs on its next check.")
             
             return {
                 "success": True,
@@ -0,0 +1,155 @@
+"""
+Slot Allocator - Alocacao de horarios em memoria
+================================================
+
+Antes, cada verificacao de slot abria uma sessao e rodava um COUNT
+(find_next_available_slot: ate 672 queries; calculate_next_slots: 2 por dia
+por ate 90 dias). Aqui os horarios ocupados de um perfil (tabela `schedule`
++ `video_queue` agendada) sao carregados UMA vez por request em uma lista
+ordenada, e as perguntas "o slot esta livre?" / "proximos N livres" viram
+buscas binarias em memoria.
+
+Slots alocados durante o request sao reservados no indice, entao itens de
+um mesmo lote (aprovacao de varios videos / varios perfis) nunca colidem,
+mesmo antes do commit.
+
+Horarios sao comparados como wall time naive (como estao gravados no banco).
+"""
+
+import bisect
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.models import ScheduleItem, VideoQueue
+
+# Status de ScheduleItem que ocupam um horario no calendario
+OCCUPYING_STATUSES = ("pending", "processing", "completed", "posted")
+
+
+def _naive(value: datetime) -> datetime:
+    return value.replace(tzinfo=None)
+
+
+class OccupancyIndex:
+    """Horarios ocupados de um perfil, ordenados (bisect)."""
+
+    def __init__(self, times: Iterable[datetime] = ()):
+        self._times: List[datetime] = sorted(_naive(t) for t in times if t is not None)
+
+    def add(self, value: datetime) -> None:
+        bisect.insort(self._times, _naive(value))
+
+    def count_between(self, start: datetime, end: datetime) -> int:
+        """Quantos horarios em [start, end]."""
+        return bisect.bisect_right(self._times, _naive(end)) - bisect.bisect_left(self._times, _naive(start))
+
+    def is_free(self, value: datetime, buffer_minutes: int = 15) -> bool:
+        """Nenhum horario no intervalo aberto (value - buffer, value + buffer)."""
+        buffer = timedelta(minutes=buffer_minutes)
+        lo = bisect.bisect_right(self._times, _naive(value - buffer))
+        hi = bisect.bisect_left(self._times, _naive(value + buffer))
+        return hi <= lo
+
+    def hour_taken(self, value: datetime) -> bool:
+        """Algum horario na mesma hora cheia de `value`."""
+        hour_start = _naive(value).replace(minute=0, second=0, microsecond=0)
+        lo = bisect.bisect_left(self._times, hour_start)
+        return lo < len(self._times) and self._times[lo] < hour_start + timedelta(hours=1)
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+
+class SlotAllocator:
+    """
+    Indices de ocupacao por perfil, carregados sob demanda e reaproveitados
+    durante um request. Um intervalo fora do que ja foi carregado faz uma
+    nova carga cobrindo a uniao (2 queries), nunca uma por slot.
+
+    schedule_statuses=None considera ScheduleItems em qualquer status.
+    """
+
+    def __init__(self, db, schedule_statuses: Optional[Sequence[str]] = OCCUPYING_STATUSES):
+        self.db = db
+        self.schedule_statuses = tuple(schedule_statuses) if schedule_statuses else None
+        self._indexes: Dict[str, OccupancyIndex] = {}
+        self._ranges: Dict[str, Tuple[datetime, datetime]] = {}
+        self._reserved: Dict[str, List[datetime]] = {}
+
+    def preload(self, profile_slugs: Sequence[str], start: datetime, end: datetime) -> None:
+        """Carrega varios perfis de uma vez (aprovacoes multi-perfil)."""
+        missing = [
+            slug for slug in dict.fromkeys(profile_slugs)
+            if not self._covers(slug, _naive(start), _naive(end))
+        ]
+        if missing:
+            self._load(missing, _naive(start), _naive(end))
+
+    def index(self, profile_slug: str, start: datetime, end: datetime) -> OccupancyIndex:
+        start, end = _naive(start), _naive(end)
+        if not self._covers(profile_slug, start, end):
+            loaded = self._ranges.get(profile_slug)
+            if loaded:
+                start, end = min(start, loaded[0]), max(end, loaded[1])
+            self._load([profile_slug], start, end)
+        return self._indexes[profile_slug]
+
+    def reserve(self, profile_slug: str, value: datetime) -> None:
+        self._reserved.setdefault(profile_slug, []).append(_naive(value))
+        if profile_slug in self._indexes:
+            self._indexes[profile_slug].add(value)
+
+    def _covers(self, profile_slug: str, start: datetime, end: datetime) -> bool:
+        loaded = self._ranges.get(profile_slug)
+        return bool(loaded) and loaded[0] <= start and end <= loaded[1]
+
+    def _load(self, profile_slugs: List[str], start: datetime, end: datetime) -> None:
+        times: Dict[str, List[datetime]] = {slug: [] for slug in profile_slugs}
+
+        query = self.db.query(ScheduleItem.profile_slug, ScheduleItem.scheduled_time).filter(
+            ScheduleItem.profile_slug.in_(profile_slugs),
+            ScheduleItem.scheduled_time >= start,
+            ScheduleItem.scheduled_time <= end,
+        )
+        if self.schedule_statuses:
+            query = query.filter(ScheduleItem.status.in_(self.schedule_statuses))
+        for slug, value in query.all():
+            times[slug].append(value)
+
+        queued = self.db.query(VideoQueue.profile_slug, VideoQueue.scheduled_at).filter(
+            VideoQueue.profile_slug.in_(profile_slugs),
+            VideoQueue.status == "scheduled",
+            VideoQueue.scheduled_at >= start,
+            VideoQueue.scheduled_at <= end,
+        )
+        for slug, value in queued.all():
+            times[slug].append(value)
+
+        for slug in profile_slugs:
+            self._indexes[slug] = OccupancyIndex(times[slug] + self._reserved.get(slug, []))
+            self._ranges[slug] = (start, end)
+
+    def next_free_slot(
+        self,
+        profile_slug: str,
+        start_time: datetime,
+        buffer_minutes: int = 15,
+        step_minutes: int = 15,
+        max_attempts: int = 672,
+    ) -> Optional[datetime]:
+        """
+        Primeiro horario a partir de start_time (em passos de step_minutes)
+        sem nenhum agendamento a menos de buffer_minutes. Reserva o slot.
+        Retorna None se nada livre em max_attempts passos.
+        """
+        step = timedelta(minutes=step_minutes)
+        buffer = timedelta(minutes=buffer_minutes)
+        idx = self.index(profile_slug, start_time - buffer, start_time + step * max_attempts + buffer)
+
+        current = start_time
+        for _ in range(max_attempts):
+            if idx.is_free(current, buffer_minutes):
+                self.reserve(profile_slug, current)
+                return current
+            current += step
+        return None
@@ -20,6 +20,7 @@ from enum import Enum
 
 # Importar scheduler existente
 from core.scheduler import scheduler_service
+from core.schedule_index import schedule_index
 
 
 class ValidationSeverity(Enum):
@@ -104,6 +105,9 @@ class SmartLogic:
     
     def __init__(self):
         self.scheduler = scheduler_service
+        # Calendario por perfil em memoria (bisect), invalidado pelos eventos do Scheduler
+        self.index = schedule_index
+        self.scheduler.on_schedule_change(self.index.invalidate)
     
     def get_rules(self) -> Dict[str, Any]:
         """Retorna as regras de negócio configuradas"""
@@ -137,54 +141,19 @@ class SmartLogic:
                     return True, "🌅 Horário da manhã"
         return False, ""
     
-    def _get_posts_count_for_day(self, profile_id: str, target_date: datetime) -> int:
+    def _get_posts_count_for_day(
+        self, profile_id: str, target_date: datetime, exclude_event_id: Optional[str] = None
+    ) -> int:
         """Conta quantos posts um perfil tem agendados para um dia"""
-        events = self.scheduler.load_schedule()
-        count = 0
-        
         target_day_start = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
         target_day_end = target_day_start + timedelta(days=1)
-        
-        for event in events:
-            if event.get('profile_id') != profile_id:
-                continue
-            if event.get('status') in ['completed', 'failed', 'cancelled']:
-                continue
-                
-            try:
-                event_time = datetime.fromisoformat(event['scheduled_time'])
-                if target_day_start <= event_time < target_day_end:
-                    count += 1
-            except (KeyError, ValueError):
-                continue
-                
-        return count
+        return self.index.count_between(profile_id, target_day_start, target_day_end, exclude_id=exclude_event_id)
     
-    def _get_nearest_event(self, profile_id: str, target_time: datetime) -> Optional[Tuple[datetime, float]]:
+    def _get_nearest_event(
+        self, profile_id: str, target_time: datetime, exclude_event_id: Optional[str] = None
+    ) -> Optional[Tuple[datetime, float]]:
         """Encontra o evento mais próximo do horário alvo e retorna a distância em horas"""
-        events = self.scheduler.load_schedule()
-        nearest = None
-        min_distance = float('inf')
-        
-        for event in events:
-            if event.get('profile_id') != profile_id:
-                continue
-            if event.get('status') in ['completed', 'failed', 'cancelled']:
-                continue
-                
-            try:
-                event_time = datetime.fromisoformat(event['scheduled_time'])
-                distance = abs((event_time - target_time).total_seconds() / 3600)
-                
-                if distance < min_distance:
-                    min_distance = distance
-                    nearest = event_time
-            except (KeyError, ValueError):
-                continue
-        
-        if nearest:
-            return nearest, min_distance
-        return None
+        return self.index.nearest(profile_id, target_time, exclude_id=exclude_event_id)
     
     def check_conflict(
         self, 
@@ -216,7 +185,7 @@ class SmartLogic:
             ))
         
         # 2. Verificar máximo de posts por dia
-        posts_today = self._get_posts_count_for_day(profile_id, proposed_time)
+        posts_today = self._get_posts_count_for_day(profile_id, proposed_time, exclude_event_id)
         if posts_today >= self.MAX_POSTS_PER_DAY:
             issues.append(ValidationIssue(
                 severity=ValidationSeverity.ERROR,
@@ -233,7 +202,7 @@ class SmartLogic:
             ))
         
         # 3. Verificar intervalo mínimo
-        nearest = self._get_nearest_event(profile_id, proposed_time)
+        nearest = self._get_nearest_event(profile_id, proposed_time, exclude_event_id)
         if nearest:
             nearest_time, distance_hours = nearest
             if distance_hours < self.MIN_INTERVAL_HOURS:
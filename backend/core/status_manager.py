@@ -1,6 +1,8 @@
 import os
 import json
 import time
+import atexit
+import threading
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import psutil
@@ -11,9 +13,12 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
 STATUS_FILE = os.path.join(DATA_DIR, "status.json")
 
+STATUS_PERSIST_INTERVAL = float(os.getenv("STATUS_PERSIST_INTERVAL_SECONDS", "2"))
+SYSTEM_STATS_INTERVAL = float(os.getenv("SYSTEM_STATS_INTERVAL_SECONDS", "5"))
+
 class StatusManager:
-    def __init__(self):
-        self.file_path = STATUS_FILE
+    def __init__(self, file_path: str = STATUS_FILE):
+        self.file_path = file_path
         self._ensure_dir()
         self.async_callback = None
         self.bots_status = {
@@ -53,24 +58,125 @@ class StatusManager:
             "factory": time.time(),
             "monitor": time.time()
         }
-        from threading import Lock
-        self._lock = Lock()
+        self._last_sent_bots: Optional[List[Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        # Authoritative status lives in memory; status.json is only a snapshot
+        snapshot = self._load_snapshot() or {}
+        snapshot.pop("bots", None)
+        self._status: Dict[str, Any] = snapshot or {
+            "state": "idle",
+            "last_updated": datetime.now().isoformat(),
+            "timestamp": time.time(),
+            "job": {"name": None, "progress": 0, "step": "Ready", "logs": []},
+        }
+        self._version = 0
+        self._dirty = False
+        self._persist_timer: Optional[threading.Timer] = None
+        self._persisted_mtime = self._file_mtime()
+        self._system_stats: Dict[str, Any] = {}
+        self._stats_sampled_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        atexit.register(self.flush)
 
     def set_async_callback(self, callback):
         self.async_callback = callback
+        try:
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
 
     def _ensure_dir(self):
         os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
 
-    def _get_system_stats(self):
+    # ------------------------------------------------------------------
+    # System stats (sampled in background)
+    # ------------------------------------------------------------------
+
+    def _sample_system_stats(self) -> Dict[str, Any]:
         try:
-            return {
-                "cpu_percent": psutil.cpu_percent(interval=0.1),
+            # interval=None: CPU since the previous sample, non-blocking
+            self._system_stats = {
+                "cpu_percent": psutil.cpu_percent(interval=None),
                 "ram_percent": psutil.virtual_memory().percent,
                 "disk_usage": psutil.disk_usage(BASE_DIR).percent
             }
-        except:
-            return {}
+        except Exception:
+            self._system_stats = {}
+        self._stats_sampled_at = time.monotonic()
+        return self._system_stats
+
+    def _get_system_stats(self):
+        """Last sample; samples inline only if the sampler is not running."""
+        if time.monotonic() - self._stats_sampled_at > SYSTEM_STATS_INTERVAL * 2:
+            return dict(self._sample_system_stats())
+        return dict(self._system_stats)
+
+    async def run_stats_sampler(self, interval: float = None):
+        """Background task: refreshes system stats every `interval` seconds."""
+        interval = interval or SYSTEM_STATS_INTERVAL
+        while True:
+            self._sample_system_stats()
+            await asyncio.sleep(interval)
+
+    # ------------------------------------------------------------------
+    # Persistence (coalesced, atomic)
+    # ------------------------------------------------------------------
+
+    def _file_mtime(self) -> float:
+        try:
+            return os.path.getmtime(self.file_path)
+        except OSError:
+            return 0.0
+
+    def _load_snapshot(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else None
+        except Exception:
+            return None
+
+    def _schedule_persist(self):
+        """Called with the lock held. At most one write per PERSIST_INTERVAL."""
+        self._dirty = True
+        if self._persist_timer is None:
+            self._persist_timer = threading.Timer(STATUS_PERSIST_INTERVAL, self.flush)
+            self._persist_timer.daemon = True
+            self._persist_timer.start()
+
+    def flush(self):
+        """Writes the in-memory status to status.json (tmp + os.replace)."""
+        with self._lock:
+            self._persist_timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = dict(self._status)
+            data["bots"] = list(self.bots_status.values())
+            payload = json.dumps(data, ensure_ascii=False)
+        tmp_path = f"{self.file_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, self.file_path)
+            self._persisted_mtime = self._file_mtime()
+        except Exception as e:
+            print(f"Failed to write status: {e}")
+
+    def _refresh_from_file(self):
+        """Picks up status.json written by another process (scheduler container)."""
+        mtime = self._file_mtime()
+        if mtime <= self._persisted_mtime:
+            return
+        snapshot = self._load_snapshot()
+        with self._lock:
+            self._persisted_mtime = mtime
+            if snapshot and snapshot.get("timestamp", 0) > self._status.get("timestamp", 0):
+                self._status = {k: v for k, v in snapshot.items() if k != "bots"}
+
+    # ------------------------------------------------------------------
+    # Status
+    # ------------------------------------------------------------------
 
     def _update_uptimes(self):
         now = time.time()
@@ -95,83 +201,68 @@ class StatusManager:
                       step: Optional[str] = None,
                       logs: Optional[List[str]] = None):
         """
-        Updates the global system status.
+        Updates the global system status (in memory) and pushes it to
+        WebSocket subscribers when state, job or bots changed. Clients
+        replace their whole status with each payload, so it is always a
+        full snapshot. Disk persistence is coalesced.
         """
         self._update_uptimes()
 
-        # [SYN-FIX] Preserve logs if not provided
-        current_logs = []
-        if logs is None:
-            # Try to read existing logs from file to preserve them
-            try:
-                if os.path.exists(self.file_path):
-                    with open(self.file_path, 'r', encoding='utf-8') as f:
-                        old_data = json.load(f)
-                        current_logs = old_data.get("job", {}).get("logs", [])
-            except:
-                pass
-        else:
-            current_logs = logs
-
-        data = {
-            "state": state,
-            "last_updated": datetime.now().isoformat(),
-            "timestamp": time.time(),
-            "job": {
+        with self._lock:
+            previous = self._status
+            # [SYN-FIX] Preserve logs if not provided
+            current_logs = list(logs) if logs is not None else previous.get("job", {}).get("logs", [])
+            job = {
                 "name": current_task or "None",
                 "progress": progress,
                 "step": step or "Waiting...",
                 "logs": current_logs
-            },
-            "bots": list(self.bots_status.values())
-        }
-        
+            }
+            self._status = {
+                "state": state,
+                "last_updated": datetime.now().isoformat(),
+                "timestamp": time.time(),
+                "job": job,
+            }
+            bots = [dict(b) for b in self.bots_status.values()]
+            changed = (
+                previous.get("state") != state
+                or previous.get("job") != job
+                or self._last_sent_bots != bots
+            )
+            self._last_sent_bots = bots
+            self._version += 1
+            payload = dict(self._status)
+            payload["version"] = self._version
+            payload["bots"] = bots
+            self._schedule_persist()
+
+        if self.async_callback and changed:
+            payload["system"] = self._get_system_stats()
+            self._dispatch(payload)
+
+    def _dispatch(self, payload: Dict[str, Any]):
+        loop = self._loop
         try:
-            with self._lock:
-                with open(self.file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2)
+            if loop is None or loop.is_closed():
+                loop = asyncio.get_running_loop()
+            asyncio.run_coroutine_threadsafe(self.async_callback(payload), loop)
+        except RuntimeError:
+            pass  # No event loop (scripts/threads): persist only
         except Exception as e:
-            print(f"Failed to write status: {e}")
-
-        if self.async_callback:
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    data_to_send = {
-                        "state": state,
-                        "job": data["job"],
-                        "system": self._get_system_stats(),
-                        "bots": data["bots"]
-                    }
-                    asyncio.run_coroutine_threadsafe(self.async_callback(data_to_send), loop)
-            except Exception as e:
-                print(f"WS Broadcast Error: {e}")
+            print(f"WS Broadcast Error: {e}")
 
     def get_status(self) -> Dict[str, Any]:
-        """Reads the current status and appends REAL system stats."""
-        # Base status from file
-        status = {}
-        if not os.path.exists(self.file_path):
-            self._update_uptimes()
-            status = {
-                "state": "idle",
-                "last_updated": datetime.now().isoformat(),
-                "job": {"name": None, "progress": 0, "step": "Ready", "logs": []},
-                "bots": list(self.bots_status.values())
-            }
-        else:
-            try:
-                with open(self.file_path, 'r', encoding='utf-8') as f:
-                    status = json.load(f)
-            except:
-                status = {"state": "unknown", "job": {}, "bots": []}
-
-        # Append Real Hardware Stats (On-the-fly)
+        """Current status from memory plus the latest system stats sample."""
+        self._refresh_from_file()
+        with self._lock:
+            status = dict(self._status)
+            status["version"] = self._version
+
         status["system"] = self._get_system_stats()
-        # Merge latest memory bot stats if file is stale
         self._update_uptimes()
         status["bots"] = list(self.bots_status.values())
-            
+
         return status
 
     def set_idle(self):
@@ -123,24 +123,21 @@ class ViralScraper:
         sounds = []
         
         try:
-            from core.browser import launch_browser, close_browser
+            from core.browser_pool import get_browser_pool
 
-            p, browser, context, page = await launch_browser(
-                headless=True,
-                viewport={"width": 1920, "height": 1080},
-            )
-            
-            # Construir URL com filtros
-            url = self._build_url(region, category)
-            logger.info(f"Navegando para: {url}")
-            
-            await page.goto(url, wait_until="networkidle", timeout=30000)
-            await page.wait_for_timeout(3000)  # Esperar carregamento JS
-            
-            # Extrair dados dos cards de musica
-            sounds = await self._extract_sounds(page, region, category, limit)
-            
-            await close_browser(p, browser)
+            # Contexto isolado num Chromium ja aquecido do pool
+            async with get_browser_pool().lease(viewport={"width": 1920, "height": 1080}) as lease:
+                page = lease.page
+
+                # Construir URL com filtros
+                url = self._build_url(region, category)
+                logger.info(f"Navegando para: {url}")
+
+                await page.goto(url, wait_until="networkidle", timeout=30000)
+                await page.wait_for_timeout(3000)  # Esperar carregamento JS
+
+                # Extrair dados dos cards de musica
+                sounds = await self._extract_sounds(page, region, category, limit)
                 
         except Exception as e:
             logger.error(f"❌ Erro no scrape: {e}")
@@ -26,6 +26,13 @@ logging.basicConfig(level=logging.INFO)
 
 async def startup(ctx):
     logger.info("🚀 Worker Process Starting...")
+    # schedule.scheduled_time_utc may not exist yet if the scheduler container hasn't started
+    try:
+        from core.database import engine
+        from core.scheduler import migrate_schedule_utc
+        migrate_schedule_utc(engine)
+    except Exception as e:
+        logger.error(f"Failed to migrate schedule.scheduled_time_utc: {e}")
     # Initialize DB connection test or anything else
     await check_consistency()
 
@@ -0,0 +1,36 @@
+"""
+Migração: Adiciona clip_jobs.transcript_text e preenche a partir do whisper_result
+==================================================================================
+
+Uso:
+    cd backend/
+    python scripts/maintenance/migrate_clip_job_transcript.py
+
+A listagem de curadoria (GET /factory/pending) lê o texto pronto em vez de
+carregar o whisper_result word-level de cada job. A API e o worker do Clipper
+já rodam esta migração no startup; o script permite aplicá-la antes do deploy.
+Idempotente: pode rodar mais de uma vez.
+"""
+
+import os
+import sys
+
+# Adiciona backend/ ao sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.database import engine
+from core.clipper.models import migrate_clip_job_transcript
+
+
+def migrate():
+    print("=" * 60)
+    print("ClipJob transcript_text: Migrando banco de dados")
+    print(f"Engine: {engine.url}")
+    print("=" * 60)
+
+    total = migrate_clip_job_transcript(engine)
+    print(f"\n✅ Migração concluída! {total} job(s) com transcript_text preenchido.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,54 @@
+"""
+Migração: Cria e popula a tabela clip_urls (indice de dedup do monitor)
+========================================================================
+
+Uso:
+    cd backend/
+    python scripts/maintenance/migrate_clip_url_index.py
+
+Cria APENAS as tabelas que ainda não existem e faz o backfill do indice
+a partir dos ClipJobs existentes. Idempotente: pode rodar mais de uma vez.
+Depois disso, os listeners de ClipJob mantêm o indice atualizado.
+"""
+
+import os
+import sys
+
+# Adiciona backend/ ao sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.database import engine, Base, safe_session
+
+# Importa TODOS os modelos para que o Base.metadata conheça as tabelas
+from core.clipper.models import TwitchTarget, ClipJob, ClipURL  # noqa: F401
+from core.clipper.clip_index import backfill_clip_url_index
+
+
+def migrate():
+    print("=" * 60)
+    print("Clip URL Index: Migrando banco de dados")
+    print(f"Engine: {engine.url}")
+    print("=" * 60)
+
+    from sqlalchemy import inspect
+
+    target_table = "clip_urls"
+    print("\n[1/2] Verificando tabela...")
+    if target_table not in inspect(engine).get_table_names():
+        print(f"  Criando tabela '{target_table}'...")
+        Base.metadata.create_all(bind=engine)
+        if target_table not in inspect(engine).get_table_names():
+            print(f"\n❌ ERRO: Tabela '{target_table}' não foi criada. Verifique os logs.")
+            sys.exit(1)
+    else:
+        print(f"  Tabela '{target_table}' já existe.")
+
+    print("\n[2/2] Backfill a partir dos jobs existentes...")
+    with safe_session() as db:
+        total = backfill_clip_url_index(db)
+
+    print(f"\n✅ Migração concluída! {total} URL(s) indexadas.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,35 @@
+"""
+Migração: Adiciona schedule.scheduled_time_utc + indice (status, scheduled_time_utc)
+====================================================================================
+
+Uso:
+    cd backend/
+    python scripts/maintenance/migrate_schedule_utc.py
+
+O Scheduler consulta itens vencidos direto pelo indice em UTC. O loop do
+scheduler ja roda esta migração no startup; o script permite aplicá-la antes
+do deploy. Idempotente: pode rodar mais de uma vez.
+"""
+
+import os
+import sys
+
+# Adiciona backend/ ao sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.database import engine
+from core.scheduler import migrate_schedule_utc
+
+
+def migrate():
+    print("=" * 60)
+    print("Schedule UTC: Migrando banco de dados")
+    print(f"Engine: {engine.url}")
+    print("=" * 60)
+
+    total = migrate_schedule_utc(engine)
+    print(f"\n✅ Migração concluída! {total} item(ns) com scheduled_time_utc preenchido.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,85 @@
+"""
+Testes unitarios para as sessoes async (core/database.py async_session)
+=======================================================================
+
+Valida (SQLite temporario via aiosqlite):
+    - async_session faz commit no sucesso e rollback no erro
+    - Helpers do Clipper Worker (_resume_stage, _fail_job_db) sem sessao sync
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core import database
+from core.clipper import worker
+from core.clipper.models import ClipJob, ClipURL, TwitchTarget
+from core.database import Base
+
+
+@pytest.fixture
+def sync_db(tmp_path, monkeypatch):
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine, tables=[TwitchTarget.__table__, ClipJob.__table__, ClipURL.__table__])
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    monkeypatch.setattr(
+        database, "AsyncSessionLocal",
+        async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False),
+    )
+    session = sessionmaker(bind=engine)()
+    session.add(TwitchTarget(id=1, channel_url="https://twitch.tv/x", channel_name="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+def _job(db, **fields):
+    job = ClipJob(target_id=1, **fields)
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+class TestAsyncSession:
+    def test_commit_and_rollback(self, sync_db):
+        job_id = _job(sync_db, status="pending")
+
+        async def run():
+            async with database.async_session() as db:
+                (await db.get(ClipJob, job_id)).status = "downloading"
+            with pytest.raises(ValueError):
+                async with database.async_session() as db:
+                    (await db.get(ClipJob, job_id)).status = "failed"
+                    raise ValueError("boom")
+
+        asyncio.run(run())
+        sync_db.expire_all()
+        assert sync_db.get(ClipJob, job_id).status == "downloading"
+
+
+class TestWorkerHelpers:
+    def test_resume_stage_and_fail(self, sync_db, tmp_path):
+        clip = tmp_path / "c.mp4"
+        clip.write_bytes(b"x")
+        editing = _job(sync_db, status="editing", clip_local_paths=[str(clip)], whisper_result=[{"text": "oi"}])
+        missing = _job(sync_db, status="transcribing", clip_local_paths=[str(tmp_path / "nada.mp4")])
+
+        assert asyncio.run(worker._resume_stage(editing)) == "render"
+        assert asyncio.run(worker._resume_stage(missing)) == "download"
+        assert asyncio.run(worker._resume_stage(9999)) == "download"
+
+        asyncio.run(worker._fail_job_db(editing, "x" * 600, "Falha no teste."))
+        sync_db.expire_all()
+        job = sync_db.get(ClipJob, editing)
+        assert job.status == "failed" and len(job.error_message) == 500
@@ -0,0 +1,179 @@
+"""
+Testes unitarios para o pool de navegadores headless (core/browser_pool.py)
+===========================================================================
+
+Valida (navegadores falsos via launcher injetavel, sem Playwright):
+    - Leases limitados por navegadores x contextos; excedente espera/timeout
+    - Navegador reciclado apos max_uses leases
+    - Navegador que caiu (disconnected) e substituido
+    - Lease expirado fecha o contexto e devolve o slot
+    - start() aquece o pool; navegadores ociosos sao despejados
+    - Metricas de stats()
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.browser_pool import BrowserPool, BrowserPoolTimeout
+
+
+class FakeContext:
+    def __init__(self, options):
+        self.options = options
+        self.closed = False
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+        self.contexts = []
+        self._handlers = []
+
+    def on(self, event, handler):
+        if event == "disconnected":
+            self._handlers.append(handler)
+
+    def is_connected(self):
+        return self.connected and not self.closed
+
+    def crash(self):
+        self.connected = False
+        for handler in self._handlers:
+            handler(self)
+
+    async def new_context(self, **options):
+        context = FakeContext(options)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    async def stop(self):
+        pass
+
+
+def _pool(**kwargs):
+    launched = []
+
+    async def launcher():
+        browser = FakeBrowser()
+        launched.append(browser)
+        return FakePlaywright(), browser
+
+    async def stealth(context, page, seed):
+        pass
+
+    kwargs.setdefault("size", 2)
+    kwargs.setdefault("contexts_per_browser", 1)
+    return BrowserPool(launcher=launcher, stealth=stealth, **kwargs), launched
+
+
+class TestBrowserPool:
+    def test_reuses_warm_browsers_and_bounds_leases(self):
+        async def run():
+            pool, launched = _pool(acquire_timeout=0.05)
+            await pool.warm_up()
+            assert len(launched) == 2
+
+            first = await pool.acquire(user_agent="UA-1")
+            second = await pool.acquire(viewport={"width": 800, "height": 600})
+            assert first.pooled is not second.pooled
+            assert first.context.options["user_agent"] == "UA-1"
+            assert second.context.options["viewport"] == {"width": 800, "height": 600}
+            assert pool.stats()["in_use"] == 2
+
+            with pytest.raises(BrowserPoolTimeout):
+                await pool.acquire()
+
+            await first.release()
+            await first.release()  # Idempotente
+            assert first.context.closed
+            async with pool.lease() as third:
+                assert third.pooled is first.pooled
+            await second.release()
+
+            stats = pool.stats()
+            assert len(launched) == 2
+            assert (stats["leases"], stats["launches"], stats["in_use"], stats["acquire_timeouts"]) == (3, 2, 0, 1)
+            await pool.close()
+            assert all(b.closed for b in launched)
+
+        asyncio.run(run())
+
+    def test_recycles_after_max_uses(self):
+        async def run():
+            pool, launched = _pool(size=1, max_uses=2)
+            for _ in range(3):
+                lease = await pool.acquire()
+                await lease.release()
+            assert len(launched) == 2 and launched[0].closed and not launched[1].closed
+            stats = pool.stats()
+            assert stats["recycles"] == 1 and stats["browsers"][0]["uses"] == 1
+            await pool.close()
+
+        asyncio.run(run())
+
+    def test_replaces_crashed_browser(self):
+        async def run():
+            pool, launched = _pool(size=1)
+            lease = await pool.acquire()
+            launched[0].crash()
+            await lease.release()
+            assert launched[0].closed and pool.stats()["crashes"] == 1
+
+            lease = await pool.acquire()
+            assert lease.pooled.browser is launched[1]
+            await lease.release()
+            await pool.close()
+
+        asyncio.run(run())
+
+    def test_expired_lease_returns_slot(self):
+        async def run():
+            pool, launched = _pool(size=1, lease_timeout=0.05, acquire_timeout=1)
+            stuck = await pool.acquire()
+            waiter = await pool.acquire()  # So anda depois que o lease preso expira
+            assert stuck.expired and stuck.context.closed
+            assert pool.stats()["expired_leases"] == 1
+            await waiter.release()
+            await stuck.release()
+            assert pool.stats()["in_use"] == 0
+            await pool.close()
+
+        asyncio.run(run())
+
+    def test_start_warms_and_evicts_idle(self):
+        async def run():
+            pool, launched = _pool(size=2, idle_timeout=0.05, min_warm=1)
+            await pool.start()
+            assert len(launched) == 2 and pool.stats()["launches"] == 2
+
+            lease = await pool.acquire()
+            await asyncio.sleep(0.06)
+            assert await pool.evict_idle() == 1  # O outro esta em uso
+            await lease.release()
+            await asyncio.sleep(0.06)
+            assert await pool.evict_idle() == 0  # min_warm mantem um aquecido
+            stats = pool.stats()
+            assert len(stats["browsers"]) == 1 and stats["idle_evictions"] == 1
+            assert stats["browsers"][0]["id"] == lease.pooled.id
+
+            await pool.close()
+            assert pool._evictor is None and all(b.closed for b in launched)
+
+        asyncio.run(run())
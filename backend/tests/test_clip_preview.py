@@ -0,0 +1,117 @@
+"""
+Testes unitarios para os previews da curadoria (core/clipper/preview.py)
+========================================================================
+
+Valida (diretorios temporarios / SQLite em memoria):
+    - Grade do sprite e indice WebVTT (#xywh)
+    - GET /factory/preview/{id}/{arquivo}: tipos, 304 via ETag, whitelist
+    - Garbage collector remove previews de itens fora da curadoria
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.api.endpoints import factory
+from core.clipper import garbage_collector, preview
+from core.database import Base
+from core.models import PendingApproval
+
+
+@pytest.fixture
+def previews_dir(tmp_path, monkeypatch):
+    d = str(tmp_path / "previews")
+    monkeypatch.setattr(preview, "PREVIEWS_DIR", d)
+    monkeypatch.setattr(garbage_collector, "PREVIEWS_DIR", d)
+    return d
+
+
+def _write_previews(approval_id):
+    out = preview.preview_dir(approval_id)
+    os.makedirs(out)
+    for name in preview.PREVIEW_FILES:
+        with open(os.path.join(out, name), "wb") as f:
+            f.write(name.encode() * 10)
+    os.utime(out, (1, 1))
+    return out
+
+
+class TestSpriteIndex:
+    def test_layout_caps_thumbnails(self):
+        layout = preview.sprite_layout(61.0, 1080, 1920)
+        assert (layout["interval"], layout["count"], layout["columns"], layout["rows"]) == (1, 61, 10, 7)
+        assert (layout["tile_w"], layout["tile_h"]) == (120, 214)
+
+        long = preview.sprite_layout(250.0, 1080, 1920)
+        assert long["interval"] == 3 and long["count"] == 84
+
+    def test_vtt_cues_point_into_grid(self):
+        layout = preview.sprite_layout(12.5, 1080, 1920)
+        vtt = preview.build_sprite_vtt(layout, 12.5)
+        lines = vtt.splitlines()
+        assert lines[0] == "WEBVTT"
+        assert "00:00:00.000 --> 00:00:01.000" in lines
+        assert "sprite.jpg#xywh=0,0,120,214" in lines
+        assert "sprite.jpg#xywh=120,214,120,214" in lines  # 12o quadro: coluna 1, linha 1
+        assert lines[-2:] == ["00:00:12.000 --> 00:00:12.500", "sprite.jpg#xywh=240,214,120,214"]
+
+
+class TestPreviewEndpoint:
+    def test_serves_whitelisted_files(self, previews_dir):
+        _write_previews(7)
+        app = FastAPI()
+        app.include_router(factory.router, prefix="/factory")
+        client = TestClient(app)
+
+        poster = client.get("/factory/preview/7/poster.jpg")
+        assert poster.status_code == 200 and poster.headers["content-type"] == "image/jpeg"
+        assert client.get("/factory/preview/7/poster.jpg", headers={"If-None-Match": poster.headers["etag"]}).status_code == 304
+        assert client.get("/factory/preview/7/sprite.vtt").headers["content-type"].startswith("text/vtt")
+
+        video = client.get("/factory/preview/7/preview.mp4", headers={"Range": "bytes=0-3"})
+        assert video.status_code == 206 and video.content == b"prev"
+
+        assert client.get("/factory/preview/7/outro.txt").status_code == 404
+        assert client.get("/factory/preview/8/poster.jpg").status_code == 404
+
+
+class TestPreviewGarbageCollection:
+    def test_removes_previews_outside_curation(self, previews_dir, monkeypatch):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine, tables=[PendingApproval.__table__])
+        factory_session = sessionmaker(bind=engine)
+
+        @contextmanager
+        def _session():
+            session = factory_session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        monkeypatch.setattr(garbage_collector, "safe_session", _session)
+        with _session() as db:
+            for item_id, status in ((1, "pending"), (2, "approved")):
+                db.add(PendingApproval(
+                    id=item_id, video_path=f"/x/{item_id}.mp4", status=status,
+                    thumbnail_path=os.path.join(preview.preview_dir(item_id), "poster.jpg"),
+                ))
+            db.commit()
+        keep, approved, deleted = _write_previews(1), _write_previews(2), _write_previews(3)
+
+        assert garbage_collector._clean_previews() > 0
+        assert os.path.isdir(keep)
+        assert not os.path.exists(approved) and not os.path.exists(deleted)
+        with _session() as db:
+            assert db.get(PendingApproval, 1).thumbnail_path
+            assert db.get(PendingApproval, 2).thumbnail_path is None
+        engine.dispose()
@@ -0,0 +1,96 @@
+"""
+Testes unitarios para o progresso em lote dos ClipJobs (core/clipper/progress.py)
+=================================================================================
+
+Valida (SQLite temporario via aiosqlite):
+    - Reportes do mesmo job coalescidos num unico flush (vale o ultimo)
+    - Progresso atrasado nao sobrescreve uma transicao de status
+    - Taxa de escrita limitada pelo intervalo de flush
+    - Publicacao imediata para o publisher (WebSocket)
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core import database
+from core.clipper.models import ClipJob, ClipURL, TwitchTarget
+from core.clipper.progress import JobProgressWriter
+import core.models  # noqa: F401 — armies (FK de twitch_targets)
+from core.database import Base
+
+
+@pytest.fixture
+def sync_db(tmp_path, monkeypatch):
+    path = tmp_path / "progress.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine, tables=[TwitchTarget.__table__, ClipJob.__table__, ClipURL.__table__])
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    monkeypatch.setattr(
+        database, "AsyncSessionLocal",
+        async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False),
+    )
+    session = sessionmaker(bind=engine)()
+    session.add(TwitchTarget(id=1, channel_url="https://twitch.tv/x", channel_name="x"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+def _job(db, status):
+    job = ClipJob(target_id=1, status=status, progress_pct=0)
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+class TestJobProgressWriter:
+    def test_coalesces_and_respects_status(self, sync_db):
+        downloading = _job(sync_db, "downloading")
+        moved_on = _job(sync_db, "transcribing")
+        writer = JobProgressWriter(flush_interval=0)
+
+        async def run():
+            writer.report(downloading, 5, "Baixando clipe 1/4...", status="downloading")
+            writer.report(downloading, 12, "Baixando clipe 2/4...", status="downloading")
+            writer.report(moved_on, 25, "Baixando clipe 4/4...", status="downloading")
+            assert await writer.flush() == 2
+            assert await writer.flush() == 0
+
+        asyncio.run(run())
+        sync_db.expire_all()
+        job = sync_db.get(ClipJob, downloading)
+        assert (job.progress_pct, job.current_step) == (12, "Baixando clipe 2/4...")
+        assert sync_db.get(ClipJob, moved_on).progress_pct == 0
+
+    def test_bounded_rate_and_publish(self, sync_db):
+        job_id = _job(sync_db, "editing")
+        writer = JobProgressWriter(flush_interval=0.2)
+        published = []
+
+        async def publisher(jid, data):
+            published.append((jid, data["progress_pct"]))
+
+        writer.set_publisher(publisher)
+
+        async def run():
+            for pct in range(50, 90, 4):
+                writer.report(job_id, pct, f"Editando {pct}", status="editing")
+                await asyncio.sleep(0.02)
+            await writer.close()
+
+        asyncio.run(run())
+        assert writer.flushes <= 3
+        assert published[-1] == (job_id, 86) and len(published) == 10
+        sync_db.expire_all()
+        assert sync_db.get(ClipJob, job_id).progress_pct == 86
@@ -0,0 +1,154 @@
+"""
+Testes unitarios para o indice de dedup de clipes (core/clipper/clip_index.py)
+===============================================================================
+
+Valida (SQLite em memoria):
+    - Listeners de ClipJob mantem clip_urls em criacao/status/remocao
+    - Regras de dedup (vivos/concluidos vs falhas esgotadas)
+    - Backfill a partir de jobs existentes
+    - Remocao de target (delete em massa) libera as URLs dos seus jobs
+"""
+
+import os
+import sys
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.api.endpoints import clipper as clipper_endpoint
+from core.database import Base, get_db
+from core.clipper.models import ClipJob, ClipURL, JobStatus, TwitchTarget
+from core.clipper.clip_index import backfill_clip_url_index, lookup_urls, processed_urls
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[ClipJob.__table__, ClipURL.__table__])
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def _job(db, urls, status="pending", retry_count=0):
+    job = ClipJob(target_id=1, clip_urls=urls, status=status, retry_count=retry_count)
+    db.add(job)
+    db.commit()
+    return job
+
+
+class TestListeners:
+    def test_insert_indexes_urls(self, db):
+        job = _job(db, ["u1", "u2"])
+        assert lookup_urls(db, ["u1", "u2", "u3"]) == {"u1": ("pending", 0), "u2": ("pending", 0)}
+        assert {r.job_id for r in db.query(ClipURL).all()} == {job.id}
+
+    def test_status_change_is_reflected(self, db):
+        job = _job(db, ["u1"])
+        job.status = JobStatus.FAILED
+        job.retry_count = 3
+        db.commit()
+        assert lookup_urls(db, ["u1"]) == {"u1": ("failed", 3)}
+
+    def test_removed_urls_are_released(self, db):
+        job = _job(db, ["u1", "u2"], status="waiting_clips")
+        job.clip_urls = ["u2", "u3"]
+        db.commit()
+        assert set(lookup_urls(db, ["u1", "u2", "u3"])) == {"u2", "u3"}
+
+    def test_delete_releases_urls(self, db):
+        job = _job(db, ["u1"])
+        db.delete(job)
+        db.commit()
+        assert lookup_urls(db, ["u1"]) == {}
+
+    def test_newest_job_wins(self, db):
+        old = _job(db, ["u1"], status="failed", retry_count=1)
+        _job(db, ["u1"], status="pending", retry_count=2)
+        # Atualizar o job antigo nao sobrescreve o ponteiro do job novo
+        old.retry_count = 3
+        db.commit()
+        assert lookup_urls(db, ["u1"]) == {"u1": ("pending", 2)}
+
+
+class TestProcessedUrls:
+    def test_dedup_rules(self, db):
+        _job(db, ["live"], status="editing")
+        _job(db, ["done"], status="completed")
+        _job(db, ["retry"], status="failed", retry_count=1)
+        _job(db, ["dead"], status="failed", retry_count=3)
+        got = processed_urls(db, ["live", "done", "retry", "dead", "new"], max_retries=3)
+        assert got == {"live", "done", "dead"}
+
+    def test_large_lookup_is_batched(self, db):
+        urls = [f"u{i}" for i in range(1200)]
+        _job(db, urls, status="completed")
+        assert len(processed_urls(db, urls, max_retries=3)) == 1200
+
+
+class TestBackfill:
+    def test_backfill_rebuilds_index(self, db):
+        _job(db, ["a", "b"], status="completed")
+        _job(db, ["b", "c"], status="failed", retry_count=3)
+        db.execute(delete(ClipURL))
+        db.commit()
+
+        assert backfill_clip_url_index(db, batch_size=1) == 4
+        assert lookup_urls(db, ["a", "b", "c"]) == {
+            "a": ("completed", 0),
+            "b": ("failed", 3),
+            "c": ("failed", 3),
+        }
+        # Idempotente
+        backfill_clip_url_index(db)
+        assert db.query(ClipURL).count() == 3
+
+
+class TestTargetDeletion:
+    def test_delete_target_releases_urls(self):
+        import core.models  # noqa: F401 — armies (FK de twitch_targets)
+        from core.models import PendingApproval
+
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(bind=engine, tables=[
+            TwitchTarget.__table__, ClipJob.__table__, ClipURL.__table__, PendingApproval.__table__,
+        ])
+        session_factory = sessionmaker(bind=engine)
+        db = session_factory()
+        db.add_all([
+            TwitchTarget(id=1, channel_url="https://twitch.tv/a", channel_name="a"),
+            TwitchTarget(id=2, channel_url="https://twitch.tv/b", channel_name="b"),
+        ])
+        db.commit()
+        _job(db, ["u1", "u2"], status="completed")
+        other = ClipJob(target_id=2, clip_urls=["u3"], status="pending")
+        db.add(other)
+        db.commit()
+
+        def override_db():
+            session = session_factory()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app = FastAPI()
+        app.include_router(clipper_endpoint.router, prefix="/api/clipper")
+        app.dependency_overrides[get_db] = override_db
+        response = TestClient(app).delete("/api/clipper/targets/1")
+        assert response.status_code == 200, response.text
+
+        db.expire_all()
+        assert db.query(ClipJob).filter(ClipJob.target_id == 1).count() == 0
+        assert lookup_urls(db, ["u1", "u2", "u3"]) == {"u3": ("pending", 0)}
+        db.close()
+        engine.dispose()
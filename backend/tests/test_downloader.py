@@ -0,0 +1,67 @@
+"""
+Testes unitarios para o Downloader (core/clipper/downloader.py)
+================================================================
+
+Valida (sem yt-dlp/ffprobe):
+    - Downloads concorrentes limitados por host, resultado em ordem
+    - Probe persistido por indice do clipe
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.clipper import downloader
+
+
+class TestDownloadJobClips:
+    def _run(self, monkeypatch, urls, limit=2, silent=()):
+        state = {"active": 0, "peak": 0, "finalized": None}
+
+        async def fake_download(url, output_path, timeout_seconds=120):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            # Clipes mais antigos demoram mais: a ordem de termino e invertida
+            await asyncio.sleep(0.01 * (len(urls) - urls.index(url)))
+            state["active"] -= 1
+            probe = {"path": output_path, "duration": 20.0, "has_audio": url not in silent}
+            return {"success": True, "path": output_path, "duration": 20.0, "file_size": 1, "probe": probe, "error": None}
+
+        def fake_finalize(job_id, local_paths, total_duration, errors, probes=None):
+            state["finalized"] = (local_paths, total_duration, errors, probes)
+
+        monkeypatch.setattr(downloader, "DOWNLOAD_PER_HOST_LIMIT", limit)
+        monkeypatch.setattr(downloader, "_HOST_SEMAPHORES", {})
+        monkeypatch.setattr(downloader, "download_clip", fake_download)
+        monkeypatch.setattr(downloader, "_start_download_job", lambda job_id: (urls, [{"title": f"t{i}"} for i in range(len(urls))]))
+        monkeypatch.setattr(downloader, "_update_job_progress", lambda *a: None)
+        monkeypatch.setattr(downloader, "_finalize_job_download", fake_finalize)
+        monkeypatch.setattr(downloader, "_fail_job", lambda *a: None)
+
+        result = asyncio.run(downloader.download_job_clips(1))
+        return result, state
+
+    def test_bounded_per_host_and_ordered(self, monkeypatch):
+        urls = [f"https://clips.twitch.tv/c{i}" for i in range(4)]
+        result, state = self._run(monkeypatch, urls, limit=2)
+        assert state["peak"] == 2
+        assert [os.path.basename(p) for p in result["local_paths"]] == [
+            f"job1_clip{i}_t{i}.mp4" for i in range(4)
+        ]
+        assert result["total_duration"] == 80.0
+
+    def test_hosts_have_independent_limits(self, monkeypatch):
+        urls = ["https://clips.twitch.tv/a", "https://www.twitch.tv/b", "https://clips.twitch.tv/c"]
+        _, state = self._run(monkeypatch, urls, limit=1)
+        assert state["peak"] == 2
+
+    def test_silent_clip_skipped_but_probe_persisted(self, monkeypatch):
+        urls = [f"https://clips.twitch.tv/c{i}" for i in range(3)]
+        result, state = self._run(monkeypatch, urls, silent={urls[1]})
+        assert len(result["local_paths"]) == 2
+        assert any("sem audio" in e for e in result["errors"])
+        _, _, _, probes = state["finalized"]
+        assert sorted(probes) == [0, 1, 2]
+        assert probes[1]["has_audio"] is False
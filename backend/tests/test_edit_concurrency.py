@@ -0,0 +1,43 @@
+"""
+Testes unitarios para o planejamento de edicao paralela (core/clipper/editor.py)
+=================================================================================
+
+Valida:
+    - Numero de edicoes paralelas limitado por cores, clipes e teto
+    - Orcamento de threads por FFmpeg sem oversubscription
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.clipper.editor import plan_edit_concurrency
+
+
+class TestPlanEditConcurrency:
+    def test_sixteen_cores_four_clips(self):
+        assert plan_edit_concurrency(4, cpu_count=16, max_parallel=4, threads_per_clip=0) == (4, 4)
+
+    def test_few_clips_get_more_threads(self):
+        assert plan_edit_concurrency(2, cpu_count=16, max_parallel=4, threads_per_clip=0) == (2, 8)
+
+    def test_small_box_keeps_single_auto_encode(self):
+        assert plan_edit_concurrency(4, cpu_count=4, max_parallel=4, threads_per_clip=0) == (1, None)
+
+    def test_max_parallel_caps_workers(self):
+        workers, threads = plan_edit_concurrency(8, cpu_count=32, max_parallel=2, threads_per_clip=0)
+        assert (workers, threads) == (2, 16)
+
+    def test_explicit_thread_budget(self):
+        workers, threads = plan_edit_concurrency(6, cpu_count=12, max_parallel=8, threads_per_clip=2)
+        assert (workers, threads) == (6, 2)
+        assert workers * threads <= 12
+
+    def test_never_oversubscribes(self):
+        for cores in (1, 2, 6, 8, 12, 16, 24, 64):
+            for n in range(1, 10):
+                workers, threads = plan_edit_concurrency(n, cpu_count=cores, max_parallel=4, threads_per_clip=0)
+                assert 1 <= workers <= n
+                if threads is not None:
+                    assert workers * threads <= cores
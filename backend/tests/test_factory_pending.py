@@ -0,0 +1,139 @@
+"""
+Testes unitarios para a listagem de curadoria (GET /factory/pending)
+====================================================================
+
+Valida (SQLite em memoria):
+    - Uma query de listagem (+ profiles), sem carregar whisper_result
+    - transcript_text mantido pelo listener do ClipJob e pela migracao
+    - Paginacao por cursor (X-Next-Cursor) e 304 via ETag
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.api.endpoints import factory
+from core.clipper.models import ClipJob, ClipURL, TwitchTarget, migrate_clip_job_transcript
+from core.database import Base, get_db
+from core.models import PendingApproval, Profile
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[
+        TwitchTarget.__table__, ClipJob.__table__, ClipURL.__table__, PendingApproval.__table__, Profile.__table__,
+    ])
+    engine.queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a: engine.queries.append(a[2]))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(engine):
+    app = FastAPI()
+    app.include_router(factory.router, prefix="/factory")
+    factory_session = sessionmaker(bind=engine)
+
+    def _get_db():
+        session = factory_session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app.dependency_overrides[get_db] = _get_db
+    return TestClient(app)
+
+
+def _seed(db, count):
+    target = TwitchTarget(channel_url="https://twitch.tv/gaules", channel_name="gaules", army_id=7)
+    db.add(target)
+    db.flush()
+    base = datetime(2026, 5, 4, 12, 0)
+    for i in range(count):
+        job = ClipJob(
+            target_id=target.id,
+            clip_urls=["u1", "u2"],
+            clip_metadata=[{"title": "a"}, {"title": "b"}],
+            whisper_result=[{"text": f"ola {i}", "words": [{"w": "ola"}] * 50}, {"text": "mundo"}],
+        )
+        db.add(job)
+        db.flush()
+        db.add(PendingApproval(clip_job_id=job.id, video_path=f"v{i}.mp4", created_at=base + timedelta(minutes=i)))
+    db.commit()
+
+
+class TestListPending:
+    def test_single_query_without_word_timestamps(self, engine, db, client):
+        _seed(db, 5)
+        engine.queries.clear()
+        resp = client.get("/factory/pending")
+        assert resp.status_code == 200
+        items = resp.json()
+        assert [i["video_path"] for i in items] == [f"v{i}.mp4" for i in range(4, -1, -1)]
+        assert items[0]["transcript"] == "ola 4 mundo"
+        assert items[0]["target_name"] == "gaules" and items[0]["target_army_id"] == 7
+        assert [c["title"] for c in items[0]["clips"]] == ["a", "b"]
+
+        selects = [q for q in engine.queries if q.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 2  # listagem + profiles
+        assert "whisper_result" not in selects[0]
+
+    def test_keyset_pagination(self, db, client):
+        _seed(db, 7)
+        seen, cursor = [], None
+        while True:
+            resp = client.get("/factory/pending", params={"limit": 3, **({"before": cursor} if cursor else {})})
+            seen += [i["id"] for i in resp.json()]
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)) == 7
+
+    def test_etag_not_modified(self, db, client):
+        _seed(db, 2)
+        first = client.get("/factory/pending")
+        etag = first.headers["ETag"]
+        assert client.get("/factory/pending", headers={"If-None-Match": etag}).status_code == 304
+
+        item = db.query(PendingApproval).first()
+        item.caption = "nova legenda"
+        db.commit()
+        assert client.get("/factory/pending", headers={"If-None-Match": etag}).status_code == 200
+
+
+class TestTranscriptText:
+    def test_listener_follows_whisper_result(self, db):
+        _seed(db, 1)
+        job = db.query(ClipJob).first()
+        assert job.transcript_text == "ola 0 mundo"
+        job.whisper_result = [{"text": "mundo"}, {"text": ""}]
+        db.commit()
+        assert job.transcript_text == "mundo"
+
+    def test_migration_backfills(self, engine, db):
+        _seed(db, 3)
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE clip_jobs SET transcript_text = NULL"))
+        assert migrate_clip_job_transcript(engine) == 3
+        assert migrate_clip_job_transcript(engine) == 0
+        db.expire_all()
+        assert {j.transcript_text for j in db.query(ClipJob)} == {"ola 0 mundo", "ola 1 mundo", "ola 2 mundo"}
@@ -0,0 +1,115 @@
+"""
+Testes unitarios para o catalogo de videos (core/file_catalog.py)
+=================================================================
+
+Valida (diretorios temporarios):
+    - Ordem por mtime, limit/offset e sidecars (.json / .error.txt)
+    - Eventos (refresh) atualizam o indice sem reescanear
+    - Sem watcher, mudanca no diretorio dispara rescan
+    - Nome corrompido (path Windows) encontrado pelo basename
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.file_catalog import DirectoryCatalog, FileCatalog
+
+
+def _video(directory, name, mtime, metadata=None, error=None):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"\0" * 2048)
+    os.utime(path, (mtime, mtime))
+    if metadata is not None:
+        with open(path + ".json", "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+    if error is not None:
+        with open(path + ".error.txt", "w", encoding="utf-8") as f:
+            f.write(error)
+    return path
+
+
+class TestDirectoryCatalog:
+    def test_sorted_listing_and_sidecars(self, tmp_path):
+        d = str(tmp_path)
+        _video(d, "a.mp4", 100, metadata={"schedule_time": "2026-01-01T10:00"})
+        _video(d, "b.mp4", 300, error="x" * 900)
+        _video(d, "c.mp4", 200)
+        catalog = DirectoryCatalog(d)
+
+        assert [e.name for e in catalog.list()] == ["b.mp4", "c.mp4", "a.mp4"]
+        assert [e.name for e in catalog.list(limit=1, offset=1)] == ["c.mp4"]
+        assert [e.name for e in catalog.list(newest_first=False, limit=2)] == ["a.mp4", "c.mp4"]
+        entries = {e.name: e for e in catalog.list()}
+        assert entries["a.mp4"].metadata["schedule_time"] == "2026-01-01T10:00"
+        assert len(entries["b.mp4"].error_message) == 500
+        assert entries["c.mp4"].size == 2048
+        assert catalog.count(lambda e: bool(e.metadata.get("schedule_time"))) == 1
+
+    def test_events_update_without_rescan(self, tmp_path):
+        d = str(tmp_path)
+        _video(d, "a.mp4", 100)
+        catalog = DirectoryCatalog(d)
+        catalog.watched = True
+        assert catalog.count() == 1
+
+        _video(d, "novo.mp4", 500)
+        catalog.refresh("novo.mp4")
+        with open(os.path.join(d, "a.mp4.json"), "w") as f:
+            json.dump({"caption": "oi"}, f)
+        catalog.refresh("a.mp4.json")
+        os.remove(os.path.join(d, "novo.mp4"))
+        _video(d, "b.mp4", 50)
+        catalog.refresh("b.mp4")
+        catalog.refresh("novo.mp4")
+
+        assert [e.name for e in catalog.list()] == ["a.mp4", "b.mp4"]
+        assert catalog.find("a.mp4").metadata == {"caption": "oi"}
+        assert catalog.scans == 1
+
+    def test_unwatched_rescans_on_directory_change(self, tmp_path):
+        d = str(tmp_path)
+        _video(d, "a.mp4", 100)
+        catalog = DirectoryCatalog(d)
+        assert catalog.count() == 1
+        assert catalog.count() == 1
+        assert catalog.scans == 1
+
+        _video(d, "b.mp4", 200)
+        os.utime(d, (os.stat(d).st_mtime + 5,) * 2)
+        assert catalog.count() == 2
+        assert catalog.scans == 2
+
+    def test_find_corrupted_windows_name(self, tmp_path):
+        d = str(tmp_path)
+        raw = "D:\\APPS\\data\\pending\\perfil_1.mp4"
+        _video(d, raw, 100)
+        with open(os.path.join(d, "perfil_1.mp4.json"), "w") as f:
+            json.dump({"profile_id": "p1"}, f)
+        catalog = DirectoryCatalog(d)
+
+        entry = catalog.find("perfil_1.mp4")
+        assert entry.name == raw and entry.id == "perfil_1"
+        assert entry.metadata == {"profile_id": "p1"}
+
+        os.remove(entry.path)
+        assert catalog.find("perfil_1.mp4") is None
+
+
+class TestFileCatalog:
+    def test_event_routed_to_directory(self, tmp_path):
+        dirs = {k: str(tmp_path / k) for k in ("pending", "done")}
+        for d in dirs.values():
+            os.makedirs(d)
+        catalog = FileCatalog(dirs)
+        assert catalog["done"].count() == 0
+        catalog["done"].watched = True
+
+        _video(dirs["done"], "x.mp4", 100)
+        catalog._on_path(os.path.join(dirs["done"], "x.mp4"))
+        assert catalog["done"].count() == 1
+        key, entry = catalog.resolve("x.mp4", ["pending", "done"])
+        assert key == "done" and entry.path == os.path.join(dirs["done"], "x.mp4")
@@ -0,0 +1,81 @@
+"""
+Testes unitarios para o render fundido (core/clipper/fused.py)
+===============================================================
+
+Valida (sem executar FFmpeg):
+    - Namespacing dos labels do grafo de cada clipe
+    - Duracao estimada (speed ASB, crossfades, cap)
+    - Presenca do loop-tail e saidas de debug
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.clipper.editor import _build_edit_filter, _apply_antishadowban
+from core.clipper.fused import _namespace_filter, build_debug_filter, build_fused_filter
+
+
+def _clip_graph(idx, duration=30.0, has_audio=True, layout="gameplay"):
+    f, label = _build_edit_filter(1920, 1080, None, None, layout)
+    f, label = _apply_antishadowban(f, label, 1.02, 2, 0)
+    f, label = _namespace_filter(f, label, idx)
+    return {"filter": f, "label": label, "duration": duration, "has_audio": has_audio}
+
+
+class TestNamespaceFilter:
+    def test_input_and_labels_are_rewritten(self):
+        f, label = _build_edit_filter(1920, 1080, None, None, "podcast")
+        ns, out = _namespace_filter(f, label, 2)
+        assert "[0:v]" not in ns
+        assert "[2:v]" in ns
+        assert "[bg_c2]" in ns and "[fg_c2]" in ns
+        assert out == "[composed_c2]"
+
+    def test_distinct_clips_do_not_collide(self):
+        a = _clip_graph(0)["filter"]
+        b = _clip_graph(1)["filter"]
+        assert "[_asb_out_c0]" in a and "[_asb_out_c1]" in b
+        assert "[_asb_out_c0]" not in b
+
+
+class TestBuildFusedFilter:
+    def test_duration_accounts_for_speed_and_fades(self):
+        graphs = [_clip_graph(0, 40.8), _clip_graph(1, 30.6)]
+        g = build_fused_filter(graphs, speed=1.02, fades=[0.5])
+        assert g["duration"] == pytest.approx(40.0 + 30.0 - 0.5)
+        assert g["loop_tail"] is True
+        assert (g["video_label"], g["audio_label"]) == ("[vout]", "[aout]")
+
+    def test_cap_applied_before_loop_tail(self):
+        graphs = [_clip_graph(i, 60.0) for i in range(3)]
+        g = build_fused_filter(graphs, speed=1.0, fades=[0.5, 0.5], max_duration=160)
+        assert g["duration"] == 160
+        assert g["filter"].index("trim=0:160.0000") < g["filter"].index("split=3[body_src]")
+
+    def test_single_clip_has_no_xfade(self):
+        g = build_fused_filter([_clip_graph(0, 70.0)], speed=1.0, fades=[])
+        assert "xfade" not in g["filter"]
+        assert "[v0]split=3[body_src]" in g["filter"]
+
+    def test_missing_audio_uses_silence(self):
+        graphs = [_clip_graph(0, 40.0), _clip_graph(1, 40.0, has_audio=False)]
+        g = build_fused_filter(graphs, speed=1.0, fades=[0.5])
+        assert "[1:a]" not in g["filter"]
+        assert "anullsrc" in g["filter"]
+
+    def test_debug_exposes_per_clip_outputs(self):
+        graphs = [_clip_graph(0, 40.0), _clip_graph(1, 40.0)]
+        f = build_debug_filter(graphs, speed=1.0)
+        for i in range(2):
+            assert f"[dbgv{i}]" in f
+            assert f"[dbga{i}]" in f
+        assert "xfade" not in f
+        assert "dbg" not in build_fused_filter(graphs, speed=1.0, fades=[0.5])["filter"]
+
+    def test_inconsistent_fades_raise(self):
+        with pytest.raises(ValueError):
+            build_fused_filter([_clip_graph(0), _clip_graph(1)], speed=1.0, fades=[])
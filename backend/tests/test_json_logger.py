@@ -0,0 +1,98 @@
+"""
+Testes unitarios para o JsonLogger com escrita em thread (core/logger.py)
+=========================================================================
+
+Valida (arquivos temporarios):
+    - log() nao escreve no disco na thread chamadora; flush() persiste o lote
+    - Rotacao por tamanho com N geracoes (app.1.jsonl ... app.N.jsonl)
+    - Ring buffer do get_logs e carga do fim do arquivo no startup
+    - clear() trunca o arquivo na ordem da fila
+    - Dois writers no mesmo arquivo rotacionam uma vez por geracao
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.logger import JsonLogger, read_tail_lines, rotated_path
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TestJsonLogger:
+    def test_batched_write_after_flush(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        log = JsonLogger(path)
+        for i in range(50):
+            log.info(f"msg {i}", "test")
+        assert log.flush()
+        assert [e["message"] for e in _lines(path)] == [f"msg {i}" for i in range(50)]
+
+    def test_ring_buffer_newest_first(self, tmp_path):
+        log = JsonLogger(str(tmp_path / "app.jsonl"), buffer_size=5)
+        for i in range(8):
+            log.log("warning" if i % 2 else "info", f"m{i}")
+        assert [e["message"] for e in log.get_logs(limit=10)] == ["m7", "m6", "m5", "m4", "m3"]
+        assert [e["message"] for e in log.get_logs(level="warning")] == ["m7", "m5", "m3"]
+        assert log.get_stats()["total"] == 5
+
+    def test_rotation_keeps_n_generations(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        log = JsonLogger(path, max_bytes=300, backup_count=2)
+        for i in range(40):
+            log.info("x" * 50 + str(i))
+            log.flush()
+        assert os.path.exists(rotated_path(path, 1))
+        assert os.path.exists(rotated_path(path, 2))
+        assert not os.path.exists(rotated_path(path, 3))
+        newest = (os.path.exists(path) and _lines(path)) or _lines(rotated_path(path, 1))
+        assert newest[-1]["message"].endswith("39")
+
+    def test_startup_loads_tail(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for i in range(1000):
+                f.write(json.dumps({"level": "info", "message": f"old {i}", "source": "s"}) + "\n")
+        log = JsonLogger(path, buffer_size=10)
+        assert [e["message"] for e in log.get_logs(limit=3)] == ["old 999", "old 998", "old 997"]
+        assert len(log.get_logs(limit=100)) == 10
+
+    def test_read_tail_lines_small_chunks(self, tmp_path):
+        path = str(tmp_path / "a.txt")
+        with open(path, "w") as f:
+            f.write("".join(f"line{i}\n" for i in range(100)))
+        assert read_tail_lines(path, 3, chunk_size=7) == ["line97", "line98", "line99"]
+        assert read_tail_lines(str(tmp_path / "missing"), 3) == []
+
+    def test_clear_truncates_in_order(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        log = JsonLogger(path)
+        log.info("before")
+        log.clear()
+        log.info("after")
+        log.flush()
+        messages = [e["message"] for e in _lines(path)]
+        assert "before" not in messages
+        assert messages[-1] == "after"
+
+    def test_two_writers_share_rotation(self, tmp_path):
+        # Dois processos (aqui duas instancias) escrevendo e rotacionando o mesmo arquivo
+        path = str(tmp_path / "app.jsonl")
+        first = JsonLogger(path, max_bytes=2000, backup_count=3)
+        second = JsonLogger(path, max_bytes=2000, backup_count=3)
+        for i in range(60):
+            (first if i % 2 else second).info(f"m{i}")
+            first.flush()
+            second.flush()
+        generations = [rotated_path(path, gen) for gen in (3, 2, 1)] + [path]
+        assert all(os.path.exists(p) for p in generations[:3])
+        messages = [e["message"] for p in generations if os.path.exists(p) for e in _lines(p)]
+        # So a geracao mais antiga cai: o que sobra e o final continuo, sem buracos
+        first_kept = 60 - len(messages)
+        assert messages == [f"m{i}" for i in range(first_kept, 60)]
+        assert len(messages) > 3 * 2000 // 200
@@ -0,0 +1,144 @@
+"""
+Testes unitarios para o indice de logs em disco (core/log_index.py)
+===================================================================
+
+Valida (arquivos temporarios):
+    - Ingestao incremental por offset e deduplicacao por uuid
+    - Filtros por level/source/job_id/texto e paginacao por cursor
+    - ts normalizado para ISO completo (so "HH:MM:SS" nao e podado)
+    - Cursor malformado: ValueError no indice, 400 no endpoint
+    - JsonLogger alimenta o indice e faz backfill das geracoes rotacionadas
+"""
+
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.api.endpoints import logs as logs_endpoint
+from core.log_index import LogIndex, entry_timestamp, extract_job_id
+from core.logger import JsonLogger, rotated_path
+
+
+# Dentro da retencao (LOG_INDEX_RETENTION_DAYS) para o prune nao apagar as entradas
+DAY = (date.today() - timedelta(days=1)).isoformat()
+
+
+def _entry(i, level="info", source="worker", message=None):
+    return {
+        "id": f"id-{i}",
+        "full_timestamp": f"{DAY}T10:{i // 60:02d}:{i % 60:02d}",
+        "level": level,
+        "source": source,
+        "message": message or f"mensagem {i}",
+    }
+
+
+def _write(path, entries):
+    with open(path, "a", encoding="utf-8") as f:
+        for e in entries:
+            f.write(json.dumps(e) + "\n")
+
+
+class TestLogIndex:
+    def test_incremental_ingest(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        index = LogIndex(str(tmp_path / "idx.db"))
+        _write(path, [_entry(i) for i in range(10)])
+        assert index.ingest_file(path) == 10
+        assert index.ingest_file(path) == 0
+        _write(path, [_entry(i) for i in range(10, 15)])
+        assert index.ingest_file(path) == 5
+        assert index.count() == 15
+
+    def test_partial_line_waits(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        index = LogIndex(str(tmp_path / "idx.db"))
+        with open(path, "w") as f:
+            f.write(json.dumps(_entry(0)) + "\n" + json.dumps(_entry(1))[:10])
+        assert index.ingest_file(path) == 1
+        with open(path, "a") as f:
+            f.write(json.dumps(_entry(1))[10:] + "\n")
+        assert index.ingest_file(path) == 1
+
+    def test_filters_and_pagination(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        index = LogIndex(str(tmp_path / "idx.db"))
+        entries = [_entry(i, level="error" if i % 3 == 0 else "info") for i in range(30)]
+        entries.append(_entry(100, message="Job #42 falhado: render timeout", source="clipper"))
+        _write(path, entries)
+        index.ingest_file(path)
+
+        errors, _ = index.search(level="error", limit=100)
+        assert len(errors) == 10
+        assert [e["id"] for e in index.search(job_id="42")[0]] == ["id-100"]
+        assert [e["id"] for e in index.search(text="render time")[0]] == ["id-100"]
+        assert index.search(source="clipper", text="mensagem")[0] == []
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = index.search(level="info", limit=7, cursor=cursor)
+            seen.extend(e["id"] for e in page)
+            if cursor is None:
+                break
+        assert len(seen) == len(set(seen)) == 21
+        assert seen[:2] == ["id-100", "id-29"]
+
+    def test_short_timestamps_survive_prune(self, tmp_path):
+        index = LogIndex(str(tmp_path / "idx.db"), retention_days=1)
+        old = datetime.now() - timedelta(days=3)
+        index.add_entries([
+            {"id": "curto", "timestamp": "00:00:01", "message": "so hora"},
+            {"id": "velho", "full_timestamp": old.isoformat(), "message": "fora da retencao"},
+        ])
+        assert [e["id"] for e in index.search()[0]] == ["curto"]
+
+    def test_entry_timestamp_normalization(self):
+        now = datetime(2026, 5, 10, 12, 0, 0)
+        assert entry_timestamp({"full_timestamp": "2026-05-09T08:00:00"}, now) == "2026-05-09T08:00:00"
+        assert entry_timestamp({"timestamp": "11:30:00"}, now) == "2026-05-10T11:30:00"
+        assert entry_timestamp({"timestamp": "23:00:00"}, now) == "2026-05-09T23:00:00"
+        assert entry_timestamp({}, now) == now.isoformat()
+
+    def test_malformed_cursor(self, tmp_path, monkeypatch):
+        index = LogIndex(str(tmp_path / "idx.db"))
+        with pytest.raises(ValueError):
+            index.search(cursor="sem-separador")
+        with pytest.raises(ValueError):
+            index.search(cursor="2026-01-01T00:00:00|abc")
+
+        monkeypatch.setattr(logs_endpoint.logger, "index", index)
+        app = FastAPI()
+        app.include_router(logs_endpoint.router, prefix="/logs")
+        client = TestClient(app)
+        assert client.get("/logs/search", params={"cursor": "lixo"}).status_code == 400
+        assert client.get("/logs/search", params={"cursor": "2026-01-01T00:00:00|5"}).status_code == 200
+
+    def test_extract_job_id(self):
+        assert extract_job_id({"message": "ClipJob #7 concluido"}) == "7"
+        assert extract_job_id({"message": "sem id", "job_id": 9}) == "9"
+        assert extract_job_id({"message": "sem id"}) is None
+
+
+class TestLoggerIntegration:
+    def test_logger_feeds_index_and_backfills_rotations(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        _write(rotated_path(path, 1), [_entry(i) for i in range(5)])
+        index = LogIndex(str(tmp_path / "idx.db"))
+        log = JsonLogger(path, index=index)
+        log.log("error", "upload falhou", "uploader", job_id=12)
+        assert log.flush()
+
+        assert index.count() == 6
+        result = log.search(job_id="12")
+        assert [e["message"] for e in result["logs"]] == ["upload falhou"]
+
+        log.clear()
+        assert log.flush()
+        assert [e["message"] for e in log.search()["logs"]] == ["Logs limpos pelo administrador"]
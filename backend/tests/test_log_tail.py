@@ -0,0 +1,127 @@
+"""
+Testes unitarios para o leitor unico de logs (app/api/log_tail.py)
+==================================================================
+
+Valida (arquivos temporarios):
+    - Linhas novas lidas uma vez, com cursor inode:offset
+    - Linha parcial espera o "\\n"; rotacao/truncamento recomecam do inicio
+    - Resume por cursor a partir do buffer e a partir do arquivo
+    - Filtro level/source aplicado no publish do hub
+    - Falha no backfill nao prende wait_ready(); stop() solta task e listener
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.api import log_tail as log_tail_module
+from app.api.log_tail import LogTail, matches_filters, parse_filter
+from app.api.ws_hub import WebSocketHub
+
+
+def _append(path, *messages, level="info"):
+    with open(path, "a", encoding="utf-8") as f:
+        for m in messages:
+            f.write(json.dumps({"level": level, "message": m, "source": "worker"}) + "\n")
+
+
+class TestLogTail:
+    def test_reads_new_lines_once(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        _append(path, "velha")
+        tail = LogTail(path)
+        assert [e["message"] for e in tail._prime()] == ["velha"]
+        assert tail.read_new() == []
+        _append(path, "a", "b")
+        entries = tail.read_new()
+        assert [e["message"] for e in entries] == ["a", "b"]
+        assert entries[-1]["cursor"].endswith(f":{os.path.getsize(path)}")
+        assert tail.read_new() == []
+
+    def test_partial_line_and_rotation(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        open(path, "w").close()
+        tail = LogTail(path)
+        tail._prime()
+        with open(path, "a") as f:
+            f.write('{"message": "meia')
+        assert tail.read_new() == []
+        with open(path, "a") as f:
+            f.write(' linha"}\n')
+        assert [e["message"] for e in tail.read_new()] == ["meia linha"]
+
+        _append(path, "antes de rotacionar")
+        os.replace(path, str(tmp_path / "app.1.jsonl"))
+        _append(path, "arquivo novo")
+        assert [e["message"] for e in tail.read_new()] == ["antes de rotacionar", "arquivo novo"]
+
+    def test_resume_from_buffer_and_file(self, tmp_path):
+        path = str(tmp_path / "app.jsonl")
+        open(path, "w").close()
+        tail = LogTail(path)
+        tail._prime()
+        _append(path, "m1", "m2", "m3")
+        entries = tail.read_new()
+        tail.recent.extend(entries)
+
+        async def run():
+            from_buffer = await tail.backfill(entries[0]["cursor"])
+            tail.recent.clear()
+            tail.recent.extend(entries[2:])
+            from_file = await tail.backfill(entries[0]["cursor"])
+            default = await tail.backfill(None, limit=1)
+            return from_buffer, from_file, default
+
+        from_buffer, from_file, default = asyncio.run(run())
+        assert [e["message"] for e in from_buffer] == ["m2", "m3"]
+        assert [e["message"] for e in from_file] == ["m2", "m3"]
+        assert [e["message"] for e in default] == ["m3"]
+
+
+class TestLifecycle:
+    def test_prime_failure_and_stop(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "app.jsonl")
+        _append(path, "antigo")
+        tail = LogTail(path, poll_interval=0.01)
+        listeners = log_tail_module.json_logger._write_listeners
+
+        def broken_prime():
+            raise OSError("disco indisponivel")
+
+        monkeypatch.setattr(tail, "_prime", broken_prime)
+
+        async def run():
+            tail.ensure_started()
+            await asyncio.wait_for(tail.wait_ready(), timeout=1)
+            assert tail._notify in listeners
+            _append(path, "novo")
+            for _ in range(100):
+                if tail.recent:
+                    break
+                await asyncio.sleep(0.01)
+            task = tail._task
+            await tail.stop()
+            return task
+
+        task = asyncio.run(run())
+        # Sem backfill, mas o stream segue do fim do arquivo
+        assert [e["message"] for e in tail.recent] == ["novo"]
+        assert task.done() and tail._task is None
+        assert tail._notify not in listeners
+
+
+class TestFilters:
+    def test_filter_applied_on_publish(self):
+        class WS:
+            async def send_text(self, text):
+                pass
+
+        hub = WebSocketHub()
+        levels, sources = parse_filter("error, WARNING"), parse_filter(None)
+        conn = hub.connect(WS(), {"telemetry:logs"}, message_filter=lambda e: matches_filters(e, levels, sources))
+        assert hub.publish("telemetry:logs", "log_entry", {"level": "info"}) == 0
+        assert hub.publish("telemetry:logs", "log_entry", {"level": "Warning"}) == 1
+        assert len(conn._pending) == 1
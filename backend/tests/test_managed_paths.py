@@ -0,0 +1,100 @@
+"""
+Testes unitarios para o worker orientado a eventos (core/managed_paths.py, core/queue_worker.py)
+================================================================================================
+
+Valida (SQLite em memoria / diretorio temporario):
+    - Indice de arquivos gerenciados carregado uma vez e mantido pelos listeners ORM
+    - update_video_path (update em massa) forca recarga via evento do Scheduler
+    - Proximo arquivo orfao: FIFO, ignora gerenciados e stitch_
+    - Handler do watchdog so acorda para .mp4
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core import managed_paths as managed_paths_module, queue_worker, scheduler as scheduler_module
+from core.database import Base
+from core.managed_paths import managed_paths
+from core.models import ScheduleItem
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[ScheduleItem.__table__])
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(managed_paths_module, "SessionLocal", factory)
+    monkeypatch.setattr(scheduler_module, "SessionLocal", factory)
+    managed_paths.invalidate()
+    session = factory()
+    yield session
+    session.close()
+    managed_paths.invalidate()
+    engine.dispose()
+
+
+def _add(db, path, status="pending"):
+    item = ScheduleItem(profile_slug="p1", video_path=path, status=status)
+    db.add(item)
+    db.commit()
+    return item
+
+
+class TestManagedPathIndex:
+    def test_listeners_keep_index_without_reload(self, db):
+        _add(db, "/x/data/approved/a.mp4")
+        _add(db, "/x/data/approved/old.mp4", status="completed")
+        assert managed_paths.names() == {"a.mp4"}
+        loads = managed_paths.loads
+
+        b = _add(db, "/x/data/approved/b.mp4")
+        assert managed_paths.names() == {"a.mp4", "b.mp4"}
+        b.status = "completed"
+        db.commit()
+        assert managed_paths.names() == {"a.mp4"}
+        item = db.query(ScheduleItem).filter_by(video_path="/x/data/approved/a.mp4").one()
+        db.delete(item)
+        db.commit()
+        assert managed_paths.names() == set()
+        assert managed_paths.loads == loads
+
+    def test_bulk_path_update_reloads(self, db):
+        _add(db, "/x/data/pending/c.mp4")
+        assert managed_paths.names() == {"c.mp4"}
+        calls = []
+        listener = lambda: calls.append(1)
+        managed_paths.on_change(listener)
+        scheduler_module.scheduler_service.on_schedule_change(managed_paths.invalidate)
+
+        scheduler_module.scheduler_service.update_video_path("/x/data/pending/c.mp4", "/x/data/approved/c2.mp4")
+        managed_paths._listeners.remove(listener)
+        assert calls
+        assert managed_paths.names() == {"c2.mp4"}
+
+
+class TestNextOrphanFile:
+    def test_fifo_skipping_managed_and_stitch(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(queue_worker, "APPROVED_DIR", str(tmp_path))
+        for name, mtime in (("novo.mp4", 300), ("velho.mp4", 100), ("stitch_1.mp4", 50), ("agendado.mp4", 10)):
+            path = tmp_path / name
+            path.write_bytes(b"x")
+            os.utime(path, (mtime, mtime))
+        (tmp_path / "velho.mp4.json").write_text("{}")
+
+        assert queue_worker.next_orphan_file({"agendado.mp4"}) == "velho.mp4"
+        assert queue_worker.next_orphan_file({"agendado.mp4", "velho.mp4", "novo.mp4"}) is None
+
+    def test_handler_wakes_only_for_videos(self):
+        calls = []
+        handler = queue_worker.ApprovedFolderHandler(lambda: calls.append(1))
+        handler.on_any_event(SimpleNamespace(is_directory=False, src_path="/a/x.mp4.json", dest_path=""))
+        handler.on_any_event(SimpleNamespace(is_directory=False, src_path="/a/tmp", dest_path="/a/x.mp4"))
+        assert calls == [1]
@@ -0,0 +1,158 @@
+"""
+Testes unitarios para o cache de ffprobe (core/clipper/media_info.py)
+======================================================================
+
+Valida (sem ffprobe — _run_ffprobe e substituido):
+    - Parse da saida JSON em MediaInfo (campos "N/A" viram 0)
+    - Cache por (path, size, mtime) com invalidacao ao reescrever o arquivo
+    - LRU limitado, dedup de probes concorrentes e persistencia em SQLite
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.clipper import media_info
+from core.clipper.media_info import MediaInfo, MediaInfoCache
+
+
+class TestFromFfprobe:
+    def test_video_and_audio(self):
+        data = {
+            "format": {"duration": "31.5"},
+            "streams": [
+                {"codec_type": "video", "width": 1920, "height": 1080, "r_frame_rate": "30000/1001", "codec_name": "h264"},
+                {"codec_type": "audio"},
+            ],
+        }
+        info = MediaInfo.from_ffprobe("a.mp4", 10, data)
+        assert info.duration == 31.5
+        assert info.has_audio and info.has_video
+        assert (info.width, info.height, info.fps, info.codec) == (1920, 1080, 29.97, "h264")
+
+    def test_missing_audio_and_bad_fps(self):
+        data = {"format": {}, "streams": [{"codec_type": "video", "r_frame_rate": "0/0"}]}
+        info = MediaInfo.from_ffprobe("a.mp4", 10, data)
+        assert info.has_audio is False
+        assert info.duration == 0.0
+        assert info.fps == 30.0
+
+    def test_not_available_fields(self):
+        # Streams ao vivo/containers quebrados: ffprobe escreve "N/A"
+        data = {"format": {"duration": "N/A"}, "streams": [{"codec_type": "video", "width": "N/A"}]}
+        info = MediaInfo.from_ffprobe("a.mp4", 10, data)
+        assert (info.duration, info.width, info.height) == (0.0, 0, 0)
+
+    def test_unexpected_output_is_runtime_error(self, monkeypatch):
+        class FakeProcess:
+            returncode = 0
+
+            async def communicate(self):
+                return b'{"streams": "nope"}', b""
+
+        async def fake_exec(*args, **kwargs):
+            return FakeProcess()
+
+        monkeypatch.setattr(media_info.asyncio, "create_subprocess_exec", fake_exec)
+        with pytest.raises(RuntimeError):
+            asyncio.run(media_info._run_ffprobe("a.mp4", 10, 5))
+
+
+@pytest.fixture
+def fake_ffprobe(monkeypatch):
+    calls = []
+
+    async def fake(path, file_size, timeout):
+        calls.append(path)
+        await asyncio.sleep(0.01)
+        return MediaInfo(path=path, duration=float(file_size), has_audio=True, has_video=True, file_size=file_size)
+
+    monkeypatch.setattr(media_info, "_run_ffprobe", fake)
+    return calls
+
+
+def _write(path, size):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return str(path)
+
+
+class TestMediaInfoCache:
+    def test_repeated_probes_hit_cache(self, tmp_path, fake_ffprobe):
+        cache = MediaInfoCache(max_entries=8)
+        path = _write(tmp_path / "a.mp4", 5)
+
+        async def run():
+            return [await cache.probe(path) for _ in range(5)]
+
+        infos = asyncio.run(run())
+        assert len(fake_ffprobe) == 1
+        assert all(i is infos[0] for i in infos)
+        assert cache.stats()["hits"] == 4
+
+    def test_rewritten_file_is_reprobed(self, tmp_path, fake_ffprobe):
+        cache = MediaInfoCache(max_entries=8)
+        path = _write(tmp_path / "a.mp4", 5)
+        first = asyncio.run(cache.probe(path))
+        _write(tmp_path / "a.mp4", 7)
+        second = asyncio.run(cache.probe(path))
+        assert (first.duration, second.duration) == (5.0, 7.0)
+        assert len(fake_ffprobe) == 2
+
+    def test_lru_is_bounded(self, tmp_path, fake_ffprobe):
+        cache = MediaInfoCache(max_entries=2)
+        paths = [_write(tmp_path / f"{i}.mp4", i + 1) for i in range(3)]
+
+        async def run():
+            for p in paths:
+                await cache.probe(p)
+            await cache.probe(paths[0])
+
+        asyncio.run(run())
+        assert cache.stats()["entries"] == 2
+        assert len(fake_ffprobe) == 4  # paths[0] foi despejado
+
+    def test_concurrent_probes_share_subprocess(self, tmp_path, fake_ffprobe):
+        cache = MediaInfoCache(max_entries=8)
+        path = _write(tmp_path / "a.mp4", 5)
+
+        async def run():
+            return await asyncio.gather(*(cache.probe(path) for _ in range(4)))
+
+        infos = asyncio.run(run())
+        assert len(fake_ffprobe) == 1
+        assert len({id(i) for i in infos}) == 1
+
+    def test_failures_are_not_cached(self, tmp_path, monkeypatch):
+        cache = MediaInfoCache(max_entries=8)
+        path = _write(tmp_path / "a.mp4", 5)
+        calls = []
+
+        async def broken(path, file_size, timeout):
+            calls.append(path)
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(media_info, "_run_ffprobe", broken)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                asyncio.run(cache.probe(path))
+        assert len(calls) == 2
+
+    def test_missing_file_raises(self, tmp_path, fake_ffprobe):
+        with pytest.raises(RuntimeError):
+            asyncio.run(MediaInfoCache().probe(str(tmp_path / "nope.mp4")))
+        assert fake_ffprobe == []
+
+    def test_persistent_store_survives_new_instance(self, tmp_path, fake_ffprobe):
+        db_path = str(tmp_path / "media_info.db")
+        path = _write(tmp_path / "a.mp4", 5)
+        asyncio.run(MediaInfoCache(db_path=db_path).probe(path))
+
+        fresh = MediaInfoCache(db_path=db_path)
+        info = asyncio.run(fresh.probe(path))
+        assert info.duration == 5.0
+        assert len(fake_ffprobe) == 1
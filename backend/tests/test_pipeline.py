@@ -0,0 +1,145 @@
+"""
+Testes unitarios para o pipeline em estagios (core/clipper/pipeline.py)
+=======================================================================
+
+Valida (com estagios falsos, sem download/Whisper/FFmpeg):
+    - Limite de concorrencia por estagio
+    - Sobreposicao entre jobs (download do proximo durante o render)
+    - Back-pressure: job so libera o slot apos ser admitido no proximo estagio
+    - Falha em um estagio encerra o job e libera a capacidade
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.clipper.pipeline import ClipPipeline, PipelineStage
+
+
+def _pipeline(download=2, transcribe=1, render=1, backlog=1):
+    return ClipPipeline([
+        PipelineStage("download", download, backlog),
+        PipelineStage("transcribe", transcribe, backlog),
+        PipelineStage("render", render, backlog),
+    ])
+
+
+class Recorder:
+    def __init__(self, durations):
+        self.durations = durations
+        self.active = {name: 0 for name in durations}
+        self.peak = {name: 0 for name in durations}
+        self.events = []
+
+    def step(self, job_id, name, ok=True):
+        async def run():
+            self.active[name] += 1
+            self.peak[name] = max(self.peak[name], self.active[name])
+            self.events.append(("start", name, job_id))
+            await asyncio.sleep(self.durations[name])
+            self.active[name] -= 1
+            self.events.append(("end", name, job_id))
+            return ok
+        return run
+
+    def steps(self, job_id, fail_at=None):
+        return [(name, self.step(job_id, name, ok=name != fail_at)) for name in self.durations]
+
+
+class TestClipPipeline:
+    def test_stage_limits_respected(self):
+        pipe = _pipeline(download=2)
+        rec = Recorder({"download": 0.01, "transcribe": 0.01, "render": 0.01})
+
+        async def run():
+            return await asyncio.gather(*(pipe.run(i, rec.steps(i)) for i in range(6)))
+
+        assert all(asyncio.run(run()))
+        assert rec.peak == {"download": 2, "transcribe": 1, "render": 1}
+        assert all(s["running"] == 0 and s["waiting"] == 0 for s in pipe.stats().values())
+
+    def test_stages_overlap_across_jobs(self):
+        pipe = _pipeline()
+        rec = Recorder({"download": 0.02, "transcribe": 0.02, "render": 0.05})
+
+        async def run():
+            await asyncio.gather(*(pipe.run(i, rec.steps(i)) for i in range(3)))
+
+        asyncio.run(run())
+        # Job 1 comeca o download antes do job 0 terminar o render
+        render0_end = rec.events.index(("end", "render", 0))
+        assert rec.events.index(("start", "download", 1)) < render0_end
+        assert rec.events.index(("start", "transcribe", 1)) < render0_end
+
+    def test_backpressure_holds_upstream_slot(self):
+        pipe = _pipeline(download=1, transcribe=1, render=1, backlog=0)
+        gate = asyncio.Event()
+
+        async def blocked():
+            await gate.wait()
+            return True
+
+        async def quick():
+            return True
+
+        async def run():
+            first = asyncio.create_task(pipe.run(0, [("transcribe", quick), ("render", blocked)]))
+            second = asyncio.create_task(pipe.run(1, [("transcribe", quick), ("render", quick)]))
+            await asyncio.sleep(0.02)
+            # Job 1 terminou a transcricao mas o render esta cheio: segura o slot
+            snapshot = pipe.stats()
+            gate.set()
+            await asyncio.gather(first, second)
+            return snapshot
+
+        snapshot = asyncio.run(run())
+        assert snapshot["render"]["running"] == 1
+        assert snapshot["transcribe"]["running"] == 1
+
+    def test_failed_stage_stops_job_and_frees_capacity(self):
+        pipe = _pipeline()
+        rec = Recorder({"download": 0.0, "transcribe": 0.0, "render": 0.0})
+
+        async def run():
+            return await pipe.run(0, rec.steps(0, fail_at="transcribe"))
+
+        assert asyncio.run(run()) is False
+        assert ("start", "render", 0) not in rec.events
+        assert all(s["running"] == 0 and s["waiting"] == 0 for s in pipe.stats().values())
+
+    def test_exception_releases_capacity(self):
+        pipe = _pipeline()
+
+        async def boom():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(pipe.run(0, [("download", boom)]))
+        assert all(s["running"] == 0 and s["waiting"] == 0 for s in pipe.stats().values())
+
+    def test_resume_from_later_stage(self):
+        pipe = _pipeline()
+        rec = Recorder({"download": 0.0, "transcribe": 0.0, "render": 0.0})
+        asyncio.run(pipe.run(0, rec.steps(0)[2:]))
+        assert [e[1] for e in rec.events if e[0] == "start"] == ["render"]
+
+    def test_wait_callback_when_stage_busy(self):
+        pipe = _pipeline(render=1)
+        waited = []
+
+        async def slow():
+            await asyncio.sleep(0.02)
+            return True
+
+        async def run():
+            await asyncio.gather(
+                pipe.run(0, [("render", slow)]),
+                pipe.run(1, [("render", slow)], on_wait=waited.append),
+            )
+
+        asyncio.run(run())
+        assert waited == ["render"]
@@ -0,0 +1,97 @@
+"""
+Testes unitarios para o indice de calendario do SmartLogic (core/schedule_index.py)
+====================================================================================
+
+Valida (SQLite em memoria):
+    - Contagem de posts por dia e evento mais proximo via bisect
+    - Eventos concluidos/falhos nao contam; exclude_event_id e respeitado
+    - Invalidacao por listeners ORM e por eventos do Scheduler
+    - validate_batch carrega cada perfil uma vez so
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core import schedule_index as schedule_index_module, scheduler as scheduler_module
+from core.database import Base
+from core.models import ScheduleItem
+from core.schedule_index import SP_TZ, schedule_index
+from core.smart_logic import smart_logic
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[ScheduleItem.__table__])
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(schedule_index_module, "SessionLocal", factory)
+    monkeypatch.setattr(scheduler_module, "SessionLocal", factory)
+    schedule_index.invalidate()
+    session = factory()
+    yield session
+    session.close()
+    schedule_index.invalidate()
+    engine.dispose()
+
+
+def _add(db, when, profile="p1", status="pending"):
+    item = ScheduleItem(profile_slug=profile, video_path="v.mp4", scheduled_time=when, status=status)
+    db.add(item)
+    db.commit()
+    return item
+
+
+def _sp(*args):
+    return datetime(*args, tzinfo=SP_TZ)
+
+
+class TestScheduleIndex:
+    def test_day_count_and_nearest(self, db):
+        _add(db, datetime(2026, 5, 4, 10, 0))
+        _add(db, datetime(2026, 5, 4, 20, 0))
+        _add(db, datetime(2026, 5, 5, 9, 0))
+        _add(db, datetime(2026, 5, 4, 15, 0), status="completed")
+        _add(db, datetime(2026, 5, 4, 16, 0), profile="p2")
+
+        assert smart_logic._get_posts_count_for_day("p1", _sp(2026, 5, 4, 13, 0)) == 2
+        nearest_time, distance = smart_logic._get_nearest_event("p1", _sp(2026, 5, 4, 13, 0))
+        assert nearest_time == _sp(2026, 5, 4, 10, 0)
+        assert distance == 3.0
+
+    def test_exclude_event_id(self, db):
+        item = _add(db, datetime(2026, 5, 4, 12, 0))
+        result = smart_logic.check_conflict("p1", _sp(2026, 5, 4, 12, 30), exclude_event_id=str(item.id))
+        assert result.is_valid
+        assert not smart_logic.check_conflict("p1", _sp(2026, 5, 4, 12, 30)).is_valid
+
+    def test_orm_writes_invalidate(self, db):
+        item = _add(db, datetime(2026, 5, 4, 12, 0))
+        assert smart_logic._get_posts_count_for_day("p1", _sp(2026, 5, 4)) == 1
+        item.status = "failed"
+        db.commit()
+        assert smart_logic._get_posts_count_for_day("p1", _sp(2026, 5, 4)) == 0
+
+    def test_scheduler_bulk_change_invalidates(self, db):
+        _add(db, datetime(2026, 5, 4, 12, 0), profile="ptiktok_tmp")
+        assert smart_logic._get_posts_count_for_day("ptiktok_tmp", _sp(2026, 5, 4)) == 1
+        scheduler_module.scheduler_service.cleanup_phantom_events()
+        assert smart_logic._get_posts_count_for_day("ptiktok_tmp", _sp(2026, 5, 4)) == 0
+
+    def test_validate_batch_loads_each_profile_once(self, db):
+        for day in range(7):
+            _add(db, datetime(2026, 5, 4 + day, 12, 0))
+        plan = [
+            {"id": f"e{i}", "profile_id": "p1", "scheduled_time": (datetime(2026, 5, 4, 18, 0) + timedelta(days=i // 2, hours=i % 2)).replace(tzinfo=SP_TZ).isoformat()}
+            for i in range(14)
+        ]
+        before = schedule_index.loads
+        results = smart_logic.validate_batch(plan)
+        assert len(results) == 14
+        assert schedule_index.loads - before == 1
@@ -0,0 +1,252 @@
+"""
+Testes unitarios para a consulta de itens vencidos do Scheduler (core/scheduler.py)
+====================================================================================
+
+Valida (SQLite em memoria, sem upload real):
+    - scheduled_time_utc normalizado pelos listeners (naive = Sao Paulo)
+    - check_due_items so dispara itens com scheduled_time_utc <= agora
+    - Heap de proximos vencimentos define quanto o loop dorme
+    - Migracao adiciona a coluna/indice e faz backfill
+    - Claim/finalize pela AsyncSession (erro claro sem driver async)
+    - retry "now" chamado de uma thread roda no loop do scheduler
+"""
+
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core import database
+from core import scheduler as scheduler_module
+from core.database import Base
+from core.models import ScheduleItem, schedule_time_to_utc
+from core.logger import JsonLogger
+from core.scheduler import Scheduler, migrate_schedule_utc
+
+
+@pytest.fixture
+def engine(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schedule.db'}")
+    Base.metadata.create_all(bind=engine, tables=[ScheduleItem.__table__])
+    monkeypatch.setattr(scheduler_module, "SessionLocal", sessionmaker(bind=engine))
+    # NullPool: cada asyncio.run do teste abre conexoes no proprio loop
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'schedule.db'}", poolclass=NullPool)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False))
+    monkeypatch.setattr(scheduler_module, "DATA_DIR", str(tmp_path))
+    # Nao escrever no logs/app.jsonl versionado (nem no indice de logs)
+    monkeypatch.setattr(scheduler_module, "logger", JsonLogger(str(tmp_path / "app.jsonl"), index=None))
+    yield engine
+    engine.dispose()
+
+
+def _sp_naive(delta: timedelta) -> datetime:
+    """Horario naive em Sao Paulo (como o resto do sistema grava)."""
+    sp = datetime.now(timezone.utc) + delta
+    return sp.astimezone(scheduler_module.ZoneInfo("America/Sao_Paulo")).replace(tzinfo=None)
+
+
+def _add(engine, delta, status="pending"):
+    db = sessionmaker(bind=engine)()
+    item = ScheduleItem(profile_slug="p1", video_path="v.mp4", scheduled_time=_sp_naive(delta), status=status)
+    db.add(item)
+    db.commit()
+    item_id = item.id
+    db.close()
+    return item_id
+
+
+class TestUtcNormalization:
+    def test_naive_is_sao_paulo(self):
+        assert schedule_time_to_utc(datetime(2026, 1, 1, 12, 0)) == datetime(2026, 1, 1, 15, 0)
+
+    def test_offset_is_dropped_like_the_db(self):
+        aware = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+        assert schedule_time_to_utc(aware) == datetime(2026, 1, 1, 15, 0)
+
+    def test_listener_tracks_updates(self, engine):
+        db = sessionmaker(bind=engine)()
+        item = ScheduleItem(profile_slug="p1", scheduled_time=datetime(2026, 1, 1, 12, 0))
+        db.add(item)
+        db.commit()
+        assert item.scheduled_time_utc == datetime(2026, 1, 1, 15, 0)
+        item.scheduled_time = datetime(2026, 1, 2, 9, 30)
+        db.commit()
+        assert item.scheduled_time_utc == datetime(2026, 1, 2, 12, 30)
+        db.close()
+
+
+class TestCheckDueItems:
+    def _run(self, monkeypatch, sched):
+        fired = []
+
+        async def fake_execute(item, db):
+            fired.append(item.id)
+
+        monkeypatch.setattr(sched, "execute_due_item", fake_execute)
+        monkeypatch.setattr("core.circuit_breaker.circuit_breaker.is_open", lambda: False)
+        asyncio.run(sched.check_due_items())
+        return fired
+
+    def test_only_due_pending_items_fire(self, engine, monkeypatch):
+        due = _add(engine, timedelta(minutes=-5))
+        _add(engine, timedelta(minutes=10))
+        _add(engine, timedelta(minutes=-5), status="completed")
+        assert self._run(monkeypatch, Scheduler()) == [due]
+
+    def test_heap_holds_next_due_time(self, engine, monkeypatch):
+        _add(engine, timedelta(minutes=30))
+        _add(engine, timedelta(minutes=10))
+        sched = Scheduler()
+        self._run(monkeypatch, sched)
+        assert len(sched._due_heap) == 2
+        delay = sched._seconds_until_next_wake(time.monotonic() + 3600)
+        assert 590 < delay <= 600
+
+    def test_housekeeping_caps_sleep(self, engine, monkeypatch):
+        _add(engine, timedelta(hours=2))
+        sched = Scheduler()
+        self._run(monkeypatch, sched)
+        assert sched._seconds_until_next_wake(time.monotonic() + 30) <= 30
+
+    def test_raw_sql_rows_are_backfilled(self, engine, monkeypatch):
+        item_id = _add(engine, timedelta(minutes=-1))
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE schedule SET scheduled_time_utc = NULL"))
+        assert self._run(monkeypatch, Scheduler()) == [item_id]
+
+
+class TestClaimAndFinalize:
+    def test_claim_is_atomic_and_finalize_updates(self, engine):
+        item_id = _add(engine, timedelta(minutes=-1))
+        sched = Scheduler()
+
+        async def run():
+            first = await sched._claim_scheduled_item(item_id, new_status="queued")
+            second = await sched._claim_scheduled_item(item_id, new_status="queued")
+            await sched._finalize_scheduled_item(item_id, "failed", {"message": "boom"})
+            return first, second
+
+        assert asyncio.run(run()) == (True, False)
+        db = sessionmaker(bind=engine)()
+        item = db.get(ScheduleItem, item_id)
+        assert item.status == "failed" and item.error_message == "boom"
+        assert item.metadata_info["error"] == "boom"
+        db.close()
+
+
+class TestMissingAsyncDriver:
+    def test_claim_raises_clear_error(self, monkeypatch):
+        monkeypatch.setattr(database, "AsyncSessionLocal", None)
+        with pytest.raises(RuntimeError, match="Async database driver"):
+            asyncio.run(Scheduler()._claim_scheduled_item(1))
+
+
+class TestRetryNow:
+    def test_thread_call_runs_on_scheduler_loop(self, engine, monkeypatch, tmp_path):
+        monkeypatch.setattr("core.config.DATA_DIR", str(tmp_path))
+        video = tmp_path / "clip_abc123.mp4"
+        video.write_bytes(b"x")
+        db = sessionmaker(bind=engine)()
+        item = ScheduleItem(profile_slug="p1", video_path=str(video), scheduled_time=_sp_naive(timedelta(hours=-1)), status="failed")
+        db.add(item)
+        db.commit()
+        item_id = item.id
+        db.close()
+
+        sched = Scheduler()
+        ran_on = []
+
+        async def fake_execute(item, db):
+            ran_on.append((item.id, asyncio.get_running_loop()))
+
+        monkeypatch.setattr(sched, "execute_due_item", fake_execute)
+
+        async def run():
+            sched._loop = asyncio.get_running_loop()
+            # Endpoint sync: retry_event roda no threadpool, sem loop
+            result = await asyncio.to_thread(sched.retry_event, str(item_id), "now")
+            for _ in range(200):  # execute_single_item espera 0.5s pelo commit
+                if ran_on:
+                    break
+                await asyncio.sleep(0.01)
+            return result
+
+        result = asyncio.run(run())
+        assert result["success"] and result["new_status"] == "pending"
+        assert ran_on and ran_on[0][0] == item_id and ran_on[0][1] is sched._loop
+
+
+class TestNotify:
+    def test_push_from_running_loop_wakes_sleeper(self):
+        sched = Scheduler()
+
+        async def run():
+            sched._loop = asyncio.get_running_loop()
+            sched._wake = asyncio.Event()
+            sleeper = asyncio.create_task(sched._sleep_until_next_due(time.monotonic() + 30))
+            await asyncio.sleep(0.01)
+            sched._notify_schedule_change(1, datetime.now(timezone.utc).replace(tzinfo=None))
+            await asyncio.wait_for(sleeper, timeout=1)
+
+        asyncio.run(run())
+        assert len(sched._due_heap) == 1
+
+
+class TestMigration:
+    def test_adds_column_index_and_backfills(self, monkeypatch, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE schedule (id INTEGER PRIMARY KEY, profile_slug VARCHAR, video_path VARCHAR,"
+                " scheduled_time DATETIME, status VARCHAR, error_message VARCHAR, metadata_info JSON)"
+            ))
+            conn.execute(text(
+                "INSERT INTO schedule (profile_slug, scheduled_time, status)"
+                " VALUES ('p1', '2026-01-01 12:00:00.000000', 'pending')"
+            ))
+        monkeypatch.setattr(scheduler_module, "SessionLocal", sessionmaker(bind=engine))
+
+        assert migrate_schedule_utc(engine) == 1
+        assert migrate_schedule_utc(engine) == 0
+        indexes = {ix["name"] for ix in inspect(engine).get_indexes("schedule")}
+        assert "ix_schedule_status_due_utc" in indexes
+        with engine.connect() as conn:
+            value = conn.execute(text("SELECT scheduled_time_utc FROM schedule")).scalar()
+        assert value.startswith("2026-01-01 15:00:00")
+        engine.dispose()
+
+    def test_concurrent_migration_is_tolerated(self, monkeypatch, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'race.db'}")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE schedule (id INTEGER PRIMARY KEY, profile_slug VARCHAR, video_path VARCHAR,"
+                " scheduled_time DATETIME, status VARCHAR, error_message VARCHAR, metadata_info JSON,"
+                " scheduled_time_utc DATETIME)"
+            ))
+        monkeypatch.setattr(scheduler_module, "SessionLocal", sessionmaker(bind=engine))
+        real_inspect = scheduler_module.sa_inspect
+        calls = []
+
+        class StaleInspector:
+            """Primeira leitura antes de outro processo adicionar a coluna."""
+            def __init__(self, bind):
+                self._real = real_inspect(bind)
+
+            def get_columns(self, table):
+                calls.append(table)
+                columns = self._real.get_columns(table)
+                return [c for c in columns if c["name"] != "scheduled_time_utc"] if len(calls) == 1 else columns
+
+        monkeypatch.setattr(scheduler_module, "sa_inspect", StaleInspector)
+        assert migrate_schedule_utc(engine) == 0
+        assert len(calls) == 2
+        engine.dispose()
@@ -0,0 +1,120 @@
+"""
+Testes unitarios para a alocacao de slots em memoria (core/slot_allocator.py)
+==============================================================================
+
+Valida (SQLite em memoria):
+    - Janela de buffer do is_free igual ao antigo is_slot_available
+    - find_next_available_slot com 2 queries, independente de quantos passos
+    - calculate_next_slots respeita schedule + video_queue e nao repete horas
+    - Lote multi-perfil reaproveita a mesma carga
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core import auto_scheduler, scheduler as scheduler_module
+from core.database import Base
+from core.models import ScheduleItem, VideoQueue
+from core.scheduler import Scheduler
+from core.slot_allocator import OccupancyIndex, SlotAllocator
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[ScheduleItem.__table__, VideoQueue.__table__])
+    engine.queries = []
+    event.listen(engine, "before_cursor_execute", lambda *a: engine.queries.append(a[2]))
+    monkeypatch.setattr(scheduler_module, "SessionLocal", sessionmaker(bind=engine))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def _schedule(db, when, profile="p1", status="pending"):
+    db.add(ScheduleItem(profile_slug=profile, video_path="v.mp4", scheduled_time=when, status=status))
+    db.commit()
+
+
+def _selects(engine):
+    return [q for q in engine.queries if q.lstrip().upper().startswith("SELECT")]
+
+
+class TestOccupancyIndex:
+    def test_buffer_is_exclusive(self):
+        idx = OccupancyIndex([datetime(2026, 1, 1, 12, 0)])
+        assert not idx.is_free(datetime(2026, 1, 1, 12, 10))
+        assert idx.is_free(datetime(2026, 1, 1, 12, 15))
+        assert idx.is_free(datetime(2026, 1, 1, 11, 45))
+
+    def test_hour_taken_and_day_count(self):
+        idx = OccupancyIndex([datetime(2026, 1, 1, 12, 59), datetime(2026, 1, 2, 9, 0)])
+        assert idx.hour_taken(datetime(2026, 1, 1, 12, 5))
+        assert not idx.hour_taken(datetime(2026, 1, 1, 13, 0))
+        assert idx.count_between(datetime(2026, 1, 2), datetime(2026, 1, 2, 23, 59, 59)) == 1
+
+
+class TestFindNextAvailableSlot:
+    def test_skips_busy_steps_with_constant_queries(self, engine, db):
+        start = datetime(2026, 3, 2, 10, 0)
+        for k in range(40):
+            _schedule(db, start + timedelta(minutes=15 * k))
+        engine.queries.clear()
+
+        slot = Scheduler().find_next_available_slot("p1", start)
+        assert slot == (start + timedelta(minutes=15 * 40)).isoformat()
+        assert len(_selects(engine)) == 2
+
+    def test_queued_videos_count_as_occupied(self, db):
+        start = datetime(2026, 3, 2, 10, 0)
+        db.add(VideoQueue(profile_slug="p1", video_path="v.mp4", position=0, status="scheduled", scheduled_at=start))
+        db.commit()
+        assert Scheduler().find_next_available_slot("p1", start) == (start + timedelta(minutes=15)).isoformat()
+
+    def test_shared_allocator_reserves_slots(self, db):
+        start = datetime(2026, 3, 2, 10, 0)
+        allocator = SlotAllocator(db, schedule_statuses=None)
+        sched = Scheduler()
+        first = sched.find_next_available_slot("p1", start, allocator=allocator)
+        second = sched.find_next_available_slot("p1", start, allocator=allocator)
+        assert (first, second) == (start.isoformat(), (start + timedelta(minutes=15)).isoformat())
+
+
+class TestCalculateNextSlots:
+    def test_occupied_hours_skipped(self, db):
+        tomorrow = datetime.now(auto_scheduler.SP_TZ).date() + timedelta(days=1)
+        busy = datetime(tomorrow.year, tomorrow.month, tomorrow.day, 12, 30)
+        _schedule(db, busy)
+        _schedule(db, busy + timedelta(hours=6), status="failed")  # falhas nao ocupam
+
+        slots = auto_scheduler.calculate_next_slots("p1", 20, [12, 18], db)
+        assert len(slots) == 20
+        assert all(not (s.date() == tomorrow and s.hour == 12) for s in slots)
+        hours = [s.replace(minute=0, second=0) for s in slots]
+        assert len(hours) == len(set(hours))
+
+    def test_batch_for_profiles_loads_once(self, engine, db):
+        engine.queries.clear()
+        result = auto_scheduler.calculate_slots_for_profiles({"p1": 5, "p2": 5, "p3": 5}, [9, 15, 21], db)
+        assert {slug: len(slots) for slug, slots in result.items()} == {"p1": 5, "p2": 5, "p3": 5}
+        assert len(_selects(engine)) == 2
+
+    def test_successive_batches_do_not_collide(self, db):
+        allocator = SlotAllocator(db)
+        first = auto_scheduler.calculate_next_slots("p1", 4, [12, 18], db, allocator=allocator)
+        second = auto_scheduler.calculate_next_slots("p1", 4, [12, 18], db, allocator=allocator)
+        hours = {s.replace(minute=0, second=0) for s in first + second}
+        assert len(hours) == 8
@@ -0,0 +1,91 @@
+"""
+Testes unitarios para o StatusManager em memoria (core/status_manager.py)
+=========================================================================
+
+Valida (arquivos temporarios):
+    - update_status nao le nem escreve o disco na hora; flush coalescido
+    - Logs preservados quando nao informados
+    - Callback recebe o status completo, e so quando algo mudou
+    - Snapshot escrito por outro processo e recarregado no get_status
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core import status_manager as status_module
+from core.status_manager import StatusManager
+
+
+class TestStatusManager:
+    def test_updates_are_coalesced(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(status_module, "STATUS_PERSIST_INTERVAL", 60)
+        path = str(tmp_path / "status.json")
+        sm = StatusManager(path)
+        for i in range(20):
+            sm.update_status("busy", step="uploading", progress=i, logs=["x"] if i == 0 else None)
+        assert not os.path.exists(path)
+        assert sm.get_status()["job"]["progress"] == 19
+        assert sm.get_status()["job"]["logs"] == ["x"]
+
+        sm.flush()
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["job"]["progress"] == 19
+        assert data["job"]["logs"] == ["x"]
+
+    def test_restart_restores_snapshot(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(status_module, "STATUS_PERSIST_INTERVAL", 60)
+        path = str(tmp_path / "status.json")
+        sm = StatusManager(path)
+        sm.update_status("error", logs=["falhou"])
+        sm.flush()
+        assert StatusManager(path).get_status()["job"]["logs"] == ["falhou"]
+
+    def test_broadcasts_full_status_on_change(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(status_module, "STATUS_PERSIST_INTERVAL", 60)
+        sm = StatusManager(str(tmp_path / "status.json"))
+        sent = []
+
+        async def callback(payload):
+            sent.append(payload)
+
+        async def run():
+            sm.set_async_callback(callback)
+            sm.update_status("busy", step="uploading", progress=10)
+            sm.update_status("busy", step="uploading", progress=10)  # sem mudanca
+            sm.update_status("busy", step="uploading", progress=20)
+            await asyncio.sleep(0.05)
+
+        asyncio.run(run())
+        assert len(sent) == 2
+        assert sent[0]["state"] == "busy" and "bots" in sent[0]
+        # Completo mesmo quando so o job mudou (o frontend substitui o estado)
+        assert {"state", "job", "bots", "version", "system"} <= set(sent[1])
+        assert sent[1]["state"] == "busy" and sent[1]["job"]["progress"] == 20
+        assert sent[1]["version"] > sent[0]["version"]
+
+    def test_external_snapshot_is_picked_up(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(status_module, "STATUS_PERSIST_INTERVAL", 60)
+        path = str(tmp_path / "status.json")
+        sm = StatusManager(path)
+        sm.update_status("idle")
+        sm.flush()
+
+        other = {"state": "busy", "timestamp": time.time() + 1, "job": {"name": "x", "progress": 5}}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(other, f)
+        os.utime(path, (time.time() + 5, time.time() + 5))
+        assert sm.get_status()["state"] == "busy"
+
+    def test_stats_do_not_block(self, tmp_path):
+        sm = StatusManager(str(tmp_path / "status.json"))
+        sm._sample_system_stats()
+        start = time.monotonic()
+        for _ in range(20):
+            sm.get_status()
+        assert time.monotonic() - start < 0.5
@@ -0,0 +1,56 @@
+"""
+Testes unitarios para o crossfade N-way do Stitcher
+====================================================
+
+Valida (sem executar FFmpeg):
+    - Offsets acumulados do xfade encadeado
+    - Silencio gerado para clips sem audio
+    - Validacao de parametros
+"""
+
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.clipper.stitcher import _build_xfade_chain_filter
+
+
+def _offsets(filter_complex: str):
+    return [float(m) for m in re.findall(r"xfade=transition=fade:duration=[\d.]+:offset=([\d.]+)", filter_complex)]
+
+
+class TestXfadeChainFilter:
+    def test_two_clips_matches_pairwise_offset(self):
+        fc = _build_xfade_chain_filter([30.0, 40.0], [True, True], [0.5])
+        assert _offsets(fc) == [29.5]
+        assert fc.endswith("[a]")
+        assert "[v]" in fc
+
+    def test_offsets_accumulate_over_chain(self):
+        fc = _build_xfade_chain_filter([30.0, 40.0, 20.0, 25.0], [True] * 4, [0.5, 0.4, 0.6])
+        # 30-0.5 ; (30+40-0.5)-0.4 ; (30+40+20-0.5-0.4)-0.6
+        assert _offsets(fc) == pytest.approx([29.5, 69.1, 88.5])
+
+    def test_single_output_labels(self):
+        fc = _build_xfade_chain_filter([10.0, 10.0, 10.0], [True] * 3, [0.5, 0.5])
+        assert fc.count("[v];") + fc.endswith("[v]") == 1
+        assert fc.count("acrossfade") == 2
+        assert "[vx1]" in fc and "[ax1]" in fc
+
+    def test_silence_for_clips_without_audio(self):
+        fc = _build_xfade_chain_filter([10.0, 12.0, 8.0], [True, False, True], [0.5, 0.5])
+        assert "[1:a]" not in fc
+        assert "anullsrc=channel_layout=stereo:sample_rate=44100,atrim=0:12.0000[a1]" in fc
+        assert "[0:a]" in fc and "[2:a]" in fc
+
+    def test_inconsistent_params_raise(self):
+        with pytest.raises(ValueError):
+            _build_xfade_chain_filter([10.0], [True], [])
+        with pytest.raises(ValueError):
+            _build_xfade_chain_filter([10.0, 10.0], [True], [0.5])
+        with pytest.raises(ValueError):
+            _build_xfade_chain_filter([10.0, 10.0, 10.0], [True] * 3, [0.5])
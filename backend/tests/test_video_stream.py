@@ -0,0 +1,122 @@
+"""
+Testes unitarios para o stream de videos (GET /videos/stream/{filename})
+========================================================================
+
+Valida (diretorios temporarios):
+    - Range simples e multi-range, ETag forte
+    - 304 via If-None-Match e If-Modified-Since
+    - X-Accel-Redirect quando configurado
+    - zerocopysend usado quando o servidor ASGI oferece a extensao
+    - Hooks privados do FileResponse conferidos contra o Starlette instalado
+"""
+
+import asyncio
+import os
+import sys
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.api import video_stream
+from app.api.endpoints import videos
+from core.file_catalog import FileCatalog
+
+CONTENT = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    dirs = {k: str(tmp_path / k) for k in ("exports", "pending", "done")}
+    for d in dirs.values():
+        os.makedirs(d)
+    with open(os.path.join(dirs["pending"], "v.mp4"), "wb") as f:
+        f.write(CONTENT)
+    catalog = FileCatalog(dirs)
+    monkeypatch.setattr(videos, "file_catalog", catalog)
+    return catalog
+
+
+@pytest.fixture
+def client(catalog):
+    app = FastAPI()
+    app.include_router(videos.router, prefix="/videos")
+    return TestClient(app)
+
+
+class TestStreamVideo:
+    def test_full_and_ranges(self, client):
+        full = client.get("/videos/stream/v.mp4")
+        assert full.status_code == 200 and full.content == CONTENT
+        assert full.headers["accept-ranges"] == "bytes"
+        assert not full.headers["etag"].startswith("W/")
+
+        part = client.get("/videos/stream/v.mp4", headers={"Range": "bytes=100-199"})
+        assert part.status_code == 206 and part.content == CONTENT[100:200]
+        assert part.headers["content-range"] == f"bytes 100-199/{len(CONTENT)}"
+
+        multi = client.get("/videos/stream/v.mp4", headers={"Range": "bytes=0-9,500-509"})
+        assert multi.status_code == 206
+        assert multi.headers["content-type"].startswith("multipart/byteranges")
+        assert CONTENT[500:510] in multi.content
+
+        assert client.get("/videos/stream/v.mp4", headers={"Range": "bytes=999999-"}).status_code == 416
+        assert client.get("/videos/stream/nada.mp4").status_code == 404
+
+    def test_conditional_requests(self, client, catalog):
+        etag = client.get("/videos/stream/v.mp4").headers["etag"]
+        assert client.get("/videos/stream/v.mp4", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/videos/stream/v.mp4", headers={"If-None-Match": '"outro"'}).status_code == 200
+
+        mtime = os.path.getmtime(os.path.join(catalog["pending"].directory, "v.mp4"))
+        since = formatdate(mtime + 10, usegmt=True)
+        assert client.get("/videos/stream/v.mp4", headers={"If-Modified-Since": since}).status_code == 304
+        before = formatdate(mtime - 3600, usegmt=True)
+        assert client.get("/videos/stream/v.mp4", headers={"If-Modified-Since": before}).status_code == 200
+
+    def test_accel_redirect(self, client, monkeypatch):
+        monkeypatch.setattr(videos, "ACCEL_REDIRECT_PREFIX", "/_protected_videos/")
+        monkeypatch.setattr(video_stream, "ACCEL_REDIRECT_PREFIX", "/_protected_videos/")
+        resp = client.get("/videos/stream/v.mp4")
+        assert resp.headers["x-accel-redirect"] == "/_protected_videos/pending/v.mp4"
+        assert resp.content == b""
+
+
+class TestZeroCopy:
+    def test_range_uses_zerocopysend(self, tmp_path):
+        path = str(tmp_path / "v.mp4")
+        with open(path, "wb") as f:
+            f.write(CONTENT)
+        response = video_stream.VideoFileResponse(path, stat_result=os.stat(path))
+        scope = {
+            "type": "http", "method": "GET", "asgi": {"spec_version": "2.4"},
+            "headers": [(b"range", b"bytes=10-19")],
+            "extensions": {video_stream.ZEROCOPY_EXTENSION: {}},
+        }
+        sent = []
+
+        async def send(message):
+            if message["type"] == video_stream.ZEROCOPY_EXTENSION:
+                message = {**message, "data": os.pread(message["file"].fileno(), message["count"], message["offset"])}
+            sent.append(message)
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        asyncio.run(response(scope, receive, send))
+        assert sent[0]["status"] == 206
+        assert dict(sent[0]["headers"])[b"content-length"] == b"10"
+        assert sent[1]["data"] == CONTENT[10:20]
+
+    def test_hook_signatures_are_checked(self, monkeypatch):
+        assert video_stream.ZEROCOPY_SUPPORTED
+        assert issubclass(video_stream.VideoFileResponse, video_stream._ZeroCopyFileResponse)
+
+        async def old_handle_simple(self, send, send_header_only):
+            pass
+
+        monkeypatch.setattr(video_stream.FileResponse, "_handle_simple", old_handle_simple)
+        assert not video_stream._file_response_hooks_match()
@@ -0,0 +1,112 @@
+"""
+Testes unitarios para a deteccao de facecam (core/clipper/vision.py)
+=====================================================================
+
+Valida (sem MTCNN/FFmpeg — detector e frames falsos):
+    - Escala de deteccao e reescala das coords para o frame original
+    - MTCNN chamado uma vez por lote de frames
+    - Cache por canal: reuso apos verificacao e redeteccao quando a face some
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.clipper import vision
+from core.clipper.vision import _detect_size, _faces_from_detection
+
+
+class FakeDetector:
+    """Detecta o retangulo claro desenhado no frame (funciona em recortes)."""
+
+    def __init__(self):
+        self.calls = []
+
+    def detect(self, imgs):
+        batch = imgs if isinstance(imgs, list) else [imgs]
+        self.calls.append([img.shape for img in batch])
+        boxes, probs = [], []
+        for img in batch:
+            ys, xs = np.nonzero(img[:, :, 0])
+            if len(xs) == 0:
+                boxes.append(None)
+                probs.append(None)
+                continue
+            boxes.append(np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]], dtype=float))
+            probs.append(np.array([0.99]))
+        return boxes, probs
+
+
+@pytest.fixture
+def fake_video(monkeypatch):
+    """Video 1920x1080 com uma "face" no canto superior esquerdo."""
+    vision.clear_facecam_cache()
+    detector = FakeDetector()
+    state = {"face": (80, 60, 280, 260)}  # x1, y1, x2, y2 no frame original
+
+    def frames(path, positions, duration, size):
+        dw, dh = size
+        scale = dw / 1920
+        out = []
+        for _ in positions:
+            frame = np.zeros((dh, dw, 3), np.uint8)
+            if state["face"]:
+                x1, y1, x2, y2 = (int(v * scale) for v in state["face"])
+                frame[y1:y2, x1:x2] = 255
+            out.append(frame)
+        return out
+
+    monkeypatch.setattr(vision, "_get_detector", lambda: detector)
+    monkeypatch.setattr(vision, "_video_meta", lambda path: (1920, 1080, 30.0))
+    monkeypatch.setattr(vision, "_sample_frames", frames)
+    detector.state = state
+    yield detector
+    vision.clear_facecam_cache()
+
+
+class TestScaling:
+    def test_detect_size_downscales_to_max_side(self):
+        assert _detect_size(1920, 1080, 960) == (960, 540, 0.5)
+        assert _detect_size(640, 360, 960) == (640, 360, 1.0)
+
+    def test_faces_rescaled_and_filtered(self):
+        faces = _faces_from_detection(
+            np.array([[10, 20, 60, 80], [0, 0, 5, 5]]), np.array([0.95, 0.5]), 0.5, offset=(100, 0)
+        )
+        assert faces == [(0.95, 120, 40, 100, 120)]
+
+
+class TestDetectFacecamBox:
+    def test_single_batched_call(self, fake_video):
+        box = vision.detect_facecam_box("a.mp4")
+        # Face (80,60,200,200) + padding (up=1.0, down=0.5, sides=1.5), limitada ao frame
+        assert box == (0, 0, 580, 360)
+        assert len(fake_video.calls) == 1
+        assert len(fake_video.calls[0]) == len(vision.SAMPLE_POSITIONS)
+        assert fake_video.calls[0][0] == (540, 960, 3)
+
+    def test_cached_box_reused_after_verification(self, fake_video):
+        first = vision.detect_facecam_box("a.mp4", channel_name="Gaules")
+        second = vision.detect_facecam_box("b.mp4", channel_name="gaules")
+        assert first == second
+        # 2a chamada: so a verificacao (3 recortes do box)
+        assert len(fake_video.calls) == 2
+        assert len(fake_video.calls[1]) == len(vision.VERIFY_SAMPLE_POSITIONS)
+        assert fake_video.calls[1][0] != (540, 960, 3)
+
+    def test_redetects_when_face_is_gone(self, fake_video):
+        vision.detect_facecam_box("a.mp4", channel_name="gaules")
+        fake_video.state["face"] = None
+        assert vision.detect_facecam_box("b.mp4", channel_name="gaules") is None
+        # verificacao + deteccao completa
+        assert len(fake_video.calls) == 3
+        assert vision._cache_get(("gaules", 1920, 1080, 1.0, 0.5, 1.5)) is None
+
+    def test_other_channel_not_shared(self, fake_video):
+        vision.detect_facecam_box("a.mp4", channel_name="gaules")
+        vision.detect_facecam_box("b.mp4", channel_name="casimiro")
+        assert [len(c) for c in fake_video.calls] == [10, 10]
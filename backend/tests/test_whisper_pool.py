@@ -0,0 +1,174 @@
+"""
+Testes unitarios para o Whisper Pool (core/clipper/whisper_pool.py)
+====================================================================
+
+Valida:
+    - Reuso de replicas entre leases (modelo carregado uma vez)
+    - Limite de replicas e guarda de memoria
+    - Eviction por ociosidade e shutdown
+
+Nao requer faster-whisper: usa um loader falso.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from core.clipper.whisper_pool import WhisperModelPool
+
+
+class FakeContext:
+    def __init__(self, name):
+        self.name = name
+        self.released = False
+
+    def __exit__(self, *args):
+        self.released = True
+        return False
+
+
+class FakeLoader:
+    def __init__(self):
+        self.loaded = []
+
+    def __call__(self, model_size):
+        ctx = FakeContext(f"{model_size}-{len(self.loaded)}")
+        self.loaded.append(ctx)
+        return ctx
+
+
+def _pool(loader, **kwargs):
+    kwargs.setdefault("size", 2)
+    kwargs.setdefault("idle_evict_seconds", 60)
+    kwargs.setdefault("memory_probe", lambda: None)
+    return WhisperModelPool(model_size="tiny", loader=loader, **kwargs)
+
+
+# ─── Reuso ──────────────────────────────────────────────────────────────
+
+class TestReuse:
+    def test_sequential_leases_load_once(self):
+        loader = FakeLoader()
+        pool = _pool(loader)
+        for _ in range(4):
+            with pool.lease() as ctx:
+                assert ctx is loader.loaded[0]
+        assert len(loader.loaded) == 1
+
+    def test_concurrent_leases_load_up_to_size(self):
+        loader = FakeLoader()
+        pool = _pool(loader, size=2)
+        with pool.lease() as a, pool.lease() as b:
+            assert a is not b
+        assert len(loader.loaded) == 2
+        assert pool.stats()["idle"] == 2
+
+    def test_waits_when_pool_exhausted(self):
+        loader = FakeLoader()
+        pool = _pool(loader, size=1)
+        with pool.lease():
+            with pytest.raises(TimeoutError):
+                with pool.lease(timeout=0.05):
+                    pass
+
+    def test_blocked_lease_gets_released_replica(self):
+        loader = FakeLoader()
+        pool = _pool(loader, size=1)
+        got = []
+        lease = pool.lease()
+        first = lease.__enter__()
+
+        t = threading.Thread(target=lambda: got.append(pool.lease(timeout=5).__enter__()))
+        t.start()
+        lease.__exit__(None, None, None)
+        t.join(timeout=5)
+
+        assert got == [first]
+        assert len(loader.loaded) == 1
+
+    def test_loader_failure_frees_slot(self):
+        calls = []
+
+        def broken(model_size):
+            calls.append(model_size)
+            raise RuntimeError("boom")
+
+        pool = _pool(broken, size=1)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                with pool.lease(timeout=0.1):
+                    pass
+        assert len(calls) == 2
+        assert pool.stats()["loaded"] == 0
+
+
+# ─── Memoria ────────────────────────────────────────────────────────────
+
+class TestMemoryGuard:
+    def test_first_replica_always_loads(self):
+        loader = FakeLoader()
+        pool = _pool(loader, memory_probe=lambda: 10, min_free_memory_mb=1000)
+        with pool.lease():
+            pass
+        assert len(loader.loaded) == 1
+
+    def test_extra_replica_blocked_under_pressure(self):
+        loader = FakeLoader()
+        pool = _pool(loader, size=2, memory_probe=lambda: 10, min_free_memory_mb=1000)
+        with pool.lease():
+            with pytest.raises(TimeoutError):
+                with pool.lease(timeout=0.05):
+                    pass
+        assert len(loader.loaded) == 1
+
+
+# ─── Eviction ───────────────────────────────────────────────────────────
+
+class TestEviction:
+    def test_recent_replicas_are_kept(self):
+        loader = FakeLoader()
+        pool = _pool(loader, idle_evict_seconds=3600)
+        with pool.lease():
+            pass
+        assert pool.evict_idle() == 0
+        assert not loader.loaded[0].released
+
+    def test_idle_replicas_are_unloaded(self):
+        loader = FakeLoader()
+        pool = _pool(loader, idle_evict_seconds=0.0001)
+        with pool.lease():
+            pass
+        time.sleep(0.01)
+        assert pool.evict_idle() == 1
+        assert loader.loaded[0].released
+        assert pool.stats()["loaded"] == 0
+
+    def test_force_respects_keep(self):
+        loader = FakeLoader()
+        pool = _pool(loader, size=2)
+        with pool.lease(), pool.lease():
+            pass
+        assert pool.evict_idle(keep=1, force=True) == 1
+        assert pool.stats()["loaded"] == 1
+
+    def test_close_unloads_idle_and_returned(self):
+        loader = FakeLoader()
+        pool = _pool(loader, size=2)
+        busy = pool.lease()
+        busy_ctx = busy.__enter__()
+        with pool.lease():
+            pass
+        pool.close()
+        idle_ctx = [c for c in loader.loaded if c is not busy_ctx][0]
+        assert idle_ctx.released
+        assert not busy_ctx.released
+        busy.__exit__(None, None, None)
+        assert all(c.released for c in loader.loaded)
+        with pytest.raises(RuntimeError):
+            with pool.lease():
+                pass
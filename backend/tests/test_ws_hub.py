@@ -0,0 +1,137 @@
+"""
+Testes unitarios para o hub de WebSocket (app/api/ws_hub.py)
+============================================================
+
+Valida (WebSockets falsos, sem servidor):
+    - Entrega por tópico, incluindo tópicos hierárquicos
+    - "*" não recebe o namespace "telemetry" (logs duplicados do LogTail)
+    - publish não espera um cliente lento; os demais recebem normalmente
+    - Fila cheia descarta as mais antigas e avisa com "overflow"
+    - Status do pipeline pendente: só o snapshot mais novo é enviado
+    - send acima do timeout derruba a conexão
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.api import ws_hub as ws_hub_module
+from app.api.ws_hub import HubConnection, WebSocketHub, parse_topics
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+        self.gate = None
+
+    async def send_text(self, text):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        self.closed = True
+
+
+def _types(ws):
+    return [m["type"] for m in ws.sent]
+
+
+class TestTopics:
+    def test_parse_and_match(self):
+        assert parse_topics(None) == {"*"}
+        assert parse_topics("logs, pipeline") == {"logs", "pipeline"}
+        conn = HubConnection(FakeWebSocket(), {"clipper", "profile:alice"})
+        assert conn.wants("clipper:job:12")
+        assert conn.wants("profile:alice")
+        assert not conn.wants("profile:bob")
+        assert not conn.wants("logs")
+
+    def test_wildcard_skips_telemetry(self):
+        # O LogTail republica os logs em "telemetry:logs"; o "*" já recebe "logs"
+        everything = HubConnection(FakeWebSocket(), parse_topics(None))
+        assert everything.wants("logs") and everything.wants("clipper:job:1")
+        assert not everything.wants("telemetry:logs")
+        assert HubConnection(FakeWebSocket(), {"telemetry:logs"}).wants("telemetry:logs")
+        assert HubConnection(FakeWebSocket(), {"telemetry"}).wants("telemetry:logs")
+
+
+class TestHub:
+    def test_topic_routing(self):
+        async def run():
+            hub = WebSocketHub()
+            logs_ws, all_ws = FakeWebSocket(), FakeWebSocket()
+            conns = [hub.connect(logs_ws, {"logs"}), hub.connect(all_ws)]
+            tasks = [asyncio.create_task(c.run()) for c in conns]
+            assert hub.publish("logs", "log_entry", {"m": 1}) == 2
+            assert hub.publish("pipeline", "pipeline_update", {"state": "busy"}) == 1
+            await asyncio.sleep(0.01)
+            for t in tasks:
+                t.cancel()
+            return logs_ws, all_ws
+
+        logs_ws, all_ws = asyncio.run(run())
+        assert _types(logs_ws) == ["log_entry"]
+        assert _types(all_ws) == ["log_entry", "pipeline_update"]
+
+    def test_slow_client_does_not_block_others(self):
+        async def run():
+            hub = WebSocketHub()
+            slow, fast = FakeWebSocket(), FakeWebSocket()
+            slow.gate = asyncio.Event()  # nunca liberado
+            tasks = [asyncio.create_task(hub.connect(ws).run()) for ws in (slow, fast)]
+            for i in range(5):
+                hub.publish("logs", "log_entry", {"i": i})
+            await asyncio.sleep(0.01)
+            for t in tasks:
+                t.cancel()
+            return slow, fast
+
+        slow, fast = asyncio.run(run())
+        assert len(fast.sent) == 5
+        assert slow.sent == []
+
+    def test_overflow_drops_oldest(self):
+        conn = HubConnection(FakeWebSocket(), {"*"}, max_pending=3)
+        for i in range(5):
+            conn.offer(json.dumps({"type": "log_entry", "data": {"i": i}}))
+        texts = []
+        while (text := conn._next_text()) is not None:
+            texts.append(json.loads(text))
+        assert texts[0] == {"type": "overflow", "data": {"dropped": 2}}
+        assert [t["data"]["i"] for t in texts[1:]] == [2, 3, 4]
+
+    def test_pipeline_keeps_latest_snapshot(self):
+        hub = WebSocketHub()
+        conn = hub.connect(FakeWebSocket())
+        first = {"state": "busy", "job": {"progress": 1}, "bots": [], "version": 1}
+        latest = {"state": "busy", "job": {"progress": 5}, "bots": [], "version": 2}
+        hub.publish("pipeline", "pipeline_update", first, coalesce=True)
+        hub.publish("log", "log_entry", {"i": 0})
+        hub.publish("pipeline", "pipeline_update", latest, coalesce=True)
+        texts = [json.loads(conn._next_text()) for _ in range(2)]
+        assert texts[0]["data"] == latest  # Mantem a posicao do primeiro, conteudo do ultimo
+        assert texts[1]["data"] == {"i": 0}
+        assert conn._next_text() is None
+
+    def test_send_timeout_closes_connection(self, monkeypatch):
+        monkeypatch.setattr(ws_hub_module, "SEND_TIMEOUT_SECONDS", 0.01)
+
+        async def run():
+            hub = WebSocketHub()
+            ws = FakeWebSocket(delay=1)
+            conn = hub.connect(ws)
+            task = asyncio.create_task(conn.run())
+            hub.publish("logs", "log_entry", {})
+            await asyncio.wait_for(task, timeout=1)
+            return ws, conn
+
+        ws, conn = asyncio.run(run())
+        assert ws.closed and conn.closed